@@ -7,12 +7,15 @@ Preparado para integração com chatbot do Microsoft Teams
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, NamedTuple, Optional, Tuple
 import glob
 import calendar
+import functools
+import inspect
 import os
+import tempfile
+import threading
 from pathlib import Path
-from io import BytesIO
 
 # Tentar importar azure-storage-blob
 try:
@@ -23,6 +26,97 @@ except ImportError as e:
     AZURE_STORAGE_AVAILABLE = False
     print(f"⚠️ Azure Storage Blob SDK não disponível: {e}")
 
+from carga_dados import (
+    PYARROW_AVAILABLE,
+    EXTENSAO_SNAPSHOT,
+    preparar_dataframe,
+    otimizar_tipos,
+    ordenar_por_data,
+    ler_snapshot,
+    ler_csv,
+    mesclar_delta,
+    salvar_dataset_mmap,
+    mapear_dataset,
+    estatisticas_memoria
+)
+from indices_apontamentos import IndiceRecursos, IndiceContratos, IndiceAtividades, CuboDiario, EstatisticasOutliers, montar_cubo, agregar_cubo, recortar_periodo, normalizar_nome, MARGEM_DESAMBIGUACAO, PONTUACAO_MINIMA_RESOLUCAO
+import calendario_util
+from cache_respostas import cache_padrao, memorizar
+from download_dados import baixar_url, baixar_blob
+from roteador_intencoes import roteador_padrao, extrair_datas
+
+
+class EstadoDados(NamedTuple):
+    """
+    Dataset publicado e estruturas derivadas dele
+
+    Imutável: cada carga ou delta monta um estado novo e o publica com uma
+    única atribuição, então quem leu a referência vê sempre df, datas,
+    índices e cubo da mesma versão.
+    """
+    df: Optional[pd.DataFrame] = None
+    datas: Optional[np.ndarray] = None
+    indice_recursos: Optional[IndiceRecursos] = None
+    cubo: Optional[CuboDiario] = None
+    indice_contratos: Optional[IndiceContratos] = None
+    indice_atividades: Optional[IndiceAtividades] = None
+    fonte_mmap: object = None
+    arquivo_mmap: Optional[str] = None
+    versao: int = 0
+    ultima_atualizacao: Optional[datetime] = None
+
+
+def estado_consistente(metodo):
+    """
+    Decorador para consultas: fixa o estado dos dados durante toda a chamada
+
+    A referência publicada é lida uma vez no início; df, _datas, índices e
+    cubo lidos dentro da consulta (e das consultas que ela chama) vêm desse
+    mesmo estado, mesmo que uma recarga publique outro no meio.
+    """
+    @functools.wraps(metodo)
+    def envoltorio(self, *args, **kwargs):
+        if getattr(self._fixado, 'estado', None) is not None:
+            return metodo(self, *args, **kwargs)
+        self._fixado.estado = self._estado
+        try:
+            return metodo(self, *args, **kwargs)
+        finally:
+            self._fixado.estado = None
+
+    return envoltorio
+
+
+def resolvendo_recurso(parametro: str):
+    """
+    Decorador para consultas de um recurso: resolve o nome antes da consulta
+
+    O argumento `parametro` passa por AgenteApontamentos.resolver_recurso. Um
+    único recurso encontrado → a consulta recebe o nome completo; vários →
+    a consulta não roda e a resposta pede para escolher entre os candidatos;
+    só nomes parecidos → "não encontrado" com sugestões.
+    """
+    def decorador(metodo):
+        assinatura = inspect.signature(metodo)
+
+        @functools.wraps(metodo)
+        def envoltorio(self, *args, **kwargs):
+            argumentos = assinatura.bind(self, *args, **kwargs)
+            termo = argumentos.arguments.get(parametro)
+            if termo and self.indice_recursos is not None:
+                resolucao = self.resolver_recurso(termo)
+                if resolucao["ambiguo"]:
+                    return self._resposta_desambiguacao(resolucao)
+                if resolucao["sugestoes"]:
+                    return self._resposta_sugestoes(resolucao)
+                if resolucao["nome"]:
+                    argumentos.arguments[parametro] = resolucao["nome"]
+            return metodo(*argumentos.args, **argumentos.kwargs)
+
+        return envoltorio
+    return decorador
+
+
 class AgenteApontamentos:
     """
     Agente inteligente que responde perguntas sobre apontamentos
@@ -31,20 +125,185 @@ class AgenteApontamentos:
     
     def __init__(self):
         """Inicializa o agente e carrega dados"""
-        self.df = None
-        self.ultima_atualizacao = None
+        # Dataset, índices, cubo e versão publicados juntos (ver EstadoDados);
+        # a versão é incrementada a cada carga e invalida os caches derivados dos dados
+        self._estado = EstadoDados()
+        self._fixado = threading.local()
+        
+        # Respostas das consultas que não dependem de quem pergunta (por versão do dataset)
+        self.cache_respostas = cache_padrao()
+        
+        # Modo mmap: dataset em Arrow IPC mapeado e compartilhado entre workers
+        # (arquivo_mmap é o caminho base; cada conteúdo vira <base>.<hash>.arrow)
+        self.modo_mmap = os.getenv('DATASET_MMAP', 'false').lower() in ('1', 'true', 'sim')
+        self.arquivo_mmap = os.getenv('DATASET_MMAP_PATH') or os.path.join(tempfile.gettempdir(), 'apontamentos_dataset.arrow')
+        
+        # Escores de outliers: (estado, EstatisticasOutliers), calculados sob demanda por estado
+        self._outliers = None
+        
+        # _lock_carga serializa a publicação do estado; _lock_atualizacao serializa os deltas
+        self._lock_carga = threading.Lock()
+        self._lock_atualizacao = threading.Lock()
+        
         self.carregar_dados()
+    
+    @property
+    def estado(self) -> EstadoDados:
+        """Estado fixado pela consulta em andamento nesta thread, ou o publicado"""
+        fixado = getattr(self._fixado, 'estado', None)
+        return fixado if fixado is not None else self._estado
+    
+    @property
+    def df(self) -> Optional[pd.DataFrame]:
+        return self.estado.df
+    
+    @property
+    def _datas(self) -> Optional[np.ndarray]:
+        return self.estado.datas
+    
+    @property
+    def indice_recursos(self) -> Optional[IndiceRecursos]:
+        return self.estado.indice_recursos
+    
+    @property
+    def cubo(self) -> Optional[CuboDiario]:
+        return self.estado.cubo
+    
+    @property
+    def indice_contratos(self) -> Optional[IndiceContratos]:
+        return self.estado.indice_contratos
+    
+    @property
+    def indice_atividades(self) -> Optional[IndiceAtividades]:
+        return self.estado.indice_atividades
+    
+    @property
+    def _fonte_mmap(self):
+        return self.estado.fonte_mmap
+    
+    @property
+    def versao_dados(self) -> int:
+        return self.estado.versao
+    
+    @property
+    def ultima_atualizacao(self) -> Optional[datetime]:
+        return self.estado.ultima_atualizacao
+        
+    def _config_blob(self) -> Tuple[Optional[str], str, str]:
+        """Resolve connection string, container e blob do Azure Storage"""
+        azure_conn_str = os.getenv('AZURE_STORAGE_CONNECTION_STRING')
+        
+        if not azure_conn_str:
+            try:
+                from config_azure import AZURE_STORAGE_CONNECTION_STRING, BLOB_CONTAINER_NAME, BLOB_FILE_NAME
+                azure_conn_str = AZURE_STORAGE_CONNECTION_STRING
+                container_name = BLOB_CONTAINER_NAME
+                blob_name = BLOB_FILE_NAME
+                print("📋 Usando configuração do arquivo config_azure.py", flush=True)
+            except ImportError:
+                print("⚠️ Arquivo config_azure.py não encontrado", flush=True)
+                container_name = "dados"
+                blob_name = "dados_anonimizados_decupado_20251118_211544.csv"
+        else:
+            print("📋 Usando AZURE_STORAGE_CONNECTION_STRING de variável de ambiente", flush=True)
+            container_name = "dados"
+            blob_name = "dados_anonimizados_decupado_20251118_211544.csv"
+        
+        return azure_conn_str, container_name, blob_name
+    
+    def _carregar_snapshot_remoto(self) -> Optional[pd.DataFrame]:
+        """
+        Tenta carregar o snapshot colunar tipado (Parquet) publicado pelo pipeline
+        
+        Ordem: SNAPSHOT_URL (HTTP) e blob .parquet
+        
+        Returns:
+            DataFrame do snapshot ou None se não houver
+        """
+        if not PYARROW_AVAILABLE:
+            return None
+        
+        # Snapshot via URL HTTP
+        snapshot_url = os.getenv('SNAPSHOT_URL')
+        if snapshot_url:
+            try:
+                print(f"🌐 Tentando carregar snapshot via URL: {snapshot_url[:80]}...", flush=True)
+                arquivo, _ = baixar_url(snapshot_url, timeout=120)
+                df = ler_snapshot(arquivo)
+                print(f"✅ Snapshot carregado via URL: {len(df)} registros", flush=True)
+                return df
+            except Exception as e:
+                print(f"⚠️ Erro ao carregar snapshot via URL: {e}", flush=True)
+        
+        # Snapshot no Azure Blob Storage (mesmo nome do CSV com extensão .parquet)
+        azure_conn_str, container_name, blob_name = self._config_blob()
+        if azure_conn_str and AZURE_STORAGE_AVAILABLE:
+            blob_snapshot = os.getenv('BLOB_SNAPSHOT_NAME') or str(Path(blob_name).with_suffix(EXTENSAO_SNAPSHOT))
+            try:
+                print(f"📦 Tentando carregar snapshot do Azure Blob Storage: {container_name}/{blob_snapshot}", flush=True)
+                blob_service = BlobServiceClient.from_connection_string(azure_conn_str)
+                blob_client = blob_service.get_container_client(container_name).get_blob_client(blob_snapshot)
+                arquivo, _ = baixar_blob(blob_client)
+                df = ler_snapshot(arquivo)
+                print(f"✅ Snapshot carregado do Azure Storage: {len(df)} registros", flush=True)
+                return df
+            except Exception as e:
+                print(f"⚠️ Snapshot não disponível no Azure Storage: {e}", flush=True)
+        
+        return None
+    
+    def _carregar_snapshot_local(self) -> Optional[pd.DataFrame]:
+        """
+        Snapshot local (SNAPSHOT_PATH ou o mais recente em resultados/)
+        
+        Só é usado depois das fontes remotas, como o CSV local: uma cópia
+        antiga em disco não pode esconder os dados publicados no servidor.
+        
+        Returns:
+            DataFrame do snapshot ou None se não houver
+        """
+        if not PYARROW_AVAILABLE:
+            return None
+        
+        snapshot_path = os.getenv('SNAPSHOT_PATH')
+        if snapshot_path:
+            snapshots = [Path(snapshot_path)] if Path(snapshot_path).exists() else []
+        else:
+            resultados_dir = Path(__file__).parent / "resultados"
+            snapshots = list(resultados_dir.glob("dados_*" + EXTENSAO_SNAPSHOT))
         
+        if not snapshots:
+            return None
+        
+        arquivo_snapshot = max(snapshots)
+        try:
+            print(f"⚡ Carregando snapshot: {arquivo_snapshot}", flush=True)
+            df = ler_snapshot(arquivo_snapshot)
+            print(f"✅ Snapshot carregado: {len(df)} registros", flush=True)
+            return df
+        except Exception as e:
+            print(f"⚠️ Erro ao carregar snapshot local: {e}", flush=True)
+            return None
+    
     def carregar_dados(self) -> bool:
-        """Carrega os dados mais recentes de apontamentos"""
+        """
+        Carrega os dados mais recentes de apontamentos (snapshot Parquet ou CSV)
+        
+        Fontes remotas primeiro (snapshot, CSV_URL, blob do CSV); snapshot e CSV
+        locais só quando nenhuma fonte remota respondeu.
+        """
         try:
+            # Método 0: snapshot colunar remoto já tipado - dispensa parse do CSV
+            df = self._carregar_snapshot_remoto()
+            if df is not None:
+                return self._finalizar_carga(df)
+            
             # URL do CSV no HostGator (fallback confiável)
             CSV_URL = os.getenv('CSV_URL', 'https://multibeat.com.br/apontamentos/dados/dados_20251205_204254_separado.csv')
             
             # Método 1: Tentar carregar via URL HTTP (HostGator ou Azure público)
             if CSV_URL:
                 try:
-                    import requests
                     print(f"🌐 Tentando carregar CSV via URL: {CSV_URL[:80]}...", flush=True)
                     
                     # Headers para evitar bloqueio do HostGator
@@ -53,38 +312,18 @@ class AgenteApontamentos:
                         'Accept': 'text/csv,text/plain,*/*'
                     }
                     
-                    response = requests.get(CSV_URL, headers=headers, timeout=120)
-                    response.raise_for_status()
-                    
-                    csv_bytes = response.content
-                    print(f"✅ CSV baixado via HTTP ({len(csv_bytes)/1024/1024:.1f}MB)", flush=True)
-                    self.df = pd.read_csv(BytesIO(csv_bytes), encoding='utf-8-sig', low_memory=False)
-                    print(f"✅ Dados carregados via URL: {len(self.df)} registros", flush=True)
-                    print(f"🔍 Colunas disponíveis: {list(self.df.columns[:10])}...", flush=True)
+                    # Download condicional (ETag/If-Modified-Since) em blocos para o cache em disco;
+                    # o parser lê do arquivo, sem manter os bytes brutos na memória
+                    arquivo_csv, _ = baixar_url(CSV_URL, headers=headers, timeout=120)
+                    df = ler_csv(arquivo_csv)
+                    print(f"✅ Dados carregados via URL: {len(df)} registros", flush=True)
+                    print(f"🔍 Colunas disponíveis: {list(df.columns[:10])}...", flush=True)
                     # NÃO retornar aqui - continuar para calcular duração
                 except Exception as e:
                     print(f"⚠️ Erro ao carregar via URL: {e}", flush=True)
-                except Exception as e:
-                    print(f"⚠️ Erro ao carregar via URL: {e}", flush=True)
             
             # Método 2: Tentar Azure Blob Storage com connection string
-            azure_conn_str = os.getenv('AZURE_STORAGE_CONNECTION_STRING')
-            
-            if not azure_conn_str:
-                try:
-                    from config_azure import AZURE_STORAGE_CONNECTION_STRING, BLOB_CONTAINER_NAME, BLOB_FILE_NAME
-                    azure_conn_str = AZURE_STORAGE_CONNECTION_STRING
-                    container_name = BLOB_CONTAINER_NAME
-                    blob_name = BLOB_FILE_NAME
-                    print("📋 Usando configuração do arquivo config_azure.py", flush=True)
-                except ImportError:
-                    print("⚠️ Arquivo config_azure.py não encontrado", flush=True)
-                    container_name = "dados"
-                    blob_name = "dados_anonimizados_decupado_20251118_211544.csv"
-            else:
-                print("📋 Usando AZURE_STORAGE_CONNECTION_STRING de variável de ambiente", flush=True)
-                container_name = "dados"
-                blob_name = "dados_anonimizados_decupado_20251118_211544.csv"
+            azure_conn_str, container_name, blob_name = self._config_blob()
             
             print(f"🔍 AZURE_STORAGE_CONNECTION_STRING definida: {bool(azure_conn_str)}", flush=True)
             print(f"🔍 AZURE_STORAGE_AVAILABLE: {AZURE_STORAGE_AVAILABLE}", flush=True)
@@ -96,20 +335,21 @@ class AgenteApontamentos:
                     container_client = blob_service.get_container_client(container_name)
                     blob_client = container_client.get_blob_client(blob_name)
                     
-                    # Download do blob para memória
-                    blob_data = blob_client.download_blob()
-                    csv_bytes = blob_data.readall()
-                    
-                    print(f"✅ CSV baixado do Azure Storage ({len(csv_bytes)/1024/1024:.1f}MB)", flush=True)
-                    self.df = pd.read_csv(BytesIO(csv_bytes), encoding='utf-8-sig', low_memory=False)
-                    print(f"✅ Dados carregados do Azure Storage: {len(self.df)} registros", flush=True)
+                    # Download do blob em blocos para o cache em disco (pulado se o ETag não mudou)
+                    arquivo_csv, _ = baixar_blob(blob_client)
+                    df = ler_csv(arquivo_csv)
+                    print(f"✅ Dados carregados do Azure Storage: {len(df)} registros", flush=True)
                     # NÃO retornar aqui - continuar para calcular duração
                 except Exception as e:
                     print(f"⚠️ Erro ao carregar do Azure Storage: {e}", flush=True)
                     print("🔄 Tentando carregar do sistema de arquivos local...", flush=True)
             
-            # Método 3: Fallback - carregar do sistema de arquivos local
-            if self.df is None:
+            # Método 3: Fallback - carregar do sistema de arquivos local (snapshot antes do CSV)
+            if df is None:
+                df = self._carregar_snapshot_local()
+                if df is not None:
+                    return self._finalizar_carga(df)
+                
                 # Determinar diretório base (onde está o script ou /home/site/wwwroot no Azure)
                 base_dir = Path(__file__).parent
                 resultados_dir = base_dir / "resultados"
@@ -126,60 +366,392 @@ class AgenteApontamentos:
                 
                 arquivo_mais_recente = str(max(arquivos))
                 print(f"📁 Carregando: {arquivo_mais_recente}")
-                self.df = pd.read_csv(arquivo_mais_recente, encoding='utf-8-sig', low_memory=False)
-            
-            # Calcular duração se não existir
-            if 'duracao_horas' not in self.df.columns:
-                print("⏱️ Calculando duração...")
-                
-                # CSV novo já tem horas calculadas em f_hr_hora_inicio e f_hr_hora_fim
-                if 'f_hr_hora_fim' in self.df.columns and 'f_hr_hora_inicio' in self.df.columns:
-                    print("   Usando colunas f_hr_hora_inicio e f_hr_hora_fim")
-                    self.df['duracao_horas'] = self.df['f_hr_hora_fim'] - self.df['f_hr_hora_inicio']
-                else:
-                    # Fallback: calcular usando timestamps
-                    col_inicio = 'd_dt_inicio_apontamento' if 'd_dt_inicio_apontamento' in self.df.columns else 'd_dt_data'
-                    col_fim = 'd_dt_fim_apontamento' if 'd_dt_fim_apontamento' in self.df.columns else 'd_dt_data_fim'
-                    
-                    self.df[col_inicio] = pd.to_datetime(self.df[col_inicio], errors='coerce')
-                    self.df[col_fim] = pd.to_datetime(self.df[col_fim], errors='coerce')
-                    
-                    duracao = (self.df[col_fim] - self.df[col_inicio])
-                    self.df['duracao_horas'] = duracao.dt.total_seconds() / 3600
-                
-                # Remover valores inválidos
-                self.df = self.df[self.df['duracao_horas'] > 0].copy()
+                df = ler_csv(arquivo_mais_recente)
             
-            # Converter colunas de data
-            if 'd_dt_data' in self.df.columns:
-                self.df['data'] = pd.to_datetime(self.df['d_dt_data'], errors='coerce')
+            # Calcular duração e data; aplicar os mesmos tipos do snapshot
+            df = otimizar_tipos(preparar_dataframe(df), compactar_duracao=False)
             
-            self.ultima_atualizacao = datetime.now()
-            print(f"✅ Dados carregados: {len(self.df)} registros")
-            return True
+            return self._finalizar_carga(df)
             
         except Exception as e:
             print(f"❌ Erro ao carregar dados: {e}")
             return False
     
-    def eh_dia_util(self, data: datetime) -> bool:
+    def _finalizar_carga(self, df: pd.DataFrame, mapeado: Optional[Tuple[object, str]] = None) -> bool:
         """
-        Verifica se uma data é dia útil (segunda a sexta, exceto feriados)
+        Etapas comuns após carregar o DataFrame (ordenação, mmap opcional, índices e timestamp)
         
         Args:
-            data: Data a verificar
+            df: DataFrame carregado
+            mapeado: (fonte, arquivo) quando df já vem de um dataset mmap publicado
+        """
+        if mapeado is None:
+            # Linhas ordenadas por data: consultas de período viram recortes contíguos
+            df, fonte_mmap, arquivo_mmap = self._compartilhar_dataset(ordenar_por_data(df))
+        else:
+            # Dataset publicado já está ordenado
+            fonte_mmap, arquivo_mmap = mapeado
+        
+        # Datas ordenadas para busca binária em _filtrar_periodo
+        datas = df['data'].to_numpy(dtype='datetime64[ns]') if 'data' in df.columns else None
+        
+        # Índice por recurso: consultas por usuário deixam de varrer todas as linhas
+        indice = None
+        if 's_nm_recurso' in df.columns and 'data' in df.columns:
+            indice = IndiceRecursos(df['s_nm_recurso'], df['data'])
+            print(f"🗂️ Índice de recursos: {len(indice)} nomes", flush=True)
+        
+        # Cubo diário: rankings, totais e estatísticas de período sem varrer as linhas
+        cubo = None
+        if 'data' in df.columns and 'duracao_horas' in df.columns:
+            cubo = CuboDiario(df)
+            print(f"🧊 Cubo diário: {len(cubo)} linhas agregadas", flush=True)
+        
+        # Índice de contratos (externo e do fornecedor): consultas de contrato sem varrer a coluna
+        contratos = IndiceContratos(df)
+        print(f"📋 Índice de contratos: {len(contratos)} chaves", flush=True)
+        
+        # Índice invertido das atividades: busca por palavras sem str.contains nas linhas
+        atividades = None
+        if 's_ds_atividade' in df.columns:
+            atividades = IndiceAtividades(df['s_ds_atividade'])
+            print(f"🔎 Índice de atividades: {len(atividades)} descrições, {len(atividades.tokens)} palavras", flush=True)
+        
+        estado = self._trocar_estado(df, fonte_mmap, datas, indice, cubo, contratos, atividades, arquivo_mmap)
+        print(f"✅ Dados carregados: {len(estado.df)} registros (versão {estado.versao})")
+        return True
+    
+    def _compartilhar_dataset(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, object, Optional[str]]:
+        """No modo mmap grava o dataset em Arrow IPC e devolve a versão mapeada (df, fonte, arquivo)"""
+        if self.modo_mmap:
+            try:
+                arquivo = salvar_dataset_mmap(df, self.arquivo_mmap)
+                if arquivo:
+                    df, fonte = mapear_dataset(arquivo)
+                    print(f"🔗 Dataset mapeado em memória compartilhada: {arquivo}", flush=True)
+                    return df, fonte, str(arquivo)
+            except Exception as e:
+                print(f"⚠️ Erro ao ativar modo mmap, mantendo dados em memória privada: {e}", flush=True)
+        return df, None, None
+    
+    def carregar_dataset_publicado(self, arquivo: str) -> bool:
+        """
+        Mapeia o dataset mmap já publicado por outro worker (recarga completa)
+        
+        Dispensa baixar e parsear as fontes de novo: só os índices e o cubo
+        deste processo são reconstruídos sobre as páginas compartilhadas.
+        
+        Args:
+            arquivo: Arquivo versionado gravado por salvar_dataset_mmap
         
         Returns:
-            True se for dia útil, False se for fim de semana
+            True se o dataset foi mapeado e publicado neste agente
         """
-        # Verifica se é fim de semana (5=sábado, 6=domingo)
-        if data.weekday() >= 5:
+        try:
+            df, fonte = mapear_dataset(arquivo)
+        except Exception as e:
+            print(f"⚠️ Erro ao mapear dataset publicado {arquivo}: {e}", flush=True)
             return False
+        print(f"🔗 Dataset publicado mapeado: {arquivo}", flush=True)
+        with self._lock_atualizacao:
+            return self._finalizar_carga(df, (fonte, str(arquivo)))
+    
+    def _trocar_estado(self, df: pd.DataFrame, fonte_mmap, datas, indice, cubo, contratos, atividades,
+                       arquivo_mmap: Optional[str] = None) -> EstadoDados:
+        """
+        Publica DataFrame, índices e cubo de uma vez e incrementa a versão
+        
+        Tudo é montado antes fora do lock; a publicação é uma única atribuição
+        de referência, então consultas em andamento terminam com o estado
+        anterior e as novas veem o estado novo inteiro.
         
-        # TODO: Adicionar verificação de feriados nacionais se necessário
-        # Por enquanto, apenas verifica se não é fim de semana
+        Returns:
+            Estado publicado
+        """
+        with self._lock_carga:
+            estado = EstadoDados(
+                df=df, datas=datas, indice_recursos=indice, cubo=cubo,
+                indice_contratos=contratos, indice_atividades=atividades,
+                fonte_mmap=fonte_mmap, arquivo_mmap=arquivo_mmap, versao=self._estado.versao + 1,
+                ultima_atualizacao=datetime.now()
+            )
+            self._estado = estado
+        return estado
+    
+    def adotar_dados(self, outro: 'AgenteApontamentos') -> bool:
+        """
+        Publica neste agente os dados carregados por outra instância (recarga completa)
+        
+        A carga pesada acontece em outra instância, fora das consultas; aqui só
+        há a troca do estado, e quem guarda referência a este agente passa a ver
+        os dados novos sem reiniciar.
+        
+        Args:
+            outro: Agente recém-construído com os dados novos
+        
+        Returns:
+            True se havia dados para adotar
+        """
+        novo = outro._estado
+        if novo.df is None:
+            return False
+        with self._lock_atualizacao:
+            estado = self._trocar_estado(novo.df, novo.fonte_mmap, novo.datas, novo.indice_recursos,
+                                         novo.cubo, novo.indice_contratos, novo.indice_atividades, novo.arquivo_mmap)
+        print(f"🔄 Dataset recarregado: {len(estado.df)} registros (versão {estado.versao})", flush=True)
         return True
     
+    def _ler_delta(self, origem=None) -> Optional[pd.DataFrame]:
+        """
+        Lê o arquivo delta (CSV ou Parquet) com as linhas novas ou alteradas
+        
+        Ordem: origem explícita, DELTA_PATH local, DELTA_URL (HTTP) e blob BLOB_DELTA_NAME
+        
+        Args:
+            origem: Caminho, bytes ou DataFrame (opcional)
+        
+        Returns:
+            DataFrame bruto do delta ou None se nenhuma fonte estiver configurada
+        """
+        if isinstance(origem, pd.DataFrame):
+            return origem.copy()
+        
+        if isinstance(origem, (bytes, bytearray)):
+            conteudo = bytes(origem)
+            # Parquet começa com a assinatura PAR1; o resto é tratado como CSV
+            return ler_snapshot(conteudo) if conteudo[:4] == b'PAR1' else ler_csv(conteudo)
+        
+        if origem is not None or os.getenv('DELTA_PATH'):
+            arquivo = Path(str(origem or os.getenv('DELTA_PATH')))
+            if not arquivo.exists():
+                print(f"⚠️ Arquivo delta não encontrado: {arquivo}", flush=True)
+                return None
+        elif os.getenv('DELTA_URL'):
+            # Corpo gravado em blocos no cache em disco (sem bufferizar o arquivo inteiro)
+            delta_url = os.getenv('DELTA_URL')
+            print(f"🌐 Baixando delta: {delta_url[:80]}...", flush=True)
+            arquivo, _ = baixar_url(delta_url, timeout=120)
+        else:
+            azure_conn_str, container_name, _ = self._config_blob()
+            nome = os.getenv('BLOB_DELTA_NAME', '')
+            if not (nome and azure_conn_str and AZURE_STORAGE_AVAILABLE):
+                return None
+            print(f"📦 Baixando delta do Azure Blob Storage: {container_name}/{nome}", flush=True)
+            blob_service = BlobServiceClient.from_connection_string(azure_conn_str)
+            blob_client = blob_service.get_container_client(container_name).get_blob_client(nome)
+            arquivo, _ = baixar_blob(blob_client)
+        
+        with open(arquivo, 'rb') as f:
+            assinatura = f.read(4)
+        if assinatura == b'PAR1' or arquivo.name.endswith(EXTENSAO_SNAPSHOT):
+            return ler_snapshot(arquivo)
+        return ler_csv(arquivo)
+    
+    def atualizar_incremental(self, origem=None) -> Dict:
+        """
+        Incorpora um delta de apontamentos sem recarregar o dataset completo
+        
+        Linhas com s_id_apontamento já carregado substituem as antigas; as demais
+        entram como novas (sem ID, só as posteriores à maior data atual). Apenas
+        os dias alterados do cubo são reagregados e, quando o delta só acrescenta
+        dias no fim, o índice de recursos é estendido em vez de reconstruído.
+        O novo estado é publicado de uma vez, com nova versão dos dados.
+        
+        Args:
+            origem: Caminho, bytes ou DataFrame do delta (padrão: DELTA_PATH,
+                DELTA_URL ou BLOB_DELTA_NAME)
+        
+        Returns:
+            Dict com novos, substituidos, registros e versao_dados (ou erro)
+        """
+        if self._estado.df is None:
+            return {"erro": "Dados não carregados", "tipo": "erro"}
+        
+        try:
+            with self._lock_atualizacao:
+                delta = self._ler_delta(origem)
+                if delta is None:
+                    return {"erro": "Nenhuma fonte de delta configurada (DELTA_PATH, DELTA_URL ou BLOB_DELTA_NAME)", "tipo": "erro"}
+                
+                # Estado lido uma vez: deltas e adoções são serializados pelo lock acima
+                atual = self._estado
+                delta = preparar_dataframe(delta)
+                df_atual, datas_atuais = atual.df, atual.datas
+                df, resumo = mesclar_delta(df_atual, delta)
+                inicio = resumo.pop("inicio_afetado")
+                
+                if inicio is None:
+                    print("✅ Delta sem alterações", flush=True)
+                    return {"novos": 0, "substituidos": 0, "registros": len(df_atual), "versao_dados": atual.versao}
+                
+                df, fonte_mmap, arquivo_mmap = self._compartilhar_dataset(df)
+                datas = df['data'].to_numpy(dtype='datetime64[ns]') if 'data' in df.columns else None
+                
+                # Só acréscimos a partir da última data: as linhas antigas mantêm as posições
+                anexado = (
+                    resumo["substituidos"] == 0 and datas_atuais is not None and len(datas_atuais) > 0
+                    and not pd.isna(inicio) and not np.isnat(datas_atuais[-1])
+                    and np.datetime64(inicio, 'ns') >= datas_atuais[-1]
+                )
+                
+                indice = atual.indice_recursos
+                if indice is not None:
+                    if anexado:
+                        n = len(df_atual)
+                        indice = indice.com_linhas_novas(df['s_nm_recurso'].iloc[n:], df['data'].iloc[n:], n)
+                    else:
+                        indice = IndiceRecursos(df['s_nm_recurso'], df['data'])
+                
+                cubo = atual.cubo.com_dias_alterados(df, datas, inicio) if atual.cubo is not None else None
+                
+                atividades = IndiceAtividades(df['s_ds_atividade']) if 's_ds_atividade' in df.columns else None
+                estado = self._trocar_estado(df, fonte_mmap, datas, indice, cubo, IndiceContratos(df), atividades, arquivo_mmap)
+        
+        except Exception as e:
+            print(f"❌ Erro na atualização incremental: {e}", flush=True)
+            return {"erro": f"Erro na atualização incremental: {e}", "tipo": "erro"}
+        
+        print(f"🔄 Delta aplicado: {resumo['novos']} novos, {resumo['substituidos']} substituídos "
+              f"({len(df)} registros, versão {estado.versao})", flush=True)
+        return {**resumo, "registros": len(df), "versao_dados": estado.versao}
+    
+    def _filtrar_periodo(self, inicio: Optional[pd.Timestamp] = None, fim: Optional[pd.Timestamp] = None, fim_exclusivo: bool = False) -> pd.DataFrame:
+        """
+        Recorte contíguo das linhas no período via busca binária (df ordenado por data)
+        
+        Args:
+            inicio: Data inicial inclusiva (opcional)
+            fim: Data final (opcional), inclusiva salvo fim_exclusivo=True
+            fim_exclusivo: Se True, exclui linhas com data igual a fim
+        
+        Returns:
+            Fatia do DataFrame (sem cópia)
+        """
+        if inicio is None and fim is None:
+            return self.df
+        a, b = recortar_periodo(self._datas, inicio, fim, fim_exclusivo)
+        return self.df.iloc[a:b]
+    
+    @estado_consistente
+    def resolver_recurso(self, termo: str, limite: int = 5) -> Dict:
+        """
+        Resolve um nome de recurso (Teams ou argumento da IA) para as pessoas dos dados
+        
+        Busca sem acento e sem caixa no índice de recursos: exato, prefixo,
+        trecho e, por último, nomes parecidos (trigramas). Nomes só parecidos
+        nunca são resolvidos sozinhos: voltam como sugestões.
+        
+        Args:
+            termo: Nome ou parte do nome
+            limite: Máximo de candidatos retornados
+        
+        Returns:
+            Dict com nome (resolvido ou None), ambiguo (várias pessoas),
+            sugestoes (só nomes parecidos) e candidatos [{nome, pontuacao,
+            apontamentos}] em ordem de relevância
+        """
+        indice = self.indice_recursos
+        candidatos = indice.candidatos(termo) if indice is not None else []
+        
+        # Melhor pontuação de cada pessoa (grafias equivalentes contam como uma)
+        pessoas: Dict[str, float] = {}
+        for nome_candidato, pontos, _ in candidatos:
+            pessoas.setdefault(normalizar_nome(nome_candidato), pontos)
+        pontuacoes = list(pessoas.values())
+        
+        confiaveis = [pontos for pontos in pontuacoes if pontos >= PONTUACAO_MINIMA_RESOLUCAO]
+        if confiaveis:
+            # Havendo nomes confiáveis, os só parecidos não entram na lista
+            candidatos = [c for c in candidatos if c[1] >= PONTUACAO_MINIMA_RESOLUCAO]
+        
+        nome = None
+        if confiaveis and confiaveis[0] >= 1.0:
+            nome = termo  # Exato: grafias equivalentes do mesmo nome ficam juntas
+        elif len(confiaveis) == 1 or (confiaveis and round(confiaveis[0] - confiaveis[1], 4) >= MARGEM_DESAMBIGUACAO):
+            nome = candidatos[0][0]
+        
+        return {
+            "termo": termo,
+            "nome": nome,
+            "ambiguo": nome is None and len(confiaveis) > 1,
+            "sugestoes": not confiaveis and bool(pontuacoes),
+            "candidatos": [
+                {"nome": str(nome_candidato), "pontuacao": round(pontos, 2), "apontamentos": apontamentos}
+                for nome_candidato, pontos, apontamentos in candidatos[:limite]
+            ],
+            "total_candidatos": len(confiaveis) or len(pessoas)
+        }
+    
+    def _resposta_sugestoes(self, resolucao: Dict) -> Dict:
+        """Resposta de nome não encontrado, com os nomes parecidos como sugestão"""
+        resposta = f"❌ Recurso '{resolucao['termo']}' não encontrado.\n\n💡 Você quis dizer:\n"
+        for candidato in resolucao["candidatos"]:
+            resposta += f"• **{candidato['nome']}**\n"
+        
+        return {
+            "resposta": resposta,
+            "dados": {"termo": resolucao["termo"], "sugestoes": resolucao["candidatos"]},
+            "tipo": "info"
+        }
+    
+    def _resposta_desambiguacao(self, resolucao: Dict) -> Dict:
+        """Resposta pedindo para escolher entre os recursos encontrados para um nome"""
+        resposta = f"🤔 Encontrei {resolucao['total_candidatos']} recursos para '{resolucao['termo']}'. Qual deles?\n\n"
+        for i, candidato in enumerate(resolucao["candidatos"], 1):
+            resposta += f"{i}. **{candidato['nome']}** ({candidato['apontamentos']} apontamentos)\n"
+        if resolucao["total_candidatos"] > len(resolucao["candidatos"]):
+            resposta += f"... e mais {resolucao['total_candidatos'] - len(resolucao['candidatos'])}\n"
+        resposta += "\n💡 Repita a pergunta com o nome completo."
+        
+        return {
+            "resposta": resposta,
+            "dados": {"termo": resolucao["termo"], "candidatos": resolucao["candidatos"]},
+            "tipo": "desambiguacao"
+        }
+    
+    def _filtrar_recurso(self, usuario: str, inicio: Optional[pd.Timestamp] = None, fim: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        Linhas de um recurso (nome exato, prefixo ou trecho), opcionalmente no período
+        
+        Args:
+            usuario: Nome ou parte do nome do recurso
+            inicio: Data inicial inclusiva (opcional)
+            fim: Data final inclusiva (opcional)
+        
+        Returns:
+            DataFrame filtrado, na ordem original das linhas
+        """
+        if self.indice_recursos is None:
+            # Sem índice (colunas ausentes): filtro direto
+            filtro = self.df['s_nm_recurso'].str.contains(usuario, case=False, na=False, regex=False)
+            if inicio is not None:
+                filtro &= self.df['data'] >= inicio
+            if fim is not None:
+                filtro &= self.df['data'] <= fim
+            return self.df[filtro]
+        
+        return self.df.iloc[self.indice_recursos.posicoes(usuario, inicio, fim)]
+    
+    @estado_consistente
+    def estatisticas_memoria(self) -> Dict:
+        """Memória residente versus compartilhada do processo (exposto em /health)"""
+        estado = self.estado
+        estatisticas = estatisticas_memoria(estado.arquivo_mmap if estado.fonte_mmap is not None else None)
+        estatisticas["modo_carga"] = "mmap" if estado.fonte_mmap is not None else "memoria"
+        return estatisticas
+    
+    def eh_dia_util(self, data: datetime) -> bool:
+        """
+        Verifica se uma data é dia útil (segunda a sexta, exceto feriados)
+        
+        Args:
+            data: Data a verificar
+        
+        Returns:
+            True se for dia útil, False se for fim de semana ou feriado
+        """
+        return calendario_util.eh_dia_util(data)
+    
     def aplicar_desconto_almoco(self, horas: float, eh_dia_util: bool = True) -> float:
         """
         Aplica desconto de 1 hora de almoço apenas em dias úteis
@@ -211,7 +783,7 @@ class AgenteApontamentos:
         
         return {
             "dia_util": dia_util,
-            "tipo_dia": "📅 Dia Útil" if dia_util else "🏖️ Fim de Semana",
+            "tipo_dia": "📅 Dia Útil" if dia_util else ("🏖️ Fim de Semana" if data.weekday() >= 5 else "🎉 Feriado"),
             "horas_brutas": horas,
             "horas_liquidas": horas_liquidas,
             "desconto_almoco": 1.0 if dia_util and horas > 0 else 0.0
@@ -227,28 +799,16 @@ class AgenteApontamentos:
         Returns:
             Lista de datas encontradas (no formato DD/MM/YYYY)
         """
-        import re
-        datas = []
-        
-        # Padrão para DD/MM/YYYY, DD/MM/YY ou DD/MM
-        padrao = r'(\d{1,2}[\/\-]\d{1,2}(?:[\/\-]\d{2,4})?)'
-        matches = re.findall(padrao, texto)
-        
-        for match in matches:
-            data = match.replace('-', '/')
-            # Adicionar ano padrão 2025 se não tiver
-            if data.count('/') == 1:  # DD/MM
-                data += '/2025'
-            elif len(data.split('/')[-1]) < 4:  # Ano incompleto
-                data = '/'.join(data.split('/')[:-1]) + '/2025'
-            datas.append(data)
-        
-        return datas
+        return extrair_datas(texto)
     
+    @estado_consistente
     def responder_pergunta(self, pergunta: str, usuario: Optional[str] = None) -> Dict:
         """
         Interpreta e responde perguntas sobre apontamentos
         
+        O roteador de intenções (palavras-chave + regex pré-compiladas) decide
+        a ferramenta e os argumentos numa passada pela pergunta.
+        
         Args:
             pergunta: Pergunta em linguagem natural
             usuario: Nome do usuário (opcional)
@@ -256,188 +816,32 @@ class AgenteApontamentos:
         Returns:
             Dicionário com resposta formatada
         """
-        pergunta_lower = pergunta.lower()
-        
-        # Ignorar usuários genéricos do emulator
-        if usuario and usuario.lower() in ['user', 'bot', 'test user', 'usuario teste']:
-            usuario = None
-        
-        # Detectar consulta por período (ex: "10/10/2025 a 10/11/2025" ou "de 10/10 até 10/11")
-        import re
-        # Aceitar formatos: DD/MM/YYYY, DD/MM/YYY, DD/MM/YY, DD/MM (sem ano)
-        padrao_periodo = r'(\d{1,2}[\/\-]\d{1,2}(?:[\/\-]\d{2,4})?)\s*(?:a|até|ate|at)\s*(\d{1,2}[\/\-]\d{1,2}(?:[\/\-]\d{2,4})?)'
-        match_periodo = re.search(padrao_periodo, pergunta)
-        
-        if match_periodo:
-            data_inicio = match_periodo.group(1).replace('-', '/')
-            data_fim = match_periodo.group(2).replace('-', '/')
-            
-            # Adicionar ano padrão 2025 se não tiver ano
-            if data_inicio.count('/') == 1:  # DD/MM
-                data_inicio += '/2025'
-            elif len(data_inicio.split('/')[-1]) < 4:  # Ano incompleto
-                data_inicio = '/'.join(data_inicio.split('/')[:-1]) + '/2025'
-                
-            if data_fim.count('/') == 1:  # DD/MM
-                data_fim += '/2025'
-            elif len(data_fim.split('/')[-1]) < 4:  # Ano incompleto
-                data_fim = '/'.join(data_fim.split('/')[:-1]) + '/2025'
-            
-            # Se a pergunta menciona "deveria fazer" ou "horas esperadas", chamar análise detalhada
-            if any(palavra in pergunta_lower for palavra in ['deveria fazer', 'deveria ter', 'esperadas', 'quantas horas o colaborador']):
-                # Extrair nome do colaborador da pergunta
-                if usuario and usuario not in ['Usuário Web', 'User']:
-                    return self.horas_esperadas_colaborador(usuario, data_inicio, data_fim)
-                else:
-                    # Tentar extrair nome da pergunta
-                    # Padrão: "colaborador NOME deveria" ou "NOME deveria"
-                    match_nome = re.search(r'colaborador\s+(\w+)', pergunta_lower)
-                    if not match_nome:
-                        match_nome = re.search(r'(\w+)\s+deveria', pergunta_lower)
-                    
-                    if match_nome:
-                        nome_colaborador = match_nome.group(1)
-                        return self.horas_esperadas_colaborador(nome_colaborador, data_inicio, data_fim)
-                    else:
-                        return {
-                            "resposta": "❌ Por favor, especifique o nome do colaborador. Exemplo: 'Quantas horas o colaborador João deveria fazer de 01/09 a 30/09?'",
-                            "tipo": "erro"
-                        }
-            
-            # Se a pergunta menciona "contrato", redirecionar para listar_contratos
-            if 'contrato' in pergunta_lower:
-                return self.listar_contratos(inicio=data_inicio, fim=data_fim)
-            
-            # Se a pergunta menciona "quem", "quais", "recursos", "ranking", "top", "média" (sem "meu/minha"), buscar TODOS
-            buscar_todos = any(palavra in pergunta_lower for palavra in ['quem', 'quais', 'recursos', 'pessoas', 'ranking', 'top'])
-            buscar_todos = buscar_todos or ('média' in pergunta_lower and not any(p in pergunta_lower for p in ['meu', 'minha', 'mim']))
-            buscar_todos = buscar_todos or ('media' in pergunta_lower and not any(p in pergunta_lower for p in ['meu', 'minha', 'mim']))
-            
-            # Sempre buscar todos se for consulta geral de período (não específica do usuário)
-            if buscar_todos or usuario in ['Usuário Web', 'User', None]:
-                return self.consultar_periodo(data_inicio, data_fim, None)
-            else:
-                return self.consultar_periodo(data_inicio, data_fim, usuario)
-        
-        # Mapeamento de perguntas para funções
-        if any(palavra in pergunta_lower for palavra in ['média', 'media', 'quanto tempo']):
-            # Se a pergunta menciona um nome específico, buscar por ele
-            if usuario and any(palavra in pergunta_lower for palavra in ['meu', 'minha', 'mim']):
-                return self.duracao_media_usuario(usuario)
-            else:
-                return self.duracao_media_geral()
-        
-        elif any(palavra in pergunta_lower for palavra in ['hoje', 'apontei hoje']):
-            if usuario:
-                return self.apontamentos_hoje(usuario)
-            else:
-                return {"resposta": "Por favor, identifique-se para consultar seus apontamentos."}
-        
-        elif any(palavra in pergunta_lower for palavra in ['semana', 'esta semana']):
-            if usuario:
-                return self.resumo_semanal(usuario)
-            else:
-                return self.resumo_semanal_geral()
-        
-        elif any(palavra in pergunta_lower for palavra in ['ranking', 'top', 'quem trabalhou mais']):
-            return self.ranking_funcionarios()
-        
-        elif any(palavra in pergunta_lower for palavra in ['outlier', 'anormal', 'fora do padrão']):
-            return self.identificar_outliers()
+        intencao = roteador_padrao.interpretar(pergunta, usuario)
         
-        elif any(palavra in pergunta_lower for palavra in ['total', 'soma', 'quantas horas']):
-            if usuario:
-                return self.total_horas_usuario(usuario)
-            else:
-                return self.total_horas_geral()
-        
-        elif any(palavra in pergunta_lower for palavra in ['comparar', 'comparação']):
-            return self.comparar_periodos()
-        
-        elif any(palavra in pergunta_lower for palavra in ['contrato', 'contratos']):
-            # Verificar se a pergunta é sobre contratos de um recurso específico
-            import re
-            if any(palavra in pergunta_lower for palavra in ['recurso', 'colaborador', 'apontou em', 'trabalhou em', 'quais contratos o', 'quais contratos a']):
-                # Extrair nome do recurso
-                match_nome = re.search(r'(?:recurso|colaborador)\s+(\w+)', pergunta_lower)
-                if not match_nome:
-                    match_nome = re.search(r'(RECURSO_\d+)', pergunta, re.IGNORECASE)
-                
-                if match_nome:
-                    nome_recurso = match_nome.group(1)
-                    datas = self.extrair_datas(pergunta)
-                    
-                    if len(datas) >= 2:
-                        return self.contratos_por_recurso(nome_recurso, datas[0], datas[1])
-                    elif len(datas) == 1:
-                        return self.contratos_por_recurso(nome_recurso, data_inicio=datas[0])
-                    else:
-                        return self.contratos_por_recurso(nome_recurso)
-                else:
-                    return {
-                        "resposta": "❌ Por favor, especifique o nome do recurso. Exemplo: 'Em quais contratos o recurso RECURSO_123 apontou?'",
-                        "tipo": "erro"
-                    }
-            else:
-                # Listagem geral de contratos
-                datas = self.extrair_datas(pergunta)
-                if datas and len(datas) >= 2:
-                    return self.listar_contratos(inicio=datas[0], fim=datas[1])
-                else:
-                    return self.listar_contratos()
-        
-        elif any(palavra in pergunta_lower for palavra in ['esqueceu', 'esqueci', 'saída', 'saida', 'bateu a saída', 'bateu saida', 'faltou', 'horário de saída']):
-            # Detectar verificação de saídas esquecidas
-            # Extrair nome do colaborador e período (se houver)
-            datas = self.extrair_datas(pergunta)
-            
-            # Determinar usuário
-            if usuario and usuario not in ['Usuário Web', 'User']:
-                nome_usuario = usuario
-            else:
-                # Tentar extrair nome da pergunta
-                import re
-                match_nome = re.search(r'(?:recurso|colaborador|usuário|usuario)\s+(\w+)', pergunta_lower)
-                if not match_nome:
-                    # Procurar por RECURSO_ seguido de números
-                    match_nome = re.search(r'(RECURSO_\d+)', pergunta, re.IGNORECASE)
-                
-                if match_nome:
-                    nome_usuario = match_nome.group(1)
-                else:
-                    return {
-                        "resposta": "❌ Por favor, especifique o nome do colaborador. Exemplo: 'O recurso RECURSO_123 esqueceu de informar horário de saída?'",
-                        "tipo": "erro"
-                    }
-            
-            # Chamar função de verificação
-            if len(datas) >= 2:
-                return self.verificar_saidas_esquecidas(nome_usuario, datas[0], datas[1])
-            elif len(datas) == 1:
-                return self.verificar_saidas_esquecidas(nome_usuario, data_inicio=datas[0])
-            else:
-                return self.verificar_saidas_esquecidas(nome_usuario)
+        if intencao["ferramenta"] is None:
+            return dict(intencao["resposta"])
         
-        else:
+        if intencao["ferramenta"] == 'fora_do_escopo':
             # Resposta padrão para perguntas fora do contexto
-            if any(palavra in pergunta_lower for palavra in ['tempo', 'clima', 'ajuda', 'help', 'prompt']):
-                return {
-                    "resposta": "🤖 Olá! Sou especializado em **apontamentos de horas**.\n\n" +
-                               "Posso ajudar você com:\n" +
-                               "• 📊 Estatísticas e médias de horas\n" +
-                               "• 📅 Consultas por período\n" +
-                               "• 🏆 Rankings de produtividade\n" +
-                               "• 📝 Detalhamento de apontamentos\n\n" +
-                               "💡 **Exemplos:**\n" +
-                               "• \"Qual a média de horas no período de 01/09/2025 a 30/09/2025?\"\n" +
-                               "• \"Quem apontou entre 10/10/2025 e 20/10/2025?\"\n" +
-                               "• \"Mostre o ranking de horas\"\n\n" +
-                               "Como posso ajudar você com apontamentos? 😊",
-                    "tipo": "info"
-                }
-            else:
-                return self.ajuda()
+            return {
+                "resposta": "🤖 Olá! Sou especializado em **apontamentos de horas**.\n\n" +
+                           "Posso ajudar você com:\n" +
+                           "• 📊 Estatísticas e médias de horas\n" +
+                           "• 📅 Consultas por período\n" +
+                           "• 🏆 Rankings de produtividade\n" +
+                           "• 📝 Detalhamento de apontamentos\n\n" +
+                           "💡 **Exemplos:**\n" +
+                           "• \"Qual a média de horas no período de 01/09/2025 a 30/09/2025?\"\n" +
+                           "• \"Quem apontou entre 10/10/2025 e 20/10/2025?\"\n" +
+                           "• \"Mostre o ranking de horas\"\n\n" +
+                           "Como posso ajudar você com apontamentos? 😊",
+                "tipo": "info"
+            }
+        
+        return getattr(self, intencao["ferramenta"])(**intencao["argumentos"])
     
+    @estado_consistente
+    @memorizar
     def duracao_media_geral(self) -> Dict:
         """Retorna duração média geral"""
         if self.df is None or 'duracao_horas' not in self.df.columns:
@@ -459,13 +863,15 @@ class AgenteApontamentos:
             "tipo": "estatistica_geral"
         }
     
+    @estado_consistente
+    @resolvendo_recurso('usuario')
     def duracao_media_usuario(self, usuario: str) -> Dict:
         """Retorna duração média de um usuário específico"""
         if self.df is None:
             return {"erro": "Dados não disponíveis"}
         
         # Buscar por nome
-        df_usuario = self.df[self.df['s_nm_recurso'].str.contains(usuario, case=False, na=False)]
+        df_usuario = self._filtrar_recurso(usuario)
         
         if len(df_usuario) == 0:
             return {
@@ -498,6 +904,8 @@ class AgenteApontamentos:
             "tipo": "usuario_individual"
         }
     
+    @estado_consistente
+    @resolvendo_recurso('usuario')
     def apontamentos_hoje(self, usuario: str) -> Dict:
         """Retorna apontamentos do dia com informação de dia útil e desconto de almoço"""
         if self.df is None or 'data' not in self.df.columns:
@@ -505,10 +913,8 @@ class AgenteApontamentos:
         
         hoje = pd.Timestamp.now()
         hoje_date = hoje.date()
-        df_hoje = self.df[
-            (self.df['data'].dt.date == hoje_date) & 
-            (self.df['s_nm_recurso'].str.contains(usuario, case=False, na=False))
-        ]
+        inicio_dia = hoje.normalize()
+        df_hoje = self._filtrar_recurso(usuario, inicio_dia, inicio_dia + pd.Timedelta(days=1) - pd.Timedelta(1, 'ns'))
         
         if len(df_hoje) == 0:
             return {
@@ -558,6 +964,8 @@ class AgenteApontamentos:
             "tipo": "dia_atual"
         }
     
+    @estado_consistente
+    @resolvendo_recurso('usuario')
     def resumo_semanal(self, usuario: str) -> Dict:
         """Retorna resumo da semana para um usuário com detalhamento de dias úteis"""
         if self.df is None or 'data' not in self.df.columns:
@@ -566,10 +974,7 @@ class AgenteApontamentos:
         hoje = pd.Timestamp.now()
         inicio_semana = hoje - timedelta(days=hoje.weekday())
         
-        df_semana = self.df[
-            (self.df['data'] >= inicio_semana) &
-            (self.df['s_nm_recurso'].str.contains(usuario, case=False, na=False))
-        ]
+        df_semana = self._filtrar_recurso(usuario, inicio=inicio_semana)
         
         if len(df_semana) == 0:
             return {
@@ -580,26 +985,15 @@ class AgenteApontamentos:
         # Calcular horas brutas
         total_horas_brutas = df_semana['duracao_horas'].sum()
         
-        # Agrupar por dia e calcular horas líquidas considerando dias úteis
-        total_horas_liquidas = 0
-        dias_uteis_trabalhados = 0
-        dias_fim_semana_trabalhados = 0
-        total_desconto_almoco = 0
-        
-        for data, grupo in df_semana.groupby(df_semana['data'].dt.date):
-            horas_dia = grupo['duracao_horas'].sum()
-            data_dt = pd.Timestamp(data)
-            classificacao = self.classificar_apontamento(data_dt, horas_dia)
-            
-            total_horas_liquidas += classificacao['horas_liquidas']
-            total_desconto_almoco += classificacao['desconto_almoco']
-            
-            if classificacao['dia_util']:
-                dias_uteis_trabalhados += 1
-            else:
-                dias_fim_semana_trabalhados += 1
+        # Somar por dia e aplicar a regra de dias úteis/almoço em lote
+        dias, horas_dia = calendario_util.somar_por_dia(df_semana['data'], df_semana['duracao_horas'])
+        totais = calendario_util.totalizar_dias(dias, horas_dia)
+        total_horas_liquidas = totais['horas_liquidas']
+        total_desconto_almoco = totais['desconto_almoco']
+        dias_uteis_trabalhados = totais['dias_uteis']
+        dias_fim_semana_trabalhados = totais['dias_fim_semana']
         
-        media_diaria_bruta = df_semana.groupby(df_semana['data'].dt.date)['duracao_horas'].sum().mean()
+        media_diaria_bruta = horas_dia.mean()
         media_diaria_liquida = total_horas_liquidas / (dias_uteis_trabalhados + dias_fim_semana_trabalhados) if (dias_uteis_trabalhados + dias_fim_semana_trabalhados) > 0 else 0
         
         resposta = f"📅 **Resumo Semanal - {usuario}**\n\n" + \
@@ -627,25 +1021,30 @@ class AgenteApontamentos:
             "tipo": "resumo_semanal"
         }
     
+    @estado_consistente
     def resumo_semanal_geral(self) -> Dict:
         """Resumo semanal de todos"""
+        if self.cubo is None:
+            return {"erro": "Dados não disponíveis", "tipo": "erro"}
+        
         hoje = pd.Timestamp.now()
         inicio_semana = hoje - timedelta(days=hoje.weekday())
         
-        df_semana = self.df[self.df['data'] >= inicio_semana]
-        total = df_semana['duracao_horas'].sum()
+        total = self.cubo.fatia(inicio_semana)['duracao_horas'].sum()
         
         return {
             "resposta": f"📊 Total apontado esta semana: **{total:.2f} horas**",
             "tipo": "estatistica"
         }
     
+    @estado_consistente
+    @memorizar
     def ranking_funcionarios(self, top_n: int = 10) -> Dict:
         """Ranking de funcionários por horas trabalhadas"""
-        if self.df is None:
+        if self.df is None or self.cubo is None:
             return {"erro": "Dados não disponíveis"}
         
-        ranking = self.df.groupby('s_nm_recurso')['duracao_horas'].agg(['sum', 'count', 'mean']).sort_values('sum', ascending=False).head(top_n)
+        ranking = agregar_cubo(self.cubo.df, 's_nm_recurso').head(top_n)
         
         resposta = f"🏆 **Top {top_n} - Horas Trabalhadas**\n\n"
         for i, (nome, row) in enumerate(ranking.iterrows(), 1):
@@ -657,40 +1056,88 @@ class AgenteApontamentos:
             "tipo": "ranking"
         }
     
-    def identificar_outliers(self) -> Dict:
-        """Identifica outliers recentes"""
+    def _estatisticas_outliers(self) -> Tuple[EstatisticasOutliers, pd.DataFrame, np.ndarray]:
+        """Escores de outliers da versão atual dos dados (calculados uma vez por versão)"""
+        estado = self.estado
+        
+        cache = self._outliers
+        if cache is None or cache[0] is not estado:
+            cache = (estado, EstatisticasOutliers(estado.df))
+            self._outliers = cache
+        return cache[1], estado.df, estado.datas
+    
+    @estado_consistente
+    @memorizar
+    def identificar_outliers(self, data_inicio: Optional[str] = None, data_fim: Optional[str] = None, top_n: int = 5) -> Dict:
+        """
+        Identifica apontamentos fora do padrão do próprio recurso e do contrato
+        
+        Usa escores robustos (mediana/MAD por recurso e por contrato) calculados
+        uma vez por versão dos dados; o DataFrame não é alterado.
+        
+        Args:
+            data_inicio: Data inicial do período (opcional)
+            data_fim: Data final do período (opcional)
+            top_n: Quantidade máxima de apontamentos listados
+        
+        Returns:
+            Dict com os apontamentos de maior escore no período
+        """
         if self.df is None:
             return {"erro": "Dados não disponíveis"}
         
-        # Calcular z-score
-        media = self.df['duracao_horas'].mean()
-        std = self.df['duracao_horas'].std()
-        self.df['z_score'] = (self.df['duracao_horas'] - media) / std
+        try:
+            inicio = pd.to_datetime(data_inicio, dayfirst=True) if data_inicio else None
+            fim = pd.to_datetime(data_fim, dayfirst=True) if data_fim else None
+        except (ValueError, TypeError):
+            return {"erro": "Data inválida. Use o formato DD/MM/YYYY", "tipo": "erro"}
+        
+        estatisticas, df, datas = self._estatisticas_outliers()
+        a, b = recortar_periodo(datas, inicio, fim) if (inicio is not None or fim is not None) else (0, len(df))
+        posicoes = estatisticas.maiores(a, b, top_n)
         
-        outliers = self.df[abs(self.df['z_score']) > 2].sort_values('duracao_horas', ascending=False).head(5)
+        periodo_texto = ""
+        if inicio is not None or fim is not None:
+            periodo_texto = f" ({inicio.strftime('%d/%m/%Y') if inicio is not None else 'início'} a {fim.strftime('%d/%m/%Y') if fim is not None else 'hoje'})"
         
-        if len(outliers) == 0:
+        if len(posicoes) == 0:
             return {
-                "resposta": "✅ Nenhum outlier detectado recentemente!",
+                "resposta": f"✅ Nenhum outlier detectado{periodo_texto}!",
                 "tipo": "info"
             }
         
-        resposta = "⚠️ **Apontamentos Fora do Padrão:**\n\n"
-        for _, row in outliers.iterrows():
-            resposta += f"• {row['s_nm_recurso']}: {row['duracao_horas']:.2f}h (Z-Score: {row['z_score']:.2f})\n"
+        linhas = df.iloc[posicoes]
+        dados = []
+        resposta = f"⚠️ **Apontamentos Fora do Padrão{periodo_texto}:**\n\n"
+        for posicao, (_, row) in zip(posicoes, linhas.iterrows()):
+            item = {
+                "s_nm_recurso": str(row['s_nm_recurso']),
+                "s_nr_contrato": str(row['s_nr_contrato']) if pd.notna(row.get('s_nr_contrato')) else None,
+                "data": row['data'].strftime('%d/%m/%Y') if pd.notna(row['data']) else None,
+                "duracao_horas": float(row['duracao_horas']),
+                "mediana_recurso": round(estatisticas.mediana_do_recurso(posicao), 2),
+                "z_score": round(float(estatisticas.escore[posicao]), 2),
+                "z_score_recurso": round(float(estatisticas.escore_recurso[posicao]), 2),
+                "z_score_contrato": round(float(estatisticas.escore_contrato[posicao]), 2)
+            }
+            dados.append(item)
+            resposta += (f"• {item['s_nm_recurso']} em {item['data'] or 'N/A'}: {item['duracao_horas']:.2f}h "
+                         f"(mediana do recurso: {item['mediana_recurso']:.2f}h, escore: {item['z_score']:.2f})\n")
         
         return {
             "resposta": resposta,
-            "dados": outliers.to_dict('records'),
+            "dados": dados,
             "tipo": "outliers"
         }
     
+    @estado_consistente
+    @resolvendo_recurso('usuario')
     def total_horas_usuario(self, usuario: str) -> Dict:
         """Total de horas de um usuário"""
         if self.df is None:
             return {"erro": "Dados não disponíveis", "tipo": "erro"}
         
-        df_usuario = self.df[self.df['s_nm_recurso'].str.contains(usuario, case=False, na=False)]
+        df_usuario = self._filtrar_recurso(usuario)
         total = df_usuario['duracao_horas'].sum()
         
         return {
@@ -699,17 +1146,21 @@ class AgenteApontamentos:
             "tipo": "total"
         }
     
+    @estado_consistente
+    @memorizar
     def total_horas_geral(self) -> Dict:
         """Total geral de horas"""
-        if self.df is None:
+        if self.df is None or self.cubo is None:
             return {"erro": "Dados não disponíveis", "tipo": "erro"}
         
-        total = self.df['duracao_horas'].sum()
+        total = self.cubo.df['duracao_horas'].sum()
         return {
             "resposta": f"📊 Total geral: **{total:.2f} horas**",
             "tipo": "total_geral"
         }
     
+    @estado_consistente
+    @resolvendo_recurso('usuario')
     def consultar_periodo(self, data_inicio: str, data_fim: str, usuario: Optional[str] = None) -> Dict:
         """
         Consulta dados de um período específico com cálculo de dias úteis e desconto de almoço
@@ -722,7 +1173,7 @@ class AgenteApontamentos:
         Returns:
             Dicionário com estatísticas do período incluindo horas brutas e líquidas
         """
-        if self.df is None or 'data' not in self.df.columns:
+        if self.df is None or self.cubo is None or 'data' not in self.df.columns:
             return {"erro": "Dados não disponíveis", "tipo": "erro"}
         
         try:
@@ -730,12 +1181,12 @@ class AgenteApontamentos:
             inicio = pd.to_datetime(data_inicio, dayfirst=True)
             fim = pd.to_datetime(data_fim, dayfirst=True)
             
-            # Filtrar por período
-            df_periodo = self.df[(self.df['data'] >= inicio) & (self.df['data'] <= fim)]
-            
-            # Filtrar por usuário se especificado
+            # Linhas do cubo no período: geral direto do cubo diário,
+            # por usuário agregando só as linhas dele (via índice)
             if usuario:
-                df_periodo = df_periodo[df_periodo['s_nm_recurso'].str.contains(usuario, case=False, na=False)]
+                df_periodo = montar_cubo(self._filtrar_recurso(usuario, inicio, fim))
+            else:
+                df_periodo = self.cubo.fatia(inicio, fim)
             
             if len(df_periodo) == 0:
                 msg = f"📅 Nenhum apontamento encontrado entre {inicio.date()} e {fim.date()}"
@@ -748,30 +1199,19 @@ class AgenteApontamentos:
             
             # Calcular estatísticas brutas
             total_horas_brutas = df_periodo['duracao_horas'].sum()
-            media_horas_brutas = df_periodo['duracao_horas'].mean()
-            quantidade = len(df_periodo)
+            quantidade = int(df_periodo['apontamentos'].sum())
+            media_horas_brutas = total_horas_brutas / quantidade
             
             # Calcular número de dias corridos no período
             dias_corridos = (fim - inicio).days + 1
             
-            # Calcular horas líquidas considerando dias úteis e desconto de almoço
-            total_horas_liquidas = 0
-            dias_uteis_trabalhados = 0
-            dias_fim_semana_trabalhados = 0
-            total_desconto_almoco = 0
-            
-            for data, grupo in df_periodo.groupby(df_periodo['data'].dt.date):
-                horas_dia = grupo['duracao_horas'].sum()
-                data_dt = pd.Timestamp(data)
-                classificacao = self.classificar_apontamento(data_dt, horas_dia)
-                
-                total_horas_liquidas += classificacao['horas_liquidas']
-                total_desconto_almoco += classificacao['desconto_almoco']
-                
-                if classificacao['dia_util']:
-                    dias_uteis_trabalhados += 1
-                else:
-                    dias_fim_semana_trabalhados += 1
+            # Calcular horas líquidas considerando dias úteis e desconto de almoço (em lote)
+            dias, horas_dia = calendario_util.somar_por_dia(df_periodo['data'], df_periodo['duracao_horas'])
+            totais = calendario_util.totalizar_dias(dias, horas_dia)
+            total_horas_liquidas = totais['horas_liquidas']
+            total_desconto_almoco = totais['desconto_almoco']
+            dias_uteis_trabalhados = totais['dias_uteis']
+            dias_fim_semana_trabalhados = totais['dias_fim_semana']
             
             dias_trabalhados_total = dias_uteis_trabalhados + dias_fim_semana_trabalhados
             
@@ -783,7 +1223,7 @@ class AgenteApontamentos:
             num_recursos = df_periodo['s_nm_recurso'].nunique() if not usuario else 1
             
             # Ranking no período
-            top_usuarios = df_periodo.groupby('s_nm_recurso')['duracao_horas'].sum().nlargest(5)
+            top_usuarios = df_periodo.groupby('s_nm_recurso', observed=True)['duracao_horas'].sum().nlargest(5)
             
             resposta = f"📅 **Período: {inicio.date()} a {fim.date()}**\n\n"
             if usuario:
@@ -834,6 +1274,8 @@ class AgenteApontamentos:
                 "tipo": "erro"
             }
     
+    @estado_consistente
+    @resolvendo_recurso('usuario')
     def detalhar_apontamentos_por_dia(self, data_inicio: str, data_fim: str, usuario: Optional[str] = None) -> Dict:
         """
         Detalha apontamentos dia a dia no período especificado
@@ -854,12 +1296,11 @@ class AgenteApontamentos:
             inicio = pd.to_datetime(data_inicio, dayfirst=True)
             fim = pd.to_datetime(data_fim, dayfirst=True)
             
-            # Filtrar por período
-            df_periodo = self.df[(self.df['data'] >= inicio) & (self.df['data'] <= fim)]
-            
-            # Filtrar por usuário se especificado
+            # Filtrar por período (e por usuário, via índice, se especificado)
             if usuario:
-                df_periodo = df_periodo[df_periodo['s_nm_recurso'].str.contains(usuario, case=False, na=False)]
+                df_periodo = self._filtrar_recurso(usuario, inicio, fim)
+            else:
+                df_periodo = self._filtrar_periodo(inicio, fim)
             
             if len(df_periodo) == 0:
                 msg = f"📅 Nenhum apontamento encontrado entre {inicio.date()} e {fim.date()}"
@@ -904,14 +1345,18 @@ class AgenteApontamentos:
                 "tipo": "erro"
             }
     
+    @estado_consistente
     def comparar_periodos(self) -> Dict:
         """Compara semana atual com anterior"""
+        if self.cubo is None:
+            return {"erro": "Dados não disponíveis", "tipo": "erro"}
+        
         hoje = pd.Timestamp.now()
         inicio_semana_atual = hoje - timedelta(days=hoje.weekday())
         inicio_semana_anterior = inicio_semana_atual - timedelta(days=7)
         
-        df_atual = self.df[(self.df['data'] >= inicio_semana_atual)]
-        df_anterior = self.df[(self.df['data'] >= inicio_semana_anterior) & (self.df['data'] < inicio_semana_atual)]
+        df_atual = self.cubo.fatia(inicio_semana_atual)
+        df_anterior = self.cubo.fatia(inicio_semana_anterior, inicio_semana_atual, fim_exclusivo=True)
         
         total_atual = df_atual['duracao_horas'].sum()
         total_anterior = df_anterior['duracao_horas'].sum()
@@ -948,30 +1393,27 @@ class AgenteApontamentos:
             inicio = pd.to_datetime(data_inicio, dayfirst=True)
             fim = pd.to_datetime(data_fim, dayfirst=True)
             
-            # Contar dias úteis
-            dias_uteis = 0
-            dias_fim_semana = 0
-            data_atual = inicio
+            # Classificar todos os dias do período de uma vez
+            dias = calendario_util.dias_do_periodo(inicio, fim)
+            mascara_util = calendario_util.mascara_dias_uteis(dias)
             
-            lista_dias_uteis = []
-            lista_fins_semana = []
-            
-            while data_atual <= fim:
-                if self.eh_dia_util(data_atual):
-                    dias_uteis += 1
-                    lista_dias_uteis.append(data_atual.strftime('%d/%m/%Y'))
-                else:
-                    dias_fim_semana += 1
-                    lista_fins_semana.append(data_atual.strftime('%d/%m/%Y'))
-                data_atual += timedelta(days=1)
+            lista_dias_uteis = calendario_util.formatar_dias(dias[mascara_util])
+            lista_fins_semana = calendario_util.formatar_dias(dias[~mascara_util])
+            dias_uteis = len(lista_dias_uteis)
+            dias_fim_semana = len(lista_fins_semana)
+            feriados = calendario_util.feriados_periodo(inicio, fim)
             
             total_dias = dias_uteis + dias_fim_semana
             
             resposta = f"📅 **Período: {inicio.date()} a {fim.date()}**\n\n" + \
                        f"📊 **Dias Úteis:** {dias_uteis} dias\n" + \
-                       f"🏖️ **Fins de Semana:** {dias_fim_semana} dias\n" + \
+                       f"🏖️ **Fins de Semana e Feriados:** {dias_fim_semana} dias\n" + \
                        f"📆 **Total de Dias:** {total_dias} dias"
             
+            if feriados:
+                resposta += "\n\n🎉 **Feriados no período:**\n" + \
+                            "\n".join(f"• {dia} - {nome}" for dia, nome in feriados)
+            
             return {
                 "resposta": resposta,
                 "dados": {
@@ -981,7 +1423,8 @@ class AgenteApontamentos:
                     "dias_fim_semana": dias_fim_semana,
                     "total_dias": total_dias,
                     "lista_dias_uteis": lista_dias_uteis,
-                    "lista_fins_semana": lista_fins_semana
+                    "lista_fins_semana": lista_fins_semana,
+                    "feriados": [{"data": dia, "nome": nome} for dia, nome in feriados]
                 },
                 "tipo": "contagem_dias_uteis"
             }
@@ -1039,7 +1482,9 @@ class AgenteApontamentos:
             "tipo": "horas_esperadas"
         }
     
-    def dias_nao_apontados(self, data_inicio: str, data_fim: str, usuario: Optional[str] = None) -> Dict:
+    @estado_consistente
+    @resolvendo_recurso('usuario')
+    def dias_nao_apontados(self, data_inicio: str, data_fim: str, usuario: Optional[str] = None, equipe: Optional[List[str]] = None) -> Dict:
         """
         Identifica quais dias úteis não tiveram apontamentos
         
@@ -1047,11 +1492,13 @@ class AgenteApontamentos:
             data_inicio: Data inicial (formato: YYYY-MM-DD ou DD/MM/YYYY)
             data_fim: Data final (formato: YYYY-MM-DD ou DD/MM/YYYY)
             usuario: Nome do usuário (opcional)
+            equipe: Lista de colaboradores a analisar (opcional, análise geral);
+                    inclui quem não apontou nada no período
         
         Returns:
             Dicionário com lista de dias não apontados
         """
-        if self.df is None or 'data' not in self.df.columns:
+        if self.df is None or self.cubo is None or 'data' not in self.df.columns:
             return {"erro": "Dados não disponíveis", "tipo": "erro"}
         
         try:
@@ -1059,13 +1506,14 @@ class AgenteApontamentos:
             inicio = pd.to_datetime(data_inicio, dayfirst=True)
             fim = pd.to_datetime(data_fim, dayfirst=True)
             
-            # Filtrar por período
-            df_periodo = self.df[(self.df['data'] >= inicio) & (self.df['data'] <= fim)]
-            
             # Se não especificar usuário, analisar todos
             if not usuario:
-                # Pegar todos os usuários únicos do período
-                usuarios = df_periodo['s_nm_recurso'].unique()
+                # Grade recurso × dia útil montada em uma passada sobre o cubo do período
+                cubo_periodo = self.cubo.fatia(inicio, fim)
+                dias_uteis = calendario_util.dias_uteis_periodo(inicio, fim)
+                usuarios, grade = calendario_util.grade_presenca(
+                    cubo_periodo['s_nm_recurso'], cubo_periodo['data'], dias_uteis, equipe
+                )
                 
                 if len(usuarios) == 0:
                     return {
@@ -1073,10 +1521,19 @@ class AgenteApontamentos:
                         "tipo": "info"
                     }
                 
-                # Analisar cada usuário
+                # Contagens por colaborador direto da grade
+                dias_apontados = grade.sum(axis=1)
+                faltas = len(dias_uteis) - dias_apontados
+                dias_formatados = np.array(calendario_util.formatar_dias(dias_uteis), dtype=object)
+                
                 resultado_usuarios = {}
-                for usr in usuarios:
-                    resultado_usuarios[usr] = self._analisar_dias_nao_apontados_usuario(inicio, fim, usr, df_periodo)
+                for i, usr in enumerate(usuarios):
+                    resultado_usuarios[usr] = {
+                        "dias_uteis_total": len(dias_uteis),
+                        "dias_apontados": int(dias_apontados[i]),
+                        "dias_nao_apontados": int(faltas[i]),
+                        "lista_dias_faltantes": dias_formatados[~grade[i]].tolist() if faltas[i] else []
+                    }
                 
                 # Montar resposta consolidada
                 resposta = f"📅 **Período: {inicio.date()} a {fim.date()}**\n\n"
@@ -1088,7 +1545,9 @@ class AgenteApontamentos:
                     resposta += "✅ **Todos os colaboradores apontaram em todos os dias úteis!**"
                 else:
                     resposta += f"⚠️ **{len(usuarios_com_faltas)} colaborador(es) com dias não apontados:**\n\n"
-                    for usr, dados in sorted(usuarios_com_faltas.items(), key=lambda x: x[1]['dias_nao_apontados'], reverse=True)[:10]:
+                    # Top 10 com mais faltas (argsort estável: empates em ordem alfabética)
+                    ordem = np.argsort(-faltas, kind='stable')[:10]
+                    for usr, dados in ((usuarios[i], resultado_usuarios[usuarios[i]]) for i in ordem if faltas[i] > 0):
                         resposta += f"• **{usr}**: {dados['dias_nao_apontados']} dia(s) não apontado(s)\n"
                         if dados['lista_dias_faltantes']:
                             resposta += f"  Dias: {', '.join(dados['lista_dias_faltantes'][:5])}"
@@ -1110,7 +1569,7 @@ class AgenteApontamentos:
             
             else:
                 # Análise individual
-                df_usuario = df_periodo[df_periodo['s_nm_recurso'].str.contains(usuario, case=False, na=False)]
+                df_usuario = self._filtrar_recurso(usuario, inicio, fim)
                 
                 if len(df_usuario) == 0:
                     return {
@@ -1118,7 +1577,7 @@ class AgenteApontamentos:
                         "tipo": "erro"
                     }
                 
-                resultado = self._analisar_dias_nao_apontados_usuario(inicio, fim, usuario, df_periodo)
+                resultado = self._analisar_dias_nao_apontados_usuario(inicio, fim, usuario)
                 
                 resposta = f"📅 **Período: {inicio.date()} a {fim.date()}**\n" + \
                            f"👤 **Colaborador: {usuario}**\n\n" + \
@@ -1150,57 +1609,49 @@ class AgenteApontamentos:
                 "tipo": "erro"
             }
     
-    def _analisar_dias_nao_apontados_usuario(self, inicio: pd.Timestamp, fim: pd.Timestamp, usuario: str, df_periodo: pd.DataFrame) -> Dict:
+    def _analisar_dias_nao_apontados_usuario(self, inicio: pd.Timestamp, fim: pd.Timestamp, usuario: str) -> Dict:
         """Função auxiliar para analisar dias não apontados de um usuário"""
-        # Filtrar dados do usuário
-        df_usuario = df_periodo[df_periodo['s_nm_recurso'].str.contains(usuario, case=False, na=False)]
-        
-        # Pegar datas que o usuário apontou
-        datas_apontadas = set(df_usuario['data'].dt.date)
+        # Filtrar dados do usuário no período
+        df_usuario = self._filtrar_recurso(usuario, inicio, fim)
         
-        # Listar todos os dias úteis do período
-        dias_uteis_periodo = []
-        data_atual = inicio
-        while data_atual <= fim:
-            if self.eh_dia_util(data_atual):
-                dias_uteis_periodo.append(data_atual.date())
-            data_atual += timedelta(days=1)
+        # Dias que o usuário apontou e dias úteis do período
+        datas_apontadas = np.unique(calendario_util.para_dias(df_usuario['data']))
+        dias_uteis_periodo = calendario_util.dias_uteis_periodo(inicio, fim)
         
         # Identificar dias não apontados
-        dias_nao_apontados = [dia for dia in dias_uteis_periodo if dia not in datas_apontadas]
+        dias_nao_apontados = np.setdiff1d(dias_uteis_periodo, datas_apontadas)
         
         return {
             "dias_uteis_total": len(dias_uteis_periodo),
-            "dias_apontados": len(datas_apontadas.intersection(set(dias_uteis_periodo))),
+            "dias_apontados": len(dias_uteis_periodo) - len(dias_nao_apontados),
             "dias_nao_apontados": len(dias_nao_apontados),
-            "lista_dias_faltantes": [dia.strftime('%d/%m/%Y') for dia in sorted(dias_nao_apontados)]
+            "lista_dias_faltantes": calendario_util.formatar_dias(dias_nao_apontados)
         }
     
+    @estado_consistente
+    @memorizar
     def listar_contratos(self, inicio: str = None, fim: str = None) -> Dict:
         """Lista todos os contratos com apontamentos, opcionalmente filtrado por período"""
-        if self.df is None or 's_nr_contrato' not in self.df.columns:
+        if self.df is None or self.cubo is None or 's_nr_contrato' not in self.df.columns:
             return {"erro": "Dados de contratos não disponíveis", "tipo": "erro"}
         
-        df = self.df.copy()
+        cubo = self.cubo.df
         
         # Filtrar por período se fornecido
         if inicio and fim:
-            df['data'] = pd.to_datetime(df['d_dt_data'], errors='coerce')
             inicio_dt = pd.to_datetime(inicio)
             fim_dt = pd.to_datetime(fim)
-            df = df[(df['data'] >= inicio_dt) & (df['data'] <= fim_dt)]
+            cubo = self.cubo.fatia(inicio_dt, fim_dt)
             periodo_texto = f" ({inicio} a {fim})"
         else:
             periodo_texto = ""
         
-        # Agrupar por contrato
-        contratos = df.groupby('s_nr_contrato').agg({
-            'duracao_horas': 'sum',
-            's_id_apontamento': 'count',
-            's_nm_recurso': 'nunique'
-        }).sort_values('duracao_horas', ascending=False)
-        
-        contratos.columns = ['total_horas', 'apontamentos', 'recursos']
+        # Agrupar por contrato (a partir do cubo diário)
+        contratos = cubo.groupby('s_nr_contrato', observed=True).agg(
+            total_horas=('duracao_horas', 'sum'),
+            apontamentos=('apontamentos', 'sum'),
+            recursos=('s_nm_recurso', 'nunique')
+        ).sort_values('total_horas', ascending=False)
         
         resposta = f"📋 **Contratos com Apontamentos{periodo_texto}** ({len(contratos)} contratos)\n\n"
         
@@ -1217,6 +1668,8 @@ class AgenteApontamentos:
             "tipo": "contratos"
         }
     
+    @estado_consistente
+    @resolvendo_recurso('recurso')
     def contratos_por_recurso(self, recurso: str, data_inicio: Optional[str] = None, data_fim: Optional[str] = None) -> Dict:
         """Lista contratos em que um recurso específico apontou horas"""
         if self.df is None:
@@ -1224,7 +1677,7 @@ class AgenteApontamentos:
         
         try:
             # Filtrar por recurso
-            df_recurso = self.df[self.df['s_nm_recurso'].str.contains(recurso, case=False, na=False)]
+            df_recurso = self._filtrar_recurso(recurso)
             
             if len(df_recurso) == 0:
                 return {
@@ -1256,7 +1709,7 @@ class AgenteApontamentos:
                 }
             
             # Agrupar por contrato
-            contratos = df_recurso.groupby('s_nr_contrato').agg({
+            contratos = df_recurso.groupby('s_nr_contrato', observed=True).agg({
                 'duracao_horas': 'sum',
                 's_id_apontamento': 'count',
                 's_ds_operacao': lambda x: ', '.join(x.unique()[:3])  # Top 3 operações
@@ -1291,29 +1744,17 @@ class AgenteApontamentos:
                 "tipo": "erro"
             }
 
+    @estado_consistente
+    @memorizar
     def recursos_por_contrato(self, contrato: str) -> Dict:
         """Lista recursos que trabalham em um contrato específico"""
-        if self.df is None:
+        if self.df is None or self.indice_contratos is None:
             return {"erro": "Dados de contratos não disponíveis", "tipo": "erro"}
         
-        # Normalizar contrato (remover espaços e converter para string)
-        contrato_busca = str(contrato).strip()
-        
-        # Buscar em s_nr_contrato (contratos EXTERNOS com E) OU contrato_fornecedor (contratos INTERNOS numéricos)
-        df_contrato = pd.DataFrame()
-        
-        if 's_nr_contrato' in self.df.columns:
-            df_externo = self.df[self.df['s_nr_contrato'].astype(str).str.strip() == contrato_busca]
-            df_contrato = pd.concat([df_contrato, df_externo], ignore_index=True)
-        
-        if 'contrato_fornecedor' in self.df.columns:
-            # Tentar como número float (ex: 7873.0)
-            try:
-                contrato_num = float(contrato_busca)
-                df_interno = self.df[self.df['contrato_fornecedor'] == contrato_num]
-                df_contrato = pd.concat([df_contrato, df_interno], ignore_index=True)
-            except ValueError:
-                pass  # Não é número, só busca em s_nr_contrato
+        # Contratos EXTERNOS (s_nr_contrato, ex: E0440404) ou INTERNOS (contrato_fornecedor, ex: 7873)
+        # pelo índice: linhas que casam nas duas colunas entram uma vez só
+        df, indice_contratos = self.df, self.indice_contratos
+        df_contrato = df.iloc[indice_contratos.posicoes(contrato)]
         
         if len(df_contrato) == 0:
             return {
@@ -1322,13 +1763,9 @@ class AgenteApontamentos:
             }
         
         # Agrupar por recurso
-        recursos = df_contrato.groupby('s_nm_recurso').agg({
-            'duracao_horas': 'sum',
-            's_id_apontamento': 'count',
-            's_ds_cargo': 'first',
-            'tecnologia': 'first',
-            'perfil': 'first'
-        }).sort_values('duracao_horas', ascending=False)
+        agregacoes = {'duracao_horas': 'sum', 's_id_apontamento': 'count'}
+        agregacoes.update({c: 'first' for c in ('s_ds_cargo', 'tecnologia', 'perfil') if c in df_contrato.columns})
+        recursos = df_contrato.groupby('s_nm_recurso', observed=True).agg(agregacoes).sort_values('duracao_horas', ascending=False)
         
         resposta = f"📋 **Contrato: {contrato}**\n\n"
         resposta += f"👥 **{len(recursos)} recursos trabalhando**\n\n"
@@ -1347,12 +1784,17 @@ class AgenteApontamentos:
         if len(recursos) > 20:
             resposta += f"\n... e mais {len(recursos) - 20} recursos\n"
         
+        total_horas, apontamentos = indice_contratos.total(contrato)
         return {
             "resposta": resposta,
             "dados": recursos.to_dict('index'),
+            "total_horas": total_horas,
+            "apontamentos": apontamentos,
             "tipo": "recursos_contrato"
         }
     
+    @estado_consistente
+    @resolvendo_recurso('usuario')
     def horas_esperadas_colaborador(self, usuario: str, data_inicio: str, data_fim: str) -> Dict:
         """
         Calcula quantas horas o colaborador deveria fazer no período (dias úteis × jornada)
@@ -1375,11 +1817,7 @@ class AgenteApontamentos:
             fim = pd.to_datetime(data_fim, dayfirst=True)
             
             # Filtrar apontamentos do usuário no período
-            df_usuario = self.df[
-                (self.df['s_nm_recurso'].str.contains(usuario, case=False, na=False)) &
-                (self.df['data'] >= inicio) & 
-                (self.df['data'] <= fim)
-            ]
+            df_usuario = self._filtrar_recurso(usuario, inicio, fim)
             
             if len(df_usuario) == 0:
                 return {
@@ -1388,12 +1826,7 @@ class AgenteApontamentos:
                 }
             
             # Calcular dias úteis no período
-            dias_uteis = 0
-            data_atual = inicio
-            while data_atual <= fim:
-                if self.eh_dia_util(data_atual):
-                    dias_uteis += 1
-                data_atual += timedelta(days=1)
+            dias_uteis = calendario_util.contar_dias_uteis(inicio, fim)
             
             # Jornada padrão: 8h/dia (pode ajustar conforme necessário)
             JORNADA_DIARIA = 8.0
@@ -1485,6 +1918,8 @@ class AgenteApontamentos:
                 "tipo": "erro"
             }
 
+    @estado_consistente
+    @resolvendo_recurso('usuario')
     def verificar_saidas_esquecidas(self, usuario: str, data_inicio: Optional[str] = None, data_fim: Optional[str] = None) -> Dict:
         """
         Verifica se o recurso esqueceu de informar horário de saída em algum dia
@@ -1503,7 +1938,7 @@ class AgenteApontamentos:
         
         try:
             # Filtrar por usuário
-            df_usuario = self.df[self.df['s_nm_recurso'].str.contains(usuario, case=False, na=False)]
+            df_usuario = self._filtrar_recurso(usuario)
             
             if len(df_usuario) == 0:
                 return {
@@ -1622,6 +2057,8 @@ class AgenteApontamentos:
 
     # ========== NOVAS FUNÇÕES PARA ATIVIDADES ==========
     
+    @estado_consistente
+    @memorizar
     def listar_atividades(self, top_n: int = 20) -> Dict:
         """
         Lista todas as atividades disponíveis no sistema
@@ -1632,7 +2069,7 @@ class AgenteApontamentos:
         Returns:
             Dicionário com lista de atividades
         """
-        if self.df is None:
+        if self.df is None or self.cubo is None:
             return {"erro": "Dados não disponíveis", "tipo": "erro"}
         
         if 's_ds_atividade' not in self.df.columns:
@@ -1640,7 +2077,8 @@ class AgenteApontamentos:
         
         try:
             # Contar atividades únicas
-            atividades = self.df['s_ds_atividade'].dropna().value_counts().head(top_n)
+            atividades = self.cubo.df.groupby('s_ds_atividade', observed=True)['apontamentos'].sum().sort_values(ascending=False)
+            atividades = atividades[atividades > 0].head(top_n)
             
             if len(atividades) == 0:
                 return {
@@ -1654,7 +2092,7 @@ class AgenteApontamentos:
                 resposta += f"{i}. **{atividade}**\n"
                 resposta += f"   └─ {count} apontamentos\n\n"
             
-            resposta += f"📊 **Total de atividades únicas:** {self.df['s_ds_atividade'].nunique()}"
+            resposta += f"📊 **Total de atividades únicas:** {self.cubo.df['s_ds_atividade'].nunique()}"
             
             return {
                 "resposta": resposta,
@@ -1668,6 +2106,7 @@ class AgenteApontamentos:
                 "tipo": "erro"
             }
     
+    @estado_consistente
     def ranking_atividades(self, top_n: int = 10, metrica: str = "horas") -> Dict:
         """
         Ranking de atividades mais realizadas
@@ -1679,14 +2118,14 @@ class AgenteApontamentos:
         Returns:
             Dicionário com ranking de atividades
         """
-        if self.df is None:
+        if self.df is None or self.cubo is None:
             return {"erro": "Dados não disponíveis", "tipo": "erro"}
         
         if 's_ds_atividade' not in self.df.columns:
             return {"erro": "Coluna de atividades não disponível", "tipo": "erro"}
         
         try:
-            df_atividades = self.df[self.df['s_ds_atividade'].notna()]
+            df_atividades = self.cubo.df[self.cubo.df['s_ds_atividade'].notna()]
             
             if len(df_atividades) == 0:
                 return {
@@ -1695,11 +2134,12 @@ class AgenteApontamentos:
                 }
             
             if metrica == "horas":
-                ranking = df_atividades.groupby('s_ds_atividade')['duracao_horas'].agg(['sum', 'count']).sort_values('sum', ascending=False).head(top_n)
+                ranking = agregar_cubo(df_atividades, 's_ds_atividade')[['sum', 'count']].head(top_n)
                 titulo = "🏆 **Top Atividades por Horas Trabalhadas**"
                 metrica_label = "h"
             else:
-                ranking = df_atividades.groupby('s_ds_atividade').size().sort_values(ascending=False).head(top_n)
+                ranking = df_atividades.groupby('s_ds_atividade', observed=True)['apontamentos'].sum().sort_values(ascending=False).head(top_n)
+                ranking.name = None
                 titulo = "🏆 **Top Atividades por Quantidade**"
                 metrica_label = "apontamentos"
             
@@ -1726,10 +2166,14 @@ class AgenteApontamentos:
                 "tipo": "erro"
             }
     
+    @estado_consistente
     def apontamentos_por_atividade(self, atividade: str, data_inicio: Optional[str] = None, data_fim: Optional[str] = None) -> Dict:
         """
         Busca apontamentos de uma atividade específica
         
+        Usa o índice invertido de atividades: palavras inteiras ou prefixos,
+        sem acento e sem caixa ("reuniao alinh" acha "Reunião de alinhamento").
+        
         Args:
             atividade: Nome ou parte do nome da atividade
             data_inicio: Data inicial (opcional)
@@ -1741,22 +2185,28 @@ class AgenteApontamentos:
         if self.df is None:
             return {"erro": "Dados não disponíveis", "tipo": "erro"}
         
-        if 's_ds_atividade' not in self.df.columns:
+        if 's_ds_atividade' not in self.df.columns or self.indice_atividades is None:
             return {"erro": "Coluna de atividades não disponível", "tipo": "erro"}
         
         try:
-            # Filtrar por atividade (case insensitive, busca parcial)
-            df_filtrado = self.df[self.df['s_ds_atividade'].str.contains(atividade, case=False, na=False)]
+            df, datas, indice_atividades = self.df, self._datas, self.indice_atividades
             
-            # Filtrar por período se especificado
+            # Atividades que casam com a consulta, da mais relevante para a menos
+            encontradas = indice_atividades.buscar(atividade)
+            posicoes = indice_atividades.posicoes([id_atividade for id_atividade, _ in encontradas])
+            
+            # Filtrar por período se especificado (posições crescentes → datas ordenadas)
             if data_inicio and data_fim:
                 inicio = pd.to_datetime(data_inicio, dayfirst=True)
                 fim = pd.to_datetime(data_fim, dayfirst=True)
-                df_filtrado = df_filtrado[(df_filtrado['data'] >= inicio) & (df_filtrado['data'] <= fim)]
+                a, b = recortar_periodo(datas[posicoes], inicio, fim)
+                posicoes = posicoes[a:b]
                 periodo_msg = f" ({inicio.date()} a {fim.date()})"
             else:
                 periodo_msg = ""
             
+            df_filtrado = df.iloc[posicoes]
+            
             if len(df_filtrado) == 0:
                 return {
                     "resposta": f"❌ Nenhum apontamento encontrado para atividade '{atividade}'{periodo_msg}",
@@ -1777,7 +2227,7 @@ class AgenteApontamentos:
             resposta += f"⌀ **Média por apontamento:** {total_horas/total_apontamentos:.2f}h\n\n"
             
             # Top 5 usuários nesta atividade
-            top_usuarios = df_filtrado.groupby('s_nm_recurso')['duracao_horas'].sum().sort_values(ascending=False).head(5)
+            top_usuarios = df_filtrado.groupby('s_nm_recurso', observed=True)['duracao_horas'].sum().sort_values(ascending=False).head(5)
             resposta += "👤 **Top 5 Usuários:**\n"
             for i, (usuario, horas) in enumerate(top_usuarios.items(), 1):
                 resposta += f"{i}. {usuario}: {horas:.2f}h\n"
@@ -1789,7 +2239,11 @@ class AgenteApontamentos:
                     "total_horas": float(total_horas),
                     "total_apontamentos": int(total_apontamentos),
                     "usuarios_unicos": int(usuarios_unicos),
-                    "top_usuarios": top_usuarios.to_dict()
+                    "top_usuarios": top_usuarios.to_dict(),
+                    "atividades_encontradas": [
+                        {"atividade": indice_atividades.atividades[id_atividade], "relevancia": round(pontos, 2)}
+                        for id_atividade, pontos in encontradas[:10]
+                    ]
                 },
                 "tipo": "apontamentos_atividade"
             }
@@ -1800,6 +2254,8 @@ class AgenteApontamentos:
                 "tipo": "erro"
             }
     
+    @estado_consistente
+    @resolvendo_recurso('usuario')
     def atividades_por_usuario(self, usuario: str, top_n: int = 10) -> Dict:
         """
         Lista atividades realizadas por um usuário específico
@@ -1819,7 +2275,7 @@ class AgenteApontamentos:
         
         try:
             # Filtrar por usuário
-            df_usuario = self.df[self.df['s_nm_recurso'].str.contains(usuario, case=False, na=False)]
+            df_usuario = self._filtrar_recurso(usuario)
             
             if len(df_usuario) == 0:
                 return {
@@ -1839,7 +2295,7 @@ class AgenteApontamentos:
                 }
             
             # Agrupar por atividade
-            atividades = df_com_atividades.groupby('s_ds_atividade')['duracao_horas'].agg(['sum', 'count']).sort_values('sum', ascending=False).head(top_n)
+            atividades = df_com_atividades.groupby('s_ds_atividade', observed=True)['duracao_horas'].agg(['sum', 'count']).sort_values('sum', ascending=False).head(top_n)
             
             resposta = f"👤 **Usuário:** {nome_completo}\n\n"
             resposta += f"📋 **Atividades realizadas** (Top {min(top_n, len(atividades))})\n\n"
@@ -1867,6 +2323,7 @@ class AgenteApontamentos:
                 "tipo": "erro"
             }
     
+    @estado_consistente
     def horas_por_atividade(self, data_inicio: Optional[str] = None, data_fim: Optional[str] = None, top_n: int = 15) -> Dict:
         """
         Total de horas gastas em cada atividade
@@ -1879,24 +2336,26 @@ class AgenteApontamentos:
         Returns:
             Dicionário com horas por atividade
         """
-        if self.df is None:
+        if self.df is None or self.cubo is None:
             return {"erro": "Dados não disponíveis", "tipo": "erro"}
         
         if 's_ds_atividade' not in self.df.columns:
             return {"erro": "Coluna de atividades não disponível", "tipo": "erro"}
         
         try:
-            df_filtrado = self.df[self.df['s_ds_atividade'].notna()].copy()
+            df_filtrado = self.cubo.df
             
             # Filtrar por período se especificado
             if data_inicio and data_fim:
                 inicio = pd.to_datetime(data_inicio, dayfirst=True)
                 fim = pd.to_datetime(data_fim, dayfirst=True)
-                df_filtrado = df_filtrado[(df_filtrado['data'] >= inicio) & (df_filtrado['data'] <= fim)]
+                df_filtrado = self.cubo.fatia(inicio, fim)
                 periodo_msg = f"📅 **Período:** {inicio.date()} a {fim.date()}\n\n"
             else:
                 periodo_msg = "📅 **Período:** Todos os registros\n\n"
             
+            df_filtrado = df_filtrado[df_filtrado['s_ds_atividade'].notna()]
+            
             if len(df_filtrado) == 0:
                 return {
                     "resposta": f"❌ Nenhum dado encontrado no período especificado.",
@@ -1904,7 +2363,7 @@ class AgenteApontamentos:
                 }
             
             # Agrupar por atividade
-            horas_atividade = df_filtrado.groupby('s_ds_atividade')['duracao_horas'].agg(['sum', 'count', 'mean']).sort_values('sum', ascending=False).head(top_n)
+            horas_atividade = agregar_cubo(df_filtrado, 's_ds_atividade').head(top_n)
             
             total_geral = df_filtrado['duracao_horas'].sum()
             
@@ -1934,6 +2393,7 @@ class AgenteApontamentos:
                 "tipo": "erro"
             }
     
+    @estado_consistente
     def atividades_por_periodo(self, data_inicio: str, data_fim: str) -> Dict:
         """
         Atividades realizadas em um período específico
@@ -1945,7 +2405,7 @@ class AgenteApontamentos:
         Returns:
             Dicionário com atividades do período
         """
-        if self.df is None:
+        if self.df is None or self.cubo is None:
             return {"erro": "Dados não disponíveis", "tipo": "erro"}
         
         if 's_ds_atividade' not in self.df.columns:
@@ -1956,7 +2416,7 @@ class AgenteApontamentos:
             fim = pd.to_datetime(data_fim, dayfirst=True)
             
             # Filtrar por período
-            df_periodo = self.df[(self.df['data'] >= inicio) & (self.df['data'] <= fim)]
+            df_periodo = self.cubo.fatia(inicio, fim)
             df_periodo = df_periodo[df_periodo['s_ds_atividade'].notna()]
             
             if len(df_periodo) == 0:
@@ -1968,10 +2428,10 @@ class AgenteApontamentos:
             # Estatísticas
             total_atividades = df_periodo['s_ds_atividade'].nunique()
             total_horas = df_periodo['duracao_horas'].sum()
-            total_apontamentos = len(df_periodo)
+            total_apontamentos = int(df_periodo['apontamentos'].sum())
             
             # Top 10 atividades do período
-            top_atividades = df_periodo.groupby('s_ds_atividade')['duracao_horas'].agg(['sum', 'count']).sort_values('sum', ascending=False).head(10)
+            top_atividades = agregar_cubo(df_periodo, 's_ds_atividade')[['sum', 'count']].head(10)
             
             resposta = f"📅 **Período:** {inicio.date()} a {fim.date()}\n\n"
             resposta += f"📋 **Atividades únicas:** {total_atividades}\n"
@@ -2000,6 +2460,7 @@ class AgenteApontamentos:
                 "tipo": "erro"
             }
     
+    @estado_consistente
     def distribuicao_atividades_por_contrato(self, contrato: Optional[str] = None) -> Dict:
         """
         Distribuição de atividades por contrato
@@ -2010,18 +2471,21 @@ class AgenteApontamentos:
         Returns:
             Dicionário com distribuição de atividades
         """
-        if self.df is None:
+        if self.df is None or self.cubo is None:
             return {"erro": "Dados não disponíveis", "tipo": "erro"}
         
         if 's_ds_atividade' not in self.df.columns:
             return {"erro": "Coluna de atividades não disponível", "tipo": "erro"}
         
         try:
-            df_filtrado = self.df[self.df['s_ds_atividade'].notna()].copy()
+            df_filtrado = self.cubo.df[self.cubo.df['s_ds_atividade'].notna()]
             
             # Filtrar por contrato se especificado
             if contrato:
-                df_filtrado = df_filtrado[df_filtrado['s_nr_contrato'].str.contains(contrato, case=False, na=False)]
+                # Trecho procurado só nos contratos distintos; as linhas do cubo são filtradas por isin
+                termo = str(contrato).casefold()
+                contratos = df_filtrado['s_nr_contrato'].dropna().unique()
+                df_filtrado = df_filtrado[df_filtrado['s_nr_contrato'].isin([c for c in contratos if termo in str(c).casefold()])]
                 
                 if len(df_filtrado) == 0:
                     return {
@@ -2032,7 +2496,7 @@ class AgenteApontamentos:
                 contrato_nome = df_filtrado['s_nr_contrato'].iloc[0]
                 
                 # Atividades do contrato
-                atividades = df_filtrado.groupby('s_ds_atividade')['duracao_horas'].agg(['sum', 'count']).sort_values('sum', ascending=False)
+                atividades = agregar_cubo(df_filtrado, 's_ds_atividade')[['sum', 'count']]
                 
                 resposta = f"📋 **Contrato:** {contrato_nome}\n\n"
                 resposta += f"🎯 **Atividades do Contrato:**\n\n"
@@ -2057,8 +2521,8 @@ class AgenteApontamentos:
                 }
             else:
                 # Distribuição geral por contrato
-                distribuicao = df_filtrado.groupby(['s_nr_contrato', 's_ds_atividade'])['duracao_horas'].sum().reset_index()
-                top_contratos = df_filtrado.groupby('s_nr_contrato')['duracao_horas'].sum().sort_values(ascending=False).head(5)
+                distribuicao = df_filtrado.groupby(['s_nr_contrato', 's_ds_atividade'], observed=True)['duracao_horas'].sum().reset_index()
+                top_contratos = df_filtrado.groupby('s_nr_contrato', observed=True)['duracao_horas'].sum().sort_values(ascending=False).head(5)
                 
                 resposta = f"📊 **Distribuição de Atividades por Contrato**\n\n"
                 resposta += "🏆 **Top 5 Contratos (por horas):**\n\n"
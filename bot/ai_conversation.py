@@ -6,18 +6,62 @@ Usa Azure OpenAI ou OpenAI para interpretação inteligente
 
 import os
 import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 import pandas as pd
 
 try:
-    from openai import AzureOpenAI, OpenAI
+    from openai import AzureOpenAI, OpenAI, AsyncAzureOpenAI, AsyncOpenAI
     OPENAI_AVAILABLE = True
 except ImportError:
     OPENAI_AVAILABLE = False
     print("⚠️ openai não instalado. Execute: pip install openai")
 
 
+# Pool limitado para o trabalho síncrono (pandas) fora do event loop do uvicorn
+EXECUTOR_FERRAMENTAS = ThreadPoolExecutor(
+    max_workers=int(os.getenv("IA_MAX_THREADS", "4")),
+    thread_name_prefix="ferramentas"
+)
+
+# Funções que já retornam formatação pronta: a resposta vai direto ao usuário
+# (evita que a IA junte itens de lista na mesma linha)
+FUNCOES_DIRETAS = [
+    'listar_contratos',
+    'recursos_por_contrato',
+    'ranking_funcionarios',
+    'detalhar_apontamentos_por_dia',
+    'consultar_periodo',
+    'horas_esperadas_colaborador',
+    'verificar_saidas_esquecidas',
+    'contratos_por_recurso'
+]
+
+
+# Rodadas máximas de chamadas de ferramenta antes de encerrar a resposta
+MAX_RODADAS_FERRAMENTAS = 3
+
+# Tokens (estimados) de histórico enviados em cada chamada
+TOKENS_HISTORICO_PROMPT = int(os.getenv("IA_TOKENS_HISTORICO", "1000"))
+
+
+async def executar_em_thread(funcao, *args):
+    """
+    Executa uma função síncrona no pool de ferramentas sem bloquear o event loop
+    
+    Args:
+        funcao: Função síncrona (consultas pandas do agente)
+        *args: Argumentos posicionais
+    
+    Returns:
+        Retorno da função
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(EXECUTOR_FERRAMENTAS, funcao, *args)
+
+
 def _serializar_para_json(obj):
     """
     Converte objetos não-serializáveis para JSON
@@ -33,6 +77,10 @@ def _serializar_para_json(obj):
         return obj.isoformat()
     return str(obj)  # fallback: converter para string
 
+from bot.ferramentas_ia import gerar_ferramentas, executar_ferramenta
+from bot.cache_semantico import cache_semantico_padrao, palavras_de_nomes
+from bot.session_store import selecionar_historico
+
 # Importar SessionManager
 try:
     from bot.session_manager import SessionManager
@@ -57,9 +105,21 @@ class ConversacaoIA:
         """
         self.agente = agente_apontamentos
         self.historico_conversas = {}  # Fallback: {user_id: [mensagens]}
+        
+        # Contexto dos dados para o prompt: (versao_dados, texto)
+        self._contexto_cache = None
+        
         self.client = None
+        self.client_async = None
         self.model = None
         
+        # Schemas de function calling gerados das assinaturas do agente
+        self.ferramentas = gerar_ferramentas(self.agente)
+        
+        # Cache semântico: perguntas equivalentes reaproveitam a decisão de ferramentas
+        self._nomes_cache = None
+        self.cache_semantico = cache_semantico_padrao(self._palavras_nomes)
+        
         # Inicializar SessionManager
         if SESSION_MANAGER_AVAILABLE:
             self.session_manager = SessionManager()
@@ -89,6 +149,11 @@ class ConversacaoIA:
                     api_version="2024-02-15-preview",
                     azure_endpoint=azure_endpoint
                 )
+                self.client_async = AsyncAzureOpenAI(
+                    api_key=azure_key,
+                    api_version="2024-02-15-preview",
+                    azure_endpoint=azure_endpoint
+                )
                 self.model = azure_deployment
                 print(f"✅ Azure OpenAI configurado - modelo: {azure_deployment}", flush=True)
                 return
@@ -99,6 +164,7 @@ class ConversacaoIA:
             
             if openai_key:
                 self.client = OpenAI(api_key=openai_key)
+                self.client_async = AsyncOpenAI(api_key=openai_key)
                 self.model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
                 print(f"✅ OpenAI configurado - modelo: {self.model}", flush=True)
                 return
@@ -109,11 +175,27 @@ class ConversacaoIA:
             print(f"⚠️ Erro ao configurar OpenAI: {e}", flush=True)
     
     def _obter_contexto_dados(self) -> str:
-        """Prepara contexto sobre os dados disponíveis"""
-        if self.agente.df is None:
+        """
+        Contexto sobre os dados disponíveis, calculado uma vez por versão do dataset
+        
+        Os dados só mudam numa recarga (agente.versao_dados), então o bloco é
+        reaproveitado por todas as mensagens até a próxima carga.
+        """
+        # Estado lido uma vez: df, cubo e versão da mesma carga
+        estado = self.agente.estado
+        if estado.df is None:
             return "Dados não disponíveis no momento."
         
-        df = self.agente.df
+        cache = self._contexto_cache
+        if cache is not None and cache[0] == estado.versao:
+            return cache[1]
+        
+        contexto = self._calcular_contexto_dados(estado.df, estado.cubo)
+        self._contexto_cache = (estado.versao, contexto)
+        return contexto
+    
+    def _calcular_contexto_dados(self, df, cubo=None) -> str:
+        """Prepara contexto sobre os dados disponíveis"""
         
         # Estatísticas básicas
         total_registros = len(df)
@@ -124,8 +206,9 @@ class ConversacaoIA:
         data_min = df['data'].min() if 'data' in df.columns else None
         data_max = df['data'].max() if 'data' in df.columns else None
         
-        # Top usuários
-        top_usuarios = df.groupby('s_nm_recurso')['duracao_horas'].sum().nlargest(5)
+        # Top usuários (pelo cubo diário, quando disponível)
+        base = cubo.df if cubo is not None and 's_nm_recurso' in cubo.df.columns else df
+        top_usuarios = base.groupby('s_nm_recurso', observed=True)['duracao_horas'].sum().nlargest(5)
         
         contexto = f"""
 CONTEXTO DOS DADOS DE APONTAMENTOS:
@@ -218,97 +301,31 @@ Total: 270h
 
 **FERRAMENTAS DISPONÍVEIS:**
 
-Quando precisar de dados específicos, use as ferramentas abaixo. Você pode:
-- Combinar múltiplas ferramentas para análises complexas
+Quando precisar de dados específicos, chame as ferramentas (function calling) disponíveis. Você pode:
+- Chamar várias ferramentas na mesma resposta quando a pergunta envolver mais de um dado (elas rodam em paralelo)
 - Interpretar livremente os resultados
 - Adicionar contexto e insights aos dados retornados
 
-Ferramentas:
-- duracao_media_geral(): Média geral de horas
-- duracao_media_usuario(nome): Média de um usuário específico
-- apontamentos_hoje(usuario): Apontamentos de hoje
-- ranking_funcionarios(): Top funcionários por horas
-- total_horas_usuario(nome): Total de horas de um usuário
-- identificar_outliers(): Apontamentos fora do padrão
-- resumo_semanal(usuario): Resumo da semana
-- comparar_periodos(): Comparar semanas
-- consultar_periodo(data_inicio, data_fim, usuario): Consulta por período de datas com RESUMO agregado (formato: DD/MM/YYYY)
-- detalhar_apontamentos_por_dia(data_inicio, data_fim, usuario): Detalha apontamentos DIA A DIA no período (formato: DD/MM/YYYY)
-- contar_dias_uteis_periodo(data_inicio, data_fim): Conta quantos dias úteis existem no período (formato: DD/MM/YYYY)
-- calcular_horas_esperadas_periodo(data_inicio, data_fim, horas_por_dia=8.0): Calcula horas esperadas (brutas e líquidas) no período
-- dias_nao_apontados(data_inicio, data_fim, usuario): Identifica dias úteis sem apontamento (todos ou usuário específico)
-- listar_contratos(): Lista todos os contratos com apontamentos
-- recursos_por_contrato(contrato): Lista recursos que trabalham em um contrato específico
-
-Para usar uma ferramenta, responda no formato:
-FERRAMENTA: nome_da_funcao(parametros)
-
-**EXEMPLOS DE USO:**
-
 Você tem LIBERDADE para:
-- Responder diretamente perguntas simples sobre contexto geral
-- Pedir ferramentas quando precisar de dados específicos
+- Responder diretamente perguntas simples sobre contexto geral (sem chamar ferramentas)
+- Chamar ferramentas quando precisar de dados específicos
 - Combinar dados de múltiplas ferramentas
 - Adicionar interpretações e insights
 
-Exemplos:
-
-User: "oi, tudo bem?"
-Assistant: Olá! 👋 Tudo ótimo por aqui! Sou o assistente de apontamentos. Posso te ajudar a consultar horas trabalhadas, contratos, recursos e muito mais. O que você gostaria de saber?
-
-User: "quantas horas eu trabalhei?"
-Assistant: FERRAMENTA: total_horas_usuario(Usuario Nome)
-
-User: "me mostra dados de setembro"
-Assistant: Claro! Para te dar uma visão completa de setembro, vou buscar os dados. FERRAMENTA: consultar_periodo(data_inicio="01/09/2025", data_fim="30/09/2025", usuario=None)
-
-User: "quantos dias úteis tem em setembro?"
-Assistant: FERRAMENTA: contar_dias_uteis_periodo(data_inicio="01/09/2025", data_fim="30/09/2025")
-
-User: "quantas horas deveria fazer em setembro?"
-Assistant: FERRAMENTA: calcular_horas_esperadas_periodo(data_inicio="01/09/2025", data_fim="30/09/2025", horas_por_dia=8.0)
-
-User: "quem não apontou em setembro?"
-Assistant: FERRAMENTA: dias_nao_apontados(data_inicio="01/09/2025", data_fim="30/09/2025", usuario=None)
-
-User: "quais contratos temos?"
-Assistant: FERRAMENTA: listar_contratos()
-
-User: "quem trabalha no contrato 8446?"
-Assistant: FERRAMENTA: recursos_por_contrato(contrato="8446.0")
-
-User: "quantas pessoas apontaram no contrato 7873?"
-Assistant: FERRAMENTA: recursos_por_contrato(contrato="7873.0")
-
-User: "quem trabalha no contrato E0220303?"
-Assistant: FERRAMENTA: recursos_por_contrato(contrato="E0220303")
-
-User: "quais são os apontamentos do recurso RECURSO_1709652440?"
-Assistant: FERRAMENTA: consultar_periodo(data_inicio="01/01/2025", data_fim="31/12/2025", usuario="RECURSO_1709652440")
-
-User: "quantas horas o recurso RECURSO_1709652440 trabalhou?"
-Assistant: FERRAMENTA: total_horas_usuario(usuario="RECURSO_1709652440")
-
-User: "apontamentos do recurso RECURSO_1709652440 por dia?"
-Assistant: FERRAMENTA: detalhar_apontamentos_por_dia(data_inicio="01/01/2025", data_fim="31/12/2025", usuario="RECURSO_1709652440")
-
-User: "abra os apontamentos do recurso RECURSO_1709652440 por dia?"
-Assistant: FERRAMENTA: detalhar_apontamentos_por_dia(data_inicio="01/01/2025", data_fim="31/12/2025", usuario="RECURSO_1709652440")
-
-User: "quantos apontamentos temos de 1/11 a 15/11?"
-Assistant: FERRAMENTA: consultar_periodo(data_inicio="01/11/2025", data_fim="15/11/2025", usuario=None)
-
-User: "quais são os apontamentos de novembro?"
-Assistant: FERRAMENTA: consultar_periodo(data_inicio="01/11/2025", data_fim="30/11/2025", usuario=None)
-
-User: "quem apontou no período de 10/10/2025 a 10/11/2025?"
-Assistant: FERRAMENTA: consultar_periodo(data_inicio="10/10/2025", data_fim="10/11/2025", usuario=None)
-
-User: "pode indicar quem apontou no período de 10/10/2025 a 10/11/2025 - visão resumida"
-Assistant: FERRAMENTA: consultar_periodo(data_inicio="10/10/2025", data_fim="10/11/2025", usuario=None)
-
-User: "mostre quem trabalhou entre 01/09 e 30/09"
-Assistant: FERRAMENTA: consultar_periodo(data_inicio="01/09/2025", data_fim="30/09/2025", usuario=None)
+Exemplos de escolha de ferramenta:
+- "oi, tudo bem?" → responder direto, sem ferramenta
+- "quantas horas eu trabalhei?" → total_horas_usuario (sem usuario: usa quem perguntou)
+- "me mostra dados de setembro" → consultar_periodo(data_inicio="01/09/2025", data_fim="30/09/2025")
+- "quantos dias úteis tem em setembro?" → contar_dias_uteis_periodo(data_inicio="01/09/2025", data_fim="30/09/2025")
+- "quantas horas deveria fazer em setembro?" → calcular_horas_esperadas_periodo(data_inicio="01/09/2025", data_fim="30/09/2025", horas_por_dia=8.0)
+- "quem não apontou em setembro?" → dias_nao_apontados(data_inicio="01/09/2025", data_fim="30/09/2025")
+- "quais contratos temos?" → listar_contratos()
+- "quem trabalha no contrato 8446?" → recursos_por_contrato(contrato="8446.0")
+- "quem trabalha no contrato E0220303?" → recursos_por_contrato(contrato="E0220303")
+- "quais são os apontamentos do recurso RECURSO_1709652440?" → consultar_periodo(data_inicio="01/01/2025", data_fim="31/12/2025", usuario="RECURSO_1709652440")
+- "apontamentos do recurso RECURSO_1709652440 por dia?" → detalhar_apontamentos_por_dia(data_inicio="01/01/2025", data_fim="31/12/2025", usuario="RECURSO_1709652440")
+- "quem apontou no período de 10/10/2025 a 10/11/2025?" → consultar_periodo(data_inicio="10/10/2025", data_fim="10/11/2025")
+- "dias úteis e horas esperadas de setembro" → contar_dias_uteis_periodo e calcular_horas_esperadas_periodo na mesma resposta
 
 **IMPORTANTE:** 
 - Você pode responder diretamente perguntas conversacionais simples
@@ -319,150 +336,146 @@ Assistant: FERRAMENTA: consultar_periodo(data_inicio="01/09/2025", data_fim="30/
 - Se o ano não for mencionado, assumir 2025
 - Seja proativo: se a pergunta for vaga, sugira opções ou faça perguntas de esclarecimento"""
     
-    def _extrair_ferramenta(self, resposta_ia: str) -> Optional[Tuple[str, Dict]]:
+    def _executar_ferramenta(self, nome: str, argumentos, usuario: str) -> Dict:
+        """Executa função do agente (argumentos em dict ou JSON da IA)"""
+        return executar_ferramenta(self.agente, nome, argumentos, usuario)
+    
+    def _preparar_mensagens(self, mensagem: str, usuario: str, conversation_id: str = None) -> Tuple[List[Dict], List]:
         """
-        Extrai chamada de ferramenta da resposta da IA
+        Monta as mensagens para a IA (prompt do sistema + histórico + mensagem atual)
         
         Returns:
-            (nome_funcao, parametros) ou None
+            (mensagens, histórico fallback do usuário)
         """
-        if "FERRAMENTA:" not in resposta_ia:
-            return None
+        # Obter histórico da sessão
+        if self.session_manager and conversation_id:
+            # Usar SessionManager para histórico isolado
+            historico = self.session_manager.get_session_history(conversation_id)
+        else:
+            # Fallback: histórico global por usuário
+            if usuario not in self.historico_conversas:
+                self.historico_conversas[usuario] = []
+            historico = self.historico_conversas[usuario]
         
-        try:
-            # Extrair linha com FERRAMENTA:
-            for linha in resposta_ia.split('\n'):
-                if "FERRAMENTA:" in linha:
-                    chamada = linha.split("FERRAMENTA:")[1].strip()
-                    
-                    # Parse: nome_funcao(param1, param2) ou nome_funcao(key=value, key2=value2)
-                    if '(' in chamada:
-                        nome = chamada.split('(')[0].strip()
-                        params_str = chamada.split('(')[1].split(')')[0]
-                        
-                        # Converter para dict
-                        params = {}
-                        if params_str.strip():
-                            # Verificar se tem parâmetros nomeados (key=value)
-                            if '=' in params_str:
-                                # Parse parâmetros nomeados: data_inicio="01/09", data_fim="30/09"
-                                for parte in params_str.split(','):
-                                    if '=' in parte:
-                                        chave, valor = parte.split('=', 1)
-                                        chave = chave.strip()
-                                        valor = valor.strip().strip('"\'')
-                                        params[chave] = valor
-                            else:
-                                # Parâmetro simples único
-                                params['arg'] = params_str.strip().strip('"\'')
-                        
-                        return (nome, params)
-            
-        except Exception as e:
-            print(f"⚠️ Erro ao extrair ferramenta: {e}")
+        # Construir mensagens
+        mensagens = [
+            {"role": "system", "content": self._criar_prompt_sistema()}
+        ]
+        
+        # Adicionar histórico recente dentro do orçamento de tokens - remover timestamp para OpenAI
+        for msg in selecionar_historico(historico, TOKENS_HISTORICO_PROMPT):
+            mensagens.append({
+                "role": msg.get("role"),
+                "content": msg.get("content")
+            })
+        
+        # Adicionar mensagem atual
+        mensagens.append({"role": "user", "content": f"[Usuário: {usuario}] {mensagem}"})
         
-        return None
+        return mensagens, historico
     
-    def _executar_ferramenta(self, nome: str, params: Dict, usuario: str) -> Dict:
-        """Executa função do agente"""
-        try:
-            if nome == "duracao_media_geral":
-                return self.agente.duracao_media_geral()
-            
-            elif nome == "duracao_media_usuario":
-                user = params.get('arg', usuario)
-                return self.agente.duracao_media_usuario(user)
-            
-            elif nome == "apontamentos_hoje":
-                return self.agente.apontamentos_hoje(usuario)
-            
-            elif nome == "ranking_funcionarios":
-                return self.agente.ranking_funcionarios()
-            
-            elif nome == "total_horas_usuario":
-                user = params.get('arg', usuario)
-                return self.agente.total_horas_usuario(user)
-            
-            elif nome == "identificar_outliers":
-                return self.agente.identificar_outliers()
-            
-            elif nome == "resumo_semanal":
-                return self.agente.resumo_semanal(usuario)
-            
-            elif nome == "comparar_periodos":
-                return self.agente.comparar_periodos()
-            
-            elif nome == "consultar_periodo":
-                # Extrair data_inicio, data_fim e usuário dos params
-                data_inicio = params.get('data_inicio', '')
-                data_fim = params.get('data_fim', '')
-                user_param = params.get('usuario', usuario)
-                # Tratar caso onde IA passa string "None" ao invés de None
-                if user_param == 'None' or user_param == 'null':
-                    user = None
-                elif user_param:
-                    user = user_param
-                else:
-                    user = None
-                return self.agente.consultar_periodo(data_inicio, data_fim, user)
-            
-            elif nome == "detalhar_apontamentos_por_dia":
-                # Detalhar apontamentos dia a dia
-                data_inicio = params.get('data_inicio', '')
-                data_fim = params.get('data_fim', '')
-                user_param = params.get('usuario', usuario)
-                # Tratar caso onde IA passa string "None" ao invés de None
-                if user_param == 'None' or user_param == 'null':
-                    user = None
-                elif user_param:
-                    user = user_param
-                else:
-                    user = None
-                return self.agente.detalhar_apontamentos_por_dia(data_inicio, data_fim, user)
-            
-            elif nome == "contar_dias_uteis_periodo":
-                # Contar dias úteis no período
-                data_inicio = params.get('data_inicio', '')
-                data_fim = params.get('data_fim', '')
-                return self.agente.contar_dias_uteis_periodo(data_inicio, data_fim)
-            
-            elif nome == "calcular_horas_esperadas_periodo":
-                # Calcular horas esperadas no período
-                data_inicio = params.get('data_inicio', '')
-                data_fim = params.get('data_fim', '')
-                horas_por_dia = float(params.get('horas_por_dia', 8.0))
-                return self.agente.calcular_horas_esperadas_periodo(data_inicio, data_fim, horas_por_dia)
-            
-            elif nome == "dias_nao_apontados":
-                # Identificar dias não apontados
-                data_inicio = params.get('data_inicio', '')
-                data_fim = params.get('data_fim', '')
-                user_param = params.get('usuario', None)
-                # Tratar caso onde IA passa string "None" ao invés de None
-                if user_param == 'None' or user_param == 'null' or user_param == '':
-                    user = None
-                elif user_param:
-                    user = user_param
-                else:
-                    user = None
-                return self.agente.dias_nao_apontados(data_inicio, data_fim, user)
-            
-            elif nome == "listar_contratos":
-                return self.agente.listar_contratos()
-            
-            elif nome == "recursos_por_contrato":
-                contrato = params.get('contrato') or params.get('arg', '')
-                return self.agente.recursos_por_contrato(contrato)
-            
-            else:
-                return {"erro": f"Ferramenta '{nome}' não encontrada"}
+    def _mensagem_resultado_ferramenta(self, chamada_id: str, resultado: Dict) -> Dict:
+        """Mensagem role=tool que devolve o resultado de uma chamada para a IA formatar"""
+        return {
+            "role": "tool",
+            "tool_call_id": chamada_id,
+            "content": json.dumps(resultado, default=_serializar_para_json, ensure_ascii=False)
+        }
+    
+    def _mensagem_chamadas(self, conteudo: Optional[str], chamadas: List[Dict]) -> Dict:
+        """Mensagem do assistente com as chamadas de ferramenta (formato OpenAI)"""
+        return {
+            "role": "assistant",
+            "content": conteudo or None,
+            "tool_calls": [
+                {
+                    "id": chamada["id"],
+                    "type": "function",
+                    "function": {"name": chamada["nome"], "arguments": chamada["argumentos"]}
+                }
+                for chamada in chamadas
+            ]
+        }
+    
+    def _parametros_completion(self, mensagens: List[Dict], com_resultados: bool) -> Dict:
+        """Parâmetros comuns das chamadas ao modelo"""
+        parametros = {
+            "model": self.model,
+            "messages": mensagens,
+            "temperature": 0.7,
+            # Resposta formatada a partir de resultados pode ser longa
+            "max_tokens": 4000 if com_resultados else 500
+        }
+        if self.ferramentas:
+            parametros["tools"] = self.ferramentas
+            parametros["tool_choice"] = "auto"
+        return parametros
+    
+    def _buscar_decisao(self, mensagem: str, usuario: str) -> Optional[List[Dict]]:
+        """Chamadas de ferramenta de uma pergunta equivalente já respondida (cache semântico)"""
+        if not self.cache_semantico:
+            return None
+        return self.cache_semantico.buscar(mensagem, usuario)
+    
+    def _guardar_decisao(self, mensagem: str, usuario: str, chamadas: List[Dict], resultados: List[Dict]):
+        """Guarda a decisão da IA no cache semântico (só se todas as ferramentas funcionaram)"""
+        if self.cache_semantico and not any('erro' in resultado for resultado in resultados):
+            self.cache_semantico.guardar(mensagem, usuario, chamadas)
+    
+    def _palavras_nomes(self) -> frozenset:
+        """Palavras dos nomes de recursos, recalculadas a cada versão do dataset"""
+        versao = getattr(self.agente, 'versao_dados', None)
+        if self._nomes_cache is None or self._nomes_cache[0] != versao:
+            indice = getattr(self.agente, 'indice_recursos', None)
+            self._nomes_cache = (versao, palavras_de_nomes(indice.chaves) if indice is not None else frozenset())
+        return self._nomes_cache[1]
+    
+    def _resposta_direta(self, chamadas: List[Dict], resultados: List[Dict]) -> Optional[str]:
+        """
+        Resposta sem reformatação quando todas as ferramentas já retornam texto pronto
         
-        except Exception as e:
-            return {"erro": f"Erro ao executar ferramenta: {e}"}
+        Returns:
+            Texto das respostas concatenadas, ou None se a IA precisa formatar
+        """
+        if not all(chamada["nome"] in FUNCOES_DIRETAS for chamada in chamadas):
+            return None
+        return "\n\n".join(resultado.get('resposta', 'Sem dados') for resultado in resultados)
+    
+    def _resultado_principal(self, resultados: List[Dict]) -> Optional[Dict]:
+        """Resultado usado para escolher o card (com uma só ferramenta, o dela)"""
+        if len(resultados) == 1:
+            return resultados[0]
+        return {"tipo": "ia_conversacao"} if resultados else None
+    
+    def _registrar_historico(self, conversation_id: Optional[str], historico: List, mensagem: str, resposta: str):
+        """Atualiza histórico (SessionManager ou fallback)"""
+        if self.session_manager and conversation_id:
+            self.session_manager.add_messages_to_session(conversation_id, [
+                {"role": "user", "content": mensagem},
+                {"role": "assistant", "content": resposta}
+            ])
+        else:
+            historico.append({"role": "user", "content": mensagem})
+            historico.append({"role": "assistant", "content": resposta})
+    
+    def _montar_retorno(self, resposta_final: str, resultado: Optional[Dict] = None) -> Dict:
+        """Dict de retorno para o bot (com ou sem ferramenta executada)"""
+        if resultado is None:
+            return {
+                "resposta": resposta_final,
+                "tipo": "ia_conversacao",
+                "usa_ia": True
+            }
+        return {
+            "resposta": resposta_final,
+            "dados": resultado.get('dados', {}),
+            "tipo": resultado.get('tipo', 'ia_conversacao'),
+            "usa_ia": True
+        }
     
     def processar_mensagem(self, mensagem: str, usuario: str, conversation_id: str = None) -> Dict:
         """
-        Processa mensagem do usuário com IA
+        Processa mensagem do usuário com IA (versão síncrona, para scripts e testes)
         
         Args:
             mensagem: Mensagem do usuário
@@ -477,116 +490,148 @@ Assistant: FERRAMENTA: consultar_periodo(data_inicio="01/09/2025", data_fim="30/
             return self._fallback_processar(mensagem, usuario)
         
         try:
-            # Obter histórico da sessão
-            if self.session_manager and conversation_id:
-                # Usar SessionManager para histórico isolado
-                historico = self.session_manager.get_session_history(conversation_id)
-            else:
-                # Fallback: histórico global por usuário
-                if usuario not in self.historico_conversas:
-                    self.historico_conversas[usuario] = []
-                historico = self.historico_conversas[usuario]
-            
-            # Construir mensagens
-            mensagens = [
-                {"role": "system", "content": self._criar_prompt_sistema()}
-            ]
-            
-            # Adicionar histórico (últimas 5 mensagens) - remover timestamp para OpenAI
-            for msg in historico[-5:]:
-                mensagens.append({
-                    "role": msg.get("role"),
-                    "content": msg.get("content")
-                })
+            mensagens, historico = self._preparar_mensagens(mensagem, usuario, conversation_id)
+            resultados = []
+            decisao = self._buscar_decisao(mensagem, usuario)
             
-            # Adicionar mensagem atual
-            mensagens.append({"role": "user", "content": f"[Usuário: {usuario}] {mensagem}"})
+            for rodada in range(MAX_RODADAS_FERRAMENTAS):
+                if rodada == 0 and decisao:
+                    # Pergunta equivalente já resolvida: pula a chamada à IA
+                    texto, chamadas = None, decisao
+                else:
+                    response = self.client.chat.completions.create(
+                        **self._parametros_completion(mensagens, bool(resultados))
+                    )
+                    resposta = response.choices[0].message
+                    texto = resposta.content
+                    chamadas = [
+                        {"id": c.id, "nome": c.function.name, "argumentos": c.function.arguments}
+                        for c in resposta.tool_calls or []
+                    ]
+                
+                if not chamadas:
+                    resposta_final = texto or ''
+                    break
+                
+                # Várias chamadas da mesma rodada rodam em paralelo no pool
+                resultados = list(EXECUTOR_FERRAMENTAS.map(
+                    lambda chamada: self._executar_ferramenta(chamada["nome"], chamada["argumentos"], usuario),
+                    chamadas
+                ))
+                
+                if rodada == 0 and not decisao:
+                    self._guardar_decisao(mensagem, usuario, chamadas, resultados)
+                
+                resposta_final = self._resposta_direta(chamadas, resultados)
+                if resposta_final is not None:
+                    break
+                
+                mensagens.append(self._mensagem_chamadas(texto, chamadas))
+                for chamada, resultado in zip(chamadas, resultados):
+                    mensagens.append(self._mensagem_resultado_ferramenta(chamada["id"], resultado))
+            else:
+                resposta_final = resultados[0].get('resposta', 'Sem dados') if resultados else 'Sem dados'
             
-            # Chamar IA
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=mensagens,
-                temperature=0.7,
-                max_tokens=500
+            self._registrar_historico(conversation_id, historico, mensagem, resposta_final)
+            return self._montar_retorno(resposta_final, self._resultado_principal(resultados))
+        
+        except Exception as e:
+            print(f"❌ Erro ao processar com IA: {e}")
+            return self._fallback_processar(mensagem, usuario)
+    
+    async def _completion_stream(self, mensagens: List[Dict], com_resultados: bool) -> Tuple[str, List[Dict]]:
+        """
+        Chama o modelo em streaming, acumulando texto e chamadas de ferramenta
+        
+        Returns:
+            (texto, chamadas) - chamadas como dicts {id, nome, argumentos}
+        """
+        stream = await self.client_async.chat.completions.create(
+            stream=True,
+            **self._parametros_completion(mensagens, com_resultados)
+        )
+        
+        trechos = []
+        chamadas: Dict[int, Dict] = {}
+        async for chunk in stream:
+            if not chunk.choices:  # Azure envia chunks de filtro de conteúdo sem choices
+                continue
+            delta = chunk.choices[0].delta
+            if delta.content:
+                trechos.append(delta.content)
+            for parte in delta.tool_calls or []:
+                chamada = chamadas.setdefault(parte.index, {"id": "", "nome": "", "argumentos": ""})
+                if parte.id:
+                    chamada["id"] = parte.id
+                if parte.function and parte.function.name:
+                    chamada["nome"] += parte.function.name
+                if parte.function and parte.function.arguments:
+                    chamada["argumentos"] += parte.function.arguments
+        
+        return ''.join(trechos), [chamadas[i] for i in sorted(chamadas)]
+    
+    async def processar_mensagem_async(self, mensagem: str, usuario: str, conversation_id: str = None) -> Dict:
+        """
+        Processa mensagem do usuário com IA sem bloquear o event loop
+        
+        Chamadas à OpenAI usam o cliente assíncrono em streaming; montagem do
+        prompt e execução das ferramentas (pandas) rodam no pool limitado de
+        threads, com as chamadas de uma mesma rodada executadas em paralelo.
+        
+        Args:
+            mensagem: Mensagem do usuário
+            usuario: Nome do usuário
+            conversation_id: ID único da conversa (para isolamento de sessões)
+        
+        Returns:
+            Dict com resposta e dados
+        """
+        # Se IA não disponível, usar fallback
+        if not self.client_async:
+            return await executar_em_thread(self._fallback_processar, mensagem, usuario)
+        
+        try:
+            mensagens, historico = await executar_em_thread(
+                self._preparar_mensagens, mensagem, usuario, conversation_id
             )
+            resultados = []
+            decisao = await executar_em_thread(self._buscar_decisao, mensagem, usuario)
             
-            resposta_ia = response.choices[0].message.content
-            
-            # Verificar se IA solicitou ferramenta
-            ferramenta = self._extrair_ferramenta(resposta_ia)
-            
-            if ferramenta:
-                nome_func, params = ferramenta
+            for rodada in range(MAX_RODADAS_FERRAMENTAS):
+                if rodada == 0 and decisao:
+                    # Pergunta equivalente já resolvida: pula a chamada à IA
+                    texto, chamadas = None, decisao
+                else:
+                    texto, chamadas = await self._completion_stream(mensagens, bool(resultados))
                 
-                # Executar ferramenta
-                resultado = self._executar_ferramenta(nome_func, params, usuario)
+                if not chamadas:
+                    resposta_final = texto or ''
+                    break
                 
-                # Para funções que já retornam formatação perfeita, retornar DIRETO sem reformatar
-                # Isso evita que a IA junte itens de lista na mesma linha
-                funcoes_diretas = [
-                    'listar_contratos', 
-                    'recursos_por_contrato', 
-                    'ranking_funcionarios',
-                    'detalhar_apontamentos_por_dia',
-                    'consultar_periodo',
-                    'horas_esperadas_colaborador',
-                    'verificar_saidas_esquecidas',
-                    'contratos_por_recurso'
-                ]
+                resultados = await asyncio.gather(*(
+                    executar_em_thread(self._executar_ferramenta, chamada["nome"], chamada["argumentos"], usuario)
+                    for chamada in chamadas
+                ))
                 
-                if nome_func in funcoes_diretas:
-                    # Retornar direto - não deixar IA reformatar
-                    resposta_final = resultado.get('resposta', 'Sem dados')
-                else:
-                    # Pedir para IA formatar resposta (só para casos simples)
-                    mensagens.append({"role": "assistant", "content": resposta_ia})
-                    mensagens.append({
-                        "role": "user", 
-                        "content": f"RESULTADO DA FERRAMENTA: {json.dumps(resultado, default=_serializar_para_json, ensure_ascii=False)}\n\n🚨 IMPORTANTE: Se a resposta tiver itens de lista (linhas separadas), PRESERVE as quebras de linha. Não junte tudo na mesma linha.\n\nAgora apresente isso de forma amigável para o usuário."
-                    })
-                    
-                    response = self.client.chat.completions.create(
-                        model=self.model,
-                        messages=mensagens,
-                        temperature=0.7,
-                        max_tokens=4000
-                    )
-                    
-                    resposta_final = response.choices[0].message.content
+                if rodada == 0 and not decisao:
+                    await executar_em_thread(self._guardar_decisao, mensagem, usuario, chamadas, resultados)
                 
-                # Atualizar histórico (SessionManager ou fallback)
-                if self.session_manager and conversation_id:
-                    self.session_manager.add_message_to_session(conversation_id, "user", mensagem)
-                    self.session_manager.add_message_to_session(conversation_id, "assistant", resposta_final)
-                else:
-                    historico.append({"role": "user", "content": mensagem})
-                    historico.append({"role": "assistant", "content": resposta_final})
+                resposta_final = self._resposta_direta(chamadas, resultados)
+                if resposta_final is not None:
+                    break
                 
-                return {
-                    "resposta": resposta_final,
-                    "dados": resultado.get('dados', {}),
-                    "tipo": resultado.get('tipo', 'ia_conversacao'),
-                    "usa_ia": True
-                }
-            
+                mensagens.append(self._mensagem_chamadas(texto, chamadas))
+                for chamada, resultado in zip(chamadas, resultados):
+                    mensagens.append(self._mensagem_resultado_ferramenta(chamada["id"], resultado))
             else:
-                # Resposta direta da IA
-                if self.session_manager and conversation_id:
-                    self.session_manager.add_message_to_session(conversation_id, "user", mensagem)
-                    self.session_manager.add_message_to_session(conversation_id, "assistant", resposta_ia)
-                else:
-                    historico.append({"role": "user", "content": mensagem})
-                    historico.append({"role": "assistant", "content": resposta_ia})
-                
-                return {
-                    "resposta": resposta_ia,
-                    "tipo": "ia_conversacao",
-                    "usa_ia": True
-                }
+                resposta_final = resultados[0].get('resposta', 'Sem dados') if resultados else 'Sem dados'
+            
+            await executar_em_thread(self._registrar_historico, conversation_id, historico, mensagem, resposta_final)
+            return self._montar_retorno(resposta_final, self._resultado_principal(resultados))
         
         except Exception as e:
             print(f"❌ Erro ao processar com IA: {e}")
-            return self._fallback_processar(mensagem, usuario)
+            return await executar_em_thread(self._fallback_processar, mensagem, usuario)
     
     def _fallback_processar(self, mensagem: str, usuario: str) -> Dict:
         """Fallback quando IA não está disponível"""
@@ -5,12 +5,14 @@ Versão: 1.0.3 - Single Tenant com permissões configuradas
 """
 import sys
 import os
+import asyncio
+import hmac
 from pathlib import Path
 
 # Adicionar path do projeto ao PYTHONPATH para importar agente_apontamentos
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI, Request, HTTPException, Header
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
@@ -19,6 +21,7 @@ from botbuilder.schema import Activity, ActivityTypes, Attachment
 import logging
 
 from bot.config import config
+from bot.recarga_dados import RecarregadorDados
 from bot.adaptive_cards import (
     create_welcome_card,
     create_statistics_card,
@@ -104,9 +107,22 @@ async def lifespan(app: FastAPI):
         logger.error(f"❌ ERRO ao criar adapter: {e}", exc_info=True)
         adapter = None
     
+    # Limpeza periódica de sessões expiradas (uma tarefa por worker)
+    session_manager = getattr(conversacao_ia, 'session_manager', None)
+    if session_manager:
+        session_manager.start_cleanup_task()
+    
+    # Verificação periódica de CSV/snapshot/delta novos (troca os dados sem reiniciar)
+    if recarregador:
+        recarregador.start()
+    
     yield  # Aplicação roda aqui
     
     # Cleanup ao encerrar
+    if session_manager:
+        session_manager.stop_cleanup_task()
+    if recarregador:
+        recarregador.stop()
     logger.info(f"🛑 Worker {os.getpid()} encerrando")
 
 # Inicializar FastAPI com lifespan
@@ -140,6 +156,9 @@ def get_agente():
 
 agente = get_agente()
 
+# Recarga dos dados em background: o agente é o mesmo, só os dados são trocados
+recarregador = RecarregadorDados(agente, config.DATA_RELOAD_INTERVAL) if agente else None
+
 # Inicializar módulo de conversação com IA
 conversacao_ia = None
 if IA_DISPONIVEL and agente:
@@ -217,13 +236,16 @@ async def process_message(turn_context: TurnContext):
             # Usar IA conversacional se disponível
             if conversacao_ia:
                 try:
-                    resultado = conversacao_ia.processar_mensagem(user_message, user_name, conversation_id)
+                    # Indicador "digitando..." enquanto a IA e as ferramentas trabalham
+                    await turn_context.send_activity(Activity(type=ActivityTypes.typing))
+                    resultado = await conversacao_ia.processar_mensagem_async(user_message, user_name, conversation_id)
                     logger.info(f"✅ Processado com IA conversacional (sessão isolada)")
                 except Exception as e:
                     logger.error(f"❌ Erro na IA, usando fallback: {e}")
-                    resultado = agente.responder_pergunta(user_message, user_name)
+                    resultado = await asyncio.to_thread(agente.responder_pergunta, user_message, user_name)
             else:
-                resultado = agente.responder_pergunta(user_message, user_name)
+                # Consultas pandas fora do event loop
+                resultado = await asyncio.to_thread(agente.responder_pergunta, user_message, user_name)
             
             # Determinar tipo de card baseado no resultado
             card = None
@@ -393,10 +415,33 @@ async def health():
         "bot_configured": adapter is not None,
         "agente_available": agente is not None,
         "ia_conversacional_available": conversacao_ia is not None,
-        "environment": config.ENVIRONMENT
+        "environment": config.ENVIRONMENT,
+        "memoria": agente.estatisticas_memoria() if agente else {},
+        "cache_respostas": agente.cache_respostas.estatisticas() if agente else {},
+        "cache_semantico": conversacao_ia.cache_semantico.estatisticas() if conversacao_ia and conversacao_ia.cache_semantico else {},
+        "dados": recarregador.estatisticas() if recarregador else {}
     }
 
 
+@app.post("/admin/recarregar")
+async def recarregar_dados(completo: bool = False, x_admin_token: str = Header(default="")):
+    """
+    Verifica as fontes de dados e recarrega o que mudou (neste worker)
+    
+    Requer o header X-Admin-Token igual a ADMIN_TOKEN. Com ?completo=true
+    força a recarga completa mesmo sem mudança detectada.
+    """
+    if not config.ADMIN_TOKEN or not hmac.compare_digest(x_admin_token, config.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Token de administração inválido")
+    if not recarregador:
+        raise HTTPException(status_code=503, detail="Agente não disponível")
+    
+    resultado = await recarregador.verificar(forcar=completo)
+    if resultado["acao"] == "erro":
+        raise HTTPException(status_code=500, detail=resultado["erro"])
+    return resultado
+
+
 @app.get("/sessions")
 async def get_sessions():
     """
@@ -0,0 +1,402 @@
+"""
+🧭 CACHE SEMÂNTICO DE DECISÕES DA IA
+Guarda a decisão de ferramentas tomada pelo modelo para uma pergunta e a
+reaproveita em perguntas equivalentes (caixa, acentos, pontuação e formato
+de datas diferentes), sem chamar a IA novamente
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import unicodedata
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# Dimensão do embedding local (trigramas de caracteres com hashing)
+DIMENSAO_EMBEDDING = 512
+
+# Perguntas que dependem do histórico ("e em outubro?") não usam o cache
+PALAVRAS_CONTEXTO = {'isso', 'disso', 'dele', 'dela', 'deles', 'mesmo', 'mesma', 'anterior', 'acima', 'tambem'}
+
+MESES = {
+    'janeiro', 'fevereiro', 'marco', 'abril', 'maio', 'junho', 'julho',
+    'agosto', 'setembro', 'outubro', 'novembro', 'dezembro',
+    'hoje', 'ontem', 'semana', 'mes', 'ano'
+}
+
+# Termos de período relativo: o modelo converte em datas do dia em que respondeu
+TERMOS_RELATIVOS = {'hoje', 'ontem', 'amanha', 'semana', 'mes', 'ano', 'dias', 'ultimos', 'ultimas', 'passado', 'passada'}
+
+# Sem '.' entre dia e mês: "8.5 horas" é número, não data
+_PADRAO_DATA_ISO = re.compile(r'\b(\d{4})-(\d{1,2})-(\d{1,2})\b')
+_PADRAO_DATA = re.compile(r'\b(\d{1,2})[/-](\d{1,2})(?:[/-](\d{2,4}))?\b')
+_PADRAO_PLACEHOLDER = re.compile(r'<(?:data\d+|usuario)>')
+_PADRAO_QUALQUER_DATA = re.compile(f"{_PADRAO_DATA_ISO.pattern}|{_PADRAO_DATA.pattern}")
+_PADRAO_DATA_ARGUMENTO = re.compile(r'\d{4}-\d{1,2}-\d{1,2}|\d{1,2}/\d{1,2}/\d{2,4}')
+_PADRAO_NUMERO = re.compile(r'\b\d+(?:[.,]\d+)?\b')
+
+
+def remover_acentos(texto: str) -> str:
+    """Remove acentos (é → e, ç → c)"""
+    return ''.join(c for c in unicodedata.normalize('NFKD', texto) if not unicodedata.combining(c))
+
+
+def _canonizar_data(dia: str, mes: str, ano: Optional[str]) -> Optional[str]:
+    """DD/MM/YYYY (ou DD/MM quando a pergunta não traz o ano); None se dia ou mês forem inválidos"""
+    if not (1 <= int(dia) <= 31 and 1 <= int(mes) <= 12) or (ano and len(ano) == 3):
+        return None
+    if ano and len(ano) == 2:
+        ano = '20' + ano
+    data = f"{int(dia):02d}/{int(mes):02d}"
+    return f"{data}/{ano}" if ano else data
+
+
+def _datas_do_texto(texto: str, substituir: Callable[[str], str]) -> str:
+    """Troca cada data válida do texto (ISO ou DD/MM[/YYYY]) por substituir(data canônica)"""
+    def _trocar(encontrado):
+        # Uma passada só: os placeholders seguem a ordem das datas no texto
+        if encontrado.group(1):
+            data = _canonizar_data(encontrado.group(3), encontrado.group(2), encontrado.group(1))
+        else:
+            data = _canonizar_data(encontrado.group(4), encontrado.group(5), encontrado.group(6))
+        return substituir(data) if data else encontrado.group(0)
+
+    return _PADRAO_QUALQUER_DATA.sub(_trocar, texto)
+
+
+def _canonizar_argumento(valor: str) -> Optional[str]:
+    """Data canônica se o valor inteiro for uma data ("2025-09-01", "1/9/2025"), senão None"""
+    valor = valor.strip()
+    for padrao, grupos in ((_PADRAO_DATA_ISO, (3, 2, 1)), (_PADRAO_DATA, (1, 2, 3))):
+        encontrado = padrao.fullmatch(valor)
+        if encontrado:
+            return _canonizar_data(*(encontrado.group(g) for g in grupos))
+    return None
+
+
+def _numeros(texto: str) -> set:
+    """Números soltos do texto (8, 8.5, 8,5) como float"""
+    return {float(n.replace(',', '.')) for n in _PADRAO_NUMERO.findall(texto)}
+
+
+def normalizar_mensagem(mensagem: str, usuario: str = '') -> Tuple[str, List[str]]:
+    """
+    Forma canônica da pergunta para o cache
+
+    Minúsculas, sem acentos e pontuação, datas em DD/MM/YYYY trocadas por
+    <data1>, <data2>... e o nome de quem pergunta trocado por <usuario>.
+
+    Args:
+        mensagem: Texto enviado pelo usuário
+        usuario: Nome de quem pergunta
+
+    Returns:
+        (texto normalizado, datas canônicas na ordem dos placeholders)
+    """
+    texto = remover_acentos(mensagem.casefold())
+
+    if usuario:
+        texto = texto.replace(remover_acentos(usuario.casefold()), ' <usuario> ')
+
+    datas: List[str] = []
+
+    def _placeholder(data):
+        if data not in datas:
+            datas.append(data)
+        return f" <data{datas.index(data) + 1}> "
+
+    texto = _datas_do_texto(texto, _placeholder)
+    texto = re.sub(r'[^\w<>\s]', ' ', texto)
+    return ' '.join(texto.split()), datas
+
+
+def embedding_local(texto: str, dimensao: int = DIMENSAO_EMBEDDING) -> np.ndarray:
+    """
+    Embedding local: trigramas de caracteres com hashing, normalizado (norma 1)
+
+    Substituto sem dependências externas para um modelo de embeddings.
+    """
+    vetor = np.zeros(dimensao, dtype=np.float32)
+    for palavra in texto.split():
+        palavra = f" {palavra} "
+        for i in range(len(palavra) - 2):
+            vetor[zlib.crc32(palavra[i:i + 3].encode('utf-8')) % dimensao] += 1.0
+    norma = np.linalg.norm(vetor)
+    return vetor / norma if norma else vetor
+
+
+def _termos_criticos(texto: str, nomes: frozenset = frozenset()) -> frozenset:
+    """Termos que precisam coincidir exatamente (números, períodos, placeholders, códigos, nomes)"""
+    return frozenset(
+        t for t in texto.split()
+        if any(c.isdigit() for c in t) or t in MESES or t in nomes or _PADRAO_PLACEHOLDER.fullmatch(t)
+    )
+
+
+def palavras_de_nomes(nomes) -> frozenset:
+    """Palavras dos nomes de recursos (normalizadas, 3+ letras) para _termos_criticos"""
+    return frozenset(
+        palavra
+        for nome in nomes
+        for palavra in remover_acentos(str(nome).casefold()).split()
+        if len(palavra) > 2
+    )
+
+
+def _escapar(valor: str) -> str:
+    """Valor como aparece dentro de uma string JSON"""
+    return json.dumps(valor, ensure_ascii=False)[1:-1]
+
+
+class CacheSemantico:
+    """
+    Cache pergunta normalizada → chamadas de ferramenta decididas pela IA
+
+    Busca exata pela forma normalizada; se não houver, busca por similaridade
+    de cosseno dos embeddings entre perguntas com os mesmos termos críticos.
+    Argumentos são guardados com placeholders e preenchidos com as datas e o
+    usuário da nova pergunta.
+    """
+
+    def __init__(
+        self,
+        capacidade: int = 1000,
+        ttl_segundos: float = 86400,
+        similaridade_minima: float = 0.93,
+        embedder: Optional[Callable[[str], np.ndarray]] = None,
+        dimensao: int = DIMENSAO_EMBEDDING,
+        nomes: Optional[Callable[[], frozenset]] = None
+    ):
+        """
+        Inicializa o cache
+
+        Args:
+            capacidade: Máximo de perguntas guardadas (LRU acima disso)
+            ttl_segundos: Tempo de vida de cada decisão
+            similaridade_minima: Cosseno mínimo para considerar perguntas equivalentes
+            embedder: Função texto → vetor normalizado (padrão: embedding_local)
+            dimensao: Dimensão dos vetores do embedder
+            nomes: Função que retorna as palavras dos nomes de recursos
+                   (perguntas sobre pessoas diferentes nunca são equivalentes)
+        """
+        self.capacidade = capacidade
+        self.ttl_segundos = ttl_segundos
+        self.similaridade_minima = similaridade_minima
+        self.embedder = embedder or embedding_local
+        self.nomes = nomes or frozenset
+
+        # texto normalizado → (expira_em, termos críticos, slot, chamadas com placeholders)
+        self._itens: "OrderedDict[str, Tuple[float, frozenset, int, List[Dict]]]" = OrderedDict()
+        self._vetores = np.zeros((capacidade, dimensao), dtype=np.float32)
+        self._ocupados = np.zeros(capacidade, dtype=bool)
+        self._chave_slot: List[Optional[str]] = [None] * capacidade
+        self._lock = threading.Lock()
+
+        self.acertos_exatos = 0
+        self.acertos_similares = 0
+        self.falhas = 0
+
+    @staticmethod
+    def _usa_contexto(texto: str) -> bool:
+        """Perguntas curtas ou que retomam a conversa dependem do histórico"""
+        palavras = texto.split()
+        return len(palavras) < 3 or palavras[0] == 'e' or any(p in PALAVRAS_CONTEXTO for p in palavras)
+
+    @staticmethod
+    def _depende_da_data_atual(texto: str, modelos: List[Dict]) -> bool:
+        """
+        Período relativo ("hoje", "semana passada") resolvido em datas fixas nos argumentos
+
+        Essas datas valem só no dia da resposta: reaproveitar a decisão
+        amanhã consultaria o período errado.
+        """
+        if not TERMOS_RELATIVOS.intersection(texto.split()):
+            return False
+        return any(_PADRAO_DATA_ARGUMENTO.search(modelo["argumentos"]) for modelo in modelos)
+
+    def _remover(self, chave: str) -> None:
+        """Remove uma entrada e libera o slot do vetor (chamado com o lock)"""
+        _, _, slot, _ = self._itens.pop(chave)
+        self._ocupados[slot] = False
+        self._chave_slot[slot] = None
+
+    def buscar(self, mensagem: str, usuario: str) -> Optional[List[Dict]]:
+        """
+        Chamadas de ferramenta para a pergunta, se houver decisão equivalente
+
+        Args:
+            mensagem: Texto enviado pelo usuário
+            usuario: Nome de quem pergunta
+
+        Returns:
+            Lista de chamadas {id, nome, argumentos} prontas para executar, ou None
+        """
+        texto, datas = normalizar_mensagem(mensagem, usuario)
+        if self._usa_contexto(texto):
+            return None
+
+        agora = time.monotonic()
+        with self._lock:
+            item = self._itens.get(texto)
+            if item is not None and item[0] <= agora:
+                self._remover(texto)
+                item = None
+
+            if item is not None:
+                self._itens.move_to_end(texto)
+                self.acertos_exatos += 1
+                chamadas = item[3]
+            else:
+                chamadas = self._buscar_similar(texto, agora)
+                if chamadas is None:
+                    self.falhas += 1
+                    return None
+                self.acertos_similares += 1
+
+        return self._preencher(chamadas, datas, usuario)
+
+    def _buscar_similar(self, texto: str, agora: float) -> Optional[List[Dict]]:
+        """Vizinho mais próximo entre as perguntas com os mesmos termos críticos (chamado com o lock)"""
+        if not self._ocupados.any():
+            return None
+
+        similaridades = self._vetores @ self.embedder(texto)
+        similaridades[~self._ocupados] = -1.0
+        termos = _termos_criticos(texto, self.nomes())
+
+        for slot in np.argsort(similaridades)[::-1]:
+            if similaridades[slot] < self.similaridade_minima:
+                return None
+            chave = self._chave_slot[slot]
+            expira_em, termos_guardados, _, chamadas = self._itens[chave]
+            if expira_em > agora and termos_guardados == termos:
+                self._itens.move_to_end(chave)
+                return chamadas
+        return None
+
+    def guardar(self, mensagem: str, usuario: str, chamadas: List[Dict]) -> None:
+        """
+        Guarda a decisão da IA para a pergunta
+
+        Args:
+            mensagem: Texto enviado pelo usuário
+            usuario: Nome de quem pergunta
+            chamadas: Chamadas {id, nome, argumentos} decididas pela IA
+        """
+        texto, datas = normalizar_mensagem(mensagem, usuario)
+        if not chamadas or self._usa_contexto(texto):
+            return
+
+        modelos = self._modelos(chamadas, mensagem, usuario, datas)
+        if modelos is None or self._depende_da_data_atual(texto, modelos):
+            return
+
+        vetor = self.embedder(texto)
+        with self._lock:
+            if texto in self._itens:
+                self._remover(texto)
+            while len(self._itens) >= self.capacidade:
+                self._remover(next(iter(self._itens)))
+
+            slot = int(np.flatnonzero(~self._ocupados)[0])
+            self._vetores[slot] = vetor
+            self._ocupados[slot] = True
+            self._chave_slot[slot] = texto
+            self._itens[texto] = (time.monotonic() + self.ttl_segundos, _termos_criticos(texto, self.nomes()), slot, modelos)
+
+    @staticmethod
+    def _modelos(chamadas: List[Dict], mensagem: str, usuario: str, datas: List[str]) -> Optional[List[Dict]]:
+        """
+        Chamadas com as datas e o usuário da pergunta trocados por placeholders
+
+        Datas dos argumentos são comparadas já canônicas (o modelo pode mandar
+        "2025-09-01" para "1/9/2025"). Se sobrar data ou número da pergunta
+        fixo nos argumentos, ou se alguma data da pergunta não virou
+        placeholder, a decisão não é reaproveitável.
+
+        Returns:
+            Chamadas {nome, argumentos} com placeholders, ou None para não guardar
+        """
+        usadas = set()
+
+        def _trocar(valor):
+            if isinstance(valor, dict):
+                return {chave: _trocar(v) for chave, v in valor.items()}
+            if isinstance(valor, list):
+                return [_trocar(v) for v in valor]
+            if not isinstance(valor, str):
+                return valor
+            data = _canonizar_argumento(valor)
+            for n, data_pergunta in enumerate(datas, start=1):
+                if data == data_pergunta:
+                    usadas.add(n)
+                    return f"<data{n}>"
+                # Pergunta sem ano ("01/09"): o ano escolhido pelo modelo fica fixo
+                if data and len(data_pergunta) == 5 and data.startswith(data_pergunta + '/'):
+                    usadas.add(n)
+                    return f"<data{n}>{data[5:]}"
+            return valor.replace(usuario, "<usuario>") if usuario else valor
+
+        modelos = []
+        for chamada in chamadas:
+            try:
+                argumentos = json.loads(chamada["argumentos"] or '{}')
+            except (TypeError, ValueError):
+                return None
+            modelos.append({"nome": chamada["nome"], "argumentos": json.dumps(_trocar(argumentos), ensure_ascii=False)})
+
+        if len(usadas) < len(datas):
+            return None
+        texto_argumentos = ' '.join(modelo["argumentos"] for modelo in modelos)
+        if _PADRAO_DATA_ARGUMENTO.search(texto_argumentos):
+            return None
+        numeros_pergunta = _numeros(_datas_do_texto(mensagem.replace(usuario, ' ') if usuario else mensagem, lambda data: ' '))
+        if numeros_pergunta & _numeros(texto_argumentos):
+            return None
+        return modelos
+
+    @staticmethod
+    def _preencher(modelos: List[Dict], datas: List[str], usuario: str) -> Optional[List[Dict]]:
+        """Substitui os placeholders pelos valores da nova pergunta"""
+        chamadas = []
+        for i, modelo in enumerate(modelos):
+            argumentos = modelo["argumentos"]
+            for n, data in enumerate(datas, start=1):
+                argumentos = argumentos.replace(f"<data{n}>", data)
+            argumentos = argumentos.replace("<usuario>", _escapar(usuario))
+            if _PADRAO_PLACEHOLDER.search(argumentos):
+                return None
+            chamadas.append({"id": f"cache_{i}", "nome": modelo["nome"], "argumentos": argumentos})
+        return chamadas
+
+    def estatisticas(self) -> Dict:
+        """Contadores para monitoramento (exposto em /health)"""
+        with self._lock:
+            acertos = self.acertos_exatos + self.acertos_similares
+            total = acertos + self.falhas
+            return {
+                "itens": len(self._itens),
+                "capacidade": self.capacidade,
+                "acertos_exatos": self.acertos_exatos,
+                "acertos_similares": self.acertos_similares,
+                "falhas": self.falhas,
+                "taxa_acerto": round(acertos / total, 3) if total else 0.0
+            }
+
+
+def cache_semantico_padrao(nomes: Optional[Callable[[], frozenset]] = None) -> Optional[CacheSemantico]:
+    """Cria o cache com configuração do ambiente (IA_CACHE_SEMANTICO=false desativa)"""
+    if os.getenv('IA_CACHE_SEMANTICO', 'true').lower() in ('0', 'false', 'nao', 'não'):
+        return None
+    return CacheSemantico(
+        capacidade=int(os.getenv('IA_CACHE_TAMANHO', '1000')),
+        ttl_segundos=float(os.getenv('IA_CACHE_TTL', '86400')),
+        similaridade_minima=float(os.getenv('IA_CACHE_SIMILARIDADE', '0.93')),
+        nomes=nomes
+    )
@@ -39,6 +39,10 @@ class Config:
     REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
     REDIS_DB = int(os.getenv("REDIS_DB", 0))
     
+    # Recarga dos dados em background (0 desativa a verificação periódica)
+    DATA_RELOAD_INTERVAL = int(os.getenv("DATA_RELOAD_INTERVAL", 300))
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+    
     # Logging
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
     
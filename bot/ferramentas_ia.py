@@ -0,0 +1,187 @@
+"""
+🧰 FERRAMENTAS DA IA - FUNCTION CALLING
+Gera os schemas de ferramentas (OpenAI tools) a partir das assinaturas
+dos métodos do AgenteApontamentos e executa as chamadas estruturadas
+"""
+
+import inspect
+import json
+import re
+import typing
+from typing import Dict, List, Optional
+
+
+# Métodos do agente expostos à IA → descrição (None = primeira linha da docstring)
+FERRAMENTAS = {
+    'duracao_media_geral': "Média geral de horas por apontamento",
+    'duracao_media_usuario': "Média de horas por apontamento de um usuário específico",
+    'apontamentos_hoje': "Apontamentos de hoje de um usuário",
+    'ranking_funcionarios': "Top funcionários por horas trabalhadas",
+    'total_horas_usuario': "Total de horas de um usuário",
+    'identificar_outliers': "Apontamentos fora do padrão do próprio recurso e do contrato (opcional: período e quantidade)",
+    'resumo_semanal': "Resumo da semana de um usuário",
+    'comparar_periodos': "Compara horas da semana atual com a anterior",
+    'consultar_periodo': "Consulta por período de datas com RESUMO agregado (omita usuario para visão geral)",
+    'detalhar_apontamentos_por_dia': "Detalha apontamentos DIA A DIA no período (omita usuario para visão geral)",
+    'contar_dias_uteis_periodo': "Conta quantos dias úteis existem no período",
+    'calcular_horas_esperadas_periodo': "Calcula horas esperadas (brutas e líquidas) no período",
+    'dias_nao_apontados': "Identifica dias úteis sem apontamento (todos ou usuário específico)",
+    'listar_contratos': "Lista todos os contratos com apontamentos",
+    'recursos_por_contrato': "Lista recursos que trabalham em um contrato específico",
+    'contratos_por_recurso': None,
+    'horas_esperadas_colaborador': None,
+    'verificar_saidas_esquecidas': None,
+}
+
+# Parâmetros que identificam o usuário: se obrigatórios e omitidos, usa quem perguntou
+PARAMETROS_USUARIO = ('usuario', 'recurso', 'nome')
+
+# Valores que a IA às vezes envia como texto para dizer "sem valor"
+VALORES_NULOS = ('', 'None', 'none', 'null', 'NULL')
+
+_TIPOS_JSON = {str: 'string', int: 'integer', float: 'number', bool: 'boolean'}
+
+
+def _tipo_json(anotacao) -> Dict:
+    """Converte uma anotação de tipo Python em schema JSON (Optional[x] → x)"""
+    argumentos = [a for a in typing.get_args(anotacao) if a is not type(None)]
+    if typing.get_origin(anotacao) is typing.Union and len(argumentos) == 1:
+        anotacao = argumentos[0]
+
+    if typing.get_origin(anotacao) in (list, List):
+        itens = typing.get_args(anotacao)
+        return {"type": "array", "items": _tipo_json(itens[0]) if itens else {"type": "string"}}
+
+    return {"type": _TIPOS_JSON.get(anotacao, 'string')}
+
+
+def _descricoes_args(docstring: Optional[str]) -> Dict[str, str]:
+    """Extrai as descrições dos parâmetros da seção Args: da docstring"""
+    descricoes = {}
+    if not docstring or 'Args:' not in docstring:
+        return descricoes
+
+    secao = docstring.split('Args:', 1)[1].split('Returns:', 1)[0]
+    atual = None
+    for linha in secao.splitlines():
+        encontrado = re.match(r'\s*(\w+):\s*(.+)', linha)
+        if encontrado:
+            atual = encontrado.group(1)
+            descricoes[atual] = encontrado.group(2).strip()
+        elif atual and linha.strip():
+            descricoes[atual] += ' ' + linha.strip()
+    return descricoes
+
+
+def gerar_ferramentas(agente) -> List[Dict]:
+    """
+    Gera a lista de tools (formato OpenAI) a partir dos métodos do agente
+
+    Args:
+        agente: Instância do AgenteApontamentos
+
+    Returns:
+        Lista de schemas {"type": "function", "function": {...}}
+    """
+    ferramentas = []
+    for nome, descricao in FERRAMENTAS.items():
+        metodo = getattr(agente, nome, None)
+        if metodo is None:
+            continue
+
+        docstring = inspect.getdoc(metodo) or ''
+        descricoes = _descricoes_args(docstring)
+        propriedades = {}
+        obrigatorios = []
+
+        for parametro in inspect.signature(metodo).parameters.values():
+            schema = _tipo_json(parametro.annotation)
+            if parametro.name in descricoes:
+                schema["description"] = descricoes[parametro.name]
+            elif parametro.name.startswith('data_') or parametro.name in ('inicio', 'fim'):
+                schema["description"] = "Data no formato DD/MM/YYYY"
+            elif parametro.name in PARAMETROS_USUARIO:
+                schema["description"] = "Nome do recurso, completo ou parcial, com ou sem acento (omita para usar quem perguntou)"
+            propriedades[parametro.name] = schema
+
+            # Usuário obrigatório pode ser omitido: a execução usa quem perguntou
+            if parametro.default is inspect.Parameter.empty and parametro.name not in PARAMETROS_USUARIO:
+                obrigatorios.append(parametro.name)
+
+        ferramentas.append({
+            "type": "function",
+            "function": {
+                "name": nome,
+                "description": descricao or docstring.split('\n', 1)[0],
+                "parameters": {
+                    "type": "object",
+                    "properties": propriedades,
+                    "required": obrigatorios
+                }
+            }
+        })
+
+    return ferramentas
+
+
+def preparar_argumentos(metodo, argumentos: Dict, usuario: str) -> Dict:
+    """
+    Ajusta os argumentos enviados pela IA à assinatura do método
+
+    Descarta parâmetros desconhecidos, converte "None"/"null" em None,
+    converte números e preenche o usuário obrigatório com quem perguntou.
+
+    Args:
+        metodo: Método do agente
+        argumentos: Argumentos decodificados do JSON da IA
+        usuario: Nome de quem enviou a mensagem
+
+    Returns:
+        kwargs prontos para a chamada
+    """
+    kwargs = {}
+    for parametro in inspect.signature(metodo).parameters.values():
+        valor = argumentos.get(parametro.name)
+        if isinstance(valor, str) and valor.strip() in VALORES_NULOS:
+            valor = None
+
+        if valor is None:
+            if parametro.default is not inspect.Parameter.empty:
+                continue
+            if parametro.name in PARAMETROS_USUARIO:
+                valor = usuario
+        else:
+            tipo = _tipo_json(parametro.annotation)["type"]
+            if tipo == 'number':
+                valor = float(valor)
+            elif tipo == 'integer':
+                valor = int(valor)
+
+        kwargs[parametro.name] = valor
+    return kwargs
+
+
+def executar_ferramenta(agente, nome: str, argumentos, usuario: str) -> Dict:
+    """
+    Executa uma chamada de ferramenta no agente
+
+    Args:
+        agente: Instância do AgenteApontamentos
+        nome: Nome da ferramenta
+        argumentos: Dict ou texto JSON com os argumentos
+        usuario: Nome de quem enviou a mensagem
+
+    Returns:
+        Resultado do agente ou dict com "erro"
+    """
+    if nome not in FERRAMENTAS or not hasattr(agente, nome):
+        return {"erro": f"Ferramenta '{nome}' não encontrada"}
+
+    try:
+        if isinstance(argumentos, str):
+            argumentos = json.loads(argumentos) if argumentos.strip() else {}
+        metodo = getattr(agente, nome)
+        return metodo(**preparar_argumentos(metodo, argumentos or {}, usuario))
+
+    except Exception as e:
+        return {"erro": f"Erro ao executar ferramenta: {e}"}
@@ -0,0 +1,321 @@
+"""
+🔄 RECARGA DOS DADOS EM BACKGROUND
+Detecta CSV/snapshot novo (mtime do arquivo, ETag/Last-Modified da URL ou
+ETag do blob) e troca o dataset do agente sem reiniciar os workers
+"""
+
+import asyncio
+import contextlib
+import json
+import os
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from carga_dados import EXTENSAO_SNAPSHOT, limpar_datasets_mmap
+
+try:
+    from azure.storage.blob import BlobServiceClient
+    AZURE_STORAGE_AVAILABLE = True
+except ImportError:
+    AZURE_STORAGE_AVAILABLE = False
+
+# Trava entre processos (workers do gunicorn) para publicar o dataset mmap
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+
+# Pasta de dados local usada pelo agente
+RESULTADOS_DIR = Path(__file__).parent.parent / "resultados"
+
+# Fontes que alimentam só a atualização incremental (o resto exige recarga completa)
+FONTES_DELTA = ('delta_arquivo', 'delta_url', 'delta_blob')
+
+# Assinatura de fonte sem conteúdo (não configurada ou arquivo inexistente); None = sem resposta
+AUSENTE = ''
+
+
+def _assinatura_arquivo(caminho: Optional[Path]) -> Optional[str]:
+    """Nome + mtime + tamanho de um arquivo local (AUSENTE se não existir)"""
+    if caminho is None:
+        return AUSENTE
+    try:
+        info = Path(caminho).stat()
+    except OSError:
+        return AUSENTE
+    return f"{Path(caminho).name}:{info.st_mtime_ns}:{info.st_size}"
+
+
+def _mais_recente(*padroes: str) -> Optional[Path]:
+    """Arquivo mais recente em resultados/ para o primeiro padrão com resultado"""
+    for padrao in padroes:
+        arquivos = list(RESULTADOS_DIR.glob(padrao))
+        if arquivos:
+            return max(arquivos)
+    return None
+
+
+def _assinatura_url(url: Optional[str]) -> Optional[str]:
+    """ETag ou Last-Modified + tamanho via HEAD (None se indisponível)"""
+    if not url:
+        return AUSENTE
+    try:
+        import requests
+        response = requests.head(url, timeout=15, allow_redirects=True)
+        response.raise_for_status()
+    except Exception as e:
+        print(f"⚠️ Não foi possível verificar {url[:80]}: {e}", flush=True)
+        return None
+
+    cabecalhos = response.headers
+    marca = cabecalhos.get('ETag') or cabecalhos.get('Last-Modified')
+    if not marca:
+        return None
+    return f"{marca}:{cabecalhos.get('Content-Length', '')}"
+
+
+def _assinatura_blob(conn_str: Optional[str], container: str, blob: Optional[str]) -> Optional[str]:
+    """ETag do blob no Azure Storage (None se indisponível)"""
+    if not (conn_str and blob and AZURE_STORAGE_AVAILABLE):
+        return AUSENTE
+    try:
+        servico = BlobServiceClient.from_connection_string(conn_str)
+        propriedades = servico.get_container_client(container).get_blob_client(blob).get_blob_properties()
+        return f"{propriedades.etag}:{propriedades.last_modified}"
+    except Exception as e:
+        print(f"⚠️ Não foi possível verificar o blob {container}/{blob}: {e}", flush=True)
+        return None
+
+
+@contextlib.contextmanager
+def _trava_publicacao(base: str):
+    """Trava exclusiva entre workers no arquivo <base>.lock (sem fcntl, não trava)"""
+    if not FCNTL_AVAILABLE:
+        yield
+        return
+    with open(f"{base}.lock", 'a') as arquivo:
+        fcntl.flock(arquivo, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(arquivo, fcntl.LOCK_UN)
+
+
+def _ler_publicacao(caminho: Path) -> Dict:
+    """Registro do último dataset mmap publicado ({} se não houver)"""
+    try:
+        return json.loads(caminho.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def _gravar_publicacao(caminho: Path, registro: Dict) -> None:
+    """Grava o registro de publicação de forma atômica (temporário único + rename)"""
+    temporario = caminho.with_name(f"{caminho.name}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+    try:
+        temporario.write_text(json.dumps(registro), encoding='utf-8')
+        os.replace(temporario, caminho)
+    finally:
+        temporario.unlink(missing_ok=True)
+
+
+class RecarregadorDados:
+    """
+    Tarefa em background que mantém o dataset do agente atualizado
+
+    Mudou o delta → agente.atualizar_incremental(). Mudou o CSV/snapshot →
+    um agente novo é carregado em thread separada e o agente atual adota os
+    dados prontos (troca atômica, sem travar o event loop nem as consultas).
+    Cada worker verifica as fontes por conta própria; no modo mmap só o
+    primeiro a ver a mudança recarrega, os outros mapeiam o que ele publicou.
+    """
+
+    def __init__(self, agente, intervalo_segundos: int = 300):
+        """
+        Inicializa o recarregador
+
+        Args:
+            agente: AgenteApontamentos em uso pelo bot
+            intervalo_segundos: Intervalo entre verificações (0 = só sob demanda)
+        """
+        self.agente = agente
+        self.intervalo_segundos = intervalo_segundos
+        self._assinaturas: Optional[Dict[str, str]] = None
+        self._lock = asyncio.Lock()
+        self._task = None
+
+        self.recargas = 0
+        self.deltas = 0
+        self.ultima_verificacao = None
+        self.ultima_recarga = None
+        self.ultimo_erro = None
+
+    def assinaturas(self) -> Dict[str, str]:
+        """
+        Assinaturas atuais das fontes configuradas (faz I/O: chamar fora do event loop)
+
+        Fonte configurada que não respondeu (HEAD ou blob com erro) mantém a
+        assinatura anterior: uma falha passageira não apaga a referência nem
+        dispara recarga quando a fonte volta com o mesmo conteúdo.
+
+        Returns:
+            Dict fonte → assinatura (AUSENTE para fonte não configurada ou arquivo inexistente)
+        """
+        conn_str, container, blob_csv = self.agente._config_blob()
+        snapshot_path = os.getenv('SNAPSHOT_PATH')
+        blob_snapshot = os.getenv('BLOB_SNAPSHOT_NAME') or str(Path(blob_csv).with_suffix(EXTENSAO_SNAPSHOT))
+        delta_path = os.getenv('DELTA_PATH')
+
+        fontes = {
+            'snapshot_arquivo': _assinatura_arquivo(Path(snapshot_path) if snapshot_path else _mais_recente("dados_*" + EXTENSAO_SNAPSHOT)),
+            'snapshot_url': _assinatura_url(os.getenv('SNAPSHOT_URL')),
+            'snapshot_blob': _assinatura_blob(conn_str, container, blob_snapshot),
+            'csv_url': _assinatura_url(os.getenv('CSV_URL', 'https://multibeat.com.br/apontamentos/dados/dados_20251205_204254_separado.csv')),
+            'csv_blob': _assinatura_blob(conn_str, container, blob_csv),
+            'csv_arquivo': _assinatura_arquivo(_mais_recente("dados_anonimizados_decupado_*.csv", "dados_com_duracao_*.csv")),
+            'delta_arquivo': _assinatura_arquivo(Path(delta_path) if delta_path else None),
+            'delta_url': _assinatura_url(os.getenv('DELTA_URL')),
+            'delta_blob': _assinatura_blob(conn_str, container, os.getenv('BLOB_DELTA_NAME')),
+        }
+        anteriores = self._assinaturas or {}
+        for fonte, assinatura in fontes.items():
+            if assinatura is None:
+                fontes[fonte] = anteriores.get(fonte)
+        return {fonte: assinatura for fonte, assinatura in fontes.items() if assinatura is not None}
+
+    def _mudaram(self, atuais: Dict[str, str], delta: bool) -> bool:
+        """Alguma fonte (do delta ou da carga completa) presente nas duas verificações tem assinatura nova?"""
+        anteriores = self._assinaturas or {}
+        return any(
+            (fonte in FONTES_DELTA) == delta and fonte in anteriores and anteriores[fonte] != assinatura
+            for fonte, assinatura in atuais.items()
+        )
+
+    def _recarregar_completo(self, atuais: Optional[Dict[str, str]] = None, forcar: bool = False) -> bool:
+        """
+        Publica os dados novos no agente atual (roda em thread)
+
+        Sem mmap cada worker carrega um agente novo e adota os dados. No modo
+        mmap um worker por vez (trava em arquivo) confere o registro do
+        dataset publicado: se já corresponde às assinaturas atuais, só mapeia
+        o mesmo arquivo; senão monta o agente novo e registra o que publicou.
+
+        Args:
+            atuais: Assinaturas das fontes que motivaram a recarga
+            forcar: Se True, ignora o registro e recarrega das fontes
+        """
+        if not getattr(self.agente, 'modo_mmap', False):
+            return self.agente.adotar_dados(type(self.agente)())
+
+        fontes = {fonte: assinatura for fonte, assinatura in (atuais or {}).items() if fonte not in FONTES_DELTA}
+        base = self.agente.arquivo_mmap
+        registro = Path(f"{base}.publicado.json")
+
+        with _trava_publicacao(base):
+            publicado = _ler_publicacao(registro)
+            arquivo = publicado.get('arquivo')
+            if not forcar and fontes and publicado.get('fontes') == fontes and arquivo and Path(arquivo).exists():
+                return self.agente.carregar_dataset_publicado(arquivo)
+
+            novo = type(self.agente)()
+            if not self.agente.adotar_dados(novo):
+                return False
+            arquivo = novo.estado.arquivo_mmap
+            if arquivo:
+                _gravar_publicacao(registro, {'fontes': fontes, 'arquivo': arquivo})
+                limpar_datasets_mmap(base, [arquivo, publicado.get('arquivo')])
+        return True
+
+    async def verificar(self, forcar: bool = False) -> Dict:
+        """
+        Verifica as fontes e recarrega o que mudou
+
+        Na primeira verificação as assinaturas viram a referência (os dados
+        já foram carregados no import); só o delta é aplicado.
+
+        Args:
+            forcar: Se True, faz a recarga completa mesmo sem mudança detectada
+
+        Returns:
+            Dict com a ação executada e a versão dos dados
+        """
+        async with self._lock:
+            acao = "nenhuma"
+            try:
+                atuais = await asyncio.to_thread(self.assinaturas)
+                primeira = self._assinaturas is None
+
+                completo = forcar or self.agente.df is None or (not primeira and self._mudaram(atuais, delta=False))
+                if completo:
+                    if not await asyncio.to_thread(self._recarregar_completo, atuais, forcar):
+                        raise RuntimeError("recarga completa sem dados")
+                    self.recargas += 1
+                    self.ultima_recarga = datetime.now()
+                    acao = "recarga_completa"
+                    # Falha no delta a seguir não deve repetir a recarga completa
+                    self._assinaturas = {
+                        **{f: a for f, a in atuais.items() if f not in FONTES_DELTA},
+                        **{f: a for f, a in (self._assinaturas or {}).items() if f in FONTES_DELTA}
+                    }
+
+                # Após a recarga completa o delta é reaplicado (linhas repetidas são ignoradas)
+                if completo or primeira or self._mudaram(atuais, delta=True):
+                    if any(atuais.get(fonte) for fonte in FONTES_DELTA):
+                        resultado = await asyncio.to_thread(self.agente.atualizar_incremental)
+                        if 'erro' in resultado:
+                            raise RuntimeError(resultado['erro'])
+                        if resultado['novos'] or resultado['substituidos']:
+                            self.deltas += 1
+                            acao = "recarga_completa" if completo else "delta"
+
+                self._assinaturas = atuais
+                self.ultimo_erro = None
+
+            except Exception as e:
+                # Assinaturas não são atualizadas: a próxima verificação tenta de novo
+                self.ultimo_erro = str(e)
+                print(f"❌ Erro na recarga dos dados: {e}", flush=True)
+                return {"acao": "erro", "erro": str(e), "versao_dados": self.agente.versao_dados}
+
+            finally:
+                self.ultima_verificacao = datetime.now()
+
+            estado = self.agente.estado
+            return {"acao": acao, "versao_dados": estado.versao, "registros": len(estado.df)}
+
+    def start(self):
+        """Inicia a verificação periódica (uma tarefa por worker)"""
+        if self._task is None and self.intervalo_segundos > 0:
+            self._task = asyncio.get_running_loop().create_task(self._verificar_periodicamente())
+
+    def stop(self):
+        """Cancela a verificação periódica (encerramento do worker)"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _verificar_periodicamente(self):
+        """Laço da tarefa em background"""
+        while True:
+            # verificar() já trata os erros; o cancelamento encerra o laço
+            await self.verificar()
+            await asyncio.sleep(self.intervalo_segundos)
+
+    def estatisticas(self) -> Dict:
+        """Estado da recarga para monitoramento (exposto em /health)"""
+        estado = self.agente.estado
+        return {
+            "versao_dados": estado.versao,
+            "ultima_atualizacao": estado.ultima_atualizacao.isoformat() if estado.ultima_atualizacao else None,
+            "intervalo_segundos": self.intervalo_segundos,
+            "ultima_verificacao": self.ultima_verificacao.isoformat() if self.ultima_verificacao else None,
+            "ultima_recarga": self.ultima_recarga.isoformat() if self.ultima_recarga else None,
+            "recargas": self.recargas,
+            "deltas": self.deltas,
+            "fontes": sorted(fonte for fonte, assinatura in (self._assinaturas or {}).items() if assinatura),
+            "ultimo_erro": self.ultimo_erro
+        }
@@ -4,28 +4,40 @@ Isola contexto e histórico de cada usuário
 """
 
 from typing import Dict, List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime
 import asyncio
+import os
+
+from bot.session_store import SessionStore, criar_session_store
 
 
 class SessionManager:
     """
     Gerencia sessões isoladas por conversation_id
     Cada usuário tem seu próprio histórico e contexto
+    
+    O armazenamento fica no SessionStore configurado (memória, SQLite ou
+    Redis), então workers diferentes enxergam o mesmo histórico.
     """
     
-    def __init__(self, timeout_minutes: int = 30):
+    def __init__(self, timeout_minutes: int = 30, store: Optional[SessionStore] = None, max_sessions: Optional[int] = None):
         """
         Inicializa o gerenciador de sessões
         
         Args:
             timeout_minutes: Tempo para expirar sessão inativa (padrão: 30 min)
+            store: Backend de armazenamento (padrão: SESSION_BACKEND do ambiente)
+            max_sessions: Limite de sessões (padrão: SESSION_MAX ou 5000); acima dele
+                          as menos ativas são descartadas
         """
-        self.sessions: Dict[str, Dict] = {}
         self.timeout_minutes = timeout_minutes
+        self.store = store or criar_session_store(
+            ttl_segundos=timeout_minutes * 60,
+            max_sessoes=max_sessions or int(os.getenv('SESSION_MAX', '5000'))
+        )
         self._cleanup_task = None
         
-        # Limpeza automática será iniciada quando houver um loop de eventos
+        # Limpeza automática: start_cleanup_task() no lifespan do bot_api
     
     def get_or_create_session(self, conversation_id: str) -> Dict:
         """
@@ -37,20 +49,10 @@ class SessionManager:
         Returns:
             Dict com dados da sessão
         """
-        if conversation_id not in self.sessions:
-            self.sessions[conversation_id] = {
-                'historico': [],
-                'contexto': {},
-                'created_at': datetime.now(),
-                'last_activity': datetime.now(),
-                'message_count': 0
-            }
+        session = self.store.carregar(conversation_id)
+        if session['message_count'] == 0 and not session['historico']:
             print(f"✅ Nova sessão criada: {conversation_id[:20]}...")
-        else:
-            # Atualizar última atividade
-            self.sessions[conversation_id]['last_activity'] = datetime.now()
-        
-        return self.sessions[conversation_id]
+        return session
     
     def add_message_to_session(
         self, 
@@ -66,19 +68,17 @@ class SessionManager:
             role: 'user' ou 'assistant'
             content: Conteúdo da mensagem
         """
-        session = self.get_or_create_session(conversation_id)
-        
-        session['historico'].append({
-            'role': role,
-            'content': content,
-            'timestamp': datetime.now()
-        })
-        
-        session['message_count'] += 1
+        self.add_messages_to_session(conversation_id, [{'role': role, 'content': content}])
+    
+    def add_messages_to_session(self, conversation_id: str, mensagens: List[Dict]):
+        """
+        Adiciona várias mensagens de uma vez (uma ida ao backend)
         
-        # Limitar histórico (últimas 20 mensagens)
-        if len(session['historico']) > 20:
-            session['historico'] = session['historico'][-20:]
+        Args:
+            conversation_id: ID da conversa
+            mensagens: Lista de {'role', 'content'}
+        """
+        self.store.adicionar_mensagens(conversation_id, mensagens)
     
     def get_session_history(self, conversation_id: str) -> List[Dict]:
         """
@@ -120,8 +120,7 @@ class SessionManager:
             key: Chave do contexto
             value: Valor a armazenar
         """
-        session = self.get_or_create_session(conversation_id)
-        session['contexto'][key] = value
+        self.store.atualizar_contexto(conversation_id, key, value)
     
     def clear_session(self, conversation_id: str):
         """
@@ -130,8 +129,7 @@ class SessionManager:
         Args:
             conversation_id: ID da conversa
         """
-        if conversation_id in self.sessions:
-            del self.sessions[conversation_id]
+        if self.store.remover(conversation_id):
             print(f"🗑️ Sessão removida: {conversation_id[:20]}...")
     
     def get_active_sessions_count(self) -> int:
@@ -141,7 +139,7 @@ class SessionManager:
         Returns:
             Quantidade de sessões
         """
-        return len(self.sessions)
+        return self.store.contar()
     
     def get_session_stats(self, conversation_id: str) -> Dict:
         """
@@ -153,10 +151,10 @@ class SessionManager:
         Returns:
             Dict com estatísticas
         """
-        if conversation_id not in self.sessions:
+        session = self.store.carregar(conversation_id, criar=False)
+        if session is None:
             return None
         
-        session = self.sessions[conversation_id]
         uptime = datetime.now() - session['created_at']
         
         return {
@@ -168,14 +166,22 @@ class SessionManager:
     
     def start_cleanup_task(self):
         """Inicia tarefa de limpeza se ainda não estiver rodando"""
+        if self.store.expira_sozinho:
+            # Backend expira as sessões sozinho (TTL do Redis)
+            return
         if self._cleanup_task is None:
             try:
-                loop = asyncio.get_event_loop()
-                self._cleanup_task = loop.create_task(self._cleanup_expired_sessions())
+                self._cleanup_task = asyncio.get_running_loop().create_task(self._cleanup_expired_sessions())
             except RuntimeError:
-                # Sem loop de eventos ainda, limpeza manual será feita
+                # Sem loop de eventos ainda; sessões expiradas também saem ao criar novas
                 pass
     
+    def stop_cleanup_task(self):
+        """Cancela a tarefa de limpeza (encerramento do worker)"""
+        if self._cleanup_task is not None:
+            self._cleanup_task.cancel()
+            self._cleanup_task = None
+    
     async def _cleanup_expired_sessions(self):
         """
         Tarefa em background para limpar sessões expiradas
@@ -184,23 +190,13 @@ class SessionManager:
             try:
                 await asyncio.sleep(300)  # Verificar a cada 5 minutos
                 
-                now = datetime.now()
-                expired = []
-                
-                for conv_id, session in self.sessions.items():
-                    last_activity = session['last_activity']
-                    time_since = now - last_activity
-                    
-                    if time_since > timedelta(minutes=self.timeout_minutes):
-                        expired.append(conv_id)
-                
-                for conv_id in expired:
-                    print(f"⏰ Sessão expirada: {conv_id[:20]}... ({self.timeout_minutes}min inativa)")
-                    self.clear_session(conv_id)
+                removidas = self.store.limpar_expirados()
                 
-                if expired:
-                    print(f"🗑️ {len(expired)} sessões limpas. Ativas: {self.get_active_sessions_count()}")
+                if removidas:
+                    print(f"🗑️ {removidas} sessões expiradas limpas ({self.timeout_minutes}min inativas). Ativas: {self.get_active_sessions_count()}")
             
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 print(f"❌ Erro na limpeza de sessões: {e}")
     
@@ -213,10 +209,10 @@ class SessionManager:
         """
         info = []
         
-        for conv_id, session in self.sessions.items():
+        for session in self.store.listar():
             uptime = datetime.now() - session['created_at']
             info.append({
-                'conversation_id': conv_id[:30] + '...',
+                'conversation_id': session['conversation_id'][:30] + '...',
                 'messages': session['message_count'],
                 'uptime_min': int(uptime.total_seconds() / 60),
                 'last_activity': session['last_activity'].strftime('%H:%M:%S')
@@ -0,0 +1,643 @@
+"""
+🗄️ ARMAZENAMENTO DE SESSÕES
+Backends plugáveis para o SessionManager: memória (padrão, um processo),
+SQLite (arquivo local compartilhado entre workers) e Redis (vários hosts)
+
+Escolha com SESSION_BACKEND=memoria|sqlite|redis
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+def _agora() -> float:
+    """Timestamp atual (segundos desde epoch) usado em todos os backends"""
+    return time.time()
+
+
+def _para_datetime(valor: float) -> datetime:
+    """Converte timestamp armazenado para datetime"""
+    return datetime.fromtimestamp(float(valor))
+
+
+# Orçamento de tokens guardado por sessão e tamanho máximo de cada mensagem guardada
+ORCAMENTO_TOKENS_SESSAO = int(os.getenv('SESSION_TOKENS', '2000'))
+MAX_TOKENS_MENSAGEM = int(os.getenv('SESSION_TOKENS_MENSAGEM', '400'))
+
+
+def estimar_tokens(texto: str) -> int:
+    """Estimativa barata de tokens (~4 caracteres por token)"""
+    return len(texto) // 4 + 1
+
+
+def compactar_conteudo(texto: str, max_tokens: int = MAX_TOKENS_MENSAGEM) -> str:
+    """
+    Corta mensagens longas (ex.: listagem completa de contratos) para o histórico
+    
+    O histórico só precisa do começo da resposta para dar contexto à IA.
+    """
+    limite = max_tokens * 4
+    if len(texto) <= limite:
+        return texto
+    corte = texto.rfind('\n', 0, limite)
+    return texto[:corte if corte > limite // 2 else limite].rstrip() + "\n[…]"
+
+
+class Mensagem:
+    """Mensagem do histórico (compacta: __slots__, timestamp em segundos)"""
+    
+    __slots__ = ('role', 'content', 'timestamp', 'tokens')
+    
+    def __init__(self, role: str, content: str, timestamp: float, tokens: Optional[int] = None):
+        self.role = role
+        self.content = content
+        self.timestamp = timestamp
+        self.tokens = tokens if tokens is not None else estimar_tokens(content)
+    
+    def get(self, chave: str, padrao=None):
+        """Acesso no estilo dict (compatível com o histórico antigo)"""
+        return getattr(self, chave, padrao)
+    
+    def __getitem__(self, chave: str):
+        try:
+            return getattr(self, chave)
+        except AttributeError:
+            raise KeyError(chave)
+    
+    def __repr__(self) -> str:
+        return f"Mensagem({self.role!r}, {self.content[:30]!r}, tokens={self.tokens})"
+
+
+class HistoricoSessao:
+    """
+    Ring buffer de mensagens limitado por quantidade e por orçamento de tokens
+    
+    Ao acrescentar, descarta as mais antigas até caber no orçamento (a última
+    mensagem sempre fica).
+    """
+    
+    __slots__ = ('mensagens', 'tokens', 'orcamento_tokens')
+    
+    def __init__(self, limite_mensagens: int = 20, orcamento_tokens: int = ORCAMENTO_TOKENS_SESSAO):
+        self.mensagens = deque(maxlen=limite_mensagens)
+        self.tokens = 0
+        self.orcamento_tokens = orcamento_tokens
+    
+    def adicionar(self, mensagem: Mensagem) -> None:
+        if len(self.mensagens) == self.mensagens.maxlen:
+            self.tokens -= self.mensagens[0].tokens
+        self.mensagens.append(mensagem)
+        self.tokens += mensagem.tokens
+        while self.tokens > self.orcamento_tokens and len(self.mensagens) > 1:
+            self.tokens -= self.mensagens.popleft().tokens
+    
+    def __iter__(self):
+        return iter(self.mensagens)
+    
+    def __len__(self) -> int:
+        return len(self.mensagens)
+    
+    def __getitem__(self, indice: int) -> Mensagem:
+        return self.mensagens[indice]
+
+
+def selecionar_historico(historico: Iterable, orcamento_tokens: int) -> List:
+    """
+    Mensagens mais recentes que cabem no orçamento de tokens (em ordem cronológica)
+    
+    Args:
+        historico: Mensagens (Mensagem ou dicts com role/content)
+        orcamento_tokens: Tokens disponíveis para o histórico no prompt
+    
+    Returns:
+        Lista das mensagens selecionadas
+    """
+    selecionadas = []
+    total = 0
+    for mensagem in reversed(list(historico)):
+        tokens = mensagem.tokens if isinstance(mensagem, Mensagem) else estimar_tokens(mensagem.get('content') or '')
+        if total + tokens > orcamento_tokens:
+            break
+        selecionadas.append(mensagem)
+        total += tokens
+    selecionadas.reverse()
+    return selecionadas
+
+
+class SessionStore:
+    """
+    Interface dos backends de sessão
+
+    Uma sessão é um dict com historico, contexto, created_at, last_activity e
+    message_count. Sessões sem atividade por mais de ttl_segundos expiram.
+    """
+
+    # Backends com expiração nativa não precisam da tarefa de limpeza
+    expira_sozinho = False
+
+    def __init__(self, ttl_segundos: float = 1800, limite_historico: int = 20, max_sessoes: int = 5000):
+        """
+        Args:
+            ttl_segundos: Inatividade máxima antes de expirar a sessão
+            limite_historico: Mensagens mantidas por sessão (as mais recentes)
+            max_sessoes: Limite de sessões; acima dele as menos ativas são descartadas
+        """
+        self.ttl_segundos = ttl_segundos
+        self.limite_historico = limite_historico
+        self.max_sessoes = max_sessoes
+        self.descartadas = 0
+        self.orcamento_tokens = ORCAMENTO_TOKENS_SESSAO
+        self.max_tokens_mensagem = MAX_TOKENS_MENSAGEM
+    
+    def _mensagens_novas(self, mensagens: List[Dict], agora: float) -> List[Mensagem]:
+        """Converte {role, content} em Mensagem, compactando as longas"""
+        return [
+            Mensagem(m['role'], compactar_conteudo(m['content'], self.max_tokens_mensagem), agora)
+            for m in mensagens
+        ]
+
+    def carregar(self, conversation_id: str, criar: bool = True) -> Optional[Dict]:
+        """Retorna a sessão (renovando a atividade) ou None se não existir e criar=False"""
+        raise NotImplementedError
+
+    def adicionar_mensagens(self, conversation_id: str, mensagens: List[Dict]) -> None:
+        """Acrescenta várias mensagens {role, content} de uma vez e corta o histórico"""
+        raise NotImplementedError
+
+    def atualizar_contexto(self, conversation_id: str, chave: str, valor) -> None:
+        """Grava uma chave do contexto da sessão (valor serializável em JSON)"""
+        raise NotImplementedError
+
+    def remover(self, conversation_id: str) -> bool:
+        """Remove a sessão; retorna True se existia"""
+        raise NotImplementedError
+
+    def listar(self) -> List[Dict]:
+        """Metadados das sessões ativas (sem histórico)"""
+        raise NotImplementedError
+
+    def contar(self) -> int:
+        """Quantidade de sessões ativas"""
+        return len(self.listar())
+
+    def limpar_expirados(self) -> int:
+        """Remove sessões expiradas; retorna quantas foram removidas"""
+        return 0
+
+
+class MemorySessionStore(SessionStore):
+    """
+    Sessões em dict do próprio processo (sem compartilhamento entre workers)
+
+    O OrderedDict fica em ordem de última atividade (cada acesso move a sessão
+    para o fim). Como o TTL é o mesmo para todas, as expiradas estão sempre no
+    início: expirar é retirar do começo até achar uma ativa, sem varrer tudo,
+    e o limite de sessões descarta a menos ativa (LRU).
+    """
+
+    def __init__(self, ttl_segundos: float = 1800, limite_historico: int = 20, max_sessoes: int = 5000):
+        super().__init__(ttl_segundos, limite_historico, max_sessoes)
+        self.sessions: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expirada(self, sessao: Dict, agora: float) -> bool:
+        return agora - sessao['last_activity'].timestamp() > self.ttl_segundos
+
+    def _retirar_expiradas(self, agora: float) -> int:
+        """Remove do início enquanto a sessão mais antiga estiver expirada (chamado com o lock)"""
+        removidas = 0
+        while self.sessions:
+            conv_id, sessao = next(iter(self.sessions.items()))
+            if not self._expirada(sessao, agora):
+                break
+            del self.sessions[conv_id]
+            removidas += 1
+        return removidas
+
+    def carregar(self, conversation_id: str, criar: bool = True) -> Optional[Dict]:
+        agora = datetime.now()
+        with self._lock:
+            sessao = self.sessions.get(conversation_id)
+            if sessao is not None and self._expirada(sessao, agora.timestamp()):
+                del self.sessions[conversation_id]
+                sessao = None
+            if sessao is None:
+                if not criar:
+                    return None
+                # Custo amortizado O(1): cada sessão sai no máximo uma vez
+                self._retirar_expiradas(agora.timestamp())
+                sessao = self.sessions[conversation_id] = {
+                    'historico': HistoricoSessao(self.limite_historico, self.orcamento_tokens),
+                    'contexto': {},
+                    'created_at': agora,
+                    'last_activity': agora,
+                    'message_count': 0
+                }
+                while len(self.sessions) > self.max_sessoes:
+                    self.sessions.popitem(last=False)
+                    self.descartadas += 1
+            else:
+                sessao['last_activity'] = agora
+                self.sessions.move_to_end(conversation_id)
+            return sessao
+
+    def adicionar_mensagens(self, conversation_id: str, mensagens: List[Dict]) -> None:
+        sessao = self.carregar(conversation_id)
+        agora = _agora()
+        with self._lock:
+            for mensagem in self._mensagens_novas(mensagens, agora):
+                sessao['historico'].adicionar(mensagem)
+            sessao['message_count'] += len(mensagens)
+
+    def atualizar_contexto(self, conversation_id: str, chave: str, valor) -> None:
+        self.carregar(conversation_id)['contexto'][chave] = valor
+
+    def remover(self, conversation_id: str) -> bool:
+        with self._lock:
+            return self.sessions.pop(conversation_id, None) is not None
+
+    def listar(self) -> List[Dict]:
+        with self._lock:
+            return [
+                {
+                    'conversation_id': conv_id,
+                    'created_at': sessao['created_at'],
+                    'last_activity': sessao['last_activity'],
+                    'message_count': sessao['message_count']
+                }
+                for conv_id, sessao in self.sessions.items()
+            ]
+
+    def contar(self) -> int:
+        return len(self.sessions)
+
+    def limpar_expirados(self) -> int:
+        with self._lock:
+            return self._retirar_expiradas(_agora())
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Sessões em arquivo SQLite (modo WAL), compartilhado pelos workers do mesmo host
+
+    Cada processo abre a própria conexão (seguro após o fork do gunicorn).
+    Leituras ignoram sessões expiradas; limpar_expirados apaga as linhas.
+    """
+
+    def __init__(self, caminho: str, ttl_segundos: float = 1800, limite_historico: int = 20, max_sessoes: int = 5000):
+        """
+        Args:
+            caminho: Arquivo do banco (criado se não existir)
+            ttl_segundos: Inatividade máxima antes de expirar a sessão
+            limite_historico: Mensagens mantidas por sessão
+            max_sessoes: Limite de sessões aplicado na limpeza (descarta as menos ativas)
+        """
+        super().__init__(ttl_segundos, limite_historico, max_sessoes)
+        self.caminho = caminho
+        self._local = threading.local()
+        with self._conexao() as conexao:
+            conexao.executescript("""
+                CREATE TABLE IF NOT EXISTS sessoes (
+                    conversation_id TEXT PRIMARY KEY,
+                    created_at REAL NOT NULL,
+                    last_activity REAL NOT NULL,
+                    message_count INTEGER NOT NULL DEFAULT 0,
+                    contexto TEXT NOT NULL DEFAULT '{}'
+                );
+                CREATE TABLE IF NOT EXISTS mensagens (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    conversation_id TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    timestamp REAL NOT NULL,
+                    tokens INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS idx_mensagens_conversa ON mensagens (conversation_id, id);
+                CREATE INDEX IF NOT EXISTS idx_sessoes_atividade ON sessoes (last_activity);
+            """)
+            # Bancos criados antes da coluna de tokens
+            colunas = {coluna[1] for coluna in conexao.execute("PRAGMA table_info(mensagens)")}
+            if 'tokens' not in colunas:
+                conexao.execute("ALTER TABLE mensagens ADD COLUMN tokens INTEGER NOT NULL DEFAULT 0")
+
+    def _conexao(self) -> sqlite3.Connection:
+        """Conexão da thread/processo atual (recriada após fork)"""
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None or getattr(self._local, 'pid', None) != os.getpid():
+            conexao = sqlite3.connect(self.caminho, timeout=10, isolation_level=None)
+            conexao.execute("PRAGMA journal_mode=WAL")
+            conexao.execute("PRAGMA synchronous=NORMAL")
+            self._local.conexao = conexao
+            self._local.pid = os.getpid()
+        return conexao
+
+    def _tocar(self, conexao: sqlite3.Connection, conversation_id: str, agora: float) -> None:
+        """Cria a sessão (ou reinicia a expirada) e renova a última atividade"""
+        limite = agora - self.ttl_segundos
+        conexao.execute(
+            "DELETE FROM mensagens WHERE conversation_id = ? AND EXISTS "
+            "(SELECT 1 FROM sessoes WHERE conversation_id = ? AND last_activity < ?)",
+            (conversation_id, conversation_id, limite)
+        )
+        conexao.execute(
+            "DELETE FROM sessoes WHERE conversation_id = ? AND last_activity < ?",
+            (conversation_id, limite)
+        )
+        conexao.execute(
+            "INSERT INTO sessoes (conversation_id, created_at, last_activity) VALUES (?, ?, ?) "
+            "ON CONFLICT(conversation_id) DO UPDATE SET last_activity = excluded.last_activity",
+            (conversation_id, agora, agora)
+        )
+
+    def carregar(self, conversation_id: str, criar: bool = True) -> Optional[Dict]:
+        agora = _agora()
+        conexao = self._conexao()
+        with conexao:
+            conexao.execute("BEGIN IMMEDIATE")
+            if criar:
+                self._tocar(conexao, conversation_id, agora)
+            linha = conexao.execute(
+                "SELECT created_at, last_activity, message_count, contexto FROM sessoes "
+                "WHERE conversation_id = ? AND last_activity >= ?",
+                (conversation_id, agora - self.ttl_segundos)
+            ).fetchone()
+            if linha is None:
+                return None
+            mensagens = conexao.execute(
+                "SELECT role, content, timestamp, tokens FROM mensagens WHERE conversation_id = ? ORDER BY id",
+                (conversation_id,)
+            ).fetchall()
+
+        return {
+            'historico': [Mensagem(*m) for m in mensagens],
+            'contexto': json.loads(linha[3]),
+            'created_at': _para_datetime(linha[0]),
+            'last_activity': _para_datetime(linha[1]),
+            'message_count': linha[2]
+        }
+
+    def adicionar_mensagens(self, conversation_id: str, mensagens: List[Dict]) -> None:
+        agora = _agora()
+        conexao = self._conexao()
+        with conexao:
+            conexao.execute("BEGIN IMMEDIATE")
+            self._tocar(conexao, conversation_id, agora)
+            conexao.executemany(
+                "INSERT INTO mensagens (conversation_id, role, content, timestamp, tokens) VALUES (?, ?, ?, ?, ?)",
+                [(conversation_id, m.role, m.content, m.timestamp, m.tokens) for m in self._mensagens_novas(mensagens, agora)]
+            )
+            conexao.execute(
+                "UPDATE sessoes SET message_count = message_count + ? WHERE conversation_id = ?",
+                (len(mensagens), conversation_id)
+            )
+            # Mantém só as últimas mensagens que cabem na quantidade e no orçamento de tokens
+            conexao.execute(
+                "DELETE FROM mensagens WHERE id IN ("
+                "  SELECT id FROM ("
+                "    SELECT id,"
+                "           ROW_NUMBER() OVER (ORDER BY id DESC) AS posicao,"
+                "           SUM(tokens) OVER (ORDER BY id DESC) AS acumulado"
+                "    FROM mensagens WHERE conversation_id = ?"
+                "  ) WHERE posicao > 1 AND (posicao > ? OR acumulado > ?)"
+                ")",
+                (conversation_id, self.limite_historico, self.orcamento_tokens)
+            )
+
+    def atualizar_contexto(self, conversation_id: str, chave: str, valor) -> None:
+        agora = _agora()
+        conexao = self._conexao()
+        with conexao:
+            conexao.execute("BEGIN IMMEDIATE")
+            self._tocar(conexao, conversation_id, agora)
+            conexao.execute(
+                "UPDATE sessoes SET contexto = json_set(contexto, ?, json(?)) WHERE conversation_id = ?",
+                (f'$."{chave}"', json.dumps(valor, default=str), conversation_id)
+            )
+
+    def remover(self, conversation_id: str) -> bool:
+        conexao = self._conexao()
+        with conexao:
+            conexao.execute("BEGIN IMMEDIATE")
+            conexao.execute("DELETE FROM mensagens WHERE conversation_id = ?", (conversation_id,))
+            return conexao.execute(
+                "DELETE FROM sessoes WHERE conversation_id = ?", (conversation_id,)
+            ).rowcount > 0
+
+    def listar(self) -> List[Dict]:
+        linhas = self._conexao().execute(
+            "SELECT conversation_id, created_at, last_activity, message_count FROM sessoes "
+            "WHERE last_activity >= ? ORDER BY last_activity DESC",
+            (_agora() - self.ttl_segundos,)
+        ).fetchall()
+        return [
+            {
+                'conversation_id': conv_id,
+                'created_at': _para_datetime(criada),
+                'last_activity': _para_datetime(atividade),
+                'message_count': total
+            }
+            for conv_id, criada, atividade, total in linhas
+        ]
+
+    def contar(self) -> int:
+        return self._conexao().execute(
+            "SELECT COUNT(*) FROM sessoes WHERE last_activity >= ?",
+            (_agora() - self.ttl_segundos,)
+        ).fetchone()[0]
+
+    def limpar_expirados(self) -> int:
+        limite = _agora() - self.ttl_segundos
+        conexao = self._conexao()
+        with conexao:
+            conexao.execute("BEGIN IMMEDIATE")
+            # Expiradas + excedentes do limite (menos ativas), pelo índice de last_activity
+            conexao.execute("CREATE TEMP TABLE IF NOT EXISTS remover (conversation_id TEXT PRIMARY KEY)")
+            conexao.execute("DELETE FROM remover")
+            conexao.execute(
+                "INSERT OR IGNORE INTO remover SELECT conversation_id FROM sessoes WHERE last_activity < ?",
+                (limite,)
+            )
+            expiradas = conexao.execute("SELECT COUNT(*) FROM remover").fetchone()[0]
+            conexao.execute(
+                "INSERT OR IGNORE INTO remover SELECT conversation_id FROM sessoes "
+                "ORDER BY last_activity DESC LIMIT -1 OFFSET ?",
+                (self.max_sessoes,)
+            )
+            total = conexao.execute("SELECT COUNT(*) FROM remover").fetchone()[0]
+            self.descartadas += total - expiradas
+            conexao.execute("DELETE FROM mensagens WHERE conversation_id IN (SELECT conversation_id FROM remover)")
+            conexao.execute("DELETE FROM sessoes WHERE conversation_id IN (SELECT conversation_id FROM remover)")
+            return total
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Sessões no Redis, compartilhadas entre workers e hosts
+
+    Chaves por sessão: {prefixo}{id}:meta (hash), :historico (lista JSON) e
+    :contexto (hash JSON). Todas recebem EXPIRE a cada atividade, então a
+    expiração é do próprio Redis e não há tarefa de limpeza.
+    """
+
+    expira_sozinho = True
+
+    def __init__(self, cliente, ttl_segundos: float = 1800, limite_historico: int = 20, prefixo: str = "sessao:"):
+        """
+        Args:
+            cliente: Cliente redis.Redis (ou substituto com a mesma API, para testes)
+            ttl_segundos: Inatividade máxima antes de expirar a sessão
+            limite_historico: Mensagens mantidas por sessão
+            prefixo: Prefixo das chaves
+        """
+        # Limite de memória fica a cargo do Redis (TTL + maxmemory-policy)
+        super().__init__(ttl_segundos, limite_historico)
+        self.cliente = cliente
+        self.prefixo = prefixo
+
+    def _chaves(self, conversation_id: str):
+        base = f"{self.prefixo}{conversation_id}"
+        return f"{base}:meta", f"{base}:historico", f"{base}:contexto"
+
+    def _tocar(self, pipe, conversation_id: str, agora: float) -> None:
+        """Cria/renova a sessão e o TTL de todas as chaves (dentro do pipeline)"""
+        meta, historico, contexto = self._chaves(conversation_id)
+        ttl = int(self.ttl_segundos)
+        pipe.hsetnx(meta, 'created_at', agora)
+        pipe.hset(meta, 'last_activity', agora)
+        for chave in (meta, historico, contexto):
+            pipe.expire(chave, ttl)
+
+    def carregar(self, conversation_id: str, criar: bool = True) -> Optional[Dict]:
+        meta, historico, contexto = self._chaves(conversation_id)
+        pipe = self.cliente.pipeline()
+        if criar:
+            self._tocar(pipe, conversation_id, _agora())
+        pipe.hgetall(meta)
+        pipe.lrange(historico, 0, -1)
+        pipe.hgetall(contexto)
+        dados_meta, mensagens, dados_contexto = pipe.execute()[-3:]
+
+        if not dados_meta:
+            return None
+        dados_meta = {_texto(k): _texto(v) for k, v in dados_meta.items()}
+        return {
+            'historico': [_decodificar_mensagem(m) for m in mensagens],
+            'contexto': {_texto(k): json.loads(v) for k, v in dados_contexto.items()},
+            'created_at': _para_datetime(dados_meta['created_at']),
+            'last_activity': _para_datetime(dados_meta['last_activity']),
+            'message_count': int(dados_meta.get('message_count', 0))
+        }
+
+    def adicionar_mensagens(self, conversation_id: str, mensagens: List[Dict]) -> None:
+        meta, historico, _ = self._chaves(conversation_id)
+        agora = _agora()
+        pipe = self.cliente.pipeline()
+        pipe.rpush(historico, *[
+            json.dumps([m.role, m.content, m.timestamp, m.tokens], ensure_ascii=False)
+            for m in self._mensagens_novas(mensagens, agora)
+        ])
+        pipe.ltrim(historico, -self.limite_historico, -1)
+        pipe.lrange(historico, 0, -1)
+        pipe.hincrby(meta, 'message_count', len(mensagens))
+        self._tocar(pipe, conversation_id, agora)
+        guardadas = pipe.execute()[2]
+
+        # Orçamento de tokens, como nos outros backends: só as mais recentes que cabem (a última sempre fica)
+        # (se outro worker acrescentar mensagens antes do ltrim, o ajuste dele acerta o orçamento)
+        manter = 0
+        total = 0
+        for bruto in reversed(guardadas):
+            total += _decodificar_mensagem(bruto).tokens
+            if manter and total > self.orcamento_tokens:
+                break
+            manter += 1
+        if manter < len(guardadas):
+            self.cliente.ltrim(historico, -manter, -1)
+
+    def atualizar_contexto(self, conversation_id: str, chave: str, valor) -> None:
+        _, _, contexto = self._chaves(conversation_id)
+        pipe = self.cliente.pipeline()
+        pipe.hset(contexto, chave, json.dumps(valor, default=str))
+        self._tocar(pipe, conversation_id, _agora())
+        pipe.execute()
+
+    def remover(self, conversation_id: str) -> bool:
+        return self.cliente.delete(*self._chaves(conversation_id)) > 0
+
+    def listar(self) -> List[Dict]:
+        sessoes = []
+        sufixo = ':meta'
+        for chave in self.cliente.scan_iter(match=f"{self.prefixo}*{sufixo}", count=500):
+            dados = {_texto(k): _texto(v) for k, v in self.cliente.hgetall(chave).items()}
+            if not dados:
+                continue
+            sessoes.append({
+                'conversation_id': _texto(chave)[len(self.prefixo):-len(sufixo)],
+                'created_at': _para_datetime(dados['created_at']),
+                'last_activity': _para_datetime(dados['last_activity']),
+                'message_count': int(dados.get('message_count', 0))
+            })
+        return sessoes
+
+
+def _texto(valor) -> str:
+    """Redis devolve bytes quando decode_responses=False"""
+    return valor.decode('utf-8') if isinstance(valor, bytes) else str(valor)
+
+
+def _decodificar_mensagem(bruto) -> Mensagem:
+    """Mensagem guardada no Redis como [role, content, timestamp, tokens]"""
+    return Mensagem(*json.loads(_texto(bruto)))
+
+
+def criar_session_store(ttl_segundos: float = 1800, limite_historico: int = 20, max_sessoes: int = 5000) -> SessionStore:
+    """
+    Cria o backend configurado em SESSION_BACKEND (memoria, sqlite ou redis)
+
+    Redis usa REDIS_HOST/REDIS_PORT/REDIS_DB de bot/config.py; SQLite usa
+    SESSION_SQLITE_PATH. Se o backend escolhido não estiver disponível,
+    volta para memória com aviso.
+    """
+    backend = os.getenv('SESSION_BACKEND', 'memoria').lower()
+
+    if backend == 'redis':
+        if not REDIS_AVAILABLE:
+            print("⚠️ redis não instalado (pip install redis) - sessões em memória", flush=True)
+        else:
+            try:
+                from bot.config import config
+                cliente = redis.Redis(
+                    host=config.REDIS_HOST,
+                    port=config.REDIS_PORT,
+                    db=config.REDIS_DB,
+                    password=os.getenv('REDIS_PASSWORD') or None,
+                    socket_timeout=2
+                )
+                cliente.ping()
+                print(f"🗄️ Sessões no Redis: {config.REDIS_HOST}:{config.REDIS_PORT}", flush=True)
+                return RedisSessionStore(cliente, ttl_segundos, limite_historico)
+            except Exception as e:
+                print(f"⚠️ Redis indisponível ({e}) - sessões em memória", flush=True)
+
+    elif backend == 'sqlite':
+        caminho = os.getenv('SESSION_SQLITE_PATH', 'sessoes.db')
+        try:
+            store = SQLiteSessionStore(caminho, ttl_segundos, limite_historico, max_sessoes)
+            print(f"🗄️ Sessões no SQLite: {caminho}", flush=True)
+            return store
+        except Exception as e:
+            print(f"⚠️ SQLite indisponível ({e}) - sessões em memória", flush=True)
+
+    return MemorySessionStore(ttl_segundos, limite_historico, max_sessoes)
@@ -0,0 +1,161 @@
+"""
+🧠 CACHE DE RESPOSTAS DO AGENTE
+Memoização das consultas determinísticas (mesma resposta para qualquer usuário)
+por método, argumentos normalizados e versão do dataset, com LRU + TTL
+"""
+
+import copy
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class CacheRespostas:
+    """
+    Cache LRU com expiração por tempo (TTL) e contadores de acerto/falha
+
+    Entradas de versões anteriores do dataset são descartadas assim que uma
+    consulta chega com a versão nova (recarga dos dados).
+    """
+
+    def __init__(self, capacidade: int = 256, ttl_segundos: float = 600):
+        """
+        Inicializa o cache
+
+        Args:
+            capacidade: Máximo de respostas guardadas (LRU acima disso)
+            ttl_segundos: Tempo de vida de cada resposta
+        """
+        self.capacidade = capacidade
+        self.ttl_segundos = ttl_segundos
+        self._itens: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._versao = None
+        self.acertos = 0
+        self.falhas = 0
+        self.expirados = 0
+        self.removidos = 0
+
+    def _verificar_versao(self, versao) -> None:
+        """Esvazia o cache quando a versão do dataset muda (chamado com o lock)"""
+        if versao != self._versao:
+            self._itens.clear()
+            self._versao = versao
+
+    def obter(self, chave: Hashable, versao) -> Tuple[bool, Any]:
+        """
+        Busca uma resposta
+
+        Returns:
+            (encontrado, valor)
+        """
+        agora = time.monotonic()
+        with self._lock:
+            self._verificar_versao(versao)
+            item = self._itens.get(chave)
+            if item is not None:
+                expira_em, valor = item
+                if expira_em > agora:
+                    self._itens.move_to_end(chave)
+                    self.acertos += 1
+                    return True, valor
+                del self._itens[chave]
+                self.expirados += 1
+            self.falhas += 1
+            return False, None
+
+    def guardar(self, chave: Hashable, versao, valor: Any) -> None:
+        """Guarda uma resposta, removendo as menos usadas acima da capacidade"""
+        with self._lock:
+            self._verificar_versao(versao)
+            self._itens[chave] = (time.monotonic() + self.ttl_segundos, valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+                self.removidos += 1
+
+    def limpar(self) -> None:
+        """Remove todas as respostas"""
+        with self._lock:
+            self._itens.clear()
+
+    def estatisticas(self) -> Dict:
+        """Contadores para monitoramento (exposto em /health)"""
+        with self._lock:
+            total = self.acertos + self.falhas
+            return {
+                "itens": len(self._itens),
+                "capacidade": self.capacidade,
+                "ttl_segundos": self.ttl_segundos,
+                "versao_dados": self._versao,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "expirados": self.expirados,
+                "removidos": self.removidos,
+                "taxa_acerto": round(self.acertos / total, 3) if total else 0.0
+            }
+
+
+def cache_padrao() -> CacheRespostas:
+    """Cria o cache com configuração do ambiente (CACHE_RESPOSTAS_TAMANHO / CACHE_RESPOSTAS_TTL)"""
+    return CacheRespostas(
+        capacidade=int(os.getenv('CACHE_RESPOSTAS_TAMANHO', '256')),
+        ttl_segundos=float(os.getenv('CACHE_RESPOSTAS_TTL', '600'))
+    )
+
+
+def _normalizar(valor) -> Hashable:
+    """
+    Converte um argumento em parte hashable da chave
+
+    Texto entra exatamente como veio: as respostas repetem o que foi digitado
+    (ex: "Contrato: e0440404"), então grafias diferentes não compartilham entrada.
+    """
+    if isinstance(valor, (set, frozenset)):
+        return frozenset(_normalizar(v) for v in valor)
+    if isinstance(valor, (list, tuple)):
+        return tuple(_normalizar(v) for v in valor)
+    if isinstance(valor, dict):
+        return tuple(sorted((k, _normalizar(v)) for k, v in valor.items()))
+    return valor
+
+
+def memorizar(metodo):
+    """
+    Decorador para métodos determinísticos do AgenteApontamentos
+
+    A chave é (método, argumentos normalizados com defaults aplicados) e a
+    versão do dataset vem de self.versao_dados. Respostas de erro não são
+    guardadas e quem chama recebe uma cópia profunda, que pode alterar à
+    vontade. Requer self.cache_respostas (None desativa o cache).
+    """
+    assinatura = inspect.signature(metodo)
+
+    @functools.wraps(metodo)
+    def envoltorio(self, *args, **kwargs):
+        cache: Optional[CacheRespostas] = getattr(self, 'cache_respostas', None)
+        if cache is None or self.df is None:
+            return metodo(self, *args, **kwargs)
+
+        argumentos = assinatura.bind(self, *args, **kwargs)
+        argumentos.apply_defaults()
+        chave = (metodo.__name__,) + tuple(
+            (nome, _normalizar(valor)) for nome, valor in argumentos.arguments.items() if nome != 'self'
+        )
+        versao = self.versao_dados
+
+        encontrado, resultado = cache.obter(chave, versao)
+        if encontrado:
+            return copy.deepcopy(resultado)
+
+        resultado = metodo(self, *args, **kwargs)
+        if isinstance(resultado, dict) and resultado.get('tipo') != 'erro' and 'erro' not in resultado:
+            cache.guardar(chave, versao, resultado)
+            return copy.deepcopy(resultado)
+        return resultado
+
+    return envoltorio
@@ -0,0 +1,408 @@
+"""
+📆 CALENDÁRIO DE DIAS ÚTEIS
+Dias úteis (com feriados nacionais e, opcionalmente, municipais) e desconto
+de almoço calculados com NumPy sobre arrays inteiros de datas, sem laços dia
+a dia em Python. Cada ano vira um bitmap de dias úteis com contagem acumulada,
+então "dias úteis entre A e B" é uma subtração.
+"""
+
+import json
+import os
+import threading
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+
+# Desconto de almoço aplicado em cada dia útil com horas apontadas
+HORAS_ALMOCO = 1.0
+
+# Arquivo de feriados distribuído com o código
+ARQUIVO_FERIADOS = Path(__file__).with_name('feriados.json')
+
+Datas = Union[pd.Series, pd.DatetimeIndex, np.ndarray, list]
+
+
+def domingo_de_pascoa(ano: int) -> date:
+    """Data da Páscoa no calendário gregoriano (algoritmo de Meeus/Jones/Butcher)"""
+    a = ano % 19
+    b, c = divmod(ano, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(ano, mes, dia + 1)
+
+
+class CalendarioUtil:
+    """
+    Calendário de dias úteis com feriados
+
+    Os anos são materializados sob demanda em um bitmap contínuo (um bool por
+    dia) e em um vetor de contagem acumulada. Leituras usam apenas indexação
+    NumPy; a extensão para novos anos troca os arrays de uma vez só.
+    """
+
+    def __init__(
+        self,
+        arquivo: Optional[Union[str, Path]] = None,
+        municipios: Optional[List[str]] = None,
+        incluir_facultativos: bool = False
+    ):
+        """
+        Inicializa o calendário
+
+        Args:
+            arquivo: JSON de feriados (padrão: feriados.json ao lado deste módulo)
+            municipios: Chaves de "municipais" no JSON a considerar (ex: ["sao_paulo"])
+            incluir_facultativos: Se True, Carnaval e Corpus Christi também deixam de ser dias úteis
+        """
+        self.arquivo = Path(arquivo) if arquivo else ARQUIVO_FERIADOS
+        self.municipios = [m.strip() for m in (municipios or []) if m.strip()]
+        self.incluir_facultativos = incluir_facultativos
+        self.regras = self._carregar_regras()
+
+        for municipio in self.municipios:
+            if municipio not in self.regras.get('municipais', {}):
+                print(f"⚠️ Município sem feriados cadastrados: {municipio}")
+
+        # (primeiro dia coberto, bitmap de dias úteis, acumulado, nomes dos feriados)
+        self._estado: Tuple[Optional[np.datetime64], np.ndarray, np.ndarray, Dict] = (
+            None, np.zeros(0, dtype=bool), np.zeros(1, dtype=np.int64), {}
+        )
+        self._lock = threading.Lock()
+
+    def _carregar_regras(self) -> Dict:
+        """Lê o JSON de feriados; sem arquivo, apenas fins de semana são excluídos"""
+        try:
+            with open(self.arquivo, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Feriados não carregados ({self.arquivo}): {e} - considerando apenas fins de semana")
+            return {}
+
+    def feriados_ano(self, ano: int) -> Dict[date, str]:
+        """
+        Feriados de um ano segundo as regras carregadas
+
+        Args:
+            ano: Ano desejado
+
+        Returns:
+            Dict data → nome do feriado
+        """
+        grupos = [self.regras.get('nacionais', {})]
+        if self.incluir_facultativos:
+            grupos.append(self.regras.get('facultativos', {}))
+        for municipio in self.municipios:
+            grupos.append(self.regras.get('municipais', {}).get(municipio, {}))
+
+        pascoa = domingo_de_pascoa(ano)
+        feriados: Dict[date, str] = {}
+        for grupo in grupos:
+            for regra in grupo.get('fixos', []):
+                if ano < regra.get('desde', ano):
+                    continue
+                mes, dia = map(int, regra['data'].split('-'))
+                feriados[date(ano, mes, dia)] = regra['nome']
+            for regra in grupo.get('pascoa', []):
+                feriados[pascoa + timedelta(days=regra['dias'])] = regra['nome']
+
+        for regra in self.regras.get('datas', []):
+            dia = date.fromisoformat(regra['data'])
+            if dia.year == ano:
+                feriados[dia] = regra['nome']
+
+        return feriados
+
+    @staticmethod
+    def _anos_cobertos(estado) -> Optional[Tuple[int, int]]:
+        """Primeiro e último ano presentes no bitmap"""
+        inicio, util = estado[0], estado[1]
+        if inicio is None:
+            return None
+        limites = np.array([inicio, inicio + len(util) - 1]).astype('datetime64[Y]').astype(int) + 1970
+        return int(limites[0]), int(limites[1])
+
+    def _garantir_anos(self, primeiro_ano: int, ultimo_ano: int) -> Tuple:
+        """
+        Estende o bitmap para cobrir [primeiro_ano, ultimo_ano]
+
+        Returns:
+            Estado (inicio, bitmap, acumulado, nomes) que cobre os anos pedidos
+        """
+        estado = self._estado
+        cobertos = self._anos_cobertos(estado)
+        if cobertos and cobertos[0] <= primeiro_ano and ultimo_ano <= cobertos[1]:
+            return estado
+
+        with self._lock:
+            cobertos = self._anos_cobertos(self._estado)
+            if cobertos:
+                if cobertos[0] <= primeiro_ano and ultimo_ano <= cobertos[1]:
+                    return self._estado
+                primeiro_ano, ultimo_ano = min(primeiro_ano, cobertos[0]), max(ultimo_ano, cobertos[1])
+
+            nomes: Dict = {}
+            for ano in range(primeiro_ano, ultimo_ano + 1):
+                for dia, nome in self.feriados_ano(ano).items():
+                    nomes[np.datetime64(dia, 'D')] = nome
+
+            primeiro = np.datetime64(f'{primeiro_ano}-01-01', 'D')
+            dias = np.arange(primeiro, np.datetime64(f'{ultimo_ano + 1}-01-01', 'D'))
+            feriados = np.array(sorted(nomes), dtype='datetime64[D]')
+            util = np.is_busday(dias) & ~np.isin(dias, feriados)
+            acumulado = np.concatenate([[0], np.cumsum(util, dtype=np.int64)])
+
+            # Troca atômica: leitores concorrentes veem o estado antigo ou o novo inteiro
+            self._estado = (primeiro, util, acumulado, nomes)
+            return self._estado
+
+    def _posicoes(self, dias: np.ndarray) -> Tuple[np.ndarray, Tuple]:
+        """Posições dos dias no bitmap e o estado usado (garantindo a cobertura dos anos)"""
+        anos = dias.astype('datetime64[Y]').astype(int) + 1970
+        estado = self._garantir_anos(int(anos.min()), int(anos.max()))
+        return (dias - estado[0]).astype(np.int64), estado
+
+    def mascara(self, datas: Datas) -> np.ndarray:
+        """
+        Máscara de dias úteis
+
+        Args:
+            datas: Datas a classificar
+
+        Returns:
+            Array booleano alinhado com datas (datas nulas → False)
+        """
+        dias = para_dias(datas)
+        validos = ~np.isnat(dias)
+        mascara = np.zeros(len(dias), dtype=bool)
+        if validos.any():
+            posicoes, estado = self._posicoes(dias[validos])
+            mascara[validos] = estado[1][posicoes]
+        return mascara
+
+    def contar(self, inicio, fim) -> int:
+        """
+        Dias úteis de inicio a fim (inclusive) em O(1) pelo acumulado
+
+        Args:
+            inicio: Data inicial
+            fim: Data final
+
+        Returns:
+            Quantidade de dias úteis (0 se fim < inicio)
+        """
+        primeiro = np.datetime64(pd.Timestamp(inicio).date(), 'D')
+        ultimo = np.datetime64(pd.Timestamp(fim).date(), 'D')
+        if ultimo < primeiro:
+            return 0
+        posicoes, estado = self._posicoes(np.array([primeiro, ultimo]))
+        acumulado = estado[2]
+        return int(acumulado[posicoes[1] + 1] - acumulado[posicoes[0]])
+
+    def feriados_periodo(self, inicio, fim) -> List[Tuple[str, str]]:
+        """
+        Feriados que caem em dias de semana no período
+
+        Args:
+            inicio: Data inicial
+            fim: Data final
+
+        Returns:
+            Lista de (data DD/MM/YYYY, nome)
+        """
+        dias = dias_do_periodo(inicio, fim)
+        if len(dias) == 0:
+            return []
+        _, estado = self._posicoes(dias[[0, -1]])
+        return [
+            (pd.Timestamp(dia).strftime('%d/%m/%Y'), nome)
+            for dia, nome in sorted(estado[3].items())
+            if dias[0] <= dia <= dias[-1] and np.is_busday(dia)
+        ]
+
+
+_calendario_padrao: Optional[CalendarioUtil] = None
+
+
+def calendario_padrao() -> CalendarioUtil:
+    """
+    Calendário configurado pelas variáveis de ambiente (criado uma vez por processo)
+
+    FERIADOS_ARQUIVO: JSON alternativo de feriados
+    FERIADOS_MUNICIPIO: municípios separados por vírgula (ex: sao_paulo)
+    FERIADOS_FACULTATIVOS: true para excluir Carnaval e Corpus Christi
+    """
+    global _calendario_padrao
+    if _calendario_padrao is None:
+        _calendario_padrao = CalendarioUtil(
+            arquivo=os.getenv('FERIADOS_ARQUIVO') or None,
+            municipios=os.getenv('FERIADOS_MUNICIPIO', '').split(','),
+            incluir_facultativos=os.getenv('FERIADOS_FACULTATIVOS', 'false').lower() in ('1', 'true', 'sim')
+        )
+    return _calendario_padrao
+
+
+def para_dias(datas: Datas) -> np.ndarray:
+    """Converte datas (Series, índice, lista ou array) para datetime64[D]"""
+    if isinstance(datas, pd.Series):
+        datas = datas.to_numpy(dtype='datetime64[ns]')
+    return np.asarray(datas, dtype='datetime64[ns]').astype('datetime64[D]')
+
+
+def dias_do_periodo(inicio, fim) -> np.ndarray:
+    """
+    Todos os dias corridos de inicio a fim (inclusive)
+
+    Args:
+        inicio: Data inicial
+        fim: Data final
+
+    Returns:
+        Array datetime64[D] (vazio se fim < inicio)
+    """
+    primeiro = np.datetime64(pd.Timestamp(inicio).date(), 'D')
+    ultimo = np.datetime64(pd.Timestamp(fim).date(), 'D')
+    return np.arange(primeiro, ultimo + 1, dtype='datetime64[D]')
+
+
+def mascara_dias_uteis(datas: Datas) -> np.ndarray:
+    """Máscara de dias úteis (segunda a sexta, exceto feriados) alinhada com datas"""
+    return calendario_padrao().mascara(datas)
+
+
+def eh_dia_util(data) -> bool:
+    """Verifica se uma única data é dia útil"""
+    return bool(mascara_dias_uteis([pd.Timestamp(data)])[0])
+
+
+def contar_dias_uteis(inicio, fim) -> int:
+    """Quantidade de dias úteis de inicio a fim (inclusive)"""
+    return calendario_padrao().contar(inicio, fim)
+
+
+def feriados_periodo(inicio, fim) -> List[Tuple[str, str]]:
+    """Feriados em dias de semana de inicio a fim: [(DD/MM/YYYY, nome)]"""
+    return calendario_padrao().feriados_periodo(inicio, fim)
+
+
+def dias_uteis_periodo(inicio, fim) -> np.ndarray:
+    """Dias úteis de inicio a fim (inclusive) como datetime64[D]"""
+    dias = dias_do_periodo(inicio, fim)
+    return dias[mascara_dias_uteis(dias)]
+
+
+def aplicar_desconto_almoco(horas: np.ndarray, dia_util: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Regra do almoço em lote: 1h descontada em dia útil com horas > 0, sem ficar negativo
+
+    Args:
+        horas: Horas brutas por dia (ou por recurso × dia)
+        dia_util: Máscara de dias úteis alinhada com horas
+
+    Returns:
+        (horas líquidas, desconto aplicado)
+    """
+    horas = np.asarray(horas, dtype='float64')
+    aplica = np.asarray(dia_util, dtype=bool) & (horas > 0)
+    liquidas = np.where(aplica, np.maximum(0.0, horas - HORAS_ALMOCO), horas)
+    desconto = np.where(aplica, HORAS_ALMOCO, 0.0)
+    return liquidas, desconto
+
+
+def somar_por_dia(datas: Datas, horas) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Soma horas por dia
+
+    Args:
+        datas: Data de cada linha
+        horas: Horas de cada linha
+
+    Returns:
+        (dias únicos ordenados, horas somadas em cada dia)
+    """
+    dias = para_dias(datas)
+    horas = np.asarray(horas, dtype='float64')
+    validos = ~np.isnat(dias)
+    unicos, posicoes = np.unique(dias[validos], return_inverse=True)
+    return unicos, np.bincount(posicoes, weights=horas[validos], minlength=len(unicos))
+
+
+def totalizar_dias(dias: Datas, horas_dia) -> Dict:
+    """
+    Totais de um conjunto de dias já agregados (por dia ou por recurso × dia)
+
+    Args:
+        dias: Dia de cada linha agregada
+        horas_dia: Horas brutas de cada linha agregada
+
+    Returns:
+        Dict com horas_liquidas, desconto_almoco, dias_uteis e dias_fim_semana
+    """
+    dia_util = mascara_dias_uteis(dias)
+    liquidas, desconto = aplicar_desconto_almoco(horas_dia, dia_util)
+    return {
+        "horas_liquidas": float(liquidas.sum()),
+        "desconto_almoco": float(desconto.sum()),
+        "dias_uteis": int(dia_util.sum()),
+        "dias_fim_semana": int((~dia_util).sum())
+    }
+
+
+def formatar_dias(dias: np.ndarray, formato: str = '%d/%m/%Y') -> list:
+    """Formata um array de dias como lista de strings"""
+    return pd.DatetimeIndex(dias).strftime(formato).tolist()
+
+
+def grade_presenca(
+    recursos: Datas,
+    datas: Datas,
+    dias_uteis: np.ndarray,
+    equipe: Optional[List[str]] = None
+) -> Tuple[List[str], np.ndarray]:
+    """
+    Grade booleana recurso × dia útil indicando presença de apontamento, em uma passada
+
+    Args:
+        recursos: Recurso de cada linha (linhas brutas ou agregadas por dia)
+        datas: Data de cada linha
+        dias_uteis: Dias úteis do período (datetime64[D] ordenado), colunas da grade
+        equipe: Lista explícita de recursos (opcional); quem não apontou nada aparece com a linha vazia
+
+    Returns:
+        (nomes das linhas, matriz bool [recursos × dias úteis])
+    """
+    codigos, unicos = pd.factorize(pd.Series(recursos), sort=True)
+
+    if equipe is None:
+        nomes = [str(nome) for nome in unicos]
+        linha_do_codigo = np.arange(len(unicos))
+    else:
+        nomes = list(dict.fromkeys(equipe))
+        posicao_nome = {nome.strip().casefold(): i for i, nome in enumerate(nomes)}
+        # Recursos fora da equipe ficam com linha -1 e são ignorados
+        linha_do_codigo = np.array(
+            [posicao_nome.get(str(nome).strip().casefold(), -1) for nome in unicos], dtype=np.int64
+        )
+
+    grade = np.zeros((len(nomes), len(dias_uteis)), dtype=bool)
+    if len(codigos) == 0 or len(dias_uteis) == 0 or len(linha_do_codigo) == 0:
+        return nomes, grade
+
+    dias = para_dias(datas)
+    colunas = np.searchsorted(dias_uteis, dias)
+    colunas_validas = np.minimum(colunas, len(dias_uteis) - 1)
+    linhas = np.where(codigos >= 0, linha_do_codigo[np.maximum(codigos, 0)], -1)
+
+    # Só marca linhas com recurso conhecido cuja data é um dos dias úteis do período
+    validas = (linhas >= 0) & ~np.isnat(dias) & (dias_uteis[colunas_validas] == dias)
+    grade[linhas[validas], colunas[validas]] = True
+    return nomes, grade
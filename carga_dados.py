@@ -0,0 +1,657 @@
+"""
+📦 CARGA DE DADOS DE APONTAMENTOS
+Preparação do DataFrame e snapshot colunar tipado (Parquet)
+Evita re-parsear o CSV completo a cada boot de worker
+"""
+
+import hashlib
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+from io import BytesIO
+
+import pandas as pd
+import numpy as np
+
+# Tentar importar pyarrow (necessário para o snapshot Parquet e o modo mmap)
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    print("⚠️ pyarrow não disponível - snapshot Parquet desativado")
+
+
+# Colunas de texto com baixa cardinalidade armazenadas como categóricas
+COLUNAS_CATEGORICAS = ['s_nm_recurso', 's_nr_contrato', 's_ds_atividade']
+
+# Extensão usada para o snapshot publicado ao lado do CSV
+EXTENSAO_SNAPSHOT = '.parquet'
+
+# Colunas de texto com menos valores únicos que esta fração viram categóricas no modo mmap
+LIMITE_CARDINALIDADE_MMAP = 0.5
+
+# Esquema do extrato do Fabric (colunas ausentes no CSV são ignoradas; as demais são inferidas)
+ESQUEMA_CSV = {
+    # Texto de baixa cardinalidade (repetido em milhares de linhas)
+    's_ds_operacao': 'category',
+    's_nr_contrato': 'category',
+    's_nr_cpf': 'category',
+    's_id_recurso': 'category',
+    's_nm_recurso': 'category',
+    's_id_cargo': 'category',
+    's_ds_cargo': 'category',
+    's_ds_atividade': 'category',
+    's_id_usuario_valida': 'category',
+    's_nm_usuario_valida': 'category',
+    's_id_usuario': 'category',
+    's_nm_usuario': 'category',
+    's_id_tipo_jornada': 'category',
+    's_ds_tipo_jornada': 'category',
+    's_id_divisao': 'category',
+    's_ds_divisao': 'category',
+    's_nm_sigla': 'category',
+    's_nm_cliente_operacional': 'category',
+    'tecnologia': 'category',
+    'perfil': 'category',
+    'nivel': 'category',
+    # Identificador único por linha
+    's_id_apontamento': 'str',
+    # Horas
+    'f_hr_hora_inicio': 'float32',
+    'f_hr_hora_fim': 'float32',
+    # Flags
+    'b_fl_validado': 'Int8',
+    'n_fl_abatimento': 'Int8',
+    # Datas
+    'd_dt_data': 'datetime64[ns]',
+    'd_dt_data_fim': 'datetime64[ns]',
+    'd_dt_inicio_apontamento': 'datetime64[ns]',
+    'd_dt_fim_apontamento': 'datetime64[ns]',
+}
+
+# Leitura paralela: processos e tamanho mínimo do arquivo para dividir em trechos
+CSV_WORKERS = int(os.getenv('CSV_WORKERS', str(min(4, os.cpu_count() or 1))))
+CSV_PARALELO_MIN_BYTES = int(float(os.getenv('CSV_PARALELO_MIN_MB', '32')) * 1024 * 1024)
+
+# Bloco lido ao contar aspas na busca dos pontos de corte
+TAMANHO_BLOCO_CORTE = 8 * 1024 * 1024
+
+
+def _aplicar_esquema(df: pd.DataFrame) -> pd.DataFrame:
+    """Converte números, flags e datas do esquema (valores inválidos viram nulos)"""
+    for coluna, tipo in ESQUEMA_CSV.items():
+        if coluna not in df.columns or tipo in ('category', 'str'):
+            continue
+        if tipo.startswith('datetime'):
+            df[coluna] = pd.to_datetime(df[coluna], errors='coerce')
+        else:
+            df[coluna] = pd.to_numeric(df[coluna], errors='coerce').astype(tipo)
+    return df
+
+
+def _tipos_leitura(colunas: List[str]) -> Dict[str, str]:
+    """dtype para o read_csv: texto direto como categoria/str; o resto é convertido depois"""
+    return {c: ESQUEMA_CSV[c] for c in colunas if ESQUEMA_CSV.get(c) in ('category', 'str')}
+
+
+def _ler_trecho(caminho: str, inicio: int, fim: int, colunas: List[str]) -> pd.DataFrame:
+    """Lê as linhas entre os bytes inicio e fim do CSV (roda em processo separado)"""
+    with open(caminho, 'rb') as arquivo:
+        arquivo.seek(inicio)
+        conteudo = arquivo.read(fim - inicio)
+    df = pd.read_csv(BytesIO(conteudo), header=None, names=colunas, dtype=_tipos_leitura(colunas),
+                     encoding='utf-8', low_memory=False)
+    return _aplicar_esquema(df)
+
+
+def _cortes_csv(caminho: str, partes: int) -> List[int]:
+    """
+    Posições (bytes) que dividem o CSV em trechos de linhas completas
+
+    Um corte só cai em quebra de linha fora de aspas (paridade de aspas par
+    desde o início do arquivo), então campos com quebra de linha não são partidos.
+    """
+    tamanho = os.path.getsize(caminho)
+    with open(caminho, 'rb') as arquivo:
+        cabecalho = arquivo.readline()
+        cortes = [arquivo.tell()]
+        aspas = cabecalho.count(b'"')
+
+        for i in range(1, partes):
+            alvo = max(cortes[-1], tamanho * i // partes)
+            posicao = arquivo.tell()
+            # Aspas entre o último ponto lido e o alvo (em blocos)
+            while posicao < alvo:
+                bloco = arquivo.read(min(TAMANHO_BLOCO_CORTE, alvo - posicao))
+                if not bloco:
+                    break
+                aspas += bloco.count(b'"')
+                posicao += len(bloco)
+            # Avança linha a linha até uma quebra fora de aspas
+            while True:
+                linha = arquivo.readline()
+                if not linha:
+                    break
+                aspas += linha.count(b'"')
+                if linha.endswith(b'\n') and aspas % 2 == 0:
+                    break
+            if arquivo.tell() >= tamanho:
+                break
+            cortes.append(arquivo.tell())
+
+    cortes.append(tamanho)
+    return cortes
+
+
+def ler_csv(origem: Union[str, Path, bytes], workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Lê o CSV do extrato aplicando ESQUEMA_CSV, em paralelo para arquivos grandes
+
+    Arquivos acima de CSV_PARALELO_MIN_MB são divididos em trechos de linhas
+    completas lidos por CSV_WORKERS processos; as categóricas dos trechos são
+    unidas ao concatenar.
+
+    Args:
+        origem: Caminho do CSV ou conteúdo em bytes
+        workers: Número de processos (padrão: CSV_WORKERS)
+
+    Returns:
+        DataFrame bruto com os tipos do esquema (ainda sem preparar_dataframe)
+    """
+    if isinstance(origem, (bytes, bytearray)):
+        cabecalho = pd.read_csv(BytesIO(origem), encoding='utf-8-sig', nrows=0).columns
+        df = pd.read_csv(BytesIO(origem), encoding='utf-8-sig', dtype=_tipos_leitura(list(cabecalho)), low_memory=False)
+        return _aplicar_esquema(df)
+
+    caminho = str(origem)
+    workers = workers or CSV_WORKERS
+    cabecalho = list(pd.read_csv(caminho, encoding='utf-8-sig', nrows=0).columns)
+
+    if workers <= 1 or os.path.getsize(caminho) < CSV_PARALELO_MIN_BYTES:
+        df = pd.read_csv(caminho, encoding='utf-8-sig', dtype=_tipos_leitura(cabecalho), low_memory=False)
+        return _aplicar_esquema(df)
+
+    cortes = _cortes_csv(caminho, workers)
+    trechos = list(zip(cortes[:-1], cortes[1:]))
+    print(f"⚡ Lendo CSV em {len(trechos)} trechos paralelos", flush=True)
+
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=len(trechos)) as executor:
+        partes = list(executor.map(_ler_trecho, *zip(*[(caminho, a, b, cabecalho) for a, b in trechos])))
+
+    return concatenar_linhas(partes)
+
+
+def preparar_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcula colunas derivadas (duracao_horas e data) a partir do CSV bruto
+
+    Args:
+        df: DataFrame lido do CSV de apontamentos
+
+    Returns:
+        DataFrame com duracao_horas e data calculadas
+    """
+    # Calcular duração se não existir
+    if 'duracao_horas' not in df.columns:
+        print("⏱️ Calculando duração...")
+
+        # CSV novo já tem horas calculadas em f_hr_hora_inicio e f_hr_hora_fim
+        if 'f_hr_hora_fim' in df.columns and 'f_hr_hora_inicio' in df.columns:
+            print("   Usando colunas f_hr_hora_inicio e f_hr_hora_fim")
+            # Horas lidas como float32 (esquema); a duração é calculada em float64
+            df['duracao_horas'] = df['f_hr_hora_fim'].astype('float64') - df['f_hr_hora_inicio'].astype('float64')
+        else:
+            # Fallback: calcular usando timestamps
+            col_inicio = 'd_dt_inicio_apontamento' if 'd_dt_inicio_apontamento' in df.columns else 'd_dt_data'
+            col_fim = 'd_dt_fim_apontamento' if 'd_dt_fim_apontamento' in df.columns else 'd_dt_data_fim'
+
+            df[col_inicio] = pd.to_datetime(df[col_inicio], errors='coerce')
+            df[col_fim] = pd.to_datetime(df[col_fim], errors='coerce')
+
+            duracao = (df[col_fim] - df[col_inicio])
+            df['duracao_horas'] = duracao.dt.total_seconds() / 3600
+
+        # Remover valores inválidos
+        df = df[df['duracao_horas'] > 0].copy()
+
+    # Converter colunas de data
+    if 'd_dt_data' in df.columns and 'data' not in df.columns:
+        df['data'] = pd.to_datetime(df['d_dt_data'], errors='coerce')
+
+    return df
+
+
+def otimizar_tipos(df: pd.DataFrame, compactar_duracao: bool = True) -> pd.DataFrame:
+    """
+    Aplica os tipos compactos do snapshot (datetime64, float32 e categóricas)
+
+    Args:
+        df: DataFrame já preparado com preparar_dataframe
+        compactar_duracao: Se True, grava duracao_horas como float32
+
+    Returns:
+        DataFrame com tipos otimizados
+    """
+    if 'data' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['data']):
+        df['data'] = pd.to_datetime(df['data'], errors='coerce')
+
+    if compactar_duracao and 'duracao_horas' in df.columns:
+        df['duracao_horas'] = df['duracao_horas'].astype('float32')
+
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in df.columns and not isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            df[coluna] = df[coluna].astype('category')
+
+    return df
+
+
+def ordenar_por_data(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Ordena as linhas por data (estável, datas nulas no fim) para recortes por busca binária
+
+    Args:
+        df: DataFrame com a coluna data
+
+    Returns:
+        DataFrame ordenado com índice 0..n-1 (o próprio df se já estiver ordenado)
+    """
+    if 'data' not in df.columns:
+        return df
+
+    # Já ordenado: datas válidas crescentes seguidas apenas de nulos
+    validas = df['data'].notna().to_numpy()
+    n_validas = int(validas.sum())
+    ordenado = validas[:n_validas].all() and df['data'].iloc[:n_validas].is_monotonic_increasing
+    indice_padrao = isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1
+
+    if ordenado and indice_padrao:
+        return df
+
+    return df.sort_values('data', kind='stable', na_position='last').reset_index(drop=True)
+
+
+def concatenar_linhas(partes: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatena DataFrames preservando as colunas categóricas
+
+    pd.concat converte para object as categóricas com categorias diferentes;
+    aqui as categorias são unidas antes, em ordem, como numa carga completa
+    (groupby e empates em rankings não dependem da ordem das cargas).
+
+    Args:
+        partes: DataFrames com as mesmas colunas
+
+    Returns:
+        DataFrame concatenado com índice 0..n-1
+    """
+    partes = [p for p in partes if len(p)] or partes[:1]
+    if len(partes) == 1:
+        return partes[0].reset_index(drop=True)
+
+    partes = [p.copy(deep=False) for p in partes]
+    for coluna in partes[0].columns:
+        if not isinstance(partes[0][coluna].dtype, pd.CategoricalDtype):
+            continue
+        categorias = partes[0][coluna].cat.categories
+        for parte in partes[1:]:
+            valores = parte[coluna].cat.categories if isinstance(parte[coluna].dtype, pd.CategoricalDtype) else parte[coluna].dropna().unique()
+            categorias = categorias.union(pd.Index(valores))
+        for parte in partes:
+            if isinstance(parte[coluna].dtype, pd.CategoricalDtype):
+                parte[coluna] = parte[coluna].cat.set_categories(categorias)
+            else:
+                parte[coluna] = pd.Categorical(parte[coluna], categories=categorias)
+
+    return pd.concat(partes, ignore_index=True)
+
+
+def mesclar_delta(df: pd.DataFrame, delta: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Incorpora um arquivo delta (linhas novas ou alteradas) ao DataFrame atual
+
+    Com s_id_apontamento nos dois lados, linhas do delta substituem as de mesmo
+    ID e as demais entram como novas. Sem ID, entram só as linhas com data
+    posterior à maior data já carregada.
+
+    Args:
+        df: DataFrame atual (preparado e ordenado por data)
+        delta: Linhas do delta já preparadas com preparar_dataframe
+
+    Returns:
+        (DataFrame mesclado e ordenado, resumo com novos, substituidos e
+        inicio_afetado - menor data alterada, ou None sem alterações)
+    """
+    delta = otimizar_tipos(delta.reindex(columns=df.columns), compactar_duracao=False)
+    # Tipos alinhados aos do dataset: delta em DataFrame não passa pela inferência
+    # do leitor de CSV/Parquet e a concatenação viraria object/float64
+    for coluna in df.columns:
+        tipo = df[coluna].dtype
+        if isinstance(tipo, pd.CategoricalDtype) or delta[coluna].dtype == tipo:
+            continue
+        try:
+            if pd.api.types.is_datetime64_any_dtype(tipo):
+                delta[coluna] = pd.to_datetime(delta[coluna], errors='coerce')
+            delta[coluna] = delta[coluna].astype(tipo)
+        except (TypeError, ValueError):
+            pass
+
+    substituidas = df.iloc[:0]
+    if 's_id_apontamento' in df.columns and delta['s_id_apontamento'].notna().any():
+        # Linhas sem ID não casam com nenhuma outra (isin/drop_duplicates juntariam os nulos): entram como novas
+        ids = df['s_id_apontamento']
+        sem_id = delta['s_id_apontamento'].isna().to_numpy()
+        delta = delta[sem_id | ~delta.duplicated('s_id_apontamento', keep='last').to_numpy()]
+        sem_id = delta['s_id_apontamento'].isna().to_numpy()
+        repetidas = (ids.notna() & ids.isin(delta['s_id_apontamento'])).to_numpy()
+        if repetidas.any():
+            # Linhas reenviadas sem mudança não geram nova versão (delta pode ser reaplicado)
+            def assinatura(linhas: pd.DataFrame) -> pd.Series:
+                return pd.util.hash_pandas_object(linhas.astype(str), index=False)
+            existentes = set(assinatura(df[repetidas]))
+            alteradas = sem_id | ~assinatura(delta).isin(existentes).to_numpy()
+            delta, sem_id = delta[alteradas], sem_id[alteradas]
+            repetidas &= ids.isin(delta['s_id_apontamento']).to_numpy()
+        novos = int((sem_id | ~delta['s_id_apontamento'].isin(ids).to_numpy()).sum())
+        if repetidas.any():
+            substituidas = df[repetidas]
+            df = df[~repetidas]
+    else:
+        if 'data' in df.columns:
+            delta = delta[delta['data'] > df['data'].max()]
+        novos = len(delta)
+
+    resumo = {
+        "novos": novos,
+        "substituidos": len(delta) - novos,
+        "inicio_afetado": None
+    }
+    if delta.empty and substituidas.empty:
+        return df, resumo
+
+    if 'data' in df.columns:
+        datas = pd.concat([delta['data'], substituidas['data']]).dropna()
+        resumo["inicio_afetado"] = datas.min() if len(datas) else pd.NaT
+
+    return ordenar_por_data(concatenar_linhas([df, delta])), resumo
+
+
+def _temporario_unico(destino: Path) -> Path:
+    """Arquivo temporário ao lado do destino, exclusivo deste processo e desta gravação"""
+    return destino.with_name(f"{destino.name}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+
+
+def caminho_snapshot(caminho_csv: Union[str, Path]) -> Path:
+    """Retorna o caminho do snapshot publicado ao lado de um CSV"""
+    return Path(caminho_csv).with_suffix(EXTENSAO_SNAPSHOT)
+
+
+def salvar_snapshot(df: pd.DataFrame, destino: Union[str, Path]) -> Optional[Path]:
+    """
+    Grava o snapshot Parquet tipado de forma atômica (arquivo temporário + rename)
+
+    Args:
+        df: DataFrame preparado
+        destino: Caminho do arquivo .parquet
+
+    Returns:
+        Caminho gravado ou None se pyarrow não estiver disponível
+    """
+    if not PYARROW_AVAILABLE:
+        print("⚠️ pyarrow não disponível - snapshot não gerado")
+        return None
+
+    destino = Path(destino)
+    temporario = _temporario_unico(destino)
+
+    snapshot = otimizar_tipos(ordenar_por_data(df.copy()))
+    try:
+        snapshot.to_parquet(temporario, engine='pyarrow', index=False)
+        os.replace(temporario, destino)
+    finally:
+        temporario.unlink(missing_ok=True)
+
+    print(f"💾 Snapshot salvo: {destino} ({destino.stat().st_size/1024/1024:.1f}MB)")
+    return destino
+
+
+def ler_snapshot(origem: Union[str, Path, bytes]) -> Optional[pd.DataFrame]:
+    """
+    Lê um snapshot Parquet de arquivo local ou de bytes já baixados
+
+    Args:
+        origem: Caminho do arquivo ou conteúdo em bytes
+
+    Returns:
+        DataFrame pronto para o agente ou None se não for possível ler
+    """
+    if not PYARROW_AVAILABLE:
+        return None
+
+    if isinstance(origem, (bytes, bytearray)):
+        df = pd.read_parquet(BytesIO(origem), engine='pyarrow')
+    else:
+        df = pd.read_parquet(origem, engine='pyarrow')
+
+    # Em memória duracao_horas volta para float64: somas e médias mantêm a
+    # precisão do CSV e continuam serializáveis em JSON
+    if 'duracao_horas' in df.columns and df['duracao_horas'].dtype != np.float64:
+        df['duracao_horas'] = df['duracao_horas'].astype('float64')
+
+    return df
+
+
+def salvar_dataset_mmap(df: pd.DataFrame, destino: Union[str, Path]) -> Optional[Path]:
+    """
+    Grava o dataset em Arrow IPC sem compressão para ser mapeado em memória
+
+    Colunas numéricas e datas são lidas sem cópia do arquivo mapeado, então
+    todos os workers do gunicorn compartilham as mesmas páginas físicas.
+    Textos de baixa cardinalidade são gravados como dicionário (categóricas)
+    para não criar um objeto Python por linha em cada worker.
+
+    O arquivo final leva o hash do conteúdo no nome (ex: dataset.<hash>.arrow):
+    workers com os mesmos dados mapeiam o mesmo arquivo, e um arquivo já
+    publicado nunca é sobrescrito por outro conteúdo.
+
+    Args:
+        df: DataFrame preparado
+        destino: Caminho base do arquivo .arrow
+
+    Returns:
+        Caminho do arquivo versionado ou None se pyarrow não estiver disponível
+    """
+    if not PYARROW_AVAILABLE:
+        print("⚠️ pyarrow não disponível - modo mmap desativado")
+        return None
+
+    destino = Path(destino)
+    temporario = _temporario_unico(destino)
+
+    df = df.copy()
+    for coluna in df.columns:
+        # Datas (d_dt_*) já chegam como datetime64 de otimizar_tipos; só texto vira categoria
+        if df[coluna].dtype == object and df[coluna].nunique() < LIMITE_CARDINALIDADE_MMAP * len(df):
+            df[coluna] = df[coluna].astype('category')
+
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+
+    # Floats com NaN gravados como valor (e não como nulo) para leitura sem cópia
+    for i, coluna in enumerate(tabela.column_names):
+        if df[coluna].dtype.kind == 'f':
+            tabela = tabela.set_column(i, tabela.schema.field(coluna), pa.array(df[coluna].to_numpy(), from_pandas=False))
+
+    try:
+        with pa.OSFile(str(temporario), 'wb') as arquivo:
+            with pa.ipc.new_file(arquivo, tabela.schema) as escritor:
+                escritor.write_table(tabela)
+
+        versionado = destino.with_name(f"{destino.stem}.{_hash_arquivo(temporario)}{destino.suffix}")
+        try:
+            # Link exclusivo: se outro worker já publicou o mesmo conteúdo, o arquivo dele é mantido
+            os.link(temporario, versionado)
+        except FileExistsError:
+            print(f"♻️ Dataset mmap já publicado: {versionado}")
+            return versionado
+        except OSError:
+            # Sistema de arquivos sem hard link: rename atômico (mesmo conteúdo, mesmo nome)
+            os.replace(temporario, versionado)
+    finally:
+        temporario.unlink(missing_ok=True)
+
+    print(f"💾 Dataset mmap salvo: {versionado} ({versionado.stat().st_size/1024/1024:.1f}MB)")
+    return versionado
+
+
+def _hash_arquivo(caminho: Path, tamanho_bloco: int = 8 * 1024 * 1024) -> str:
+    """Hash curto (BLAKE2b) do conteúdo do arquivo, lido em blocos"""
+    digest = hashlib.blake2b(digest_size=8)
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b''):
+            digest.update(bloco)
+    return digest.hexdigest()
+
+
+def limpar_datasets_mmap(
+    destino: Union[str, Path],
+    manter: List[Union[str, Path]],
+    idade_minima: float = 300
+) -> int:
+    """
+    Remove versões antigas do dataset mmap (dataset.<hash>.arrow)
+
+    Workers que ainda mapeiam um arquivo removido continuam válidos (o
+    sistema só libera as páginas quando o último mapeamento é fechado).
+    Arquivos recentes ficam: outro worker pode estar prestes a mapeá-los.
+
+    Args:
+        destino: Caminho base usado em salvar_dataset_mmap
+        manter: Arquivos versionados que não podem ser removidos
+        idade_minima: Só remove arquivos sem modificação há mais que isso (segundos)
+
+    Returns:
+        Quantidade de arquivos removidos
+    """
+    destino = Path(destino)
+    manter = {Path(caminho).name for caminho in manter if caminho}
+    limite = time.time() - idade_minima
+    removidos = 0
+    for arquivo in destino.parent.glob(f"{destino.stem}.*{destino.suffix}"):
+        if arquivo.name not in manter and arquivo.stat().st_mtime < limite:
+            try:
+                arquivo.unlink()
+                removidos += 1
+            except OSError:
+                pass
+    return removidos
+
+
+def mapear_dataset(caminho: Union[str, Path]) -> Tuple[pd.DataFrame, object]:
+    """
+    Abre o arquivo Arrow IPC via mmap e monta o DataFrame sem copiar as colunas
+
+    Args:
+        caminho: Arquivo gerado por salvar_dataset_mmap
+
+    Returns:
+        (DataFrame, arquivo mapeado) - manter a referência ao arquivo enquanto o DataFrame for usado
+    """
+    fonte = pa.memory_map(str(caminho), 'r')
+    tabela = pa.ipc.open_file(fonte).read_all()
+    df = tabela.to_pandas(split_blocks=True, self_destruct=False)
+    return df, fonte
+
+
+def _ler_smaps(caminho: str, arquivo_mmap: Optional[str] = None) -> Dict[str, int]:
+    """Soma os campos de /proc/self/smaps(_rollup) em bytes, opcionalmente só do arquivo mapeado"""
+    totais: Dict[str, int] = {}
+    dentro = arquivo_mmap is None
+
+    with open(caminho) as f:
+        for linha in f:
+            partes = linha.split()
+            if not partes:
+                continue
+            if not partes[0].endswith(':'):
+                # Cabeçalho de um novo mapeamento (endereço perms offset dev inode caminho)
+                if arquivo_mmap is not None:
+                    dentro = len(partes) >= 6 and partes[-1] == arquivo_mmap
+                continue
+            if dentro and len(partes) >= 3 and partes[2] == 'kB':
+                chave = partes[0][:-1]
+                totais[chave] = totais.get(chave, 0) + int(partes[1]) * 1024
+
+    return totais
+
+
+def estatisticas_memoria(arquivo_mmap: Optional[Union[str, Path]] = None) -> Dict:
+    """
+    Memória do processo: residente total versus páginas compartilhadas com outros processos
+
+    Args:
+        arquivo_mmap: Arquivo do dataset mapeado (opcional) para detalhar suas páginas
+
+    Returns:
+        Dict com bytes residentes, compartilhados e privados
+    """
+    try:
+        geral = _ler_smaps('/proc/self/smaps_rollup')
+    except OSError:
+        # Fora do Linux: usar psutil se disponível
+        try:
+            import psutil
+            info = psutil.Process().memory_info()
+            return {"residente_bytes": info.rss, "compartilhado_bytes": getattr(info, 'shared', None)}
+        except Exception:
+            return {}
+
+    estatisticas = {
+        "residente_bytes": geral.get('Rss', 0),
+        "proporcional_bytes": geral.get('Pss', 0),
+        "compartilhado_bytes": geral.get('Shared_Clean', 0) + geral.get('Shared_Dirty', 0),
+        "privado_bytes": geral.get('Private_Clean', 0) + geral.get('Private_Dirty', 0)
+    }
+
+    if arquivo_mmap:
+        try:
+            dataset = _ler_smaps('/proc/self/smaps', str(Path(arquivo_mmap).resolve()))
+            estatisticas["dataset_mmap"] = {
+                "arquivo": str(arquivo_mmap),
+                "residente_bytes": dataset.get('Rss', 0),
+                "compartilhado_bytes": dataset.get('Shared_Clean', 0) + dataset.get('Shared_Dirty', 0)
+            }
+        except OSError:
+            pass
+
+    return estatisticas
+
+
+def publicar_snapshot(caminho_csv: Union[str, Path]) -> Optional[Path]:
+    """
+    Gera o snapshot .parquet a partir de um CSV do pipeline
+
+    Args:
+        caminho_csv: CSV de apontamentos (ex: resultados/dados_anonimizados_decupado_*.csv)
+
+    Returns:
+        Caminho do snapshot gerado
+    """
+    print(f"📂 Lendo CSV: {caminho_csv}")
+    df = ler_csv(caminho_csv)
+    df = preparar_dataframe(df)
+    return salvar_snapshot(df, caminho_snapshot(caminho_csv))
+
+
+if __name__ == "__main__":
+    # Uso: python carga_dados.py resultados/dados_anonimizados_decupado_XXXX.csv
+    if len(sys.argv) < 2:
+        print("Uso: python carga_dados.py <arquivo.csv>")
+        sys.exit(1)
+
+    for arquivo in sys.argv[1:]:
+        publicar_snapshot(arquivo)
@@ -0,0 +1,194 @@
+"""
+🧪 DADOS SINTÉTICOS PARA OS TESTES
+Gera um extrato no formato do CSV real e monta um AgenteApontamentos
+carregado a partir dele (snapshot Parquet local, sem rede nem Azure)
+"""
+
+import contextlib
+import functools
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+
+# Nomes fixos usados nos testes do resolvedor (acentos, homônimos parciais)
+NOMES_FIXOS = ["João Silva", "Joao Santos", "Maria Souza", "Ana Paula", "JOSÉ Pereira",
+               "Ana Souza", "João Paulo Souza", "Maria Oliveira"]
+
+CONTRATOS = ["E0220303", "E0110101", "E0330000", "E0440404", "E0550505", None]
+CONTRATOS_FORNECEDOR = [7873.0, 7874.0, 8446.0, None]
+ATIVIDADES = ["Desenvolvimento de software", "Reunião de alinhamento", "Suporte técnico N2",
+              "Análise de requisitos", "Testes automatizados", "Documentação técnica", None]
+
+
+def verificar(condicao: bool, descricao: str):
+    """Imprime o resultado de uma verificação e interrompe o teste se falhar"""
+    print(f"   {'✅' if condicao else '❌'} {descricao}")
+    if not condicao:
+        raise AssertionError(descricao)
+
+
+def titulo(texto: str):
+    """Cabeçalho de uma seção do teste"""
+    print(f"\n{'='*60}")
+    print(texto)
+    print(f"{'='*60}")
+
+
+class _ArquivosSilenciosos(SimpleHTTPRequestHandler):
+    """Serve arquivos de uma pasta sem log por requisição"""
+
+    def log_message(self, *args):
+        pass
+
+
+@contextlib.contextmanager
+def servidor_http(pasta: Union[str, Path]):
+    """
+    Servidor HTTP local servindo os arquivos da pasta (substitui HostGator/URLs)
+
+    Yields:
+        URL base (ex: http://127.0.0.1:PORTA)
+    """
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_ArquivosSilenciosos, directory=str(pasta)))
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{servidor.server_address[1]}"
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+def gerar_apontamentos(
+    linhas: int = 6000,
+    nomes: Optional[List[str]] = None,
+    inicio: str = "2025-08-01",
+    fim: str = "2025-11-30",
+    semente: int = 42,
+    prefixo_id: str = "APT"
+) -> pd.DataFrame:
+    """
+    DataFrame bruto com as colunas do extrator
+
+    Args:
+        linhas: Quantidade de apontamentos
+        nomes: Recursos (padrão: NOMES_FIXOS + 40 RECURSO_<n>)
+        inicio: Primeira data possível (YYYY-MM-DD)
+        fim: Última data possível (YYYY-MM-DD)
+        semente: Semente do gerador (mesma semente → mesmos dados)
+        prefixo_id: Prefixo do s_id_apontamento
+
+    Returns:
+        DataFrame no formato do CSV (datas e horas ainda como texto/número)
+    """
+    rng = np.random.default_rng(semente)
+    if nomes is None:
+        nomes = NOMES_FIXOS + [f"RECURSO_{n}" for n in rng.integers(10**9, 2 * 10**9, 40)]
+    datas = pd.date_range(inicio, fim, freq="D")
+
+    inicio_hora = rng.choice([8.0, 9.0, 13.0, 14.0], linhas)
+    duracao = rng.choice([1.0, 2.0, 4.0, 4.5, 8.0, 9.0, 12.0, 0.0], linhas)
+    fim_hora = np.where(rng.random(linhas) > 0.02, inicio_hora + duracao, np.nan)
+
+    return pd.DataFrame({
+        "s_id_apontamento": [f"{prefixo_id}{i}" for i in rng.permutation(linhas) + 100000],
+        "s_ds_operacao": rng.choice(["Operação A", "Operação B", "Educação"], linhas),
+        "s_nr_contrato": [CONTRATOS[i] for i in rng.integers(0, len(CONTRATOS), linhas)],
+        "s_nm_recurso": [nomes[i] for i in rng.integers(0, len(nomes), linhas)],
+        "s_ds_cargo": "7874-3-AZURE-GERENTE DE PROJETOS-NÍVEL 3",
+        "d_dt_data": [str(datas[i].date()) for i in rng.integers(0, len(datas), linhas)],
+        "f_hr_hora_inicio": inicio_hora,
+        "f_hr_hora_fim": fim_hora,
+        "b_fl_validado": rng.integers(0, 2, linhas),
+        "s_ds_atividade": [ATIVIDADES[i] for i in rng.integers(0, len(ATIVIDADES), linhas)],
+        "contrato_fornecedor": [CONTRATOS_FORNECEDOR[i] for i in rng.integers(0, len(CONTRATOS_FORNECEDOR), linhas)],
+        "tecnologia": "AZURE",
+        "perfil": "GERENTE DE PROJETOS",
+        "nivel": "NÍVEL 3",
+        "s_nm_cliente_operacional": "Cliente X",
+    })
+
+
+def gravar_csv(df: pd.DataFrame, caminho: Union[str, Path]) -> Path:
+    """Grava o DataFrame como o extrator (UTF-8 com BOM)"""
+    caminho = Path(caminho)
+    df.to_csv(caminho, index=False, encoding="utf-8-sig")
+    return caminho
+
+
+def criar_agente(pasta: Union[str, Path], df: Optional[pd.DataFrame] = None, **ambiente):
+    """
+    AgenteApontamentos carregado com os dados sintéticos
+
+    O CSV vira snapshot Parquet (o mesmo caminho da carga em produção) e o
+    agente é apontado para ele; CSV_URL e Azure ficam desligados.
+
+    Args:
+        pasta: Pasta temporária para CSV, snapshot e caches
+        df: Dados brutos (padrão: gerar_apontamentos())
+        **ambiente: Variáveis de ambiente extras (ex: DATASET_MMAP="true")
+
+    Returns:
+        AgenteApontamentos com os dados carregados
+    """
+    from carga_dados import publicar_snapshot
+
+    pasta = Path(pasta)
+    pasta.mkdir(parents=True, exist_ok=True)
+    csv = gravar_csv(gerar_apontamentos() if df is None else df, pasta / "dados_anonimizados_decupado_teste.csv")
+    snapshot = publicar_snapshot(csv)
+
+    os.environ.update({
+        "SNAPSHOT_PATH": str(snapshot),
+        "CSV_URL": "",
+        "AZURE_STORAGE_CONNECTION_STRING": "",
+        "DOWNLOAD_CACHE_DIR": str(pasta / "download"),
+        "DATASET_MMAP": "false",
+        "DATASET_MMAP_PATH": str(pasta / "dataset.arrow"),
+        **{chave: str(valor) for chave, valor in ambiente.items()},
+    })
+
+    from agente_apontamentos import AgenteApontamentos
+    return AgenteApontamentos()
+
+
+# Consultas que percorrem todos os caminhos do agente (índices, cubo, recortes e grade)
+CONSULTAS_PADRAO = [
+    ("total_horas_geral", ()),
+    ("ranking_funcionarios", (15,)),
+    ("duracao_media_geral", ()),
+    ("total_horas_usuario", ("João Silva",)),
+    ("duracao_media_usuario", ("Maria Souza",)),
+    ("consultar_periodo", ("01/09/2025", "30/09/2025")),
+    ("consultar_periodo", ("01/09/2025", "30/09/2025", "Ana Paula")),
+    ("detalhar_apontamentos_por_dia", ("06/10/2025", "17/10/2025", "João Silva")),
+    ("dias_nao_apontados", ("01/10/2025", "31/10/2025")),
+    ("dias_nao_apontados", ("01/10/2025", "31/10/2025", "Maria Souza")),
+    ("horas_esperadas_colaborador", ("Ana Paula", "01/08/2025", "31/08/2025")),
+    ("verificar_saidas_esquecidas", ("João Silva",)),
+    ("identificar_outliers", ("01/08/2025", "30/11/2025", 10)),
+    ("listar_contratos", ()),
+    ("contratos_por_recurso", ("Maria Souza",)),
+    ("recursos_por_contrato", ("E0440404",)),
+    ("recursos_por_contrato", ("7873",)),
+    ("listar_atividades", ()),
+    ("ranking_atividades", (10, "horas")),
+    ("apontamentos_por_atividade", ("reuniao",)),
+    ("atividades_por_usuario", ("João Silva",)),
+    ("horas_por_atividade", ("01/09/2025", "30/11/2025")),
+    ("atividades_por_periodo", ("01/10/2025", "31/10/2025")),
+    ("distribuicao_atividades_por_contrato", ("E0220303",)),
+]
+
+
+def responder_consultas(agente, consultas=None) -> dict:
+    """Respostas do agente para as consultas ((método, args) → resultado)"""
+    return {
+        (metodo, args): getattr(agente, metodo)(*args)
+        for metodo, args in (consultas or CONSULTAS_PADRAO)
+    }
@@ -0,0 +1,153 @@
+"""
+⬇️ DOWNLOAD CONDICIONAL DOS DADOS
+Baixa CSV/snapshot por HTTP ou Azure Blob direto para um cache em disco,
+em blocos, revalidando com ETag/If-Modified-Since: sem mudança na origem
+não há download, e os bytes brutos nunca ficam inteiros na memória
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import uuid
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+
+# Tamanho dos blocos gravados no disco durante o download
+TAMANHO_BLOCO = 1024 * 1024
+
+
+def pasta_cache_padrao() -> Path:
+    """Pasta do cache de downloads (DOWNLOAD_CACHE_DIR ou temp do sistema)"""
+    return Path(os.getenv('DOWNLOAD_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'apontamentos_download'))
+
+
+def _caminhos_cache(origem: str, pasta: Path, sufixo: str) -> Tuple[Path, Path]:
+    """Arquivo de dados e de metadados (ETag/Last-Modified) de uma origem"""
+    chave = hashlib.sha1(origem.encode('utf-8')).hexdigest()[:16]
+    return pasta / f"{chave}{sufixo}", pasta / f"{chave}.json"
+
+
+def _ler_metadados(caminho: Path) -> Dict:
+    try:
+        return json.loads(caminho.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def _gravar_blocos(blocos, destino: Path) -> int:
+    """Grava os blocos em arquivo temporário e troca de forma atômica; retorna os bytes gravados"""
+    # Temporário exclusivo: workers baixando a mesma origem não escrevem no mesmo arquivo
+    temporario = destino.with_name(f"{destino.name}.{os.getpid()}.{uuid.uuid4().hex}.tmp")
+    total = 0
+    try:
+        with open(temporario, 'wb') as arquivo:
+            for bloco in blocos:
+                if bloco:
+                    arquivo.write(bloco)
+                    total += len(bloco)
+        os.replace(temporario, destino)
+    finally:
+        temporario.unlink(missing_ok=True)
+    return total
+
+
+def _gravar_metadados(caminho: Path, metadados: Dict):
+    """Grava ETag/Last-Modified de forma atômica (nunca fica um .json pela metade)"""
+    _gravar_blocos([json.dumps(metadados).encode('utf-8')], caminho)
+
+
+def baixar_url(
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    timeout: float = 120,
+    pasta: Optional[Union[str, Path]] = None
+) -> Tuple[Path, bool]:
+    """
+    Baixa uma URL para o cache em disco, só se ela mudou
+
+    Envia If-None-Match/If-Modified-Since com os dados da última cópia; 304
+    reaproveita o arquivo em cache. O corpo é gravado em blocos (stream).
+    Se a origem falhar e existir cópia em cache, ela é usada.
+
+    Args:
+        url: Endereço do arquivo
+        headers: Cabeçalhos extras (ex: User-Agent)
+        timeout: Timeout de conexão/leitura em segundos
+        pasta: Pasta do cache (padrão: DOWNLOAD_CACHE_DIR)
+
+    Returns:
+        (caminho local do arquivo, True se houve download)
+    """
+    import requests
+
+    pasta = Path(pasta) if pasta else pasta_cache_padrao()
+    pasta.mkdir(parents=True, exist_ok=True)
+    arquivo, arquivo_meta = _caminhos_cache(url, pasta, Path(url.split('?', 1)[0]).suffix)
+    metadados = _ler_metadados(arquivo_meta) if arquivo.exists() else {}
+
+    cabecalhos = dict(headers or {})
+    if metadados.get('etag'):
+        cabecalhos['If-None-Match'] = metadados['etag']
+    if metadados.get('last_modified'):
+        cabecalhos['If-Modified-Since'] = metadados['last_modified']
+
+    try:
+        with requests.get(url, headers=cabecalhos, timeout=timeout, stream=True) as response:
+            if response.status_code == 304 and arquivo.exists():
+                print(f"♻️ Sem mudanças na origem, usando cache: {arquivo}", flush=True)
+                return arquivo, False
+
+            response.raise_for_status()
+            total = _gravar_blocos(response.iter_content(chunk_size=TAMANHO_BLOCO), arquivo)
+            metadados = {
+                'url': url,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified')
+            }
+
+    except Exception as e:
+        if arquivo.exists():
+            print(f"⚠️ Erro ao baixar ({e}), usando cópia em cache: {arquivo}", flush=True)
+            return arquivo, False
+        raise
+
+    _gravar_metadados(arquivo_meta, metadados)
+    print(f"✅ Baixado para cache ({total/1024/1024:.1f}MB): {arquivo}", flush=True)
+    return arquivo, True
+
+
+def baixar_blob(blob_client, pasta: Optional[Union[str, Path]] = None) -> Tuple[Path, bool]:
+    """
+    Baixa um blob do Azure Storage para o cache em disco, só se o ETag mudou
+
+    Args:
+        blob_client: BlobClient do azure-storage-blob
+        pasta: Pasta do cache (padrão: DOWNLOAD_CACHE_DIR)
+
+    Returns:
+        (caminho local do arquivo, True se houve download)
+    """
+    pasta = Path(pasta) if pasta else pasta_cache_padrao()
+    pasta.mkdir(parents=True, exist_ok=True)
+    arquivo, arquivo_meta = _caminhos_cache(blob_client.url, pasta, Path(blob_client.blob_name).suffix)
+
+    etag = blob_client.get_blob_properties().etag
+    if arquivo.exists() and _ler_metadados(arquivo_meta).get('etag') == etag:
+        print(f"♻️ Blob sem mudanças, usando cache: {arquivo}", flush=True)
+        return arquivo, False
+
+    # Download condicionado ao ETag lido acima: blob trocado no meio falha em vez de misturar versões
+    download = blob_client.download_blob(etag=etag, match_condition=_match_condition())
+    total = _gravar_blocos(download.chunks(), arquivo)
+
+    _gravar_metadados(arquivo_meta, {'url': blob_client.url, 'etag': etag})
+    print(f"✅ Blob baixado para cache ({total/1024/1024:.1f}MB): {arquivo}", flush=True)
+    return arquivo, True
+
+
+def _match_condition():
+    """MatchConditions.IfNotModified (import tardio: azure-core é opcional)"""
+    from azure.core import MatchConditions
+    return MatchConditions.IfNotModified
@@ -0,0 +1,714 @@
+"""
+🗂️ ÍNDICES DE APONTAMENTOS
+Estruturas construídas na carga dos dados para evitar varreduras
+completas do DataFrame (str.contains) a cada pergunta
+"""
+
+import re
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from carga_dados import concatenar_linhas
+
+
+# Chaves do cubo diário (as ausentes no DataFrame são ignoradas)
+CHAVES_CUBO = ['data', 's_nm_recurso', 's_nr_contrato', 's_ds_atividade']
+
+
+def dobrar_acentos(texto) -> str:
+    """Texto sem acentos e sem caixa (Reunião → reuniao)"""
+    decomposto = unicodedata.normalize('NFKD', str(texto))
+    return ''.join(c for c in decomposto if not unicodedata.combining(c)).casefold()
+
+
+def normalizar_nome(nome) -> str:
+    """Normaliza um nome de recurso para busca (sem acentos, sem caixa, espaços simples)"""
+    return ' '.join(dobrar_acentos(nome).split())
+
+
+def trigramas(texto: str) -> set:
+    """Trigramas de um texto normalizado, com espaço nas pontas ("ana" → " an", "ana", "na ")"""
+    texto = f" {texto} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+# Semelhança mínima (Dice dos trigramas) para sugerir um nome parecido
+SEMELHANCA_MINIMA = 0.45
+
+# Vantagem mínima do melhor candidato sobre o segundo para resolver sem perguntar
+MARGEM_DESAMBIGUACAO = 0.1
+
+# Pontuação mínima para usar um nome sem confirmação (exato, prefixo ou trecho);
+# nomes só parecidos (trigramas) viram sugestão, nunca as linhas de outra pessoa
+PONTUACAO_MINIMA_RESOLUCAO = 0.7
+
+
+def recortar_periodo(
+    datas: np.ndarray,
+    inicio: Optional[pd.Timestamp] = None,
+    fim: Optional[pd.Timestamp] = None,
+    fim_exclusivo: bool = False
+) -> Tuple[int, int]:
+    """
+    Limites [a, b) das posições com data no período, em um array de datas ordenado
+
+    Args:
+        datas: datetime64[ns] ordenado (datas nulas no fim)
+        inicio: Data inicial inclusiva (opcional)
+        fim: Data final (opcional), inclusiva salvo fim_exclusivo=True
+        fim_exclusivo: Se True, exclui datas iguais a fim
+
+    Returns:
+        (a, b) para fatiar com [a:b]
+    """
+    a = int(np.searchsorted(datas, np.datetime64(inicio, 'ns'), side='left')) if inicio is not None else 0
+    if fim is not None:
+        b = int(np.searchsorted(datas, np.datetime64(fim, 'ns'), side='left' if fim_exclusivo else 'right'))
+    elif inicio is not None:
+        # Datas nulas (NaT) ficam no fim e não entram em filtros de período
+        b = int(np.searchsorted(datas, np.datetime64('NaT'), side='left'))
+    else:
+        b = len(datas)
+    return a, max(a, b)
+
+
+class IndiceRecursos:
+    """
+    Índice de recursos: nome normalizado → posições das linhas ordenadas por data
+
+    Construído uma vez na carga. Nomes sem acento e sem caixa ("Joao" acha
+    "João"). Buscas exatas e por prefixo são resolvidas por dicionário/busca
+    binária; trecho do nome e nomes com erro de digitação usam um índice de
+    trigramas sobre os nomes únicos, nunca as linhas do DataFrame.
+    """
+
+    def __init__(self, nomes: pd.Series, datas: pd.Series):
+        """
+        Constrói o índice
+
+        Args:
+            nomes: Coluna s_nm_recurso
+            datas: Coluna data (datetime64) alinhada com nomes
+        """
+        # nome normalizado → [(nome original, posições, datas)] - posições em ordem de data
+        self.entradas: Dict[str, List[Tuple[str, np.ndarray, np.ndarray]]] = {}
+
+        codigos, unicos = pd.factorize(nomes, sort=False)
+        valores_data = datas.to_numpy(dtype='datetime64[ns]')
+
+        # Ordenação estável por (recurso, data): cada recurso vira um bloco contíguo
+        ordem = np.lexsort((valores_data, codigos))
+        codigos_ordenados = codigos[ordem]
+        cortes = np.flatnonzero(np.diff(codigos_ordenados)) + 1
+
+        for bloco in np.split(ordem, cortes):
+            if len(bloco) == 0:
+                continue
+            codigo = codigos[bloco[0]]
+            if codigo < 0:  # nome nulo
+                continue
+            nome = unicos[codigo]
+            self.entradas.setdefault(normalizar_nome(nome), []).append(
+                (nome, bloco, valores_data[bloco])
+            )
+
+        self._indexar_chaves()
+
+    def _indexar_chaves(self):
+        """Chaves ordenadas (prefixo com bisect) e trigrama → ids das chaves"""
+        self.chaves = sorted(self.entradas)
+        self.trigramas: Dict[str, set] = {}
+        self.trigramas_chave: List[set] = []
+        for id_chave, chave in enumerate(self.chaves):
+            grams = trigramas(chave)
+            self.trigramas_chave.append(grams)
+            for gram in grams:
+                self.trigramas.setdefault(gram, set()).add(id_chave)
+
+    def __len__(self) -> int:
+        return len(self.chaves)
+
+    def com_linhas_novas(self, nomes: pd.Series, datas: pd.Series, inicio: int) -> 'IndiceRecursos':
+        """
+        Novo índice com linhas anexadas ao fim do DataFrame (o atual não muda)
+
+        Válido quando as linhas antigas mantêm suas posições e as novas têm
+        data maior ou igual à última já indexada (delta do dia).
+
+        Args:
+            nomes: s_nm_recurso das linhas novas
+            datas: data das linhas novas
+            inicio: Posição (iloc) da primeira linha nova
+
+        Returns:
+            IndiceRecursos atualizado
+        """
+        novo = IndiceRecursos.__new__(IndiceRecursos)
+        novo.entradas = dict(self.entradas)
+        delta = IndiceRecursos(nomes, datas)
+
+        for chave, grupos in delta.entradas.items():
+            atuais = {nome: (posicoes, valores) for nome, posicoes, valores in novo.entradas.get(chave, [])}
+            for nome, posicoes, valores in grupos:
+                posicoes = posicoes + inicio
+                if nome in atuais:
+                    antigas, datas_antigas = atuais[nome]
+                    posicoes = np.concatenate([antigas, posicoes])
+                    valores = np.concatenate([datas_antigas, valores])
+                atuais[nome] = (posicoes, valores)
+            novo.entradas[chave] = [(nome, posicoes, valores) for nome, (posicoes, valores) in atuais.items()]
+
+        if len(novo.entradas) == len(self.entradas):
+            # Nenhum nome novo: chaves e trigramas continuam valendo
+            novo.chaves, novo.trigramas, novo.trigramas_chave = self.chaves, self.trigramas, self.trigramas_chave
+        else:
+            novo._indexar_chaves()
+        return novo
+
+    def _chaves_candidatas(self, termo: str) -> List[Tuple[str, float]]:
+        """
+        Chaves que correspondem ao termo, com pontuação
+
+        Exato (1.0) → prefixo (0.9) → trecho, no início de palavra (0.8) ou não
+        (0.7) → nome parecido por trigramas (até 0.6). Cada etapa só roda se a
+        anterior não achou nada.
+        """
+        chave = normalizar_nome(termo)
+        if not chave:
+            return []
+
+        if chave in self.entradas:
+            return [(chave, 1.0)]
+
+        # Prefixo: busca binária na lista ordenada de nomes
+        encontradas = []
+        i = bisect_left(self.chaves, chave)
+        while i < len(self.chaves) and self.chaves[i].startswith(chave):
+            encontradas.append((self.chaves[i], 0.9))
+            i += 1
+        if encontradas:
+            return encontradas
+
+        # Trecho do nome: só as chaves com todos os trigramas internos do termo
+        grams = trigramas(chave) if len(chave) >= 3 else set()
+        internos = [self.trigramas.get(g, set()) for g in grams if ' ' not in (g[0], g[-1])]
+        if internos:
+            ids = sorted(set.intersection(*sorted(internos, key=len)))
+        else:
+            ids = range(len(self.chaves))
+        for id_chave in ids:
+            nome = self.chaves[id_chave]
+            posicao = nome.find(chave)
+            if posicao >= 0:
+                encontradas.append((nome, 0.8 if posicao == 0 or nome[posicao - 1] == ' ' else 0.7))
+        if encontradas:
+            return encontradas
+
+        # Nome parecido (erro de digitação, ordem trocada): Dice dos trigramas
+        comuns: Dict[int, int] = {}
+        for gram in grams:
+            for id_chave in self.trigramas.get(gram, ()):
+                comuns[id_chave] = comuns.get(id_chave, 0) + 1
+        for id_chave, quantidade in comuns.items():
+            semelhanca = 2 * quantidade / (len(grams) + len(self.trigramas_chave[id_chave]))
+            if semelhanca >= SEMELHANCA_MINIMA:
+                encontradas.append((self.chaves[id_chave], round(0.6 * semelhanca, 4)))
+        return encontradas
+
+    def _resolver(self, termo: str) -> List[Tuple[str, np.ndarray, np.ndarray]]:
+        """Entradas (nome original, posições, datas) das chaves candidatas, sem as só parecidas"""
+        encontrados = []
+        for chave, pontos in self._chaves_candidatas(termo):
+            if pontos >= PONTUACAO_MINIMA_RESOLUCAO:
+                encontrados.extend(self.entradas[chave])
+        return encontrados
+
+    def candidatos(self, termo: str, limite: Optional[int] = None) -> List[Tuple[str, float, int]]:
+        """
+        Nomes originais que correspondem ao termo, do mais provável para o menos
+
+        Args:
+            termo: Nome (ou parte dele) do recurso
+            limite: Máximo de candidatos (opcional)
+
+        Returns:
+            [(nome original, pontuação 0-1, quantidade de apontamentos)]
+        """
+        ranking = [
+            (nome, pontos, len(posicoes))
+            for chave, pontos in self._chaves_candidatas(termo)
+            for nome, posicoes, _ in self.entradas[chave]
+        ]
+        ranking.sort(key=lambda item: (-item[1], -item[2], item[0]))
+        return ranking[:limite] if limite else ranking
+
+    def nomes(self, termo: str) -> List[str]:
+        """Retorna os nomes originais que correspondem ao termo"""
+        return [nome for nome, _, _ in self._resolver(termo)]
+
+    def posicoes(
+        self,
+        termo: str,
+        inicio: Optional[pd.Timestamp] = None,
+        fim: Optional[pd.Timestamp] = None
+    ) -> np.ndarray:
+        """
+        Posições (iloc) das linhas do recurso, opcionalmente recortadas por período
+
+        Como cada recurso está ordenado por data, o recorte é uma busca binária.
+        As posições voltam na ordem original do DataFrame, então o resultado é
+        idêntico ao de um filtro booleano.
+
+        Args:
+            termo: Nome (ou parte dele) do recurso
+            inicio: Data inicial inclusiva (opcional)
+            fim: Data final inclusiva (opcional)
+
+        Returns:
+            Array ordenado de posições
+        """
+        partes = []
+        for _, posicoes, datas in self._resolver(termo):
+            a, b = recortar_periodo(datas, inicio, fim)
+            if b > a:
+                partes.append(posicoes[a:b])
+
+        if not partes:
+            return np.empty(0, dtype=np.intp)
+        return np.sort(np.concatenate(partes))
+
+
+# Colunas de contrato indexadas: externo (ex: E0440404) e interno do fornecedor (ex: 7873)
+COLUNAS_CONTRATO = ['s_nr_contrato', 'contrato_fornecedor']
+
+
+def normalizar_contrato(valor) -> str:
+    """Chave de contrato: sem espaços, maiúsculas e números inteiros sem '.0' (7873.0 → 7873)"""
+    texto = str(valor).strip().upper()
+    try:
+        numero = float(texto)
+        if numero.is_integer():
+            return str(int(numero))
+    except ValueError:
+        pass
+    return texto
+
+
+def _posicoes_por_valor(coluna: pd.Series) -> Dict[object, np.ndarray]:
+    """Valor único → posições das linhas (ordenadas), sem varrer a coluna por valor"""
+    codigos, unicos = pd.factorize(coluna, sort=False)
+    ordem = np.argsort(codigos, kind='stable')
+    codigos_ordenados = codigos[ordem]
+    cortes = np.flatnonzero(np.diff(codigos_ordenados)) + 1
+    return {
+        unicos[codigos[bloco[0]]]: bloco
+        for bloco in np.split(ordem, cortes)
+        if len(bloco) and codigos[bloco[0]] >= 0
+    }
+
+
+class IndiceContratos:
+    """
+    Índice de contratos: chave normalizada → posições das linhas
+
+    Cobre s_nr_contrato e contrato_fornecedor; uma linha que casa pelas duas
+    colunas aparece uma vez só. Horas e apontamentos por contrato ficam
+    pré-calculados.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Constrói o índice
+
+        Args:
+            df: DataFrame completo de apontamentos
+        """
+        partes: Dict[str, List[np.ndarray]] = {}
+        for coluna in COLUNAS_CONTRATO:
+            if coluna not in df.columns:
+                continue
+            for valor, posicoes in _posicoes_por_valor(df[coluna]).items():
+                partes.setdefault(normalizar_contrato(valor), []).append(posicoes)
+
+        # Posições ordenadas e sem repetição (np.unique) por chave
+        self.posicoes_por_chave: Dict[str, np.ndarray] = {
+            chave: lista[0] if len(lista) == 1 else np.unique(np.concatenate(lista))
+            for chave, lista in partes.items()
+        }
+
+        horas = df['duracao_horas'].to_numpy(dtype=np.float64) if 'duracao_horas' in df.columns else None
+        self.totais: Dict[str, Tuple[float, int]] = {
+            chave: (float(horas[posicoes].sum()) if horas is not None else 0.0, len(posicoes))
+            for chave, posicoes in self.posicoes_por_chave.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.posicoes_por_chave)
+
+    def posicoes(self, contrato) -> np.ndarray:
+        """Posições (iloc, ordenadas) das linhas do contrato; vazio se não existir"""
+        return self.posicoes_por_chave.get(normalizar_contrato(contrato), np.empty(0, dtype=np.intp))
+
+    def total(self, contrato) -> Optional[Tuple[float, int]]:
+        """(horas, apontamentos) do contrato ou None se não existir"""
+        return self.totais.get(normalizar_contrato(contrato))
+
+
+# Palavras ignoradas nas buscas de atividade (quando há outras na consulta)
+PALAVRAS_VAZIAS = frozenset({'a', 'o', 'as', 'os', 'de', 'da', 'do', 'das', 'dos', 'e', 'em', 'na', 'no', 'para', 'com', 'por'})
+
+
+def tokenizar(texto) -> List[str]:
+    """Palavras do texto já sem acentos e sem caixa"""
+    return re.findall(r'\w+', dobrar_acentos(texto))
+
+
+class IndiceAtividades:
+    """
+    Índice invertido das descrições de atividade
+
+    token (sem acento) → ids das atividades únicas; id → posições das linhas.
+    A busca roda sobre as poucas descrições únicas, nunca sobre as linhas.
+    """
+
+    def __init__(self, atividades: pd.Series):
+        """
+        Constrói o índice
+
+        Args:
+            atividades: Coluna s_ds_atividade
+        """
+        codigos, unicos = pd.factorize(atividades, sort=False)
+        self.atividades: List[str] = [str(a) for a in unicos]
+        self.textos: List[str] = [dobrar_acentos(a) for a in self.atividades]
+
+        # id → posições (ordenadas) das linhas
+        ordem = np.argsort(codigos, kind='stable')
+        tamanhos = np.bincount(codigos[codigos >= 0], minlength=len(unicos))
+        inicio = int(np.count_nonzero(codigos < 0))  # nulos ficam no começo da ordem
+        self.posicoes_atividade: List[np.ndarray] = []
+        for tamanho in tamanhos:
+            self.posicoes_atividade.append(np.sort(ordem[inicio:inicio + tamanho]))
+            inicio += tamanho
+
+        self.tokens: Dict[str, set] = {}
+        self.tokens_atividade: List[List[str]] = []
+        for id_atividade, texto in enumerate(self.atividades):
+            tokens = tokenizar(texto)
+            self.tokens_atividade.append(tokens)
+            for token in tokens:
+                self.tokens.setdefault(token, set()).add(id_atividade)
+
+        # Tokens ordenados para busca por prefixo com bisect
+        self.chaves = sorted(self.tokens)
+
+    def __len__(self) -> int:
+        return len(self.atividades)
+
+    def _ids_token(self, token: str) -> Dict[int, float]:
+        """id → peso para um token da consulta: exato (1.0) ou prefixo (0.7)"""
+        pesos = {id_atividade: 1.0 for id_atividade in self.tokens.get(token, ())}
+        i = bisect_left(self.chaves, token)
+        while i < len(self.chaves) and self.chaves[i].startswith(token):
+            for id_atividade in self.tokens[self.chaves[i]]:
+                pesos.setdefault(id_atividade, 0.7)
+            i += 1
+        return pesos
+
+    def buscar(self, consulta: str) -> List[Tuple[int, float]]:
+        """
+        Atividades que contêm todas as palavras da consulta (inteiras ou como prefixo)
+
+        Sem resultado por palavras, cai para trecho do texto (sem acento) nas
+        descrições únicas. Ranking: soma dos pesos das palavras, bônus para a
+        frase inteira e para descrições mais curtas (maior cobertura).
+
+        Args:
+            consulta: Texto livre (ex: "reuniao alinh")
+
+        Returns:
+            [(id da atividade, pontuação)] em ordem decrescente de pontuação
+        """
+        frase = dobrar_acentos(consulta).strip()
+        palavras = tokenizar(consulta)
+        uteis = [p for p in palavras if p not in PALAVRAS_VAZIAS] or palavras
+
+        pontos: Dict[int, float] = {}
+        if uteis:
+            pontos = self._ids_token(uteis[0])
+            for palavra in uteis[1:]:
+                pesos = self._ids_token(palavra)
+                pontos = {i: p + pesos[i] for i, p in pontos.items() if i in pesos}
+                if not pontos:
+                    break
+
+        if not pontos and frase:
+            pontos = {i: 0.5 for i, texto in enumerate(self.textos) if frase in texto}
+
+        ranking = []
+        for id_atividade, ponto in pontos.items():
+            texto = self.textos[id_atividade]
+            if frase and frase == texto:
+                ponto += 2.0
+            elif frase and frase in texto:
+                ponto += 1.0
+            ponto += len(uteis) / max(len(self.tokens_atividade[id_atividade]), 1)
+            ranking.append((id_atividade, ponto))
+
+        ranking.sort(key=lambda item: (-item[1], self.atividades[item[0]]))
+        return ranking
+
+    def exata(self, consulta: str) -> Optional[int]:
+        """Id da atividade com a descrição igual à consulta (sem acento/caixa), se houver"""
+        frase = dobrar_acentos(consulta).strip()
+        for id_atividade, texto in enumerate(self.textos):
+            if texto == frase:
+                return id_atividade
+        return None
+
+    def posicoes(self, ids: List[int]) -> np.ndarray:
+        """Posições (iloc, ordenadas) das linhas das atividades"""
+        if not ids:
+            return np.empty(0, dtype=np.intp)
+        if len(ids) == 1:
+            return self.posicoes_atividade[ids[0]]
+        return np.sort(np.concatenate([self.posicoes_atividade[i] for i in ids]))
+
+
+def montar_cubo(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agrega as linhas em recurso × dia × contrato × atividade
+
+    Args:
+        df: Linhas de apontamento (DataFrame completo ou um recorte)
+
+    Returns:
+        DataFrame ordenado por data com duracao_horas (soma) e apontamentos (quantidade)
+    """
+    chaves = [c for c in CHAVES_CUBO if c in df.columns]
+    return (
+        df.groupby(chaves, observed=True, dropna=False, sort=True)['duracao_horas']
+        .agg(duracao_horas='sum', apontamentos='size')
+        .reset_index()
+    )
+
+
+def agregar_cubo(cubo: pd.DataFrame, chave) -> pd.DataFrame:
+    """
+    Soma, quantidade e média de horas por chave, a partir de linhas do cubo
+
+    Equivale a df.groupby(chave)['duracao_horas'].agg(['sum', 'count', 'mean'])
+    sobre as linhas originais, ordenado por soma decrescente.
+
+    Args:
+        cubo: Linhas do cubo (CuboDiario.df ou um recorte)
+        chave: Coluna (ou lista de colunas) de agrupamento
+
+    Returns:
+        DataFrame com colunas sum, count e mean
+    """
+    somas = cubo.groupby(chave, observed=True)[['duracao_horas', 'apontamentos']].sum()
+    resultado = pd.DataFrame({
+        'sum': somas['duracao_horas'],
+        'count': somas['apontamentos'],
+        'mean': somas['duracao_horas'] / somas['apontamentos']
+    })
+    return resultado.sort_values('sum', ascending=False)
+
+
+class CuboDiario:
+    """
+    Cubo diário pré-agregado (recurso × dia × contrato × atividade)
+
+    Rankings, totais e estatísticas de período somam as linhas do cubo em vez
+    das linhas brutas; as linhas brutas ficam para os detalhamentos.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Constrói o cubo
+
+        Args:
+            df: DataFrame completo de apontamentos
+        """
+        self.df = montar_cubo(df)
+        self._datas = self.df['data'].to_numpy(dtype='datetime64[ns]')
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def com_dias_alterados(self, df: pd.DataFrame, datas: np.ndarray, inicio: pd.Timestamp) -> 'CuboDiario':
+        """
+        Novo cubo reagregando só os dias a partir de inicio (o atual não muda)
+
+        Args:
+            df: DataFrame completo já com o delta, ordenado por data
+            datas: Coluna data de df em datetime64[ns]
+            inicio: Menor data alterada (NaT = só linhas sem data)
+
+        Returns:
+            CuboDiario atualizado
+        """
+        a_cubo = int(np.searchsorted(self._datas, np.datetime64(inicio, 'ns'), side='left'))
+        a_df = int(np.searchsorted(datas, np.datetime64(inicio, 'ns'), side='left'))
+
+        novo = CuboDiario.__new__(CuboDiario)
+        novo.df = concatenar_linhas([self.df.iloc[:a_cubo], montar_cubo(df.iloc[a_df:])])
+        novo._datas = novo.df['data'].to_numpy(dtype='datetime64[ns]')
+        return novo
+
+    def fatia(
+        self,
+        inicio: Optional[pd.Timestamp] = None,
+        fim: Optional[pd.Timestamp] = None,
+        fim_exclusivo: bool = False
+    ) -> pd.DataFrame:
+        """
+        Linhas do cubo no período (recorte contíguo por busca binária)
+
+        Args:
+            inicio: Data inicial inclusiva (opcional)
+            fim: Data final (opcional), inclusiva salvo fim_exclusivo=True
+            fim_exclusivo: Se True, exclui linhas com data igual a fim
+
+        Returns:
+            Fatia do cubo
+        """
+        if inicio is None and fim is None:
+            return self.df
+        a, b = recortar_periodo(self._datas, inicio, fim, fim_exclusivo)
+        return self.df.iloc[a:b]
+
+
+# Escore robusto (Iglewicz-Hoaglin): desvio da mediana em unidades de 1.4826 × MAD
+FATOR_MAD = 1.4826
+LIMITE_OUTLIER = 3.5
+
+# Grupos com menos linhas que isso usam a distribuição geral
+MINIMO_GRUPO_OUTLIERS = 5
+
+
+def _mediana_por_grupo(codigos: np.ndarray, valores: np.ndarray, n_grupos: int) -> np.ndarray:
+    """Mediana de valores por código de grupo (0..n_grupos-1), via ordenação única"""
+    ordem = np.lexsort((valores, codigos))
+    ordenados = valores[ordem]
+    tamanhos = np.bincount(codigos, minlength=n_grupos)
+    inicios = np.concatenate(([0], np.cumsum(tamanhos)[:-1]))
+    medianas = np.full(n_grupos, np.nan)
+    ocupados = tamanhos > 0
+    baixo = inicios[ocupados] + (tamanhos[ocupados] - 1) // 2
+    alto = inicios[ocupados] + tamanhos[ocupados] // 2
+    medianas[ocupados] = (ordenados[baixo] + ordenados[alto]) / 2
+    return medianas
+
+
+def escores_robustos(grupos: Optional[pd.Series], valores: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Escore robusto de cada valor em relação ao próprio grupo (mediana/MAD)
+
+    Grupos pequenos ou nulos usam a mediana/MAD geral. MAD zero (quase todos
+    os valores iguais) cai para o desvio médio absoluto × 1.2533.
+
+    Args:
+        grupos: Coluna de agrupamento (None = só distribuição geral)
+        valores: Valores numéricos alinhados com grupos
+
+    Returns:
+        (escore por linha float32, código do grupo por linha, mediana por grupo)
+    """
+    n = len(valores)
+    if grupos is None:
+        codigos, n_grupos = np.zeros(n, dtype=np.intp), 1
+    else:
+        codigos, unicos = pd.factorize(grupos, sort=False)
+        n_grupos = len(unicos)
+    tamanhos = np.bincount(codigos[codigos >= 0], minlength=n_grupos)
+
+    # Linhas de grupos pequenos/nulos vão para o grupo extra "geral" (índice n_grupos)
+    efetivos = np.where((codigos >= 0) & (tamanhos[np.maximum(codigos, 0)] >= MINIMO_GRUPO_OUTLIERS), codigos, n_grupos)
+    validos = ~np.isnan(valores)
+
+    medianas = _mediana_por_grupo(efetivos[validos], valores[validos], n_grupos + 1)
+    geral = np.nanmedian(valores) if validos.any() else np.nan
+    medianas[n_grupos] = geral
+    desvios = np.abs(valores - medianas[efetivos])
+
+    escalas = FATOR_MAD * _mediana_por_grupo(efetivos[validos], desvios[validos], n_grupos + 1)
+    escalas[n_grupos] = FATOR_MAD * np.nanmedian(np.abs(valores - geral)) if validos.any() else np.nan
+
+    # MAD zero: desvio médio absoluto (≈ desvio padrão × 0.8 na normal)
+    somas = np.bincount(efetivos[validos], weights=desvios[validos], minlength=n_grupos + 1)
+    contagens = np.bincount(efetivos[validos], minlength=n_grupos + 1)
+    desvio_medio = np.divide(somas, contagens, out=np.zeros(n_grupos + 1), where=contagens > 0) * 1.2533
+    escalas = np.where(escalas > 0, escalas, desvio_medio)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        escores = (valores - medianas[efetivos]) / escalas[efetivos]
+    escores[~np.isfinite(escores)] = 0.0
+
+    # Mediana exibida: a do próprio grupo quando ele tem linhas suficientes
+    medianas_grupo = np.where(tamanhos >= MINIMO_GRUPO_OUTLIERS, medianas[:n_grupos], geral)
+    return escores.astype(np.float32), codigos, medianas_grupo
+
+
+class EstatisticasOutliers:
+    """
+    Escores robustos por recurso e por contrato, calculados uma vez por versão
+
+    Cada linha recebe um escore em relação à distribuição do próprio recurso
+    e outro em relação à do contrato; o escore final é o de menor magnitude,
+    então jornada longa de quem sempre faz jornada longa (ou de um contrato
+    inteiro com esse padrão) não é anomalia. Os arrays são alinhados com as
+    linhas do DataFrame ordenado por data: períodos são fatias contíguas.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Calcula os escores
+
+        Args:
+            df: DataFrame completo, ordenado por data
+        """
+        horas = df['duracao_horas'].to_numpy(dtype=np.float64)
+        recursos = df['s_nm_recurso'] if 's_nm_recurso' in df.columns else None
+        contratos = df['s_nr_contrato'] if 's_nr_contrato' in df.columns else None
+
+        self.mediana_geral = float(np.nanmedian(horas)) if len(horas) else float('nan')
+        self.escore_recurso, self.codigo_recurso, self.mediana_recurso = escores_robustos(recursos, horas)
+        self.escore_contrato, _, _ = escores_robustos(contratos, horas)
+        self.escore = np.where(
+            np.abs(self.escore_recurso) <= np.abs(self.escore_contrato), self.escore_recurso, self.escore_contrato
+        )
+
+    def __len__(self) -> int:
+        return len(self.escore)
+
+    def maiores(self, a: int, b: int, top_n: int, limite: float = LIMITE_OUTLIER) -> np.ndarray:
+        """
+        Posições das top_n maiores anomalias entre as linhas [a, b)
+
+        Args:
+            a: Primeira posição do período
+            b: Posição final (exclusiva)
+            top_n: Quantidade máxima
+            limite: Escore absoluto mínimo para ser anomalia
+
+        Returns:
+            Posições (iloc) em ordem decrescente de |escore|
+        """
+        magnitudes = np.abs(self.escore[a:b])
+        candidatos = np.flatnonzero(magnitudes > limite)
+        if len(candidatos) > top_n:
+            # Seleção parcial: só os top_n são ordenados
+            candidatos = candidatos[np.argpartition(-magnitudes[candidatos], top_n - 1)[:top_n]]
+        ordem = np.argsort(-magnitudes[candidatos], kind='stable')
+        return candidatos[ordem] + a
+
+    def mediana_do_recurso(self, posicao: int) -> float:
+        """Mediana de horas do recurso da linha (ou a geral se o recurso tem poucas linhas)"""
+        codigo = self.codigo_recurso[posicao]
+        return float(self.mediana_recurso[codigo]) if codigo >= 0 else self.mediana_geral
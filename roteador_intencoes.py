@@ -0,0 +1,319 @@
+"""
+🧭 ROTEADOR DE INTENÇÕES
+Roteamento por regras de responder_pergunta (caminho usado quando a IA está
+lenta ou fora): um autômato Aho-Corasick acha todas as palavras-chave numa
+única passada pela mensagem e as regex ficam compiladas no import
+"""
+
+import re
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+
+# Ano usado quando a data vem sem ano (DD/MM) ou com ano incompleto
+ANO_PADRAO = 2025
+
+# Usuários genéricos do emulator: tratados como anônimos
+USUARIOS_GENERICOS = {'user', 'bot', 'test user', 'usuario teste'}
+
+# Nomes que chegam do webchat sem identificar quem pergunta
+USUARIOS_NAO_IDENTIFICADOS = ('Usuário Web', 'User')
+
+# Grupo → palavras-chave (casam como trecho da pergunta em minúsculas)
+PALAVRAS_CHAVE: Dict[str, List[str]] = {
+    'esperadas': ['deveria fazer', 'deveria ter', 'esperadas', 'quantas horas o colaborador'],
+    'todos': ['quem', 'quais', 'recursos', 'pessoas', 'ranking', 'top'],
+    'media_palavra': ['média', 'media'],
+    'proprio': ['meu', 'minha', 'mim'],
+    'media': ['média', 'media', 'quanto tempo'],
+    'hoje': ['hoje', 'apontei hoje'],
+    'semana': ['semana', 'esta semana'],
+    'ranking': ['ranking', 'top', 'quem trabalhou mais'],
+    'outlier': ['outlier', 'anormal', 'fora do padrão'],
+    'total': ['total', 'soma', 'quantas horas'],
+    'comparar': ['comparar', 'comparação'],
+    'contrato': ['contrato', 'contratos'],
+    'contrato_recurso': ['recurso', 'colaborador', 'apontou em', 'trabalhou em', 'quais contratos o', 'quais contratos a'],
+    'saida': ['esqueceu', 'esqueci', 'saída', 'saida', 'bateu a saída', 'bateu saida', 'faltou', 'horário de saída'],
+    'fora_do_escopo': ['tempo', 'clima', 'ajuda', 'help', 'prompt'],
+}
+
+# Datas DD/MM/YYYY, DD/MM/YY ou DD/MM (também com '-')
+_DATA = r'\d{1,2}[\/\-]\d{1,2}(?:[\/\-]\d{2,4})?'
+PADRAO_DATA = re.compile(f'({_DATA})')
+PADRAO_PERIODO = re.compile(rf'({_DATA})\s*(?:a|até|ate|at)\s*({_DATA})')
+
+# Nomes na pergunta (aplicados sobre o texto em minúsculas, salvo PADRAO_ID_RECURSO)
+PADRAO_NOME_COLABORADOR = re.compile(r'colaborador\s+(\w+)')
+PADRAO_NOME_DEVERIA = re.compile(r'(\w+)\s+deveria')
+PADRAO_NOME_RECURSO = re.compile(r'(?:recurso|colaborador)\s+(\w+)')
+PADRAO_NOME_USUARIO = re.compile(r'(?:recurso|colaborador|usuário|usuario)\s+(\w+)')
+PADRAO_ID_RECURSO = re.compile(r'(RECURSO_\d+)', re.IGNORECASE)
+
+# Contrato externo (E0440404) ou número após "contrato" (contrato 7873)
+PADRAO_CONTRATO = re.compile(r'\b(E\d{4,})\b|\bcontrato\s+(?:n[º°o]\.?\s*)?(\d{3,})\b(?![\/\-])', re.IGNORECASE)
+
+
+class AutomatoPalavras:
+    """
+    Autômato Aho-Corasick sobre as palavras-chave
+
+    As transições já incluem os links de falha (DFA completo), então a busca
+    é um acesso a dicionário por caractere, independente da quantidade de
+    palavras. Cada estado guarda os grupos de todas as palavras que terminam nele.
+    """
+
+    def __init__(self, grupos: Dict[str, Iterable[str]]):
+        """
+        Constrói o autômato
+
+        Args:
+            grupos: Grupo → palavras-chave
+        """
+        self.transicoes: List[Dict[str, int]] = [{}]
+        self.saidas: List[FrozenSet[str]] = [frozenset()]
+        saidas = [set()]
+
+        # Trie das palavras
+        for grupo, palavras in grupos.items():
+            for palavra in palavras:
+                estado = 0
+                for caractere in palavra:
+                    proximo = self.transicoes[estado].get(caractere)
+                    if proximo is None:
+                        proximo = len(self.transicoes)
+                        self.transicoes[estado][caractere] = proximo
+                        self.transicoes.append({})
+                        saidas.append(set())
+                    estado = proximo
+                saidas[estado].add(grupo)
+
+        # Links de falha em largura; transições ausentes herdam as do estado de falha
+        falhas = [0] * len(self.transicoes)
+        fila = deque(self.transicoes[0].values())
+        while fila:
+            estado = fila.popleft()
+            saidas[estado] |= saidas[falhas[estado]]
+            filhos = self.transicoes[estado]
+            for caractere, filho in list(filhos.items()):
+                falhas[filho] = self.transicoes[falhas[estado]].get(caractere, 0)
+                fila.append(filho)
+            for caractere, destino in self.transicoes[falhas[estado]].items():
+                filhos.setdefault(caractere, destino)
+
+        self.saidas = [frozenset(s) for s in saidas]
+
+    def __len__(self) -> int:
+        return len(self.transicoes)
+
+    def grupos(self, texto: str) -> FrozenSet[str]:
+        """
+        Grupos com alguma palavra-chave contida no texto (uma passada)
+
+        Args:
+            texto: Texto já em minúsculas
+
+        Returns:
+            Conjunto de grupos encontrados
+        """
+        transicoes, saidas = self.transicoes, self.saidas
+        encontrados = set()
+        estado = transicoes[0]
+        for caractere in texto:
+            numero = estado.get(caractere, 0)
+            estado = transicoes[numero]
+            if saidas[numero]:
+                encontrados |= saidas[numero]
+        return frozenset(encontrados)
+
+
+def completar_ano(data: str) -> str:
+    """Data DD/MM ou DD/MM/YY(Y) com '-' ou '/' → DD/MM/YYYY (ano padrão quando falta)"""
+    data = data.replace('-', '/')
+    if data.count('/') == 1:  # DD/MM
+        return f"{data}/{ANO_PADRAO}"
+    if len(data.split('/')[-1]) < 4:  # Ano incompleto
+        return '/'.join(data.split('/')[:-1]) + f"/{ANO_PADRAO}"
+    return data
+
+
+def extrair_datas(texto: str) -> List[str]:
+    """
+    Extrai datas de um texto em formato DD/MM/YYYY ou DD/MM
+
+    Args:
+        texto: Texto para extrair datas
+
+    Returns:
+        Lista de datas encontradas (no formato DD/MM/YYYY)
+    """
+    return [completar_ano(data) for data in PADRAO_DATA.findall(texto)]
+
+
+def extrair_contrato(texto: str) -> Optional[str]:
+    """Código de contrato citado no texto (E0440404 ou o número após 'contrato'), se houver"""
+    match = PADRAO_CONTRATO.search(texto)
+    if not match:
+        return None
+    return (match.group(1) or match.group(2)).upper()
+
+
+class RoteadorIntencoes:
+    """
+    Interpreta uma pergunta em linguagem natural como uma intenção estruturada
+
+    A intenção é um dict com a ferramenta (método do AgenteApontamentos) e
+    seus argumentos, o usuário, o período e o contrato citados. Quando não
+    há ferramenta a chamar (falta o nome do colaborador, por exemplo), a
+    intenção traz a resposta pronta em "resposta".
+    """
+
+    def __init__(self, palavras_chave: Optional[Dict[str, List[str]]] = None):
+        """
+        Inicializa o roteador
+
+        Args:
+            palavras_chave: Grupo → palavras (padrão: PALAVRAS_CHAVE)
+        """
+        self.automato = AutomatoPalavras(palavras_chave or PALAVRAS_CHAVE)
+
+    def interpretar(self, pergunta: str, usuario: Optional[str] = None) -> Dict:
+        """
+        Monta a intenção da pergunta
+
+        Args:
+            pergunta: Pergunta em linguagem natural
+            usuario: Nome de quem pergunta (opcional)
+
+        Returns:
+            Dict com ferramenta, argumentos, usuario, data_inicio, data_fim,
+            contrato, grupos e, se ferramenta for None, resposta
+        """
+        texto = pergunta.lower()
+
+        # Ignorar usuários genéricos do emulator
+        if usuario and usuario.lower() in USUARIOS_GENERICOS:
+            usuario = None
+        identificado = bool(usuario) and usuario not in USUARIOS_NAO_IDENTIFICADOS
+
+        grupos = self.automato.grupos(texto)
+        datas = extrair_datas(pergunta)
+        periodo = PADRAO_PERIODO.search(pergunta)
+        if periodo:
+            data_inicio, data_fim = completar_ano(periodo.group(1)), completar_ano(periodo.group(2))
+        else:
+            data_inicio = datas[0] if datas else None
+            data_fim = datas[1] if len(datas) >= 2 else None
+
+        intencao = {
+            "ferramenta": None,
+            "argumentos": {},
+            "usuario": usuario,
+            "data_inicio": data_inicio,
+            "data_fim": data_fim,
+            "contrato": extrair_contrato(pergunta),
+            "grupos": sorted(grupos),
+        }
+
+        def ferramenta(nome: str, **argumentos) -> Dict:
+            intencao["ferramenta"] = nome
+            intencao["argumentos"] = argumentos
+            return intencao
+
+        def resposta(texto_resposta: str, tipo: Optional[str] = "erro") -> Dict:
+            intencao["resposta"] = {"resposta": texto_resposta, "tipo": tipo} if tipo else {"resposta": texto_resposta}
+            return intencao
+
+        # Consulta por período (ex: "10/10/2025 a 10/11/2025" ou "de 10/10 até 10/11")
+        if periodo:
+            if 'esperadas' in grupos:
+                if identificado:
+                    return ferramenta('horas_esperadas_colaborador', usuario=usuario, data_inicio=data_inicio, data_fim=data_fim)
+                match_nome = PADRAO_NOME_COLABORADOR.search(texto) or PADRAO_NOME_DEVERIA.search(texto)
+                if match_nome:
+                    return ferramenta('horas_esperadas_colaborador', usuario=match_nome.group(1), data_inicio=data_inicio, data_fim=data_fim)
+                return resposta("❌ Por favor, especifique o nome do colaborador. Exemplo: 'Quantas horas o colaborador João deveria fazer de 01/09 a 30/09?'")
+
+            if 'contrato' in grupos:
+                return ferramenta('listar_contratos', inicio=data_inicio, fim=data_fim)
+
+            # "quem", "quais", "ranking", "média" (sem "meu/minha")... ou usuário não identificado: todos
+            buscar_todos = 'todos' in grupos or ('media_palavra' in grupos and 'proprio' not in grupos)
+            if buscar_todos or usuario in (*USUARIOS_NAO_IDENTIFICADOS, None):
+                return ferramenta('consultar_periodo', data_inicio=data_inicio, data_fim=data_fim, usuario=None)
+            return ferramenta('consultar_periodo', data_inicio=data_inicio, data_fim=data_fim, usuario=usuario)
+
+        if 'media' in grupos:
+            if usuario and 'proprio' in grupos:
+                return ferramenta('duracao_media_usuario', usuario=usuario)
+            return ferramenta('duracao_media_geral')
+
+        if 'hoje' in grupos:
+            if usuario:
+                return ferramenta('apontamentos_hoje', usuario=usuario)
+            return resposta("Por favor, identifique-se para consultar seus apontamentos.", tipo=None)
+
+        if 'semana' in grupos:
+            return ferramenta('resumo_semanal', usuario=usuario) if usuario else ferramenta('resumo_semanal_geral')
+
+        if 'ranking' in grupos:
+            return ferramenta('ranking_funcionarios')
+
+        if 'outlier' in grupos:
+            return ferramenta('identificar_outliers')
+
+        if 'total' in grupos:
+            return ferramenta('total_horas_usuario', usuario=usuario) if usuario else ferramenta('total_horas_geral')
+
+        if 'comparar' in grupos:
+            return ferramenta('comparar_periodos')
+
+        if 'contrato' in grupos:
+            datas_recurso = {}
+            if len(datas) >= 2:
+                datas_recurso = {"data_inicio": datas[0], "data_fim": datas[1]}
+            elif len(datas) == 1:
+                datas_recurso = {"data_inicio": datas[0]}
+
+            # Contratos de um recurso específico
+            match_nome = None
+            if 'contrato_recurso' in grupos:
+                match_nome = PADRAO_NOME_RECURSO.search(texto) or PADRAO_ID_RECURSO.search(pergunta)
+            if match_nome:
+                return ferramenta('contratos_por_recurso', recurso=match_nome.group(1), **datas_recurso)
+
+            # Recursos de um contrato citado pelo código
+            if intencao["contrato"]:
+                return ferramenta('recursos_por_contrato', contrato=intencao["contrato"])
+
+            if 'contrato_recurso' in grupos:
+                return resposta("❌ Por favor, especifique o nome do recurso. Exemplo: 'Em quais contratos o recurso RECURSO_123 apontou?'")
+
+            # Listagem geral de contratos
+            if len(datas) >= 2:
+                return ferramenta('listar_contratos', inicio=datas[0], fim=datas[1])
+            return ferramenta('listar_contratos')
+
+        if 'saida' in grupos:
+            if identificado:
+                nome_usuario = usuario
+            else:
+                match_nome = PADRAO_NOME_USUARIO.search(texto) or PADRAO_ID_RECURSO.search(pergunta)
+                if not match_nome:
+                    return resposta("❌ Por favor, especifique o nome do colaborador. Exemplo: 'O recurso RECURSO_123 esqueceu de informar horário de saída?'")
+                nome_usuario = match_nome.group(1)
+
+            if len(datas) >= 2:
+                return ferramenta('verificar_saidas_esquecidas', usuario=nome_usuario, data_inicio=datas[0], data_fim=datas[1])
+            if len(datas) == 1:
+                return ferramenta('verificar_saidas_esquecidas', usuario=nome_usuario, data_inicio=datas[0])
+            return ferramenta('verificar_saidas_esquecidas', usuario=nome_usuario)
+
+        # Fora do contexto de apontamentos
+        if 'fora_do_escopo' in grupos:
+            return ferramenta('fora_do_escopo')
+        return ferramenta('ajuda')
+
+
+# Roteador compartilhado (compilado uma vez no import)
+roteador_padrao = RoteadorIntencoes()
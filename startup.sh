@@ -21,6 +21,9 @@ fi
 echo "🧪 Testando imports..."
 python -c "import bot.bot_api; print('✅ Import OK')" || { echo "❌ Erro no import!"; python -c "import bot.bot_api" 2>&1; exit 1; }
 
+# Dataset mapeado em memória (Arrow IPC): workers compartilham as mesmas páginas
+export DATASET_MMAP=${DATASET_MMAP:-true}
+
 echo "🚀 Iniciando gunicorn..."
 # Iniciar gunicorn com uvicorn workers
 exec gunicorn -w 4 \
@@ -0,0 +1,160 @@
+"""
+🧪 TESTE DA ATUALIZAÇÃO INCREMENTAL
+Agente atualizado por deltas (linhas novas e alteradas) comparado com um
+agente carregado do zero com os mesmos dados: linhas, cubo, índices e
+respostas iguais; delta reaplicado não gera nova versão
+"""
+
+import tempfile
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from dados_teste import criar_agente, gerar_apontamentos, responder_consultas, titulo, verificar
+from indices_apontamentos import CuboDiario, IndiceAtividades, IndiceContratos, IndiceRecursos
+
+CORTE = "2025-11-15"
+
+
+def ordenar_linhas(df: pd.DataFrame) -> pd.DataFrame:
+    """Mesmas linhas independentemente da ordem dentro de um dia"""
+    return df.sort_values(["data", "s_id_apontamento"], kind="stable").reset_index(drop=True)
+
+
+def comparar_agentes(incremental, completo, rotulo: str):
+    """Linhas, cubo, índices e respostas do agente incremental × carregado do zero"""
+    df, referencia = incremental.df, completo.df
+    pd.testing.assert_frame_equal(ordenar_linhas(df), ordenar_linhas(referencia), check_categorical=False)
+    verificar(True, f"{rotulo}: mesmas {len(df)} linhas do carregamento completo")
+    verificar(df["data"].dropna().is_monotonic_increasing, f"{rotulo}: linhas continuam ordenadas por data")
+
+    pd.testing.assert_frame_equal(incremental.cubo.df.reset_index(drop=True), CuboDiario(df).df.reset_index(drop=True))
+    pd.testing.assert_frame_equal(
+        incremental.cubo.df.sort_values(["data", "s_nm_recurso"]).reset_index(drop=True).astype(str),
+        completo.cubo.df.sort_values(["data", "s_nm_recurso"]).reset_index(drop=True).astype(str)
+    )
+    verificar(True, f"{rotulo}: cubo igual ao reconstruído e ao do carregamento completo")
+
+    reconstruido = IndiceRecursos(df["s_nm_recurso"], df["data"])
+    verificar(incremental.indice_recursos.chaves == reconstruido.chaves
+              and all(np.array_equal(incremental.indice_recursos.posicoes(c), reconstruido.posicoes(c)) for c in reconstruido.chaves),
+              f"{rotulo}: índice de recursos igual ao reconstruído")
+
+    contratos, atividades = IndiceContratos(df), IndiceAtividades(df["s_ds_atividade"])
+    verificar(all(np.array_equal(incremental.indice_contratos.posicoes(c), contratos.posicoes(c)) for c in ("E0440404", "7873", "8446")),
+              f"{rotulo}: índice de contratos igual ao reconstruído")
+    def linhas_da_busca(indice, consulta):
+        return indice.posicoes([id_atividade for id_atividade, _ in indice.buscar(consulta)])
+    verificar(all(np.array_equal(linhas_da_busca(incremental.indice_atividades, q), linhas_da_busca(atividades, q))
+                  for q in ("reuniao", "testes", "suporte")),
+              f"{rotulo}: índice de atividades igual ao reconstruído")
+
+    respostas_inc, respostas_ref = responder_consultas(incremental), responder_consultas(completo)
+    diferentes = [c for c in respostas_ref if respostas_inc[c] != respostas_ref[c]]
+    verificar(not diferentes, f"{rotulo}: {len(respostas_ref)} consultas com respostas idênticas" + (f": {diferentes}" if diferentes else ""))
+
+
+def esperado_bruto(bruto: pd.DataFrame, alteradas: pd.DataFrame, extras: pd.DataFrame) -> pd.DataFrame:
+    """Extrato completo equivalente: linhas alteradas no lugar das originais, mais as extras"""
+    esperado = bruto.set_index("s_id_apontamento")
+    esperado.update(alteradas.set_index("s_id_apontamento"))
+    return pd.concat([esperado.reset_index(), extras], ignore_index=True)
+
+
+def testar_linhas_novas(pasta: Path, bruto: pd.DataFrame, base: pd.DataFrame, novos: pd.DataFrame):
+    titulo("➕ Delta só com dias novos")
+
+    completo = criar_agente(pasta / "completo", df=bruto)
+    agente = criar_agente(pasta / "incremental", df=base)
+    versao, linhas = agente.versao_dados, len(agente.df)
+    resultado = agente.atualizar_incremental(novos)
+    verificar(resultado["novos"] == len(completo.df) - linhas and resultado["substituidos"] == 0 and resultado["versao_dados"] == versao + 1,
+              f"{resultado['novos']} linhas novas, versão {resultado['versao_dados']}")
+
+    comparar_agentes(agente, completo, "acréscimo")
+
+    reaplicado = agente.atualizar_incremental(novos)
+    verificar(reaplicado["novos"] == 0 and reaplicado["substituidos"] == 0 and agente.versao_dados == versao + 1,
+              "mesmo delta reaplicado não gera nova versão")
+    return agente
+
+
+def testar_linhas_alteradas(pasta: Path, agente, bruto: pd.DataFrame):
+    titulo("✏️ Delta com linhas alteradas e novas")
+
+    alteradas = bruto[bruto["d_dt_data"] < "2025-09-01"].sample(40, random_state=2).copy()
+    alteradas["f_hr_hora_fim"] = alteradas["f_hr_hora_inicio"] + 3.0
+    alteradas.loc[alteradas.index[:5], "s_nm_recurso"] = "Maria Souza"
+    extras = gerar_apontamentos(linhas=150, inicio="2025-12-01", fim="2025-12-05", semente=77, prefixo_id="EXT")
+    delta = pd.concat([alteradas, extras], ignore_index=True)
+
+    versao, linhas = agente.versao_dados, len(agente.df)
+    resultado = agente.atualizar_incremental(delta)
+
+    # Linha substituída vai para o fim do seu dia; a ordem dentro do dia não tem
+    # significado no extrato, então a referência é carregada nessa mesma ordem
+    esperado = esperado_bruto(bruto, alteradas, extras).set_index("s_id_apontamento")
+    ordem = agente.df["s_id_apontamento"].astype(str)
+    esperado = pd.concat([esperado.loc[ordem], esperado.drop(ordem)]).reset_index()
+    completo = criar_agente(pasta / "completo_alterado", df=esperado)
+
+    verificar(resultado["novos"] == len(completo.df) - linhas and resultado["versao_dados"] == versao + 1,
+              f"{resultado['novos']} novas e {resultado['substituidos']} substituídas")
+
+    comparar_agentes(agente, completo, "alteração")
+
+    reaplicado = agente.atualizar_incremental(delta)
+    verificar(reaplicado["novos"] == 0 and reaplicado["substituidos"] == 0 and agente.versao_dados == versao + 1,
+              "delta com alterações reaplicado não gera nova versão")
+
+
+def testar_sem_ids(pasta: Path, bruto: pd.DataFrame, base: pd.DataFrame, novos: pd.DataFrame):
+    titulo("🆔 Delta sem s_id_apontamento")
+
+    agente = criar_agente(pasta / "sem_ids", df=base)
+    ultima, linhas = agente.df["data"].max(), len(agente.df)
+    # Linhas antigas reenviadas sem ID não podem ser casadas: só entra o que é posterior à última data
+    delta = pd.concat([base.tail(50), novos]).drop(columns=["s_id_apontamento"])
+    resultado = agente.atualizar_incremental(delta)
+    completo = criar_agente(pasta / "sem_ids_completo", df=bruto)
+    verificar(resultado["novos"] == len(completo.df) - linhas,
+              f"só as {resultado['novos']} linhas posteriores a {ultima.date()} entram")
+    verificar(np.isclose(agente.df["duracao_horas"].sum(), completo.df["duracao_horas"].sum())
+              and len(agente.df) == len(completo.df), "mesmo total do carregamento completo")
+
+
+
+def testar_ids_nulos(pasta: Path, bruto: pd.DataFrame, base: pd.DataFrame, novos: pd.DataFrame):
+    titulo("🕳️ Delta com parte das linhas sem ID")
+
+    base = base.copy()
+    base.loc[base.index[:5], "s_id_apontamento"] = None
+    delta = novos.copy()
+    delta.loc[delta.index[::10], "s_id_apontamento"] = None
+
+    agente = criar_agente(pasta / "ids_nulos", df=base)
+    linhas = len(agente.df)
+    resultado = agente.atualizar_incremental(delta)
+    completo = criar_agente(pasta / "ids_nulos_completo", df=pd.concat([base, delta], ignore_index=True))
+    sem_id = int(completo.df["s_id_apontamento"].isna().sum())
+    verificar(resultado["novos"] == len(completo.df) - linhas and resultado["substituidos"] == 0,
+              f"{resultado['novos']} linhas novas, sem substituições")
+    verificar(agente.df["s_id_apontamento"].isna().sum() == sem_id, f"{sem_id} linhas sem ID do dataset e do delta preservadas")
+    verificar(np.isclose(agente.df["duracao_horas"].sum(), completo.df["duracao_horas"].sum())
+              and len(agente.df) == len(completo.df), "mesmo total do carregamento completo")
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore", UserWarning)
+    bruto = gerar_apontamentos()
+    base, novos = bruto[bruto["d_dt_data"] < CORTE], bruto[bruto["d_dt_data"] >= CORTE]
+    with tempfile.TemporaryDirectory() as pasta:
+        pasta = Path(pasta)
+        agente = testar_linhas_novas(pasta, bruto, base, novos)
+        testar_linhas_alteradas(pasta, agente, bruto)
+        testar_sem_ids(pasta, bruto, base, novos)
+        testar_ids_nulos(pasta, bruto, base, novos)
+
+    print("\n✅ Atualização incremental funcionando!\n")
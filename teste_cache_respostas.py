@@ -0,0 +1,122 @@
+"""
+🧪 TESTE DO CACHE DE RESPOSTAS
+Respostas memorizadas iguais às calculadas sem cache, invalidação quando a
+versão dos dados muda, erros fora do cache, LRU e expiração por tempo
+"""
+
+import tempfile
+import time
+import warnings
+
+from cache_respostas import CacheRespostas
+from dados_teste import criar_agente, gerar_apontamentos, titulo, verificar
+
+CONSULTAS = [
+    ("duracao_media_geral", ()),
+    ("total_horas_geral", ()),
+    ("ranking_funcionarios", ()),
+    ("ranking_funcionarios", (5,)),
+    ("identificar_outliers", ("01/09/2025", "30/11/2025", 10)),
+    ("listar_contratos", ()),
+    ("listar_contratos", ("01/10/2025", "31/10/2025")),
+    ("recursos_por_contrato", ("E0440404",)),
+    ("recursos_por_contrato", ("7873",)),
+    ("listar_atividades", (10,)),
+]
+
+
+def sem_cache(agente, metodo: str, args: tuple):
+    """Mesma consulta calculada com o cache desligado"""
+    cache, agente.cache_respostas = agente.cache_respostas, None
+    try:
+        return getattr(agente, metodo)(*args)
+    finally:
+        agente.cache_respostas = cache
+
+
+def testar_acertos(agente):
+    titulo("🧠 Com cache × sem cache")
+
+    cache = agente.cache_respostas
+    cache.limpar()
+    diferentes = []
+    for metodo, args in CONSULTAS:
+        esperado = sem_cache(agente, metodo, args)
+        if getattr(agente, metodo)(*args) != esperado or getattr(agente, metodo)(*args) != esperado:
+            diferentes.append((metodo, args))
+    verificar(not diferentes, f"{len(CONSULTAS)} consultas iguais na falha e no acerto" + (f": {diferentes}" if diferentes else ""))
+
+    estatisticas = cache.estatisticas()
+    verificar(estatisticas["acertos"] >= len(CONSULTAS) and estatisticas["itens"] == len(CONSULTAS),
+              f"{estatisticas['itens']} respostas guardadas, {estatisticas['acertos']} acertos")
+
+    acertos = cache.acertos
+    agente.ranking_funcionarios(top_n=10)
+    verificar(cache.acertos == acertos + 1, "default explícito reaproveita a mesma entrada")
+    variante = agente.recursos_por_contrato("  e0440404 ")
+    verificar(cache.acertos == acertos + 1 and variante == sem_cache(agente, "recursos_por_contrato", ("  e0440404 ",)),
+              "outra grafia do contrato não devolve a resposta guardada para E0440404")
+
+    resposta = agente.total_horas_geral()
+    resposta["resposta"] = "alterada"
+    verificar(agente.total_horas_geral() == sem_cache(agente, "total_horas_geral", ()), "alterar o dict devolvido não altera o cache")
+
+    recursos = agente.recursos_por_contrato("E0440404")
+    for dados in recursos["dados"].values():
+        dados["duracao_horas"] = -1
+    verificar(agente.recursos_por_contrato("E0440404") == sem_cache(agente, "recursos_por_contrato", ("E0440404",)),
+              "alterar dicts aninhados da resposta não altera o cache")
+
+
+def testar_erros(agente):
+    titulo("🚫 Erros fora do cache")
+
+    cache = agente.cache_respostas
+    itens = cache.estatisticas()["itens"]
+    erro = agente.recursos_por_contrato("CONTRATO_INEXISTENTE")
+    verificar(erro.get("tipo") == "erro" or "erro" in erro, "contrato inexistente responde com erro")
+    verificar(cache.estatisticas()["itens"] == itens, "resposta de erro não foi guardada")
+
+
+def testar_versao(agente):
+    titulo("🔄 Nova versão dos dados")
+
+    cache = agente.cache_respostas
+    antes = agente.total_horas_geral()
+    delta = gerar_apontamentos(linhas=200, inicio="2025-12-01", fim="2025-12-05", semente=9, prefixo_id="DLT")
+    verificar("erro" not in agente.atualizar_incremental(delta), "delta aplicado")
+
+    acertos = cache.acertos
+    depois = agente.total_horas_geral()
+    verificar(cache.acertos == acertos and depois != antes, "consulta após o delta não usa a resposta antiga")
+    verificar(depois == sem_cache(agente, "total_horas_geral", ()), "resposta nova igual à calculada sem cache")
+    verificar(cache.estatisticas()["versao_dados"] == agente.versao_dados, "cache acompanha a versão dos dados")
+
+
+def testar_lru_ttl():
+    titulo("⏳ LRU e expiração")
+
+    cache = CacheRespostas(capacidade=2, ttl_segundos=60)
+    cache.guardar("a", 1, "A")
+    cache.guardar("b", 1, "B")
+    cache.obter("a", 1)
+    cache.guardar("c", 1, "C")
+    verificar(cache.obter("b", 1) == (False, None) and cache.obter("a", 1) == (True, "A"), "acima da capacidade sai o menos usado")
+    verificar(cache.obter("a", 2) == (False, None) and cache.estatisticas()["itens"] == 0, "versão nova esvazia o cache")
+
+    cache = CacheRespostas(capacidade=10, ttl_segundos=0.05)
+    cache.guardar("a", 1, "A")
+    time.sleep(0.1)
+    verificar(cache.obter("a", 1) == (False, None) and cache.expirados == 1, "resposta expirada não é devolvida")
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore", UserWarning)
+    with tempfile.TemporaryDirectory() as pasta:
+        agente = criar_agente(pasta)
+        testar_acertos(agente)
+        testar_erros(agente)
+        testar_versao(agente)
+    testar_lru_ttl()
+
+    print("\n✅ Cache de respostas funcionando!\n")
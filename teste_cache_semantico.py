@@ -0,0 +1,143 @@
+"""
+🧪 TESTE DO CACHE SEMÂNTICO DE DECISÕES
+Decisões reaproveitadas para perguntas equivalentes com as datas e o usuário
+da nova pergunta, executadas com o mesmo resultado de uma decisão nova; nada
+guardado para períodos relativos, datas ou números fixos nos argumentos
+"""
+
+import json
+import tempfile
+import warnings
+
+from bot.cache_semantico import CacheSemantico, normalizar_mensagem, palavras_de_nomes
+from dados_teste import NOMES_FIXOS, criar_agente, titulo, verificar
+
+PERIODO_SETEMBRO = '{"data_inicio": "01/09/2025", "data_fim": "30/09/2025"}'
+
+
+def chamada(nome: str, argumentos) -> list:
+    """Decisão da IA com uma chamada de ferramenta"""
+    if not isinstance(argumentos, str):
+        argumentos = json.dumps(argumentos, ensure_ascii=False)
+    return [{"id": "call_0", "nome": nome, "argumentos": argumentos}]
+
+
+def argumentos(chamadas) -> dict:
+    """Argumentos da primeira chamada devolvida pelo cache"""
+    return json.loads(chamadas[0]["argumentos"])
+
+
+def novo_cache() -> CacheSemantico:
+    return CacheSemantico(capacidade=50, nomes=lambda: palavras_de_nomes(NOMES_FIXOS))
+
+
+def testar_normalizacao():
+    titulo("🔤 Forma normalizada da pergunta")
+
+    texto, datas = normalizar_mensagem("Total de HORAS de 1/9/2025 a 2025-09-30?")
+    verificar(texto == "total de horas de <data1> a <data2>" and datas == ["01/09/2025", "30/09/2025"],
+              "datas em formatos diferentes viram placeholders canônicos")
+    verificar(normalizar_mensagem("mais de 8.5 horas")[0] != normalizar_mensagem("mais de 10.5 horas")[0],
+              "número decimal não é lido como data")
+    verificar(normalizar_mensagem("entre 31/13/2025 e 10-15 horas")[1] == [], "dia ou mês inválido não é data")
+
+
+def testar_acertos():
+    titulo("🎯 Acerto exato, acerto por semelhança e placeholders")
+
+    cache = novo_cache()
+    cache.guardar("Qual o total de horas de 01/09/2025 a 30/09/2025?", "João Silva", chamada("consultar_periodo", PERIODO_SETEMBRO))
+
+    exato = cache.buscar("qual o total de horas de 1/10/2025 a 31/10/2025", "Ana Paula")
+    verificar(exato is not None and argumentos(exato) == {"data_inicio": "01/10/2025", "data_fim": "31/10/2025"},
+              "mesma pergunta com outras datas: datas novas nos argumentos")
+    semelhante = cache.buscar("Qual é o total das horas de 01/11/2025 a 30/11/2025", "Ana Paula")
+    verificar(semelhante is not None and argumentos(semelhante)["data_inicio"] == "01/11/2025"
+              and cache.acertos_similares == 1, "pergunta parecida reaproveita a decisão")
+    verificar(cache.buscar("qual o total de horas de 01/09/2025 a 30/09/2025 por contrato", "Ana Paula") is None,
+              "pergunta sobre outra coisa não reaproveita")
+
+    cache.guardar("Quantas horas eu apontei no total?", "João Silva", chamada("total_horas_usuario", {"usuario": "João Silva"}))
+    outro = cache.buscar("quantas horas eu apontei no total", "Maria Souza")
+    verificar(outro is not None and argumentos(outro) == {"usuario": "Maria Souza"}, "usuário de quem pergunta entra no lugar do anterior")
+
+
+def testar_nao_guardados():
+    titulo("🚫 Decisões que não podem ser reaproveitadas")
+
+    cache = novo_cache()
+    cache.guardar("total de horas da semana passada", "João Silva", chamada("consultar_periodo", PERIODO_SETEMBRO))
+    verificar(cache.estatisticas()["itens"] == 0, "período relativo resolvido em datas não é guardado")
+
+    cache.guardar("e em outubro?", "João Silva", chamada("consultar_periodo", PERIODO_SETEMBRO))
+    verificar(cache.estatisticas()["itens"] == 0, "pergunta que depende do histórico não é guardada")
+
+    cache.guardar("total de horas de 01/09/2025 em diante", "João Silva", chamada("consultar_periodo", PERIODO_SETEMBRO))
+    verificar(cache.estatisticas()["itens"] == 0, "data que não veio da pergunta fica de fora do cache")
+
+    cache.guardar("total de horas de 01/09/2025 a 30/09/2025", "João Silva",
+                  chamada("consultar_periodo", {"data_inicio": "01/09/2025", "data_fim": "15/09/2025"}))
+    verificar(cache.estatisticas()["itens"] == 0, "data da pergunta sem placeholder nos argumentos não é guardada")
+
+
+def testar_nomes():
+    titulo("👤 Nomes de recursos como termos críticos")
+
+    pergunta = "lista todos os contratos em que a ana souza trabalhou durante o ano inteiro"
+    decisao = chamada("contratos_por_recurso", {"recurso": "Ana Souza"})
+    cache = novo_cache()
+    cache.guardar(pergunta, "João Silva", decisao)
+    verificar(cache.buscar(pergunta.upper(), "Maria Oliveira") is not None, "mesma pessoa: acerto")
+    verificar(cache.buscar(pergunta.replace("ana souza", "maria souza"), "Maria Oliveira") is None,
+              "outra pessoa com nome parecido não recebe a decisão de Ana Souza")
+
+    sem_nomes = CacheSemantico(capacidade=50)
+    sem_nomes.guardar(pergunta, "João Silva", decisao)
+    verificar(sem_nomes.buscar(pergunta.replace("ana souza", "maria souza"), "Maria Oliveira") is not None,
+              "sem a lista de nomes a pergunta seria considerada equivalente")
+
+
+def testar_regressoes():
+    titulo("🐞 Datas ISO e números decimais")
+
+    cache = novo_cache()
+    cache.guardar("total de horas de 1/9/2025 a 30/9/2025 por contrato", "João Silva",
+                  chamada("consultar_periodo", {"data_inicio": "2025-09-01", "data_fim": "2025-09-30"}))
+    outubro = cache.buscar("total de horas de 1/10/2025 a 31/10/2025 por contrato", "João Silva")
+    verificar(outubro is not None and argumentos(outubro) == {"data_inicio": "01/10/2025", "data_fim": "31/10/2025"},
+              "datas ISO nos argumentos viram placeholders: outubro consulta outubro")
+
+    cache.guardar("apontamentos com mais de 8.5 horas", "João Silva", chamada("apontamentos_acima", {"limite": 8.5}))
+    verificar(cache.buscar("apontamentos com mais de 10.5 horas", "João Silva") is None, "10.5 horas não recebe o limite de 8.5")
+    verificar(cache.buscar("apontamentos com mais de 8.5 horas", "João Silva") is None, "número da pergunta fixo nos argumentos não é guardado")
+
+
+def testar_execucao(agente):
+    titulo("🛠️ Decisão do cache × decisão nova")
+
+    from bot.ferramentas_ia import executar_ferramenta
+    cache = novo_cache()
+    cache.guardar("quantas horas foram apontadas de 01/09/2025 a 30/09/2025", "João Silva",
+                  chamada("consultar_periodo", {"data_inicio": "2025-09-01", "data_fim": "2025-09-30"}))
+
+    diferentes = []
+    for inicio, fim in (("01/10/2025", "31/10/2025"), ("03/11/2025", "14/11/2025"), ("1/8/2025", "2025-08-29")):
+        reaproveitada = cache.buscar(f"Quantas horas foram apontadas de {inicio} a {fim}?", "Ana Paula")
+        nova = chamada("consultar_periodo", {"data_inicio": inicio, "data_fim": fim})
+        if reaproveitada is None or executar_ferramenta(agente, reaproveitada[0]["nome"], reaproveitada[0]["argumentos"], "Ana Paula") \
+                != executar_ferramenta(agente, nova[0]["nome"], nova[0]["argumentos"], "Ana Paula"):
+            diferentes.append((inicio, fim))
+    verificar(not diferentes, "3 períodos com o mesmo resultado da decisão nova" + (f": {diferentes}" if diferentes else ""))
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore", UserWarning)
+    testar_normalizacao()
+    testar_acertos()
+    testar_nao_guardados()
+    testar_nomes()
+    testar_regressoes()
+    with tempfile.TemporaryDirectory() as pasta:
+        testar_execucao(criar_agente(pasta))
+
+    print("\n✅ Cache semântico funcionando!\n")
@@ -0,0 +1,52 @@
+"""
+🧪 TESTE DO CONTEXTO DOS DADOS NO PROMPT
+Bloco de contexto calculado pelo cubo igual ao calculado sobre as linhas,
+reaproveitado entre mensagens e recalculado só quando a versão dos dados muda
+"""
+
+import tempfile
+import warnings
+
+from dados_teste import criar_agente, gerar_apontamentos, titulo, verificar
+
+
+def testar_cubo_linhas(conversa):
+    titulo("🧊 Contexto pelo cubo × pelas linhas")
+
+    estado = conversa.agente.estado
+    pelo_cubo = conversa._calcular_contexto_dados(estado.df, estado.cubo)
+    pelas_linhas = conversa._calcular_contexto_dados(estado.df)
+    verificar(pelo_cubo == pelas_linhas, "mesmo texto com e sem o cubo diário")
+    verificar(f"Total de registros: {len(estado.df)}" in pelo_cubo, "total de registros no contexto")
+
+
+def testar_reaproveitamento(conversa):
+    titulo("♻️ Contexto por versão dos dados")
+
+    agente = conversa.agente
+    primeiro = conversa._obter_contexto_dados()
+    verificar(conversa._obter_contexto_dados() is primeiro, "segunda mensagem reaproveita o mesmo texto")
+    verificar(primeiro in conversa._criar_prompt_sistema(), "prompt do sistema usa o contexto em cache")
+
+    versao = agente.versao_dados
+    delta = gerar_apontamentos(linhas=300, inicio="2025-12-01", fim="2025-12-10", semente=5, prefixo_id="DLT")
+    resultado = agente.atualizar_incremental(delta)
+    verificar(resultado["versao_dados"] == versao + 1, f"delta aplicado (versão {versao} → {versao + 1})")
+
+    atualizado = conversa._obter_contexto_dados()
+    verificar(atualizado != primeiro, "nova versão recalcula o contexto")
+    verificar(atualizado == conversa._calcular_contexto_dados(agente.df), "contexto novo igual ao calculado sobre as linhas")
+    verificar(f"Total de registros: {resultado['registros']}" in atualizado, "contexto novo inclui as linhas do delta")
+    verificar(conversa._obter_contexto_dados() is atualizado, "e volta a ser reaproveitado")
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore", UserWarning)
+    with tempfile.TemporaryDirectory() as pasta:
+        agente = criar_agente(pasta)
+        from bot.ai_conversation import ConversacaoIA
+        conversa = ConversacaoIA(agente)
+        testar_cubo_linhas(conversa)
+        testar_reaproveitamento(conversa)
+
+    print("\n✅ Contexto dos dados funcionando!\n")
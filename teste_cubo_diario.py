@@ -0,0 +1,105 @@
+"""
+🧪 TESTE DO CUBO DIÁRIO
+Somas, contagens e médias lidas do cubo (geral e por período) comparadas com
+groupby sobre as linhas brutas; cubo reagregado por dias igual ao reconstruído
+"""
+
+import tempfile
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from dados_teste import criar_agente, titulo, verificar
+from indices_apontamentos import CuboDiario, agregar_cubo
+
+PERIODOS = [
+    (None, None),
+    (pd.Timestamp("2025-09-01"), pd.Timestamp("2025-09-30")),
+    (pd.Timestamp("2025-10-06"), pd.Timestamp("2025-10-10")),
+    (pd.Timestamp("2025-11-15"), None),
+]
+
+
+def agregar_linhas(df: pd.DataFrame, chave) -> pd.DataFrame:
+    """Referência: groupby direto nas linhas brutas"""
+    grupos = df.groupby(chave, observed=True)["duracao_horas"]
+    return pd.DataFrame({"sum": grupos.sum(), "count": grupos.size(), "mean": grupos.mean()})
+
+
+def linhas_do_periodo(df: pd.DataFrame, inicio, fim) -> pd.DataFrame:
+    mascara = np.ones(len(df), dtype=bool)
+    if inicio is not None:
+        mascara &= (df["data"] >= inicio).to_numpy()
+    if fim is not None:
+        mascara &= (df["data"] <= fim).to_numpy()
+    return df[mascara]
+
+
+def comparar_agregados(cubo: pd.DataFrame, esperado: pd.DataFrame) -> bool:
+    obtido = cubo.sort_index()
+    esperado = esperado.sort_index()
+    return (
+        obtido.index.equals(esperado.index)
+        and np.allclose(obtido["sum"], esperado["sum"])
+        and np.array_equal(obtido["count"].to_numpy(), esperado["count"].to_numpy())
+        and np.allclose(obtido["mean"], esperado["mean"])
+    )
+
+
+def testar_agregados(agente):
+    titulo("🧊 Cubo × groupby nas linhas")
+
+    df, cubo = agente.df, agente.cubo
+    verificar(len(cubo) < len(df), f"{len(cubo)} linhas no cubo para {len(df)} apontamentos")
+    verificar(int(cubo.df["apontamentos"].sum()) == len(df), "todos os apontamentos contados")
+    verificar(np.isclose(cubo.df["duracao_horas"].sum(), df["duracao_horas"].sum()), "total de horas preservado")
+
+    for chave in ("s_nm_recurso", "s_nr_contrato", "s_ds_atividade", ["s_nm_recurso", "s_ds_atividade"]):
+        for inicio, fim in PERIODOS:
+            iguais = comparar_agregados(
+                agregar_cubo(cubo.fatia(inicio, fim), chave),
+                agregar_linhas(linhas_do_periodo(df, inicio, fim), chave)
+            )
+            verificar(iguais, f"agregado por {chave} em {inicio and inicio.date()}..{fim and fim.date()}")
+
+
+def testar_consultas(agente):
+    titulo("🤖 Consultas respondidas pelo cubo")
+
+    df = agente.df
+    total = df["duracao_horas"].sum()
+    verificar(f"{total:.2f} horas" in agente.total_horas_geral()["resposta"], "total_horas_geral")
+
+    ranking = agente.ranking_funcionarios(10)["dados"]
+    esperado = agregar_linhas(df, "s_nm_recurso").sort_values("sum", ascending=False).head(10)
+    verificar(list(ranking) == list(esperado.index), "ranking_funcionarios: mesma ordem")
+    verificar(all(np.isclose(ranking[nome]["sum"], esperado.loc[nome, "sum"]) and ranking[nome]["count"] == esperado.loc[nome, "count"]
+                  for nome in esperado.index), "ranking_funcionarios: mesmas horas e apontamentos")
+
+    atividades = agente.listar_atividades(20)
+    verificar(all(str(a) in atividades["resposta"] for a in df["s_ds_atividade"].dropna().unique()), "listar_atividades")
+
+
+def testar_dias_alterados(agente):
+    titulo("🔁 Cubo reagregado a partir de um dia")
+
+    df = agente.df
+    datas = agente._datas
+    corte = int(np.searchsorted(datas, np.datetime64("2025-10-20"), side="left"))
+    parcial = CuboDiario(df.iloc[:corte])
+    atualizado = parcial.com_dias_alterados(df, datas, pd.Timestamp("2025-10-20"))
+    pd.testing.assert_frame_equal(atualizado.df.reset_index(drop=True), CuboDiario(df).df.reset_index(drop=True))
+    verificar(True, "igual ao cubo reconstruído do zero")
+    verificar(len(parcial.df) < len(atualizado.df), "cubo original não foi alterado")
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore", UserWarning)
+    with tempfile.TemporaryDirectory() as pasta:
+        agente = criar_agente(pasta)
+        testar_agregados(agente)
+        testar_consultas(agente)
+        testar_dias_alterados(agente)
+
+    print("\n✅ Cubo diário funcionando!\n")
@@ -0,0 +1,135 @@
+"""
+🧪 TESTE DOS DIAS ÚTEIS E DESCONTO DE ALMOÇO
+Máscaras, contagens e horas líquidas calculadas em lote comparadas com um laço
+dia a dia (segunda a sexta, fora dos feriados, 1h de almoço por dia útil)
+"""
+
+import tempfile
+import warnings
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+import calendario_util
+from dados_teste import criar_agente, titulo, verificar
+
+PERIODOS = [
+    ("01/08/2025", "31/08/2025"),
+    ("01/09/2025", "30/09/2025"),
+    ("06/10/2025", "19/10/2025"),
+    ("10/11/2025", "23/11/2025"),
+    ("01/08/2025", "30/11/2025"),
+]
+
+
+def feriados(anos) -> set:
+    calendario = calendario_util.calendario_padrao()
+    return {dia for ano in anos for dia in calendario.feriados_ano(ano)}
+
+
+def dia_util_ingenuo(dia: date, lista_feriados: set) -> bool:
+    """Referência: um dia por vez"""
+    return dia.weekday() < 5 and dia not in lista_feriados
+
+
+def dias_corridos(inicio: date, fim: date):
+    dia = inicio
+    while dia <= fim:
+        yield dia
+        dia += timedelta(days=1)
+
+
+def liquido_ingenuo(df: pd.DataFrame, lista_feriados: set) -> dict:
+    """Referência: horas por dia em um laço, desconto de 1h em cada dia útil com horas"""
+    liquidas = desconto = 0.0
+    uteis = fim_semana = 0
+    for dia, horas in df.groupby(df["data"].dt.date)["duracao_horas"].sum().items():
+        if dia_util_ingenuo(dia, lista_feriados):
+            uteis += 1
+            if horas > 0:
+                liquidas += max(0.0, horas - 1.0)
+                desconto += 1.0
+                continue
+        else:
+            fim_semana += 1
+        liquidas += horas
+    return {"liquidas": liquidas, "desconto": desconto, "uteis": uteis, "fim_semana": fim_semana}
+
+
+def testar_mascara():
+    titulo("📅 Máscara e contagem × laço dia a dia")
+
+    lista_feriados = feriados(range(2023, 2028))
+    dias = list(dias_corridos(date(2023, 1, 1), date(2027, 12, 31)))
+    esperado = np.array([dia_util_ingenuo(d, lista_feriados) for d in dias])
+    verificar(np.array_equal(calendario_util.mascara_dias_uteis(pd.to_datetime(dias)), esperado),
+              f"máscara igual em {len(dias)} dias corridos")
+
+    rng = np.random.default_rng(5)
+    divergentes = []
+    for _ in range(200):
+        a, b = sorted(rng.integers(0, len(dias), 2))
+        if calendario_util.contar_dias_uteis(dias[a], dias[b]) != int(esperado[a:b + 1].sum()):
+            divergentes.append((dias[a], dias[b]))
+    verificar(not divergentes, "200 contagens iguais ao laço" + (f": {divergentes[:3]}" if divergentes else ""))
+    verificar(calendario_util.contar_dias_uteis("2025-10-10", "2025-10-01") == 0, "fim antes do início conta zero")
+
+    com_nulo = pd.Series(pd.to_datetime(["2025-10-13", None, "2025-10-11"]))
+    verificar(calendario_util.mascara_dias_uteis(com_nulo).tolist() == [True, False, False], "data nula não é dia útil")
+
+
+def testar_desconto():
+    titulo("🍽️ Desconto de almoço em lote × regra escalar")
+
+    rng = np.random.default_rng(8)
+    horas = np.round(rng.uniform(-0.5, 12, 500), 2)
+    horas[:20] = 0.0
+    horas[20:40] = 0.5
+    uteis = rng.random(500) < 0.7
+
+    from agente_apontamentos import AgenteApontamentos
+    escalar = AgenteApontamentos.aplicar_desconto_almoco
+    liquidas, desconto = calendario_util.aplicar_desconto_almoco(horas, uteis)
+    verificar(np.allclose(liquidas, [escalar(None, h, u) for h, u in zip(horas, uteis)]), "horas líquidas iguais à regra escalar")
+    verificar(np.array_equal(desconto, np.where(uteis & (horas > 0), 1.0, 0.0)), "1h descontada só em dia útil com horas")
+    verificar((liquidas[horas >= 0] >= 0).all(), "desconto nunca deixa horas negativas")
+
+
+def testar_agente(agente):
+    titulo("🤖 consultar_periodo e contar_dias_uteis_periodo")
+
+    df = agente.df
+    lista_feriados = feriados(range(2025, 2026))
+    for data_inicio, data_fim in PERIODOS:
+        inicio = pd.to_datetime(data_inicio, dayfirst=True)
+        fim = pd.to_datetime(data_fim, dayfirst=True)
+        periodo = df[(df["data"] >= inicio) & (df["data"] <= fim)]
+
+        for usuario in (None, "João Silva"):
+            linhas = periodo if usuario is None else periodo[periodo["s_nm_recurso"] == usuario]
+            esperado = liquido_ingenuo(linhas, lista_feriados)
+            dados = agente.consultar_periodo(data_inicio, data_fim, usuario)["dados"]
+            verificar(
+                dados["total_horas_liquidas"] == round(esperado["liquidas"], 2)
+                and dados["desconto_almoco"] == round(esperado["desconto"], 2)
+                and dados["dias_uteis"] == esperado["uteis"]
+                and dados["dias_fim_semana"] == esperado["fim_semana"],
+                f"consultar_periodo {data_inicio}..{data_fim} ({usuario or 'geral'})"
+            )
+
+        corridos = list(dias_corridos(inicio.date(), fim.date()))
+        uteis = [d.strftime("%d/%m/%Y") for d in corridos if dia_util_ingenuo(d, lista_feriados)]
+        contagem = agente.contar_dias_uteis_periodo(data_inicio, data_fim)["dados"]
+        verificar(contagem["lista_dias_uteis"] == uteis and contagem["total_dias"] == len(corridos),
+                  f"contar_dias_uteis_periodo {data_inicio}..{data_fim}: {len(uteis)} dias úteis")
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore", UserWarning)
+    testar_mascara()
+    testar_desconto()
+    with tempfile.TemporaryDirectory() as pasta:
+        testar_agente(criar_agente(pasta))
+
+    print("\n✅ Dias úteis e desconto de almoço funcionando!\n")
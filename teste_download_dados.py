@@ -0,0 +1,187 @@
+"""
+🧪 TESTE DO DOWNLOAD CONDICIONAL
+Sobe um servidor HTTP local (com ETag/Last-Modified) no lugar do HostGator
+e valida cache em disco, respostas 304, carga do agente via CSV_URL e
+delta via DELTA_URL igual ao mesmo delta lido do disco
+"""
+
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+
+class ServidorCSV(BaseHTTPRequestHandler):
+    """Serve um único arquivo com ETag e Last-Modified, respondendo 304 quando possível"""
+
+    arquivo: Path = None
+    respostas = []
+
+    def do_GET(self):
+        conteudo = self.arquivo.read_bytes()
+        info = self.arquivo.stat()
+        etag = f'"{info.st_mtime_ns:x}-{info.st_size:x}"'
+
+        if self.headers.get('If-None-Match') == etag:
+            self.respostas.append(304)
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.respostas.append(200)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/csv')
+        self.send_header('Content-Length', str(len(conteudo)))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', formatdate(info.st_mtime, usegmt=True))
+        self.end_headers()
+        self.wfile.write(conteudo)
+
+    def log_message(self, *args):
+        pass
+
+
+class ServidorDelta(ServidorCSV):
+    """Mesmo servidor, com o arquivo delta"""
+
+    arquivo: Path = None
+    respostas = []
+
+
+def gerar_csv(caminho: Path, dias: int):
+    """CSV no formato do extrator com 2 recursos por dia"""
+    linhas = ["s_id_apontamento,s_nm_recurso,s_nr_contrato,s_ds_atividade,d_dt_data,f_hr_hora_inicio,f_hr_hora_fim"]
+    for dia in range(1, dias + 1):
+        for i, recurso in enumerate(("Ana Paula", "João Silva")):
+            linhas.append(f"{dia * 10 + i},{recurso},E0110101,Desenvolvimento,2025-09-{dia:02d},8,17")
+    caminho.write_text("\n".join(linhas), encoding='utf-8-sig')
+
+
+def verificar(condicao: bool, descricao: str):
+    print(f"   {'✅' if condicao else '❌'} {descricao}")
+    if not condicao:
+        raise AssertionError(descricao)
+
+
+def testar_download(url: str, csv: Path, pasta: Path):
+    from download_dados import baixar_url
+
+    print(f"\n{'='*60}")
+    print("⬇️ Download condicional")
+    print(f"{'='*60}")
+
+    arquivo, baixado = baixar_url(url, pasta=pasta)
+    verificar(baixado and arquivo.read_bytes() == csv.read_bytes(), "primeiro acesso baixa o arquivo")
+
+    arquivo, baixado = baixar_url(url, pasta=pasta)
+    verificar(not baixado and ServidorCSV.respostas[-1] == 304, "sem mudança: 304 e cópia do cache")
+
+    gerar_csv(csv, 10)
+    os.utime(csv, ns=(csv.stat().st_atime_ns, csv.stat().st_mtime_ns + 10**9))
+    arquivo, baixado = baixar_url(url, pasta=pasta)
+    verificar(baixado and arquivo.read_bytes() == csv.read_bytes(), "arquivo alterado é baixado de novo")
+
+    paralela = pasta.with_name(pasta.name + "_paralelo")
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        baixados = list(executor.map(lambda _: baixar_url(url, pasta=paralela), range(4)))
+    verificar(all(caminho.read_bytes() == csv.read_bytes() for caminho, _ in baixados)
+              and json.loads(baixados[0][0].with_suffix(".json").read_text()).get("etag"),
+              "4 downloads simultâneos da mesma origem: arquivo e metadados inteiros")
+    verificar(not list(pasta.glob('*.tmp')) and not list(paralela.glob('*.tmp')), "nenhum temporário deixado no cache")
+
+
+def testar_agente(url: str, pasta: Path):
+    print(f"\n{'='*60}")
+    print("🤖 Agente carregando via CSV_URL")
+    print(f"{'='*60}")
+
+    os.environ['CSV_URL'] = url
+    os.environ['DOWNLOAD_CACHE_DIR'] = str(pasta)
+    os.environ['SNAPSHOT_PATH'] = str(pasta / 'sem_snapshot.parquet')
+    from agente_apontamentos import AgenteApontamentos
+
+    total = len(ServidorCSV.respostas)
+    agente = AgenteApontamentos()
+    verificar(agente.df is not None and len(agente.df) == 20, "agente carregou os 20 registros")
+
+    agente = AgenteApontamentos()
+    verificar(ServidorCSV.respostas[total:] == [200, 304], "segunda carga reaproveita o cache (304)")
+    verificar(len(agente.df) == 20, "dados iguais a partir do cache")
+
+
+def testar_delta_url(url: str, delta: Path, pasta: Path):
+    print(f"\n{'='*60}")
+    print("🌐 Delta via DELTA_URL")
+    print(f"{'='*60}")
+
+    linhas = ["s_id_apontamento,s_nm_recurso,s_nr_contrato,s_ds_atividade,d_dt_data,f_hr_hora_inicio,f_hr_hora_fim",
+              "10,Ana Paula,E0110101,Desenvolvimento,2025-09-01,8,12"]
+    for dia in (11, 12):
+        linhas.append(f"{dia * 10},Ana Paula,E0110101,Desenvolvimento,2025-09-{dia:02d},8,17")
+    delta.write_text("\n".join(linhas), encoding='utf-8-sig')
+
+    from agente_apontamentos import AgenteApontamentos
+    os.environ.pop('DELTA_PATH', None)
+    os.environ['DELTA_URL'] = url
+    os.environ['DOWNLOAD_CACHE_DIR'] = str(pasta)
+    remoto = AgenteApontamentos()
+    resultado = remoto.atualizar_incremental()
+    verificar(resultado.get('novos') == 2 and resultado.get('substituidos') == 1, "delta baixado: 2 linhas novas e 1 substituída")
+    verificar(any(arquivo.read_bytes() == delta.read_bytes() for arquivo in pasta.iterdir() if arquivo.is_file()),
+              "corpo gravado no cache em disco igual ao publicado")
+
+    local = AgenteApontamentos()
+    local.atualizar_incremental(str(delta))
+    verificar(remoto.df.reset_index(drop=True).equals(local.df.reset_index(drop=True)), "mesmas linhas do delta lido do disco")
+    verificar(remoto.total_horas_geral() == local.total_horas_geral(), "mesma resposta do delta lido do disco")
+
+    versao = remoto.versao_dados
+    resultado = remoto.atualizar_incremental()
+    verificar(ServidorDelta.respostas[-1] == 304 and resultado.get('novos') == 0 and remoto.versao_dados == versao,
+              "delta sem mudança: 304 e nenhuma versão nova")
+    os.environ.pop('DELTA_URL')
+
+
+def testar_origem_fora(url: str, pasta: Path, servidor):
+    from download_dados import baixar_url
+
+    print(f"\n{'='*60}")
+    print("🔌 Origem indisponível")
+    print(f"{'='*60}")
+
+    servidor.shutdown()
+    servidor.server_close()
+    arquivo, baixado = baixar_url(url, pasta=pasta, timeout=2)
+    verificar(not baixado and arquivo.exists(), "usa a última cópia em cache")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as pasta:
+        pasta = Path(pasta)
+        csv = pasta / "dados.csv"
+        gerar_csv(csv, 5)
+
+        ServidorCSV.arquivo = csv
+        servidor = ThreadingHTTPServer(("127.0.0.1", 0), ServidorCSV)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{servidor.server_address[1]}/dados.csv"
+
+        testar_download(url, csv, pasta / "cache")
+        testar_agente(url, pasta / "cache_agente")
+
+        delta = pasta / "delta.csv"
+        ServidorDelta.arquivo = delta
+        servidor_delta = ThreadingHTTPServer(("127.0.0.1", 0), ServidorDelta)
+        threading.Thread(target=servidor_delta.serve_forever, daemon=True).start()
+        testar_delta_url(f"http://127.0.0.1:{servidor_delta.server_address[1]}/delta.csv", delta, pasta / "cache_delta")
+        servidor_delta.shutdown()
+        servidor_delta.server_close()
+
+        testar_origem_fora(url, pasta / "cache", servidor)
+
+    print("\n✅ Download condicional funcionando!\n")
@@ -0,0 +1,125 @@
+"""
+🧪 TESTE DO CALENDÁRIO DE FERIADOS
+Páscoa e feriados móveis em datas conhecidas, feriados municipais e
+facultativos, e contagem pelo bitmap acumulado igual à contagem dia a dia
+"""
+
+import json
+import tempfile
+import warnings
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from calendario_util import CalendarioUtil, domingo_de_pascoa
+from dados_teste import criar_agente, titulo, verificar
+
+PASCOAS = {
+    2000: date(2000, 4, 23), 2008: date(2008, 3, 23), 2019: date(2019, 4, 21), 2024: date(2024, 3, 31),
+    2025: date(2025, 4, 20), 2026: date(2026, 4, 5), 2038: date(2038, 4, 25), 2285: date(2285, 3, 22),
+}
+
+
+def contar_ingenuo(calendario: CalendarioUtil, inicio: date, fim: date) -> int:
+    """Referência: percorre os dias consultando feriados_ano"""
+    feriados = {dia for ano in range(inicio.year, fim.year + 1) for dia in calendario.feriados_ano(ano)}
+    total, dia = 0, inicio
+    while dia <= fim:
+        total += dia.weekday() < 5 and dia not in feriados
+        dia += timedelta(days=1)
+    return total
+
+
+def testar_pascoa():
+    titulo("🐣 Páscoa e feriados móveis")
+
+    verificar(all(domingo_de_pascoa(ano) == dia for ano, dia in PASCOAS.items()), f"{len(PASCOAS)} datas de Páscoa conhecidas")
+    verificar(all(domingo_de_pascoa(ano).weekday() == 6 for ano in range(1900, 2100)), "Páscoa sempre num domingo (1900-2099)")
+
+    nacional = CalendarioUtil().feriados_ano(2025)
+    verificar(nacional.get(date(2025, 4, 18)) == "Sexta-feira Santa", "Sexta-feira Santa 2025 em 18/04")
+    verificar(date(2025, 3, 3) not in nacional and date(2025, 6, 19) not in nacional, "Carnaval e Corpus Christi fora por padrão")
+    verificar(len(nacional) == 10, "10 feriados nacionais em 2025")
+    verificar(date(2023, 11, 20) not in CalendarioUtil().feriados_ano(2023), "Consciência Negra só a partir de 2024")
+
+    facultativos = CalendarioUtil(incluir_facultativos=True).feriados_ano(2025)
+    verificar({date(2025, 3, 3), date(2025, 3, 4), date(2025, 6, 19)} <= set(facultativos), "facultativos: Carnaval e Corpus Christi 2025")
+
+
+def testar_municipais():
+    titulo("🏙️ Feriados municipais")
+
+    sao_paulo = CalendarioUtil(municipios=["sao_paulo"])
+    verificar(sao_paulo.feriados_ano(2025).get(date(2025, 7, 9)) == "Revolução Constitucionalista", "09/07 em São Paulo")
+    verificar(CalendarioUtil().mascara(["2025-07-09"])[0], "09/07 é dia útil sem município")
+    verificar(not sao_paulo.mascara(["2025-07-09"])[0], "09/07 não é dia útil em São Paulo")
+    verificar(sao_paulo.contar("2025-07-01", "2025-07-31") == CalendarioUtil().contar("2025-07-01", "2025-07-31") - 1,
+              "julho/2025 em São Paulo tem um dia útil a menos")
+    verificar(CalendarioUtil(municipios=["atlantida"]).feriados_ano(2025) == CalendarioUtil().feriados_ano(2025),
+              "município sem cadastro usa só os nacionais")
+
+
+def testar_contagem():
+    titulo("🧮 Bitmap acumulado × contagem dia a dia")
+
+    rng = np.random.default_rng(13)
+    for calendario in (CalendarioUtil(), CalendarioUtil(municipios=["sao_paulo"], incluir_facultativos=True)):
+        dias = pd.date_range("2019-01-01", "2031-12-31", freq="D")
+        divergentes = []
+        for _ in range(150):
+            a, b = sorted(rng.integers(0, len(dias), 2))
+            inicio, fim = dias[a].date(), dias[b].date()
+            if calendario.contar(inicio, fim) != contar_ingenuo(calendario, inicio, fim):
+                divergentes.append((inicio, fim))
+        verificar(not divergentes, f"150 períodos (municípios={calendario.municipios}, facultativos={calendario.incluir_facultativos})"
+                  + (f": {divergentes[:3]}" if divergentes else ""))
+
+    # Consultas em anos fora do bitmap estendem a cobertura sem mudar resultados anteriores
+    calendario = CalendarioUtil()
+    antes = calendario.contar("2025-01-01", "2025-12-31")
+    calendario.contar("2040-01-01", "2040-12-31")
+    calendario.contar("2010-01-01", "2010-12-31")
+    verificar(calendario.contar("2025-01-01", "2025-12-31") == antes == contar_ingenuo(calendario, date(2025, 1, 1), date(2025, 12, 31)),
+              f"cobertura estendida para 2010-2040 mantém 2025 ({antes} dias úteis)")
+
+
+def testar_arquivo(pasta: Path):
+    titulo("📄 Arquivo de feriados")
+
+    sem_arquivo = CalendarioUtil(arquivo=pasta / "nao_existe.json")
+    verificar(sem_arquivo.contar("2025-01-01", "2025-01-31") == int(np.is_busday(np.arange("2025-01-01", "2025-02-01", dtype="datetime64[D]")).sum()),
+              "sem arquivo, só fins de semana são excluídos")
+
+    proprio = pasta / "feriados.json"
+    proprio.write_text(json.dumps({"nacionais": {"fixos": [{"data": "10-15", "nome": "Dia do Professor"}]},
+                                   "datas": [{"data": "2025-10-17", "nome": "Ponte"}]}), encoding="utf-8")
+    calendario = CalendarioUtil(arquivo=proprio)
+    verificar(calendario.mascara(["2025-10-15", "2025-10-17", "2025-10-16"]).tolist() == [False, False, True],
+              "fixos e datas avulsas do arquivo próprio")
+    verificar(calendario.feriados_periodo("2025-10-13", "2025-10-19") == [("15/10/2025", "Dia do Professor"), ("17/10/2025", "Ponte")],
+              "feriados_periodo lista os feriados em dias de semana")
+
+
+def testar_agente(agente):
+    titulo("🤖 Feriados nas respostas do agente")
+
+    dados = agente.contar_dias_uteis_periodo("01/11/2025", "30/11/2025")["dados"]
+    verificar([f["nome"] for f in dados["feriados"]] == ["Dia Nacional de Zumbi e da Consciência Negra"],
+              "novembro/2025: só 20/11 cai em dia de semana")
+    verificar(dados["dias_uteis"] == contar_ingenuo(CalendarioUtil(), date(2025, 11, 1), date(2025, 11, 30)), "dias úteis de novembro/2025")
+    verificar(not agente.eh_dia_util(pd.Timestamp("2025-11-20")) and agente.eh_dia_util(pd.Timestamp("2025-11-21")), "eh_dia_util respeita feriados")
+    verificar(agente.classificar_apontamento(pd.Timestamp("2025-11-20"), 8.0)["tipo_dia"] == "🎉 Feriado", "classificar_apontamento marca feriado")
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore", UserWarning)
+    testar_pascoa()
+    testar_municipais()
+    testar_contagem()
+    with tempfile.TemporaryDirectory() as pasta:
+        testar_arquivo(Path(pasta))
+        testar_agente(criar_agente(pasta))
+
+    print("\n✅ Calendário de feriados funcionando!\n")
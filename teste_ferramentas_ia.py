@@ -0,0 +1,104 @@
+"""
+🧪 TESTE DAS FERRAMENTAS DA IA
+Schemas gerados das assinaturas do agente, chamadas estruturadas (JSON da IA)
+iguais às chamadas diretas e execução paralela igual à sequencial
+"""
+
+import inspect
+import json
+import tempfile
+import warnings
+
+from dados_teste import criar_agente, titulo, verificar
+
+# (ferramenta, argumentos como a IA envia, chamada direta equivalente)
+CHAMADAS = [
+    ("ranking_funcionarios", '{"top_n": "5"}', ("ranking_funcionarios", (5,))),
+    ("total_horas_usuario", '{"usuario": "João Silva"}', ("total_horas_usuario", ("João Silva",))),
+    ("total_horas_usuario", '{}', ("total_horas_usuario", ("Maria Souza",))),
+    ("consultar_periodo", '{"data_inicio": "01/09/2025", "data_fim": "30/09/2025", "usuario": "None"}',
+     ("consultar_periodo", ("01/09/2025", "30/09/2025"))),
+    ("calcular_horas_esperadas_periodo", '{"data_inicio": "01/10/2025", "data_fim": "31/10/2025", "horas_por_dia": "6"}',
+     ("calcular_horas_esperadas_periodo", ("01/10/2025", "31/10/2025", 6.0))),
+    ("dias_nao_apontados", '{"data_inicio": "01/10/2025", "data_fim": "15/10/2025", "equipe": ["João Silva", "Ana Paula"]}',
+     ("dias_nao_apontados", ("01/10/2025", "15/10/2025", None, ["João Silva", "Ana Paula"]))),
+    ("recursos_por_contrato", {"contrato": "E0440404", "extra": 1}, ("recursos_por_contrato", ("E0440404",))),
+    ("identificar_outliers", '', ("identificar_outliers", ())),
+    ("listar_contratos", '{"inicio": "null"}', ("listar_contratos", ())),
+]
+
+
+def testar_schemas(agente):
+    titulo("📐 Schemas gerados das assinaturas")
+
+    from bot.ferramentas_ia import FERRAMENTAS, PARAMETROS_USUARIO, gerar_ferramentas
+    ferramentas = {f["function"]["name"]: f["function"] for f in gerar_ferramentas(agente)}
+    verificar(list(ferramentas) == [nome for nome in FERRAMENTAS if hasattr(agente, nome)], f"{len(ferramentas)} ferramentas expostas")
+
+    divergentes = []
+    for nome, funcao in ferramentas.items():
+        parametros = inspect.signature(getattr(agente, nome)).parameters.values()
+        obrigatorios = [p.name for p in parametros if p.default is inspect.Parameter.empty and p.name not in PARAMETROS_USUARIO]
+        if list(funcao["parameters"]["properties"]) != [p.name for p in parametros] or funcao["parameters"]["required"] != obrigatorios:
+            divergentes.append(nome)
+    verificar(not divergentes, "parâmetros e obrigatórios iguais às assinaturas" + (f": {divergentes}" if divergentes else ""))
+
+    tipos = ferramentas["dias_nao_apontados"]["parameters"]["properties"]
+    verificar(tipos["equipe"] == {"type": "array", "items": {"type": "string"}, "description": tipos["equipe"]["description"]},
+              "Optional[List[str]] vira array de strings")
+    verificar(ferramentas["calcular_horas_esperadas_periodo"]["parameters"]["properties"]["horas_por_dia"]["type"] == "number",
+              "float vira number")
+    verificar(ferramentas["contratos_por_recurso"]["description"] == inspect.getdoc(agente.contratos_por_recurso).split("\n")[0],
+              "sem descrição própria usa a primeira linha da docstring")
+    json.dumps(list(ferramentas.values()))
+    verificar(True, "schemas serializáveis em JSON")
+
+
+def testar_execucao(agente):
+    titulo("🛠️ Chamada estruturada × chamada direta")
+
+    from bot.ferramentas_ia import executar_ferramenta
+    diferentes = []
+    for nome, argumentos, (metodo, args) in CHAMADAS:
+        if executar_ferramenta(agente, nome, argumentos, "Maria Souza") != getattr(agente, metodo)(*args):
+            diferentes.append((nome, argumentos))
+    verificar(not diferentes, f"{len(CHAMADAS)} chamadas iguais às diretas" + (f": {diferentes}" if diferentes else ""))
+
+    verificar("erro" in executar_ferramenta(agente, "apagar_tudo", "{}", "Maria Souza"), "ferramenta desconhecida vira erro")
+    verificar("erro" in executar_ferramenta(agente, "ranking_funcionarios", "{top_n: 5", "Maria Souza"), "JSON inválido vira erro")
+    verificar("erro" in executar_ferramenta(agente, "resumo_semanal_geral", "{}", "Maria Souza"), "método fora da lista não é exposto")
+
+
+def testar_paralelo(conversa):
+    titulo("⚡ Execução paralela × sequencial")
+
+    from bot.ai_conversation import EXECUTOR_FERRAMENTAS
+    chamadas = [{"id": f"call_{i}", "nome": nome, "argumentos": argumentos} for i, (nome, argumentos, _) in enumerate(CHAMADAS * 3)]
+    sequencial = [conversa._executar_ferramenta(c["nome"], c["argumentos"], "Maria Souza") for c in chamadas]
+    paralelo = list(EXECUTOR_FERRAMENTAS.map(lambda c: conversa._executar_ferramenta(c["nome"], c["argumentos"], "Maria Souza"), chamadas))
+    verificar(paralelo == sequencial, f"{len(chamadas)} chamadas no pool com os mesmos resultados, na mesma ordem")
+
+    mensagem = conversa._mensagem_chamadas(None, chamadas[:2])
+    verificar([c["function"]["name"] for c in mensagem["tool_calls"]] == [chamadas[0]["nome"], chamadas[1]["nome"]]
+              and mensagem["content"] is None, "mensagem do assistente com tool_calls no formato OpenAI")
+    retorno = conversa._mensagem_resultado_ferramenta("call_0", sequencial[3])
+    verificar(retorno["role"] == "tool" and json.loads(retorno["content"])["tipo"] == sequencial[3]["tipo"],
+              "resultado devolvido como mensagem role=tool em JSON")
+
+    # ranking_funcionarios e consultar_periodo já devolvem texto pronto; identificar_outliers não
+    diretas, resultados = [chamadas[0], chamadas[3]], [sequencial[0], sequencial[3]]
+    verificar(conversa._resposta_direta(diretas, resultados) == "\n\n".join(r["resposta"] for r in resultados),
+              "ferramentas com texto pronto respondem sem nova chamada à IA")
+    verificar(conversa._resposta_direta(chamadas[6:8], sequencial[6:8]) is None, "com identificar_outliers na rodada, a IA formata")
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore", UserWarning)
+    with tempfile.TemporaryDirectory() as pasta:
+        agente = criar_agente(pasta)
+        from bot.ai_conversation import ConversacaoIA
+        testar_schemas(agente)
+        testar_execucao(agente)
+        testar_paralelo(ConversacaoIA(agente))
+
+    print("\n✅ Ferramentas da IA funcionando!\n")
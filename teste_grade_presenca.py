@@ -0,0 +1,98 @@
+"""
+🧪 TESTE DA GRADE DE PRESENÇA
+Relatório geral de dias não apontados (grade recurso × dia útil) comparado com
+a análise individual de cada colaborador e com um cálculo ingênuo por usuário
+"""
+
+import tempfile
+import warnings
+
+import pandas as pd
+
+import calendario_util
+from dados_teste import criar_agente, titulo, verificar
+
+PERIODOS = [
+    ("01/08/2025", "31/08/2025"),
+    ("06/10/2025", "24/10/2025"),
+    ("01/08/2025", "30/11/2025"),
+    ("01/12/2025", "15/12/2025"),
+]
+
+
+def faltas_ingenuas(df: pd.DataFrame, usuario: str, inicio: pd.Timestamp, fim: pd.Timestamp) -> list:
+    """Referência: dias úteis do período sem nenhuma linha do usuário, um dia por vez"""
+    apontados = set(df.loc[df["s_nm_recurso"] == usuario, "data"].dt.date)
+    return [
+        dia.strftime("%d/%m/%Y")
+        for dia in pd.date_range(inicio, fim, freq="D")
+        if calendario_util.eh_dia_util(dia) and dia.date() not in apontados
+    ]
+
+
+def testar_relatorio_geral(agente):
+    titulo("👥 Relatório geral × cálculo por usuário")
+
+    df = agente.df
+    for data_inicio, data_fim in PERIODOS:
+        inicio = pd.to_datetime(data_inicio, dayfirst=True)
+        fim = pd.to_datetime(data_fim, dayfirst=True)
+        periodo = df[(df["data"] >= inicio) & (df["data"] <= fim)]
+        usuarios = sorted(periodo["s_nm_recurso"].dropna().astype(str).unique())
+
+        resultado = agente.dias_nao_apontados(data_inicio, data_fim)
+        if not usuarios:
+            verificar(resultado["tipo"] == "info", f"{data_inicio}..{data_fim}: sem apontamentos, sem colaboradores")
+            continue
+
+        detalhes = resultado["dados"]["detalhes"]
+        verificar(list(detalhes) == usuarios, f"{data_inicio}..{data_fim}: {len(usuarios)} colaboradores em ordem alfabética")
+        divergentes = [
+            usuario for usuario in usuarios
+            if detalhes[usuario]["lista_dias_faltantes"] != faltas_ingenuas(periodo, usuario, inicio, fim)
+            or detalhes[usuario] != agente._analisar_dias_nao_apontados_usuario(inicio, fim, usuario)
+        ]
+        verificar(not divergentes, f"{data_inicio}..{data_fim}: faltas iguais às da análise individual" + (f": {divergentes}" if divergentes else ""))
+
+
+def testar_equipe(agente):
+    titulo("📋 Equipe explícita")
+
+    equipe = ["maria souza", "Fulano Sem Apontamento", "João Silva"]
+    resultado = agente.dias_nao_apontados("01/09/2025", "30/09/2025", equipe=equipe)
+    detalhes = resultado["dados"]["detalhes"]
+    dias_uteis = calendario_util.contar_dias_uteis("2025-09-01", "2025-09-30")
+
+    verificar(list(detalhes) == equipe, "linhas na ordem da equipe informada, sem outros recursos")
+    verificar(detalhes["Fulano Sem Apontamento"]["dias_nao_apontados"] == dias_uteis, "quem não apontou nada falta em todos os dias úteis")
+    geral = agente.dias_nao_apontados("01/09/2025", "30/09/2025")["dados"]["detalhes"]
+    verificar(detalhes["maria souza"] == geral["Maria Souza"] and detalhes["João Silva"] == geral["João Silva"],
+              "nome em outra caixa casa com o recurso e repete o relatório geral")
+
+
+def testar_grade():
+    titulo("🧮 grade_presenca nos limites")
+
+    dias_uteis = calendario_util.dias_uteis_periodo("2025-11-17", "2025-11-23")
+    recursos = ["Ana", "Bia", None, "Ana", "Bia", "Caio"]
+    datas = pd.to_datetime(["2025-11-17", "2025-11-20", "2025-11-18", "2025-11-22", None, "2025-11-24"])
+    nomes, grade = calendario_util.grade_presenca(recursos, datas, dias_uteis)
+
+    verificar(calendario_util.formatar_dias(dias_uteis) == ["17/11/2025", "18/11/2025", "19/11/2025", "21/11/2025"], "20/11 (feriado) fora das colunas")
+    verificar(nomes == ["Ana", "Bia", "Caio"], "recurso nulo ignorado")
+    verificar(grade.tolist() == [[True, False, False, False], [False, False, False, False], [False, False, False, False]],
+              "feriado, fim de semana, data nula e dia fora do período não marcam presença")
+
+    nomes, grade = calendario_util.grade_presenca([], [], dias_uteis, equipe=["Ana"])
+    verificar(nomes == ["Ana"] and grade.shape == (1, 4) and not grade.any(), "sem linhas: equipe inteira ausente")
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore", UserWarning)
+    with tempfile.TemporaryDirectory() as pasta:
+        agente = criar_agente(pasta)
+        testar_relatorio_geral(agente)
+        testar_equipe(agente)
+    testar_grade()
+
+    print("\n✅ Grade de presença funcionando!\n")
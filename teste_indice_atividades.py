@@ -0,0 +1,134 @@
+"""
+🧪 TESTE DO ÍNDICE DE ATIVIDADES
+Busca pelo índice invertido comparada com uma busca ingênua descrição a
+descrição (palavra inteira, prefixo, todas as palavras úteis e trecho do
+texto como último recurso), posições comparadas com máscaras nas linhas
+"""
+
+import re
+import tempfile
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from dados_teste import criar_agente, gerar_apontamentos, titulo, verificar
+from indices_apontamentos import PALAVRAS_VAZIAS, IndiceAtividades, dobrar_acentos
+
+ATIVIDADES_EXTRAS = ["Reunião com cliente", "Reuniões semanais", "Teste de carga", "Pré-venda técnica",
+                     "Suporte N2/N3", "REUNIÃO DE ALINHAMENTO", "Análise", "Desenvolvimento de software legado"]
+
+CONSULTAS = ["reuniao", "reuni", "Reunião", "reuniao alinh", "REUNIÃO de alinhamento", "reuniao de alinhamento", "teste",
+             "testes automatizados", "de", "suporte n2", "n3", "pre venda", "pré-venda", "desenv soft", "software",
+             "analise", "ao de al", "nica n", "xyz", "de da", "   ", ""]
+
+
+def busca_ingenua(descricoes, consulta: str):
+    """[(descrição, pontuação)] testando cada descrição única, sem índice"""
+    frase = dobrar_acentos(consulta).strip()
+    palavras = re.findall(r"\w+", dobrar_acentos(consulta))
+    uteis = [p for p in palavras if p not in PALAVRAS_VAZIAS] or palavras
+
+    def peso(palavra, tokens):
+        if palavra in tokens:
+            return 1.0
+        return 0.7 if any(t.startswith(palavra) for t in tokens) else None
+
+    pontos = {}
+    if uteis:
+        for descricao in descricoes:
+            tokens = re.findall(r"\w+", dobrar_acentos(descricao))
+            pesos = [peso(p, tokens) for p in uteis]
+            if all(p is not None for p in pesos):
+                pontos[descricao] = sum(pesos)
+    if not pontos and frase:
+        pontos = {d: 0.5 for d in descricoes if frase in dobrar_acentos(d)}
+
+    ranking = []
+    for descricao, ponto in pontos.items():
+        texto = dobrar_acentos(descricao)
+        ponto += 2.0 if frase and frase == texto else 1.0 if frase and frase in texto else 0.0
+        ponto += len(uteis) / max(len(re.findall(r"\w+", texto)), 1)
+        ranking.append((descricao, ponto))
+    return sorted(ranking, key=lambda item: (-item[1], item[0]))
+
+
+def com_atividades_extras(bruto: pd.DataFrame) -> pd.DataFrame:
+    """Dados sintéticos com descrições parecidas (plurais, caixa, acentos e prefixos comuns)"""
+    df = bruto.copy()
+    posicoes = df.index[::7]
+    df.loc[posicoes, "s_ds_atividade"] = [ATIVIDADES_EXTRAS[i % len(ATIVIDADES_EXTRAS)] for i in range(len(posicoes))]
+    return df
+
+
+def testar_busca(df: pd.DataFrame):
+    titulo("🔎 Índice invertido × busca ingênua")
+
+    coluna = df["s_ds_atividade"]
+    indice = IndiceAtividades(coluna)
+    descricoes = [str(d) for d in coluna.dropna().unique()]
+    verificar(sorted(indice.atividades) == sorted(descricoes), f"{len(indice)} descrições únicas indexadas")
+
+    diferentes = []
+    for consulta in CONSULTAS:
+        obtido = [(indice.atividades[i], round(p, 6)) for i, p in indice.buscar(consulta)]
+        esperado = [(d, round(p, 6)) for d, p in busca_ingenua(descricoes, consulta)]
+        if obtido != esperado:
+            diferentes.append(consulta)
+    verificar(not diferentes, f"{len(CONSULTAS)} consultas com o mesmo ranking e pontuação" + (f": {diferentes}" if diferentes else ""))
+
+    primeira = lambda consulta: indice.atividades[indice.buscar(consulta)[0][0]]
+    verificar(primeira("reuniao de alinhamento") in ("Reunião de alinhamento", "REUNIÃO DE ALINHAMENTO"), "frase inteira fica no topo")
+    verificar({"Reunião com cliente", "Reuniões semanais"} <= {indice.atividades[i] for i, _ in indice.buscar("reuni")},
+              "prefixo (reuni) encontra reunião e reuniões")
+    verificar("Reuniões semanais" not in {indice.atividades[i] for i, _ in indice.buscar("reuniao")}, "palavra inteira não casa com outra grafia")
+    verificar(indice.buscar("ao de al") and indice.buscar("xyz") == [] and indice.buscar("   ") == [],
+              "trecho do texto como último recurso; nada para consulta vazia ou sem correspondência")
+    return indice
+
+
+def testar_posicoes(df: pd.DataFrame, indice: IndiceAtividades):
+    titulo("📍 Posições × máscaras")
+
+    coluna = df["s_ds_atividade"].astype(object)
+    diferentes = []
+    for consulta in CONSULTAS:
+        encontradas = indice.buscar(consulta)
+        posicoes = indice.posicoes([i for i, _ in encontradas])
+        alvo = {d for d, _ in busca_ingenua([str(d) for d in coluna.dropna().unique()], consulta)}
+        if not np.array_equal(posicoes, np.flatnonzero(coluna.isin(alvo).to_numpy())):
+            diferentes.append(consulta)
+    verificar(not diferentes, "linhas das atividades encontradas iguais às da máscara" + (f": {diferentes}" if diferentes else ""))
+    verificar(len(indice.posicoes([])) == 0, "lista vazia de atividades: nenhuma linha")
+    verificar(sum(len(p) for p in indice.posicoes_atividade) == coluna.notna().sum(), "cada linha com atividade em exatamente uma descrição")
+
+
+def testar_agente(agente):
+    titulo("🤖 apontamentos_por_atividade × filtro nas linhas")
+
+    df = agente.df
+    descricoes = [str(d) for d in df["s_ds_atividade"].dropna().unique()]
+    for consulta, periodo in (("reuniao", ()), ("reuniao alinh", ("01/09/2025", "30/09/2025")),
+                              ("teste", ("01/10/2025", "31/10/2025")), ("suporte n2", ())):
+        alvo = {d for d, _ in busca_ingenua(descricoes, consulta)}
+        linhas = df[df["s_ds_atividade"].astype(object).isin(alvo)]
+        if periodo:
+            inicio, fim = (pd.to_datetime(d, dayfirst=True) for d in periodo)
+            linhas = linhas[(linhas["data"] >= inicio) & (linhas["data"] <= fim)]
+        dados = agente.apontamentos_por_atividade(consulta, *periodo)["dados"]
+        verificar(dados["total_apontamentos"] == len(linhas) and np.isclose(dados["total_horas"], linhas["duracao_horas"].sum())
+                  and dados["usuarios_unicos"] == linhas["s_nm_recurso"].nunique(),
+                  f"'{consulta}'{' em ' + ' a '.join(periodo) if periodo else ''}: {len(linhas)} apontamentos")
+
+    verificar(agente.apontamentos_por_atividade("xyz")["tipo"] == "info", "atividade inexistente responde sem erro")
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore", UserWarning)
+    with tempfile.TemporaryDirectory() as pasta:
+        agente = criar_agente(pasta, df=com_atividades_extras(gerar_apontamentos()))
+        indice = testar_busca(agente.df)
+        testar_posicoes(agente.df, indice)
+        testar_agente(agente)
+
+    print("\n✅ Índice de atividades funcionando!\n")
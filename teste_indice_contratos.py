@@ -0,0 +1,92 @@
+"""
+🧪 TESTE DO ÍNDICE DE CONTRATOS
+Posições e totais do índice comparados com máscaras sobre s_nr_contrato e
+contrato_fornecedor, grafias diferentes do mesmo contrato e respostas do
+agente iguais às calculadas filtrando as linhas
+"""
+
+import tempfile
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from dados_teste import criar_agente, gerar_apontamentos, titulo, verificar
+from indices_apontamentos import IndiceContratos, normalizar_contrato
+
+
+def mascara(df: pd.DataFrame, contrato) -> np.ndarray:
+    """Linhas do contrato em qualquer das duas colunas, varrendo o DataFrame"""
+    chave = normalizar_contrato(contrato)
+    encontrado = np.zeros(len(df), dtype=bool)
+    for coluna in ("s_nr_contrato", "contrato_fornecedor"):
+        valores = df[coluna].astype(object)
+        encontrado |= valores.map(lambda v: pd.notna(v) and normalizar_contrato(v) == chave).to_numpy(dtype=bool)
+    return encontrado
+
+
+def com_colisao(bruto: pd.DataFrame) -> pd.DataFrame:
+    """Linhas com o mesmo contrato nas duas colunas e grafias irregulares"""
+    extras = bruto.sample(30, random_state=3).copy()
+    extras["s_id_apontamento"] = [f"COL{i}" for i in range(len(extras))]
+    extras.loc[extras.index[:10], ["s_nr_contrato", "contrato_fornecedor"]] = ["7873", 7873.0]
+    extras.loc[extras.index[10:20], "s_nr_contrato"] = " e0440404 "
+    extras.loc[extras.index[20:], "s_nr_contrato"] = "8446.0"
+    return pd.concat([bruto, extras], ignore_index=True)
+
+
+def testar_posicoes(df: pd.DataFrame):
+    titulo("📋 Índice × máscaras")
+
+    indice = IndiceContratos(df)
+    chaves = {normalizar_contrato(v) for coluna in ("s_nr_contrato", "contrato_fornecedor") for v in df[coluna].dropna().unique()}
+    verificar(set(indice.posicoes_por_chave) == chaves, f"{len(indice)} chaves, as mesmas das duas colunas")
+
+    diferentes = []
+    horas = df["duracao_horas"].to_numpy(dtype=np.float64)
+    for chave in sorted(chaves):
+        esperado = mascara(df, chave)
+        posicoes = indice.posicoes(chave)
+        total = indice.total(chave)
+        if not np.array_equal(posicoes, np.flatnonzero(esperado)) or total[1] != esperado.sum() or not np.isclose(total[0], horas[esperado].sum()):
+            diferentes.append(chave)
+    verificar(not diferentes, "posições ordenadas, horas e apontamentos iguais às máscaras" + (f": {diferentes}" if diferentes else ""))
+
+    colisao = mascara(df, "7873")
+    verificar(len(indice.posicoes("7873")) == colisao.sum() and len(np.unique(indice.posicoes("7873"))) == colisao.sum(),
+              "linha com o contrato nas duas colunas aparece uma vez só")
+
+    for grafias in (("E0440404", " e0440404 ", "e0440404"), ("7873", 7873, 7873.0, "7873.0", " 7873 "), ("8446", "8446.0", 8446.0)):
+        verificar(all(np.array_equal(indice.posicoes(g), indice.posicoes(grafias[0])) for g in grafias) and len(indice.posicoes(grafias[0])),
+                  f"grafias {grafias} levam às mesmas linhas")
+
+    verificar(len(indice.posicoes("E9999999")) == 0 and indice.total("E9999999") is None, "contrato inexistente: sem linhas e sem total")
+    verificar(len(indice.posicoes("nan")) == 0 and len(indice.posicoes("None")) == 0, "contratos nulos não viram chave")
+
+
+def testar_agente(agente):
+    titulo("🤖 recursos_por_contrato × filtro nas linhas")
+
+    df = agente.df
+    for contrato in ("E0440404", "e0440404", "7873", "8446.0", "E0330000"):
+        linhas = df[mascara(df, contrato)]
+        esperado = linhas.groupby("s_nm_recurso", observed=True)["duracao_horas"].agg(["sum", "size"])
+        resultado = agente.recursos_por_contrato(contrato)
+        dados = resultado["dados"]
+        iguais = (set(dados) == set(esperado.index)
+                  and all(np.isclose(dados[r]["duracao_horas"], esperado.loc[r, "sum"]) and dados[r]["s_id_apontamento"] == esperado.loc[r, "size"]
+                          for r in dados)
+                  and np.isclose(resultado["total_horas"], linhas["duracao_horas"].sum()) and resultado["apontamentos"] == len(linhas))
+        verificar(iguais, f"{contrato}: {len(dados)} recursos, {resultado['apontamentos']} apontamentos")
+
+    verificar(agente.recursos_por_contrato("E9999999")["tipo"] == "erro", "contrato inexistente responde com erro")
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore", UserWarning)
+    with tempfile.TemporaryDirectory() as pasta:
+        agente = criar_agente(pasta, df=com_colisao(gerar_apontamentos()))
+        testar_posicoes(agente.df)
+        testar_agente(agente)
+
+    print("\n✅ Índice de contratos funcionando!\n")
@@ -0,0 +1,92 @@
+"""
+🧪 TESTE DO ÍNDICE DE RECURSOS
+Posições devolvidas pelo índice (com e sem período) comparadas com o filtro
+booleano sobre a coluna inteira, para todos os nomes da amostra
+"""
+
+import tempfile
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from dados_teste import criar_agente, titulo, verificar
+from indices_apontamentos import IndiceRecursos, normalizar_nome
+
+PERIODOS = [
+    (None, None),
+    (pd.Timestamp("2025-09-01"), pd.Timestamp("2025-09-30")),
+    (pd.Timestamp("2025-08-15"), None),
+    (None, pd.Timestamp("2025-10-10")),
+    (pd.Timestamp("2025-11-30"), pd.Timestamp("2025-11-30")),
+    (pd.Timestamp("2026-01-01"), pd.Timestamp("2026-02-01")),
+]
+
+
+def mascara_recurso(df: pd.DataFrame, nome: str, inicio=None, fim=None) -> np.ndarray:
+    """Filtro de referência: nome normalizado igual e data no período"""
+    chaves = df["s_nm_recurso"].astype(object).map(normalizar_nome, na_action="ignore")
+    mascara = (chaves == normalizar_nome(nome)).to_numpy()
+    if inicio is not None:
+        mascara &= (df["data"] >= inicio).to_numpy()
+    if fim is not None:
+        mascara &= (df["data"] <= fim).to_numpy()
+    return mascara
+
+
+def testar_posicoes(agente):
+    titulo("🗂️ Posições do índice × filtro booleano")
+
+    df, indice = agente.df, agente.indice_recursos
+    nomes = df["s_nm_recurso"].dropna().unique().tolist()
+    verificar(len(indice) == len({normalizar_nome(n) for n in nomes}), f"{len(indice)} chaves, uma por nome normalizado")
+
+    divergentes = [
+        (nome, inicio, fim)
+        for nome in nomes
+        for inicio, fim in PERIODOS
+        if not np.array_equal(indice.posicoes(nome, inicio, fim), np.flatnonzero(mascara_recurso(df, nome, inicio, fim)))
+    ]
+    verificar(not divergentes, f"{len(nomes)} nomes × {len(PERIODOS)} períodos iguais ao filtro" + (f": {divergentes[:3]}" if divergentes else ""))
+
+    for variante in ("joao silva", "JOÃO SILVA", "  João   Silva "):
+        verificar(np.array_equal(indice.posicoes(variante), indice.posicoes("João Silva")), f"'{variante}' acha as linhas de João Silva")
+    verificar(len(indice.posicoes("Zacarias Inexistente")) == 0, "nome ausente não tem posições")
+
+
+def testar_filtro_agente(agente):
+    titulo("👤 _filtrar_recurso do agente")
+
+    df = agente.df
+    for nome in ("João Silva", "Maria Souza", "JOSÉ Pereira"):
+        for inicio, fim in PERIODOS[:3]:
+            esperado = df[mascara_recurso(df, nome, inicio, fim)]
+            obtido = agente._filtrar_recurso(nome, inicio, fim)
+            pd.testing.assert_frame_equal(obtido, esperado)
+    verificar(True, "mesmas linhas, na mesma ordem, que o filtro booleano")
+
+
+def testar_linhas_novas(agente):
+    titulo("➕ Índice estendido com linhas novas")
+
+    df = agente.df
+    corte = int(np.searchsorted(agente._datas, np.datetime64("2025-11-01"), side="left"))
+    parcial = IndiceRecursos(df["s_nm_recurso"].iloc[:corte], df["data"].iloc[:corte])
+    estendido = parcial.com_linhas_novas(df["s_nm_recurso"].iloc[corte:], df["data"].iloc[corte:], corte)
+    completo = IndiceRecursos(df["s_nm_recurso"], df["data"])
+
+    verificar(estendido.chaves == completo.chaves, "mesmas chaves do índice reconstruído")
+    verificar(all(np.array_equal(estendido.posicoes(chave), completo.posicoes(chave)) for chave in completo.chaves),
+              "mesmas posições do índice reconstruído")
+    verificar(len(parcial.posicoes("João Silva")) < len(estendido.posicoes("João Silva")), "índice original não foi alterado")
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore", UserWarning)
+    with tempfile.TemporaryDirectory() as pasta:
+        agente = criar_agente(pasta)
+        testar_posicoes(agente)
+        testar_filtro_agente(agente)
+        testar_linhas_novas(agente)
+
+    print("\n✅ Índice de recursos funcionando!\n")
@@ -0,0 +1,119 @@
+"""
+🧪 TESTE DA LEITURA PARALELA DO CSV
+CSV dividido em trechos lidos por vários processos comparado com a leitura
+em um processo e com o pd.read_csv puro: mesmas linhas, tipos e categorias,
+inclusive com campos entre aspas contendo vírgulas e quebras de linha
+"""
+
+import tempfile
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import carga_dados
+from carga_dados import ESQUEMA_CSV, _cortes_csv, ler_csv
+from dados_teste import criar_agente, gerar_apontamentos, gravar_csv, responder_consultas, titulo, verificar
+
+
+def gerar_csv(pasta: Path) -> Path:
+    """Extrato sintético com atividades que o corte não pode partir"""
+    df = gerar_apontamentos()
+    especiais = ["Reunião, alinhamento e \"follow-up\"", "Linha 1\nLinha 2 do mesmo campo", "Ajuste, \"hotfix\"\ne deploy"]
+    df.loc[df.index[::97], "s_ds_atividade"] = [especiais[i % len(especiais)] for i in range(len(df.index[::97]))]
+    return gravar_csv(df, pasta / "extrato.csv")
+
+
+def testar_cortes(csv: Path):
+    titulo("✂️ Pontos de corte")
+
+    conteudo = csv.read_bytes()
+    for partes in (2, 3, 4, 7, 16):
+        cortes = _cortes_csv(str(csv), partes)
+        inteiros = all(conteudo[c - 1:c] == b"\n" and conteudo[:c].count(b'"') % 2 == 0 for c in cortes[:-1])
+        verificar(inteiros and cortes == sorted(cortes) and cortes[-1] == len(conteudo),
+                  f"{partes} partes: {len(cortes) - 1} trechos em quebras de linha fora de aspas")
+
+
+def testar_paralelo(csv: Path):
+    titulo("⚡ Paralelo × um processo")
+
+    sequencial = ler_csv(csv, workers=1)
+    for workers in (2, 3, 4, 7):
+        paralelo = ler_csv(csv, workers=workers)
+        pd.testing.assert_frame_equal(paralelo, sequencial)
+        verificar(True, f"{workers} processos: mesmas {len(paralelo)} linhas, tipos e categorias")
+
+    verificar(all(list(sequencial[c].cat.categories) == sorted(sequencial[c].cat.categories)
+                  for c in sequencial.columns if isinstance(sequencial[c].dtype, pd.CategoricalDtype)),
+              "categorias unidas em ordem, como na leitura em um processo")
+    pd.testing.assert_frame_equal(ler_csv(csv.read_bytes()), sequencial)
+    verificar(True, "conteúdo em bytes lido igual ao arquivo")
+
+
+def testar_read_csv_puro(csv: Path):
+    titulo("🐼 Paralelo × pd.read_csv")
+
+    paralelo = ler_csv(csv, workers=4)
+    puro = pd.read_csv(csv, encoding="utf-8-sig", low_memory=False)
+    verificar(list(paralelo.columns) == list(puro.columns) and len(paralelo) == len(puro), f"{len(puro)} linhas e mesmas colunas")
+
+    diferentes = []
+    for coluna in puro.columns:
+        tipo = ESQUEMA_CSV.get(coluna)
+        if tipo in ("float32", "Int8"):
+            iguais = np.allclose(paralelo[coluna].astype("float64"), puro[coluna].astype("float64"), equal_nan=True)
+        elif tipo and tipo.startswith("datetime"):
+            iguais = paralelo[coluna].equals(pd.to_datetime(puro[coluna], errors="coerce"))
+        else:
+            iguais = paralelo[coluna].astype(object).where(paralelo[coluna].notna(), None).tolist() == \
+                puro[coluna].astype(object).where(puro[coluna].notna(), None).tolist()
+        if not iguais:
+            diferentes.append(coluna)
+    verificar(not diferentes, "valores iguais coluna a coluna" + (f": {diferentes}" if diferentes else ""))
+    verificar(paralelo["s_ds_atividade"].astype(str).str.contains("\n").sum() == puro["s_ds_atividade"].astype(str).str.contains("\n").sum(),
+              "campos com quebra de linha preservados")
+
+
+def testar_arquivos_pequenos(pasta: Path):
+    titulo("🤏 Arquivos menores que o número de processos")
+
+    for linhas, final in ((1, "\n"), (3, ""), (5, "\n")):
+        csv = pasta / f"pequeno_{linhas}.csv"
+        gravar_csv(gerar_apontamentos(linhas=linhas, semente=linhas), csv)
+        csv.write_bytes(csv.read_bytes().rstrip(b"\r\n") + final.encode())
+        pd.testing.assert_frame_equal(ler_csv(csv, workers=8), ler_csv(csv, workers=1))
+        verificar(True, f"{linhas} linha(s){' sem quebra final' if not final else ''}: igual à leitura em um processo")
+
+
+def testar_agente(pasta: Path):
+    titulo("🤖 Agente carregado com leitura paralela")
+
+    df = gerar_apontamentos(semente=11)
+    carga_dados.CSV_WORKERS = 1
+    sequencial = criar_agente(pasta / "sequencial", df=df)
+    carga_dados.CSV_WORKERS = 4
+    paralelo = criar_agente(pasta / "paralelo", df=df)
+
+    pd.testing.assert_frame_equal(paralelo.df, sequencial.df)
+    verificar(True, f"mesmo DataFrame preparado ({len(paralelo.df)} linhas)")
+    respostas, esperadas = responder_consultas(paralelo), responder_consultas(sequencial)
+    diferentes = [c for c in esperadas if respostas[c] != esperadas[c]]
+    verificar(not diferentes, f"{len(esperadas)} consultas com respostas idênticas" + (f": {diferentes}" if diferentes else ""))
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore", UserWarning)
+    # Qualquer tamanho de arquivo é dividido em trechos
+    carga_dados.CSV_PARALELO_MIN_BYTES = 0
+    with tempfile.TemporaryDirectory() as pasta:
+        pasta = Path(pasta)
+        csv = gerar_csv(pasta)
+        testar_cortes(csv)
+        testar_paralelo(csv)
+        testar_read_csv_puro(csv)
+        testar_arquivos_pequenos(pasta)
+        testar_agente(pasta)
+
+    print("\n✅ Leitura paralela do CSV funcionando!\n")
@@ -0,0 +1,65 @@
+"""
+🧪 TESTE DO MODO MMAP
+Dataset gravado em Arrow IPC e mapeado em memória: mesmos valores do
+DataFrame original e mesmas respostas do agente com dados em memória privada
+"""
+
+import tempfile
+import warnings
+from pathlib import Path
+
+import pandas as pd
+
+from carga_dados import ler_snapshot, mapear_dataset, salvar_dataset_mmap
+from dados_teste import criar_agente, responder_consultas, titulo, verificar
+
+
+def testar_arquivo(pasta: Path):
+    titulo("🗺️ Arquivo Arrow IPC")
+
+    agente = criar_agente(pasta / "memoria")
+    df = agente.df
+    arquivo = salvar_dataset_mmap(df, pasta / "dataset.arrow")
+    verificar(arquivo.name.startswith("dataset.") and arquivo.suffix == ".arrow" and arquivo.exists(),
+              f"arquivo versionado pelo conteúdo ({arquivo.name})")
+    verificar(not list(pasta.glob("*.tmp")), "nenhum temporário deixado na pasta")
+
+    mapeado, fonte = mapear_dataset(arquivo)
+    verificar(fonte is not None and len(mapeado) == len(df), "dataset mapeado com todas as linhas")
+    # Categóricas do mmap podem ter outras categorias; os valores precisam ser os mesmos
+    pd.testing.assert_frame_equal(mapeado, df, check_dtype=False, check_categorical=False)
+    verificar(True, "valores mapeados iguais aos do DataFrame original")
+
+    verificar(salvar_dataset_mmap(df, pasta / "dataset.arrow") == arquivo, "mesmo conteúdo grava o mesmo arquivo")
+    outro = salvar_dataset_mmap(df.iloc[:100], pasta / "dataset.arrow")
+    verificar(outro != arquivo and arquivo.exists(), "conteúdo diferente não sobrescreve o arquivo publicado")
+
+
+def testar_agente(pasta: Path):
+    titulo("🤖 Agente: mmap × memória privada")
+
+    memoria = criar_agente(pasta / "agente")
+    mmap = criar_agente(pasta / "agente", DATASET_MMAP="true")
+
+    verificar(memoria.estatisticas_memoria()["modo_carga"] == "memoria", "agente padrão em memória privada")
+    estatisticas = mmap.estatisticas_memoria()
+    verificar(estatisticas["modo_carga"] == "mmap" and mmap.estado.arquivo_mmap, "agente com DATASET_MMAP=true usa o arquivo mapeado")
+    verificar(Path(mmap.estado.arquivo_mmap).parent == pasta / "agente", "arquivo gravado em DATASET_MMAP_PATH")
+
+    respostas_memoria = responder_consultas(memoria)
+    respostas_mmap = responder_consultas(mmap)
+    diferentes = [consulta for consulta in respostas_memoria if respostas_memoria[consulta] != respostas_mmap[consulta]]
+    verificar(not diferentes, f"{len(respostas_memoria)} consultas com respostas idênticas" + (f": {diferentes}" if diferentes else ""))
+
+    snapshot = ler_snapshot(pasta / "agente" / "dados_anonimizados_decupado_teste.parquet")
+    verificar(abs(mmap.df["duracao_horas"].sum() - snapshot["duracao_horas"].sum()) < 1e-6, "total de horas igual ao do snapshot")
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore", UserWarning)
+    with tempfile.TemporaryDirectory() as pasta:
+        pasta = Path(pasta)
+        testar_arquivo(pasta)
+        testar_agente(pasta)
+
+    print("\n✅ Modo mmap funcionando!\n")
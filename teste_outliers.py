@@ -0,0 +1,147 @@
+"""
+🧪 TESTE DOS OUTLIERS
+Escores robustos (mediana/MAD por recurso e por contrato) comparados com um
+cálculo ingênuo por groupby, e apontamentos fora do padrão do agente iguais
+aos escolhidos por esse cálculo, com linhas extremas inseridas nos dados
+"""
+
+import tempfile
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from dados_teste import criar_agente, gerar_apontamentos, titulo, verificar
+from indices_apontamentos import FATOR_MAD, LIMITE_OUTLIER, MINIMO_GRUPO_OUTLIERS, EstatisticasOutliers, escores_robustos
+
+
+def escores_ingenuos(grupos, valores: np.ndarray) -> np.ndarray:
+    """Escore de cada linha calculado grupo a grupo, sem vetorização"""
+    valores = pd.Series(valores, dtype="float64")
+    # Sem coluna de grupo, todas as linhas formam um único grupo
+    grupos = pd.Series(["todos"] * len(valores) if grupos is None else np.asarray(grupos, dtype=object))
+    tamanhos = grupos.value_counts(dropna=True)
+    proprio = grupos.map(lambda g: pd.notna(g) and tamanhos.get(g, 0) >= MINIMO_GRUPO_OUTLIERS).astype(bool)
+
+    def escala(desvios: pd.Series) -> float:
+        mad = FATOR_MAD * desvios.median()
+        return mad if mad > 0 else desvios.mean() * 1.2533
+
+    geral = valores.median()
+    resto = valores[~proprio]
+    escala_geral = FATOR_MAD * (valores - geral).abs().median()
+    if not escala_geral > 0:
+        escala_geral = (resto - geral).abs().mean() * 1.2533
+
+    parametros = {}
+    for grupo, linhas in valores[proprio].groupby(grupos[proprio]):
+        mediana = linhas.median()
+        parametros[grupo] = (mediana, escala((linhas - mediana).abs()))
+
+    escores = np.zeros(len(valores))
+    for i, (grupo, valor) in enumerate(zip(grupos, valores)):
+        mediana, divisor = parametros[grupo] if proprio.iloc[i] else (geral, escala_geral)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            escore = (valor - mediana) / divisor
+        escores[i] = escore if np.isfinite(escore) else 0.0
+    return escores
+
+
+def com_extremos(bruto: pd.DataFrame) -> pd.DataFrame:
+    """Dados sintéticos com jornadas fora do padrão e padrões incomuns mas consistentes"""
+    modelo = bruto.iloc[0]
+    linhas = []
+
+    def linha(recurso, contrato, data, inicio, fim, sufixo):
+        linhas.append({**modelo.to_dict(), "s_id_apontamento": f"OUT{len(linhas)}{sufixo}", "s_nm_recurso": recurso,
+                       "s_nr_contrato": contrato, "d_dt_data": data, "f_hr_hora_inicio": inicio, "f_hr_hora_fim": fim})
+
+    # Sempre 8h num contrato próprio, com um dia de 14h e outro de 0,5h
+    for dia in range(1, 31):
+        linha("Regular Oito", "E0990909", f"2025-09-{dia:02d}", 8.0, 16.0, "R")
+    linha("Regular Oito", "E0990909", "2025-10-07", 8.0, 22.0, "R")
+    linha("Regular Oito", "E0990909", "2025-10-08", 8.0, 8.5, "R")
+    # Plantão de 12h todo dia: incomum no geral, normal para o recurso
+    for dia in range(1, 25):
+        linha("Plantonista Fixo", "E0440404", f"2025-10-{dia:02d}", 7.0, 19.0, "P")
+    # Poucas linhas: comparado com a distribuição geral
+    linha("Recurso Novo", None, "2025-11-03", 0.0, 23.5, "N")
+    linha("Recurso Novo", None, "2025-11-04", 8.0, 12.0, "N")
+    return pd.concat([bruto, pd.DataFrame(linhas)], ignore_index=True)
+
+
+def testar_escores(df: pd.DataFrame):
+    titulo("📏 Escores robustos × groupby ingênuo")
+
+    horas = df["duracao_horas"].to_numpy(dtype=np.float64)
+    for rotulo, grupos in (("recurso", df["s_nm_recurso"]), ("contrato", df["s_nr_contrato"]), ("geral", None)):
+        escores, _, _ = escores_robustos(grupos, horas)
+        esperados = escores_ingenuos(grupos, horas)
+        verificar(np.allclose(escores, esperados, rtol=1e-5, atol=1e-4), f"por {rotulo}: {len(escores)} escores iguais")
+
+    com_nulos = horas.copy()
+    com_nulos[::50] = np.nan
+    escores, _, _ = escores_robustos(df["s_nm_recurso"], com_nulos)
+    verificar(np.allclose(escores, escores_ingenuos(df["s_nm_recurso"], com_nulos), rtol=1e-5, atol=1e-4)
+              and (escores[::50] == 0).all(), "horas nulas ficam com escore 0 e não mudam as medianas")
+
+    estatisticas = EstatisticasOutliers(df)
+    recurso = escores_ingenuos(df["s_nm_recurso"], horas)
+    contrato = escores_ingenuos(df["s_nr_contrato"], horas)
+    final = np.where(np.abs(recurso) <= np.abs(contrato), recurso, contrato)
+    verificar(np.allclose(estatisticas.escore, final, rtol=1e-5, atol=1e-4), "escore final é o de menor magnitude")
+
+    medianas = df.groupby("s_nm_recurso", observed=True)["duracao_horas"].agg(["median", "size"])
+    esperadas = [medianas.loc[r, "median"] if medianas.loc[r, "size"] >= MINIMO_GRUPO_OUTLIERS else np.median(horas)
+                 for r in df["s_nm_recurso"]]
+    verificar(np.allclose([estatisticas.mediana_do_recurso(i) for i in range(len(df))], esperadas),
+              "mediana do recurso (ou geral para recursos com poucas linhas)")
+    return final
+
+
+def testar_maiores(df: pd.DataFrame, final: np.ndarray):
+    titulo("🔝 Maiores anomalias por período")
+
+    estatisticas = EstatisticasOutliers(df)
+    magnitudes = np.abs(final)
+    datas = df["data"].to_numpy()
+    for inicio, fim, top_n in (("2025-08-01", "2025-12-01", 2), ("2025-10-01", "2025-11-01", 3), ("2025-11-01", "2025-12-01", 1000)):
+        a, b = np.searchsorted(datas, np.datetime64(inicio)), np.searchsorted(datas, np.datetime64(fim))
+        posicoes = estatisticas.maiores(a, b, top_n)
+        candidatos = [i for i in range(a, b) if magnitudes[i] > LIMITE_OUTLIER]
+        esperadas = sorted((magnitudes[i] for i in candidatos), reverse=True)[:top_n]
+        verificar(np.allclose(np.abs(estatisticas.escore[posicoes]), esperadas, atol=1e-4) and set(posicoes) <= set(candidatos),
+                  f"{inicio[:7]} a {fim[:7]}: {len(posicoes)} de {len(candidatos)} anomalias, em ordem de escore")
+        if top_n >= len(candidatos):
+            verificar(set(posicoes) == set(candidatos), "com top_n folgado, todas as anomalias do período")
+
+
+def testar_agente(agente, final: np.ndarray):
+    titulo("🤖 identificar_outliers com linhas extremas")
+
+    resultado = agente.identificar_outliers(top_n=1000)
+    dados = resultado["dados"]
+    verificar(len(dados) == int((np.abs(final) > LIMITE_OUTLIER).sum()), f"{len(dados)} apontamentos fora do padrão")
+
+    recursos = {item["s_nm_recurso"] for item in dados}
+    regular = sorted(item["duracao_horas"] for item in dados if item["s_nm_recurso"] == "Regular Oito")
+    verificar(regular == [0.5, 14.0], "jornada de 14h e de 0,5h de quem sempre faz 8h são anomalias")
+    verificar("Plantonista Fixo" not in recursos, "plantão de 12h recorrente não é anomalia")
+    verificar(any(item["s_nm_recurso"] == "Recurso Novo" and item["duracao_horas"] == 23.5 for item in dados),
+              "recurso com poucas linhas é comparado com a distribuição geral")
+
+    primeiro = agente.identificar_outliers(top_n=1)["dados"][0]
+    verificar(abs(primeiro["z_score"]) == max(abs(item["z_score"]) for item in dados), "top 1 é a maior anomalia")
+    vazio = agente.identificar_outliers("01/08/2025", "01/08/2025", 5)
+    verificar(vazio["tipo"] in ("info", "outliers"), "período de um dia responde sem erro")
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore", UserWarning)
+    with tempfile.TemporaryDirectory() as pasta:
+        agente = criar_agente(pasta, df=com_extremos(gerar_apontamentos()))
+        final = testar_escores(agente.df)
+        testar_maiores(agente.df, final)
+        testar_agente(agente, final)
+
+    print("\n✅ Outliers funcionando!\n")
@@ -0,0 +1,97 @@
+"""
+🧪 TESTE DO PROCESSAMENTO ASSÍNCRONO
+Respostas de processar_mensagem_async iguais às da versão síncrona e event
+loop livre enquanto o trabalho síncrono (pandas) roda no pool de threads
+"""
+
+import asyncio
+import tempfile
+import time
+import warnings
+
+from dados_teste import criar_agente, titulo, verificar
+
+MENSAGENS = [
+    ("ranking", "João Silva"),
+    ("total de horas", None),
+    ("total de horas", "Maria Souza"),
+    ("qual a média de horas?", None),
+    ("tem algum outlier?", None),
+    ("quais contratos temos?", None),
+    ("resumo da semana", "Ana Paula"),
+    ("listar atividades", None),
+]
+
+
+async def contar_batidas(parar: asyncio.Event, intervalo: float = 0.005) -> int:
+    """Quantas vezes o event loop conseguiu rodar outra tarefa até parar"""
+    batidas = 0
+    while not parar.is_set():
+        await asyncio.sleep(intervalo)
+        batidas += 1
+    return batidas
+
+
+async def batidas_durante(trabalho) -> tuple:
+    """Roda o trabalho (corrotina) com um contador de batidas do loop em paralelo"""
+    parar = asyncio.Event()
+    contador = asyncio.create_task(contar_batidas(parar))
+    await asyncio.sleep(0)
+    resultado = await trabalho
+    parar.set()
+    return resultado, await contador
+
+
+def testar_respostas(conversa):
+    titulo("💬 Assíncrono × síncrono")
+
+    # Sem cliente OpenAI configurado as duas versões respondem pelo fallback do agente
+    sincronas = [conversa.processar_mensagem(mensagem, usuario or "Anônimo") for mensagem, usuario in MENSAGENS]
+
+    async def todas():
+        return await asyncio.gather(*(
+            conversa.processar_mensagem_async(mensagem, usuario or "Anônimo") for mensagem, usuario in MENSAGENS
+        ))
+
+    assincronas = asyncio.run(todas())
+    diferentes = [MENSAGENS[i] for i, (a, b) in enumerate(zip(sincronas, assincronas)) if a != b]
+    verificar(not diferentes, f"{len(MENSAGENS)} mensagens concorrentes com a mesma resposta" + (f": {diferentes}" if diferentes else ""))
+
+
+def testar_loop_livre():
+    titulo("⏱️ Event loop livre durante trabalho síncrono")
+
+    from bot.ai_conversation import EXECUTOR_FERRAMENTAS, executar_em_thread
+
+    def trabalho_bloqueante():
+        time.sleep(0.2)
+        return "ok"
+
+    async def no_loop():
+        return trabalho_bloqueante()
+
+    _, batidas = asyncio.run(batidas_durante(no_loop()))
+    verificar(batidas <= 1, f"executado direto no loop: {batidas} batida(s) em 200ms")
+
+    resultado, batidas = asyncio.run(batidas_durante(executar_em_thread(trabalho_bloqueante)))
+    verificar(resultado == "ok" and batidas >= 10, f"executado no pool: {batidas} batidas em 200ms")
+
+    async def varios():
+        inicio = time.perf_counter()
+        await asyncio.gather(*(executar_em_thread(trabalho_bloqueante) for _ in range(EXECUTOR_FERRAMENTAS._max_workers)))
+        return time.perf_counter() - inicio
+
+    duracao = asyncio.run(varios())
+    verificar(duracao < 0.2 * EXECUTOR_FERRAMENTAS._max_workers * 0.75,
+              f"{EXECUTOR_FERRAMENTAS._max_workers} trabalhos em paralelo no pool ({duracao*1000:.0f}ms)")
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore", UserWarning)
+    with tempfile.TemporaryDirectory() as pasta:
+        agente = criar_agente(pasta)
+        from bot.ai_conversation import ConversacaoIA
+        testar_respostas(ConversacaoIA(agente))
+    testar_loop_livre()
+
+    print("\n✅ Processamento assíncrono funcionando!\n")
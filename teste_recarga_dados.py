@@ -0,0 +1,216 @@
+"""
+🧪 TESTE DA RECARGA DOS DADOS EM BACKGROUND
+Recarregador aplicando delta e recarga completa comparado com agentes
+carregados do zero, fonte fora do ar sem recarga falsa, segundo worker
+mapeando o dataset mmap publicado e consultas presas a um único estado
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import warnings
+from pathlib import Path
+
+import pandas as pd
+
+import bot.recarga_dados as recarga
+from agente_apontamentos import estado_consistente
+from bot.recarga_dados import RecarregadorDados
+from carga_dados import publicar_snapshot
+from dados_teste import criar_agente, gerar_apontamentos, gravar_csv, responder_consultas, servidor_http, titulo, verificar
+
+CORTE = "2025-11-15"
+VARIAVEIS_DELTA = ("DELTA_PATH", "DELTA_URL", "BLOB_DELTA_NAME")
+
+
+def comparar_respostas(agente, referencia, rotulo: str):
+    """Respostas das consultas padrão iguais às de um agente carregado do zero"""
+    respostas, esperadas = responder_consultas(agente), responder_consultas(referencia)
+    diferentes = [c for c in esperadas if respostas[c] != esperadas[c]]
+    verificar(not diferentes, f"{rotulo}: {len(esperadas)} consultas iguais às do carregamento completo" + (f": {diferentes}" if diferentes else ""))
+
+
+def republicar(pasta: Path, df: pd.DataFrame):
+    """Extrato novo no mesmo caminho do snapshot em uso (o que o pipeline faz a cada execução)"""
+    publicar_snapshot(gravar_csv(df, pasta / "dados_anonimizados_decupado_teste.csv"))
+
+
+def sem_delta():
+    """Remove as fontes de delta do ambiente"""
+    for variavel in VARIAVEIS_DELTA:
+        os.environ.pop(variavel, None)
+
+
+async def testar_sem_mudanca(recarregador):
+    titulo("💤 Fontes sem mudança")
+
+    versao = recarregador.agente.versao_dados
+    primeira = await recarregador.verificar()
+    segunda = await recarregador.verificar()
+    verificar(primeira["acao"] == "nenhuma" and segunda["acao"] == "nenhuma", "primeira verificação só guarda as assinaturas")
+    verificar(recarregador.agente.versao_dados == versao and recarregador.recargas == 0, f"versão {versao} mantida, nenhuma recarga")
+
+
+async def testar_delta(pasta: Path, recarregador, novos: pd.DataFrame, referencia):
+    titulo("➕ Delta local detectado")
+
+    agente = recarregador.agente
+    versao = agente.versao_dados
+    os.environ["DELTA_PATH"] = str(gravar_csv(novos, pasta / "delta.csv"))
+    resultado = await recarregador.verificar()
+    verificar(resultado["acao"] == "delta" and resultado["versao_dados"] == versao + 1 and resultado["registros"] == len(referencia.df),
+              f"delta aplicado: {resultado['registros']} registros (versão {resultado['versao_dados']})")
+    comparar_respostas(agente, referencia, "após o delta")
+
+    resultado = await recarregador.verificar()
+    verificar(resultado["acao"] == "nenhuma" and agente.versao_dados == versao + 1, "delta inalterado não é reaplicado")
+
+
+async def testar_recarga_completa(pasta: Path, recarregador, completo: pd.DataFrame, referencia):
+    titulo("🔄 Recarga completa com consultas em andamento")
+
+    agente = recarregador.agente
+    versao, antes = agente.versao_dados, agente.total_horas_geral()
+    republicar(pasta, completo)
+
+    # Consultas continuam respondendo durante a carga do agente novo, sempre com um estado inteiro
+    tarefa = asyncio.create_task(recarregador.verificar())
+    respostas = []
+    while not tarefa.done():
+        respostas.append(await asyncio.to_thread(agente.total_horas_geral))
+        await asyncio.sleep(0.005)
+    resultado = tarefa.result()
+    depois = agente.total_horas_geral()
+
+    verificar(resultado["acao"] == "recarga_completa" and resultado["versao_dados"] > versao and recarregador.recargas == 1,
+              f"snapshot novo recarregado (versão {versao} → {resultado['versao_dados']})")
+    verificar(respostas and all(r in (antes, depois) for r in respostas),
+              f"{len(respostas)} consultas durante a recarga com o estado antigo ou o novo")
+    comparar_respostas(agente, referencia, "após a recarga")
+
+    resultado = await recarregador.verificar()
+    verificar(resultado["acao"] == "nenhuma" and resultado["versao_dados"] == agente.versao_dados, "nada a fazer na verificação seguinte")
+
+
+async def testar_fonte_indisponivel(pasta: Path, recarregador, extras: pd.DataFrame):
+    titulo("📡 Delta por URL com a fonte fora do ar")
+
+    agente = recarregador.agente
+    servidor = pasta / "servidor"
+    servidor.mkdir()
+    delta = gravar_csv(extras, servidor / "delta.csv")
+    sem_delta()
+    with servidor_http(servidor) as url:
+        os.environ["DELTA_URL"] = f"{url}/delta.csv"
+        resultado = await recarregador.verificar()
+        versao = agente.versao_dados
+        verificar(resultado["acao"] == "delta" and resultado["registros"] == len(agente.df), f"delta da URL aplicado (versão {versao})")
+        assinatura = recarregador.assinaturas()["delta_url"]
+
+        delta.rename(servidor / "delta.bak")
+        resultado = await recarregador.verificar()
+        verificar(recarregador.assinaturas().get("delta_url") == assinatura, "URL sem resposta mantém a assinatura anterior")
+        verificar(resultado["acao"] == "nenhuma" and recarregador.ultimo_erro is None and agente.versao_dados == versao,
+                  "falha passageira não dispara recarga nem erro")
+
+        (servidor / "delta.bak").rename(delta)
+        resultado = await recarregador.verificar()
+        verificar(resultado["acao"] == "nenhuma" and agente.versao_dados == versao, "fonte de volta com o mesmo conteúdo não recarrega")
+    sem_delta()
+
+
+async def testar_mmap(pasta: Path, base: pd.DataFrame, bruto: pd.DataFrame, referencia):
+    titulo("🔗 Dois workers no modo mmap")
+
+    sem_delta()
+    primeiro = criar_agente(pasta, df=base, DATASET_MMAP="true")
+    with contextlib.redirect_stdout(io.StringIO()):
+        segundo = type(primeiro)()
+    workers = [RecarregadorDados(primeiro, 0), RecarregadorDados(segundo, 0)]
+    for worker in workers:
+        await worker.verificar()
+
+    republicar(pasta, bruto)
+    resultado = await workers[0].verificar()
+    publicado = primeiro.estado.arquivo_mmap
+    registro = recarga._ler_publicacao(Path(f"{primeiro.arquivo_mmap}.publicado.json"))
+    verificar(resultado["acao"] == "recarga_completa" and registro.get("arquivo") == publicado,
+              f"primeiro worker recarrega e registra {Path(publicado).name}")
+
+    saida = io.StringIO()
+    with contextlib.redirect_stdout(saida):
+        resultado = await workers[1].verificar()
+    verificar(resultado["acao"] == "recarga_completa" and segundo.estado.arquivo_mmap == publicado,
+              "segundo worker adota o mesmo arquivo publicado")
+    verificar("Dataset publicado mapeado" in saida.getvalue() and "Carregando snapshot" not in saida.getvalue(),
+              "segundo worker só mapeia, sem reler as fontes")
+    comparar_respostas(segundo, referencia, "worker que mapeou")
+    verificar(responder_consultas(primeiro) == responder_consultas(segundo), "os dois workers respondem igual")
+
+
+def testar_estado_fixado(agente, delta: pd.DataFrame):
+    titulo("📌 Consulta presa ao estado do início")
+
+    iniciou, trocou = threading.Event(), threading.Event()
+    vistos = []
+
+    @estado_consistente
+    def consulta_lenta(self):
+        vistos.append((self.versao_dados, self.df, self.cubo))
+        iniciou.set()
+        trocou.wait(10)
+        vistos.append((self.versao_dados, self.df, self.cubo))
+        return self.total_horas_geral()
+
+    antes = agente.total_horas_geral()
+    resposta = []
+    thread = threading.Thread(target=lambda: resposta.append(consulta_lenta(agente)))
+    thread.start()
+    iniciou.wait(10)
+    versao = agente.versao_dados
+    resultado = agente.atualizar_incremental(delta)
+    trocou.set()
+    thread.join()
+
+    verificar(resultado["versao_dados"] == versao + 1 and agente.versao_dados == versao + 1, "delta publicado no meio da consulta")
+    (versao_inicio, df_inicio, cubo_inicio), (versao_fim, df_fim, cubo_fim) = vistos
+    verificar(versao_inicio == versao_fim == versao and df_inicio is df_fim and cubo_inicio is cubo_fim,
+              "versão, linhas e cubo iguais do início ao fim da consulta")
+    verificar(resposta == [antes] and agente.total_horas_geral() != antes, "consulta em andamento responde com o estado antigo")
+
+
+async def executar(pasta: Path):
+    bruto = gerar_apontamentos()
+    base, novos = bruto[bruto["d_dt_data"] < CORTE], bruto[bruto["d_dt_data"] >= CORTE]
+    extras = gerar_apontamentos(linhas=300, inicio="2025-12-01", fim="2025-12-10", semente=7, prefixo_id="EXT")
+    completo = pd.concat([bruto, extras], ignore_index=True)
+
+    # Referências antes do agente testado: criar_agente reaponta SNAPSHOT_PATH
+    sem_delta()
+    referencia = criar_agente(pasta / "referencia", df=bruto)
+    referencia_completa = criar_agente(pasta / "referencia_completa", df=completo)
+
+    agente = criar_agente(pasta / "recarga", df=base)
+    recarga.RESULTADOS_DIR = pasta / "recarga"
+    recarregador = RecarregadorDados(agente, 0)
+
+    await testar_sem_mudanca(recarregador)
+    await testar_delta(pasta, recarregador, novos, referencia)
+    await testar_recarga_completa(pasta / "recarga", recarregador, completo, referencia_completa)
+    await testar_fonte_indisponivel(pasta, recarregador,
+                                    gerar_apontamentos(linhas=200, inicio="2025-12-15", fim="2025-12-19", semente=8, prefixo_id="URL"))
+    testar_estado_fixado(agente, gerar_apontamentos(linhas=100, inicio="2025-12-22", fim="2025-12-23", semente=9, prefixo_id="FIX"))
+
+    recarga.RESULTADOS_DIR = pasta / "mmap"
+    await testar_mmap(pasta / "mmap", base, bruto, referencia)
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore", UserWarning)
+    with tempfile.TemporaryDirectory() as pasta:
+        asyncio.run(executar(Path(pasta)))
+
+    print("\n✅ Recarga dos dados funcionando!\n")
@@ -0,0 +1,93 @@
+"""
+🧪 TESTE DO RECORTE DE PERÍODO
+Linhas ordenadas por data + busca binária comparadas com o filtro booleano,
+inclusive com datas nulas e limites fora dos dados
+"""
+
+import tempfile
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from carga_dados import ordenar_por_data
+from dados_teste import criar_agente, gerar_apontamentos, titulo, verificar
+from indices_apontamentos import recortar_periodo
+
+
+def mascara_periodo(datas: pd.Series, inicio=None, fim=None, fim_exclusivo=False) -> np.ndarray:
+    """Filtro de referência (NaT nunca entra quando há limite)"""
+    mascara = np.ones(len(datas), dtype=bool)
+    if inicio is not None:
+        mascara &= (datas >= inicio).to_numpy()
+    if fim is not None:
+        mascara &= ((datas < fim) if fim_exclusivo else (datas <= fim)).to_numpy()
+    return mascara
+
+
+def periodos_aleatorios(quantidade: int = 300, semente: int = 3):
+    """Períodos com limites dentro, antes e depois dos dados (alguns abertos)"""
+    rng = np.random.default_rng(semente)
+    dias = pd.date_range("2025-07-01", "2026-01-31", freq="D")
+    for _ in range(quantidade):
+        inicio, fim = sorted(rng.choice(dias, 2))
+        inicio = None if rng.random() < 0.15 else pd.Timestamp(inicio)
+        fim = None if rng.random() < 0.15 else pd.Timestamp(fim)
+        yield inicio, fim, bool(rng.random() < 0.3)
+
+
+def testar_ordenacao():
+    titulo("📅 Ordenação por data")
+
+    df = gerar_apontamentos(linhas=2000)
+    df["data"] = pd.to_datetime(df["d_dt_data"])
+    df.loc[df.sample(50, random_state=1).index, "data"] = pd.NaT
+    ordenado = ordenar_por_data(df)
+
+    datas = ordenado["data"]
+    validas = int(datas.notna().sum())
+    verificar(datas.iloc[:validas].is_monotonic_increasing and datas.iloc[validas:].isna().all(), "datas crescentes e nulas no fim")
+    verificar(sorted(ordenado["s_id_apontamento"]) == sorted(df["s_id_apontamento"]), "nenhuma linha perdida ou repetida")
+    return ordenado
+
+
+def testar_recortes(df: pd.DataFrame):
+    titulo("✂️ Busca binária × filtro booleano")
+
+    datas = df["data"].to_numpy(dtype="datetime64[ns]")
+    divergentes = []
+    for inicio, fim, fim_exclusivo in periodos_aleatorios():
+        a, b = recortar_periodo(datas, inicio, fim, fim_exclusivo)
+        esperado = np.flatnonzero(mascara_periodo(df["data"], inicio, fim, fim_exclusivo))
+        if not np.array_equal(np.arange(a, b), esperado):
+            divergentes.append((inicio, fim, fim_exclusivo))
+    verificar(not divergentes, "300 períodos iguais ao filtro" + (f": {divergentes[:3]}" if divergentes else ""))
+
+    verificar(recortar_periodo(datas) == (0, len(datas)), "sem limites: todas as linhas (inclusive datas nulas)")
+    a, b = recortar_periodo(datas, pd.Timestamp("2030-01-01"), pd.Timestamp("2030-12-31"))
+    verificar(a == b, "período depois dos dados é vazio")
+    a, b = recortar_periodo(datas, pd.Timestamp("2025-10-10"), pd.Timestamp("2025-10-01"))
+    verificar(a == b, "fim antes do início é vazio")
+
+
+def testar_agente(pasta: str):
+    titulo("🤖 _filtrar_periodo do agente")
+
+    agente = criar_agente(pasta)
+    df = agente.df
+    verificar(df["data"].dropna().is_monotonic_increasing, "dataset do agente ordenado por data")
+
+    for inicio, fim, fim_exclusivo in list(periodos_aleatorios(40, semente=11)):
+        esperado = df[mascara_periodo(df["data"], inicio, fim, fim_exclusivo)]
+        pd.testing.assert_frame_equal(agente._filtrar_periodo(inicio, fim, fim_exclusivo), esperado)
+    verificar(True, "mesmas linhas e ordem do filtro booleano em 40 períodos")
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore", UserWarning)
+    ordenado = testar_ordenacao()
+    testar_recortes(ordenado)
+    with tempfile.TemporaryDirectory() as pasta:
+        testar_agente(pasta)
+
+    print("\n✅ Recorte de período funcionando!\n")
@@ -0,0 +1,116 @@
+"""
+🧪 TESTE DO RESOLVEDOR DE NOMES DE RECURSO
+Nome exato, sem acento, ambíguo e ausente (só parecido): nenhuma consulta
+por usuário pode mostrar os apontamentos de outra pessoa; candidatos do
+índice de trigramas iguais aos de uma varredura de todos os nomes
+"""
+
+import random
+import tempfile
+
+from dados_teste import criar_agente, titulo, verificar
+from indices_apontamentos import SEMELHANCA_MINIMA, normalizar_nome, trigramas
+
+
+def candidatos_ingenuos(nomes, termo: str):
+    """[(nome, pontuação, apontamentos)] comparando o termo com cada nome, sem índice"""
+    chave = normalizar_nome(termo)
+    if not chave:
+        return []
+    chaves = {}
+    for nome, apontamentos in nomes.items():
+        chaves.setdefault(normalizar_nome(nome), []).append((nome, apontamentos))
+
+    pontos = {}
+    if chave in chaves:
+        pontos = {chave: 1.0}
+    if not pontos:
+        pontos = {c: 0.9 for c in chaves if c.startswith(chave)}
+    if not pontos:
+        for c in chaves:
+            posicao = c.find(chave)
+            if posicao >= 0:
+                pontos[c] = 0.8 if posicao == 0 or c[posicao - 1] == " " else 0.7
+    if not pontos:
+        grams = trigramas(chave) if len(chave) >= 3 else set()
+        for c in chaves:
+            semelhanca = 2 * len(grams & trigramas(c)) / (len(grams) + len(trigramas(c)))
+            if grams & trigramas(c) and semelhanca >= SEMELHANCA_MINIMA:
+                pontos[c] = round(0.6 * semelhanca, 4)
+
+    ranking = [(nome, p, apontamentos) for c, p in pontos.items() for nome, apontamentos in chaves[c]]
+    return sorted(ranking, key=lambda item: (-item[1], -item[2], item[0]))
+
+
+def testar_candidatos(agente):
+    titulo("🔤 Índice de trigramas × varredura dos nomes")
+
+    nomes = agente.df["s_nm_recurso"].value_counts().to_dict()
+    nomes = {str(nome): int(quantidade) for nome, quantidade in nomes.items() if quantidade}
+    rng = random.Random(7)
+    termos = ["João Silva", "joao", "JOÃO PAULO", "souza", "ana", "a", "ria", "oao s", "Joao Slva", "Silva Joao",
+              "Mraia Souza", "recurso_1", "Zacarias", "  ", "jo"]
+    for nome in nomes:
+        inicio = rng.randrange(len(nome))
+        termos.append(nome[inicio:inicio + rng.randint(2, 8)])
+        posicao = rng.randrange(len(nome))
+        termos.append(nome[:posicao] + nome[posicao + 1:])
+
+    indice = agente.indice_recursos
+    diferentes = [termo for termo in termos if indice.candidatos(termo) != candidatos_ingenuos(nomes, termo)]
+    verificar(not diferentes, f"{len(termos)} termos (trechos e erros de digitação) com os mesmos candidatos e pontuações"
+              + (f": {diferentes[:5]}" if diferentes else ""))
+
+
+def testar_resolucao(agente):
+    titulo("🔎 Resolução de nomes")
+
+    resolucao = agente.resolver_recurso("João Silva")
+    verificar(resolucao["nome"] == "João Silva" and not resolucao["ambiguo"], "nome exato")
+
+    resolucao = agente.resolver_recurso("joao silva")
+    verificar(resolucao["nome"] is not None and resolucao["candidatos"][0]["nome"] == "João Silva", "sem acento e sem caixa")
+
+    resolucao = agente.resolver_recurso("JOÃO PAULO")
+    verificar(resolucao["nome"] == "João Paulo Souza", "prefixo único")
+
+    resolucao = agente.resolver_recurso("joão")
+    nomes = {c["nome"] for c in resolucao["candidatos"]}
+    verificar(resolucao["ambiguo"] and resolucao["nome"] is None, "prefixo de várias pessoas é ambíguo")
+    verificar({"João Silva", "Joao Santos", "João Paulo Souza"} <= nomes, "candidatos da desambiguação")
+
+    for ausente in ("Pedro Souza", "João Pedro Souza", "Marcos Oliveira", "Joao Slva"):
+        resolucao = agente.resolver_recurso(ausente)
+        verificar(resolucao["nome"] is None and not resolucao["ambiguo"], f"'{ausente}' não é resolvido para outra pessoa")
+        verificar(len(agente._filtrar_recurso(ausente)) == 0, f"'{ausente}' não traz linhas de outra pessoa")
+
+    verificar(agente.resolver_recurso("Joao Slva")["sugestoes"], "nome parecido vira sugestão")
+    verificar(agente.resolver_recurso("Zacarias")["candidatos"] == [], "nome sem semelhança: sem candidatos")
+
+
+def testar_consultas(agente):
+    titulo("👤 Consultas por usuário")
+
+    resultado = agente.contratos_por_recurso("joao silva")
+    verificar("**Recurso:** João Silva" in resultado["resposta"], "consulta com nome sem acento usa o nome completo")
+
+    for consulta in (agente.apontamentos_hoje, agente.resumo_semanal, agente.total_horas_usuario):
+        resultado = consulta("Pedro Souza")
+        verificar("não encontrado" in resultado["resposta"] and "Ana Souza" not in resultado["resposta"].split("💡")[0],
+                  f"{consulta.__name__}: nome ausente responde 'não encontrado'")
+
+    resultado = agente.resumo_semanal("joão")
+    verificar(resultado["tipo"] == "desambiguacao", "nome ambíguo pede para escolher")
+
+    resultado = agente.contratos_por_recurso("Marcos Oliveira")
+    verificar("Maria Oliveira" not in resultado["resposta"].split("💡")[0], "contratos_por_recurso não usa outro recurso")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as pasta:
+        agente = criar_agente(pasta)
+        testar_resolucao(agente)
+        testar_candidatos(agente)
+        testar_consultas(agente)
+
+    print("\n✅ Resolvedor de nomes funcionando!\n")
@@ -0,0 +1,182 @@
+"""
+🧪 TESTE DO ROTEADOR DE INTENÇÕES
+Corpus de perguntas com a ferramenta e os argumentos esperados (acurácia),
+equivalência do autômato com a busca ingênua por trecho e micro-benchmark
+"""
+
+import random
+import time
+
+from roteador_intencoes import AutomatoPalavras, PALAVRAS_CHAVE, RoteadorIntencoes
+
+
+# (pergunta, usuário, ferramenta esperada, argumentos esperados); ferramenta None = resposta pronta
+CORPUS = [
+    ('qual a média de horas?', None, 'duracao_media_geral', {}),
+    ('qual a minha média?', 'João Silva', 'duracao_media_usuario', {'usuario': 'João Silva'}),
+    ('quanto tempo eu trabalho em média?', 'João Silva', 'duracao_media_geral', {}),
+    ('o que apontei hoje?', 'João Silva', 'apontamentos_hoje', {'usuario': 'João Silva'}),
+    ('o que apontei hoje?', None, None, {}),
+    ('resumo da semana', 'João Silva', 'resumo_semanal', {'usuario': 'João Silva'}),
+    ('resumo da semana', None, 'resumo_semanal_geral', {}),
+    ('ranking', 'João Silva', 'ranking_funcionarios', {}),
+    ('top 10', None, 'ranking_funcionarios', {}),
+    ('quem trabalhou mais?', None, 'ranking_funcionarios', {}),
+    ('tem algum outlier?', None, 'identificar_outliers', {}),
+    ('apontamentos fora do padrão', None, 'identificar_outliers', {}),
+    ('total de horas', 'Ana Paula', 'total_horas_usuario', {'usuario': 'Ana Paula'}),
+    ('total de horas', None, 'total_horas_geral', {}),
+    ('quantas horas no total?', None, 'total_horas_geral', {}),
+    ('comparar períodos', None, 'comparar_periodos', {}),
+    ('comparação mensal', None, 'comparar_periodos', {}),
+    ('contratos', None, 'listar_contratos', {}),
+    ('quais contratos existem de 01/09/2025 a 30/09/2025?', None, 'listar_contratos', {'inicio': '01/09/2025', 'fim': '30/09/2025'}),
+    ('listar contratos 01/09 e 30/09', None, 'listar_contratos', {'inicio': '01/09/2025', 'fim': '30/09/2025'}),
+    ('quais contratos o recurso RECURSO_1796842586 apontou', None, 'contratos_por_recurso', {'recurso': 'recurso_1796842586'}),
+    ('em quais contratos o colaborador joao trabalhou em 01/09/2025 e 30/09/2025?', None, 'contratos_por_recurso', {'recurso': 'joao', 'data_inicio': '01/09/2025', 'data_fim': '30/09/2025'}),
+    ('contratos do recurso RECURSO_123 desde 05/09', None, 'contratos_por_recurso', {'recurso': 'recurso_123', 'data_inicio': '05/09/2025'}),
+    ('quais contratos o fulano apontou?', None, None, {}),
+    ('quem apontou de 01/09/2025 a 30/09/2025', 'João Silva', 'consultar_periodo', {'data_inicio': '01/09/2025', 'data_fim': '30/09/2025', 'usuario': None}),
+    ('minhas horas de 01/09 a 30/09', 'João Silva', 'consultar_periodo', {'data_inicio': '01/09/2025', 'data_fim': '30/09/2025', 'usuario': 'João Silva'}),
+    ('minhas horas de 01/09 a 30/09', 'Usuário Web', 'consultar_periodo', {'data_inicio': '01/09/2025', 'data_fim': '30/09/2025', 'usuario': None}),
+    ('média do período 01-09-25 até 15-09-25', 'João Silva', 'consultar_periodo', {'data_inicio': '01/09/2025', 'data_fim': '15/09/2025', 'usuario': None}),
+    ('minha média de 01/09/2025 a 30/09/2025', 'João Silva', 'consultar_periodo', {'data_inicio': '01/09/2025', 'data_fim': '30/09/2025', 'usuario': 'João Silva'}),
+    ('quantas horas o colaborador joao deveria fazer de 01/09 a 30/09?', None, 'horas_esperadas_colaborador', {'usuario': 'joao', 'data_inicio': '01/09/2025', 'data_fim': '30/09/2025'}),
+    ('maria deveria ter feito quanto de 01/09 a 30/09?', None, 'horas_esperadas_colaborador', {'usuario': 'maria', 'data_inicio': '01/09/2025', 'data_fim': '30/09/2025'}),
+    ('horas esperadas de 01/09 a 30/09', 'Ana Paula', 'horas_esperadas_colaborador', {'usuario': 'Ana Paula', 'data_inicio': '01/09/2025', 'data_fim': '30/09/2025'}),
+    ('horas esperadas de 01/09 a 30/09', None, None, {}),
+    ('contratos de 01/09/2025 a 30/09/2025', None, 'listar_contratos', {'inicio': '01/09/2025', 'fim': '30/09/2025'}),
+    ('o recurso RECURSO_555 esqueceu a saída?', None, 'verificar_saidas_esquecidas', {'usuario': 'recurso_555'}),
+    ('esqueci de bater saida em 03/09/2025', 'Ana Paula', 'verificar_saidas_esquecidas', {'usuario': 'Ana Paula', 'data_inicio': '03/09/2025'}),
+    ('faltou horário de saída do colaborador pedro entre 01/09 e 10/09', None, 'verificar_saidas_esquecidas', {'usuario': 'pedro', 'data_inicio': '01/09/2025', 'data_fim': '10/09/2025'}),
+    ('quem esqueceu a saída?', None, None, {}),
+    ('qual o clima hoje?', None, None, {}),
+    ('previsão do tempo', None, 'fora_do_escopo', {}),
+    ('ajuda', None, 'fora_do_escopo', {}),
+    ('oi tudo bem?', None, 'ajuda', {}),
+    ('help me', 'user', 'fora_do_escopo', {}),
+    ('qual a média de horas?', 'test user', 'duracao_media_geral', {}),
+    ('o que eu fiz hoje?', 'bot', None, {}),
+    ('ranking de 01/09/2025 a 30/09/2025', None, 'consultar_periodo', {'data_inicio': '01/09/2025', 'data_fim': '30/09/2025', 'usuario': None}),
+    ('saída esquecida', 'Usuário Web', None, {}),
+    ('o que apontei hoje?', 'Usuário Web', 'apontamentos_hoje', {'usuario': 'Usuário Web'}),
+    ('quais recursos do contrato E0220303?', None, 'recursos_por_contrato', {'contrato': 'E0220303'}),
+    ('contrato 7873', None, 'recursos_por_contrato', {'contrato': '7873'}),
+]
+
+
+def verificar(condicao: bool, descricao: str):
+    print(f"   {'✅' if condicao else '❌'} {descricao}")
+    if not condicao:
+        raise AssertionError(descricao)
+
+
+def grupos_ingenuo(texto: str):
+    """Referência: um `in` por palavra-chave, como no roteamento antigo"""
+    return frozenset(grupo for grupo, palavras in PALAVRAS_CHAVE.items() if any(p in texto for p in palavras))
+
+
+def testar_automato():
+    print(f"\n{'='*60}")
+    print("🔤 Autômato de palavras-chave")
+    print(f"{'='*60}")
+
+    automato = AutomatoPalavras(PALAVRAS_CHAVE)
+    palavras = [p for lista in PALAVRAS_CHAVE.values() for p in lista]
+    alfabeto = sorted(set(''.join(palavras))) + list('xyz0/')
+
+    aleatorio = random.Random(42)
+    divergencias = 0
+    for _ in range(5000):
+        texto = ''.join(aleatorio.choice(alfabeto) for _ in range(aleatorio.randint(0, 60)))
+        if aleatorio.random() < 0.5:
+            posicao = aleatorio.randint(0, len(texto))
+            texto = texto[:posicao] + aleatorio.choice(palavras) + texto[posicao:]
+        divergencias += automato.grupos(texto) != grupos_ingenuo(texto)
+
+    verificar(divergencias == 0, f"mesmos grupos da busca ingênua em 5000 textos ({len(automato)} estados)")
+    verificar(automato.grupos("quem trabalhou mais") == {'todos', 'ranking'}, "palavras sobrepostas encontradas")
+    verificar(automato.grupos("") == frozenset(), "texto vazio")
+
+
+def testar_corpus(roteador: RoteadorIntencoes):
+    print(f"\n{'='*60}")
+    print("🎯 Acurácia no corpus de perguntas")
+    print(f"{'='*60}")
+
+    acertos = 0
+    for pergunta, usuario, ferramenta, argumentos in CORPUS:
+        intencao = roteador.interpretar(pergunta, usuario)
+        if intencao["ferramenta"] == ferramenta and intencao["argumentos"] == argumentos:
+            acertos += 1
+        else:
+            print(f"   ❌ {pergunta!r} ({usuario}): {intencao['ferramenta']} {intencao['argumentos']}")
+
+    verificar(acertos == len(CORPUS), f"{acertos}/{len(CORPUS)} perguntas roteadas corretamente")
+
+
+def testar_intencao(roteador: RoteadorIntencoes):
+    print(f"\n{'='*60}")
+    print("🧩 Intenção estruturada")
+    print(f"{'='*60}")
+
+    intencao = roteador.interpretar("horas do contrato E0440404 de 01/09 até 15/09/25", "Ana Paula")
+    verificar((intencao["data_inicio"], intencao["data_fim"]) == ("01/09/2025", "15/09/2025"), "período com ano completado")
+    verificar(intencao["contrato"] == "E0440404", "contrato extraído")
+    verificar(intencao["usuario"] == "Ana Paula", "usuário preservado")
+
+    intencao = roteador.interpretar("total de horas", "Test User")
+    verificar(intencao["usuario"] is None and intencao["ferramenta"] == "total_horas_geral", "usuário do emulator tratado como anônimo")
+
+    intencao = roteador.interpretar("contratos de 01/09/2025 a 30/09/2025")
+    verificar(intencao["contrato"] is None, "data após 'contratos' não vira contrato")
+
+    intencao = roteador.interpretar("o que apontei hoje?")
+    verificar(intencao["ferramenta"] is None and "identifique-se" in intencao["resposta"]["resposta"], "resposta pronta sem ferramenta")
+
+
+def testar_desempenho(roteador: RoteadorIntencoes):
+    print(f"\n{'='*60}")
+    print("⏱️ Micro-benchmark")
+    print(f"{'='*60}")
+
+    perguntas = [(pergunta, usuario) for pergunta, usuario, _, _ in CORPUS]
+    textos = [pergunta.lower() for pergunta, _ in perguntas]
+    repeticoes = 200
+
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for pergunta, usuario in perguntas:
+            roteador.interpretar(pergunta, usuario)
+    por_pergunta = (time.perf_counter() - inicio) / (repeticoes * len(perguntas)) * 1e6
+
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for texto in textos:
+            roteador.automato.grupos(texto)
+    automato = (time.perf_counter() - inicio) / (repeticoes * len(textos)) * 1e6
+
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        for texto in textos:
+            grupos_ingenuo(texto)
+    ingenuo = (time.perf_counter() - inicio) / (repeticoes * len(textos)) * 1e6
+
+    inicio = time.perf_counter()
+    RoteadorIntencoes()
+    construcao = (time.perf_counter() - inicio) * 1e3
+
+    print(f"   📊 interpretar(): {por_pergunta:.1f}µs por pergunta")
+    print(f"   📊 palavras-chave: autômato {automato:.1f}µs x busca ingênua {ingenuo:.1f}µs por pergunta")
+    print(f"   📊 construção do roteador: {construcao:.2f}ms")
+    verificar(por_pergunta < 1000, "roteamento abaixo de 1ms por pergunta")
+
+
+if __name__ == "__main__":
+    roteador = RoteadorIntencoes()
+    testar_automato()
+    testar_corpus(roteador)
+    testar_intencao(roteador)
+    testar_desempenho(roteador)
+
+    print("\n✅ Roteador de intenções funcionando!\n")
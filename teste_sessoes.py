@@ -0,0 +1,225 @@
+"""
+🧪 TESTE DOS BACKENDS DE SESSÃO
+Valida memória, SQLite (compartilhado entre processos) e Redis
+(fakeredis se instalado, senão um substituto local em memória)
+"""
+
+import fnmatch
+import multiprocessing
+import os
+import tempfile
+import time
+
+from bot.session_manager import SessionManager
+from bot.session_store import MemorySessionStore, SQLiteSessionStore, RedisSessionStore, selecionar_historico
+
+
+class RedisLocal:
+    """Substituto mínimo do redis.Redis (só os comandos usados pelo RedisSessionStore)"""
+
+    def __init__(self):
+        self.dados = {}
+        self.expira = {}
+
+    def _vivo(self, chave):
+        if chave in self.expira and self.expira[chave] <= time.time():
+            self.dados.pop(chave, None)
+            self.expira.pop(chave, None)
+        return self.dados.get(chave)
+
+    def pipeline(self):
+        return PipelineLocal(self)
+
+    def hsetnx(self, chave, campo, valor):
+        hash_ = self.dados.setdefault(chave, {}) if self._vivo(chave) is None else self.dados[chave]
+        return int(hash_.setdefault(campo, str(valor)) == str(valor))
+
+    def hset(self, chave, campo, valor):
+        self._vivo(chave)
+        self.dados.setdefault(chave, {})[campo] = str(valor)
+
+    def hgetall(self, chave):
+        return dict(self._vivo(chave) or {})
+
+    def hincrby(self, chave, campo, valor):
+        self._vivo(chave)
+        hash_ = self.dados.setdefault(chave, {})
+        hash_[campo] = str(int(hash_.get(campo, 0)) + valor)
+        return int(hash_[campo])
+
+    def expire(self, chave, segundos):
+        if self._vivo(chave) is not None:
+            self.expira[chave] = time.time() + segundos
+
+    def rpush(self, chave, *valores):
+        self._vivo(chave)
+        self.dados.setdefault(chave, []).extend(valores)
+
+    def ltrim(self, chave, inicio, fim):
+        lista = self._vivo(chave) or []
+        self.dados[chave] = lista[inicio:None if fim == -1 else fim + 1]
+
+    def lrange(self, chave, inicio, fim):
+        lista = self._vivo(chave) or []
+        return lista[inicio:None if fim == -1 else fim + 1]
+
+    def delete(self, *chaves):
+        return sum(1 for c in chaves if self._vivo(c) is not None and self.dados.pop(c, None) is not None)
+
+    def scan_iter(self, match="*", count=None):
+        return [c for c in list(self.dados) if self._vivo(c) is not None and fnmatch.fnmatch(c, match)]
+
+
+class PipelineLocal:
+    """Pipeline do substituto: enfileira comandos e executa em ordem"""
+
+    def __init__(self, cliente):
+        self.cliente = cliente
+        self.comandos = []
+
+    def __getattr__(self, nome):
+        def enfileirar(*args, **kwargs):
+            self.comandos.append((nome, args, kwargs))
+            return self
+        return enfileirar
+
+    def execute(self):
+        return [getattr(self.cliente, nome)(*args, **kwargs) for nome, args, kwargs in self.comandos]
+
+
+def cliente_redis_teste():
+    """fakeredis quando disponível; senão o substituto local"""
+    try:
+        import fakeredis
+        return fakeredis.FakeRedis()
+    except ImportError:
+        return RedisLocal()
+
+
+def verificar(condicao: bool, descricao: str):
+    print(f"   {'✅' if condicao else '❌'} {descricao}")
+    if not condicao:
+        raise AssertionError(descricao)
+
+
+def testar_backend(nome: str, criar_store):
+    print(f"\n{'='*60}")
+    print(f"🗄️ Backend: {nome}")
+    print(f"{'='*60}")
+
+    manager = SessionManager(timeout_minutes=30, store=criar_store(1800))
+
+    manager.add_messages_to_session("conv-a", [
+        {"role": "user", "content": "quantas horas?"},
+        {"role": "assistant", "content": "Você fez 8h"}
+    ])
+    manager.add_message_to_session("conv-b", "user", "ranking")
+
+    historico = manager.get_session_history("conv-a")
+    verificar([m['content'] for m in historico] == ["quantas horas?", "Você fez 8h"], "histórico em ordem")
+    verificar(len(manager.get_session_history("conv-b")) == 1, "sessões isoladas")
+
+    for i in range(30):
+        manager.add_message_to_session("conv-a", "user", f"msg {i}")
+    historico = manager.get_session_history("conv-a")
+    verificar(len(historico) == 20 and historico[-1]['content'] == "msg 29", "histórico limitado às 20 últimas")
+    verificar(manager.get_session_stats("conv-a")['messages'] == 32, "contador de mensagens")
+
+    manager.add_message_to_session("conv-a", "assistant", "📋 Contrato\n" * 2000)
+    ultima = manager.get_session_history("conv-a")[-1]
+    verificar(ultima['content'].endswith("[…]") and ultima['tokens'] <= 410, "resposta longa compactada no histórico")
+
+    manager.update_session_context("conv-a", "ultimo_periodo", {"inicio": "01/09/2025"})
+    verificar(manager.get_session_context("conv-a")["ultimo_periodo"]["inicio"] == "01/09/2025", "contexto persistido")
+
+    verificar(manager.get_active_sessions_count() == 2, "contagem de sessões ativas")
+    verificar(len(manager.get_all_sessions_info()) == 2, "listagem de sessões")
+
+    manager.clear_session("conv-b")
+    verificar(manager.get_session_stats("conv-b") is None, "sessão removida")
+
+    # TTL curto: sessão expira sem atividade
+    curto = SessionManager(store=criar_store(1))
+    curto.add_message_to_session("conv-ttl", "user", "oi")
+    time.sleep(2.1)
+    curto.store.limpar_expirados()
+    verificar(curto.get_session_stats("conv-ttl") is None, "sessão expirada por TTL")
+
+
+def testar_limite(nome: str, store):
+    print(f"\n{'='*60}")
+    print(f"📏 Limite de sessões (LRU): {nome}")
+    print(f"{'='*60}")
+
+    manager = SessionManager(store=store)
+    for i in range(3):
+        manager.add_message_to_session(f"conv-{i}", "user", "oi")
+        time.sleep(0.01)
+    manager.get_session_history("conv-0")  # conv-0 volta a ser a mais ativa
+    for i in (3, 4):
+        time.sleep(0.01)
+        manager.add_message_to_session(f"conv-{i}", "user", "oi")
+    store.limpar_expirados()
+
+    ativas = {s['conversation_id'] for s in store.listar()}
+    verificar(len(ativas) == 3, "no máximo 3 sessões")
+    verificar(ativas == {"conv-0", "conv-3", "conv-4"}, "descarta as menos ativas")
+    verificar(len(manager.get_session_history("conv-0")) == 1, "sessão mais ativa preservada")
+
+
+def testar_orcamento_tokens(nome: str, store):
+    print(f"\n{'='*60}")
+    print(f"🪙 Orçamento de tokens do histórico: {nome}")
+    print(f"{'='*60}")
+
+    store.orcamento_tokens = 300
+    manager = SessionManager(store=store)
+    for i in range(10):
+        manager.add_message_to_session("conv-tokens", "assistant", f"{i} " + "x" * 396)  # ~100 tokens
+
+    historico = manager.get_session_history("conv-tokens")
+    verificar(sum(m['tokens'] for m in historico) <= 300, "histórico dentro do orçamento")
+    verificar(historico[-1]['content'].startswith("9 "), "mensagens mais recentes preservadas")
+
+    selecionadas = selecionar_historico(historico, 150)
+    verificar(len(selecionadas) == 1 and selecionadas[0]['content'].startswith("9 "), "prompt recebe só o que cabe no orçamento")
+
+
+def _worker_sqlite(caminho: str, worker: int):
+    """Simula um worker do gunicorn escrevendo na mesma conversa"""
+    manager = SessionManager(store=SQLiteSessionStore(caminho))
+    manager.add_messages_to_session("conv-compartilhada", [
+        {"role": "user", "content": f"pergunta do worker {worker}"},
+        {"role": "assistant", "content": f"resposta do worker {worker}"}
+    ])
+
+
+def testar_entre_processos(caminho: str):
+    print(f"\n{'='*60}")
+    print("👥 SQLite compartilhado entre processos")
+    print(f"{'='*60}")
+
+    processos = [multiprocessing.Process(target=_worker_sqlite, args=(caminho, i)) for i in range(4)]
+    for processo in processos:
+        processo.start()
+    for processo in processos:
+        processo.join()
+
+    manager = SessionManager(store=SQLiteSessionStore(caminho))
+    historico = manager.get_session_history("conv-compartilhada")
+    verificar(len(historico) == 8, "mensagens dos 4 workers visíveis em outro processo")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as pasta:
+        testar_backend("memória", lambda ttl: MemorySessionStore(ttl_segundos=ttl))
+        testar_backend("sqlite", lambda ttl: SQLiteSessionStore(os.path.join(pasta, f"sessoes_{ttl}.db"), ttl_segundos=ttl))
+        testar_backend("redis (local)", lambda ttl: RedisSessionStore(cliente_redis_teste(), ttl_segundos=ttl))
+        testar_orcamento_tokens("memória", MemorySessionStore())
+        testar_orcamento_tokens("sqlite", SQLiteSessionStore(os.path.join(pasta, "tokens.db")))
+        testar_orcamento_tokens("redis (local)", RedisSessionStore(cliente_redis_teste()))
+        testar_limite("memória", MemorySessionStore(max_sessoes=3))
+        testar_limite("sqlite", SQLiteSessionStore(os.path.join(pasta, "limite.db"), max_sessoes=3))
+        testar_entre_processos(os.path.join(pasta, "compartilhado.db"))
+
+    print("\n✅ Todos os backends de sessão funcionando!\n")
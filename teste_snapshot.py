@@ -0,0 +1,110 @@
+"""
+🧪 TESTE DO SNAPSHOT PARQUET
+CSV → snapshot → leitura devolve o mesmo DataFrame tipado; o agente carregado
+do snapshot responde igual ao carregado do CSV; fontes remotas vêm antes do
+snapshot local
+"""
+
+import os
+import tempfile
+import warnings
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from carga_dados import (
+    ler_csv,
+    ler_snapshot,
+    ordenar_por_data,
+    otimizar_tipos,
+    preparar_dataframe,
+    publicar_snapshot,
+)
+from dados_teste import (
+    criar_agente,
+    gerar_apontamentos,
+    gravar_csv,
+    responder_consultas,
+    servidor_http,
+    titulo,
+    verificar,
+)
+
+
+def testar_ida_e_volta(pasta: Path):
+    titulo("💾 Snapshot ida e volta")
+
+    csv = gravar_csv(gerar_apontamentos(), pasta / "dados_anonimizados_decupado_ida.csv")
+    snapshot = publicar_snapshot(csv)
+    verificar(snapshot == csv.with_suffix(".parquet") and snapshot.exists(), "snapshot publicado ao lado do CSV")
+    verificar(not list(pasta.glob("*.tmp")), "nenhum temporário deixado na pasta")
+
+    # Em disco duracao_horas é float32; a leitura devolve float64 com esses valores
+    esperado = otimizar_tipos(ordenar_por_data(preparar_dataframe(ler_csv(csv))))
+    esperado["duracao_horas"] = esperado["duracao_horas"].astype("float64")
+    lido = ler_snapshot(snapshot)
+    pd.testing.assert_frame_equal(lido, esperado)
+    verificar(True, "snapshot lido é igual ao CSV preparado, ordenado e tipado")
+
+    pd.testing.assert_frame_equal(ler_snapshot(snapshot.read_bytes()), lido)
+    verificar(True, "leitura a partir de bytes igual à leitura do arquivo")
+
+    verificar(str(lido["data"].dtype) == "datetime64[ns]", "data já vem como datetime64")
+    verificar(str(pq.read_schema(snapshot).field("duracao_horas").type) == "float", "duracao_horas gravada em float32")
+    verificar(all(isinstance(lido[c].dtype, pd.CategoricalDtype) for c in ("s_nm_recurso", "s_nr_contrato", "s_ds_atividade")),
+              "recurso, contrato e atividade como categóricas")
+    verificar(lido["data"].dropna().is_monotonic_increasing, "linhas ordenadas por data")
+
+
+def testar_agente_snapshot_csv(pasta: Path):
+    titulo("🤖 Agente: snapshot × CSV")
+
+    agente_snapshot = criar_agente(pasta / "snapshot")
+    csv = pasta / "snapshot" / "dados_anonimizados_decupado_teste.csv"
+
+    with servidor_http(csv.parent) as url:
+        os.environ.update({
+            "SNAPSHOT_PATH": str(pasta / "nao_existe.parquet"),
+            "CSV_URL": f"{url}/{csv.name}",
+        })
+        from agente_apontamentos import AgenteApontamentos
+        agente_csv = AgenteApontamentos()
+
+    verificar(len(agente_csv.df) == len(agente_snapshot.df), "mesma quantidade de registros")
+    respostas_snapshot = responder_consultas(agente_snapshot)
+    respostas_csv = responder_consultas(agente_csv)
+    diferentes = [consulta for consulta in respostas_snapshot if respostas_snapshot[consulta] != respostas_csv[consulta]]
+    verificar(not diferentes, f"{len(respostas_snapshot)} consultas com respostas idênticas" + (f": {diferentes}" if diferentes else ""))
+
+
+def testar_ordem_das_fontes(pasta: Path):
+    titulo("📡 Ordem das fontes")
+
+    # Snapshot local antigo e CSV remoto mais novo (com mais linhas)
+    antigo = gravar_csv(gerar_apontamentos(linhas=1000), pasta / "dados_anonimizados_decupado_antigo.csv")
+    snapshot_local = publicar_snapshot(antigo)
+    remoto = pasta / "remoto"
+    remoto.mkdir()
+    gravar_csv(gerar_apontamentos(linhas=3000, semente=7), remoto / "dados.csv")
+
+    from agente_apontamentos import AgenteApontamentos
+    with servidor_http(remoto) as url:
+        os.environ.update({"SNAPSHOT_PATH": str(snapshot_local), "CSV_URL": f"{url}/dados.csv"})
+        agente = AgenteApontamentos()
+    verificar(len(agente.df) > 1000, "CSV remoto tem prioridade sobre o snapshot local")
+
+    os.environ["CSV_URL"] = ""
+    agente = AgenteApontamentos()
+    verificar(len(agente.df) == len(ler_snapshot(snapshot_local)), "sem fonte remota, o snapshot local é usado")
+
+
+if __name__ == "__main__":
+    warnings.simplefilter("ignore", UserWarning)
+    with tempfile.TemporaryDirectory() as pasta:
+        pasta = Path(pasta)
+        testar_ida_e_volta(pasta)
+        testar_agente_snapshot_csv(pasta)
+        testar_ordem_das_fontes(pasta)
+
+    print("\n✅ Snapshot Parquet funcionando!\n")
@@ -4,6 +4,7 @@ Script para fazer upload do CSV para Azure Blob Storage
 import os
 from azure.storage.blob import BlobServiceClient
 from pathlib import Path
+from carga_dados import publicar_snapshot
 
 def upload_csv_to_azure():
     """Faz upload do CSV para Azure Blob Storage"""
@@ -61,6 +62,17 @@ def upload_csv_to_azure():
         print(f"   Blob: {blob_name}")
         print(f"   URL: {blob_client.url}")
         
+        # Publicar snapshot Parquet tipado (carregado pelo bot antes do CSV)
+        print("\n⚡ Gerando snapshot Parquet...")
+        snapshot_file = publicar_snapshot(csv_file)
+        
+        if snapshot_file:
+            snapshot_client = container_client.get_blob_client(snapshot_file.name)
+            print(f"⬆️ Fazendo upload de '{snapshot_file.name}'...")
+            with open(snapshot_file, "rb") as data:
+                snapshot_client.upload_blob(data, overwrite=True)
+            print(f"✅ Snapshot disponível: {snapshot_client.url}")
+        
         return True
         
     except Exception as e: